@@ -5,6 +5,51 @@ from infrastructure.storage_stack import StorageStack
 from infrastructure.compute_stack import ComputeStack
 from infrastructure.auth_stack import AuthStack
 from infrastructure.workspace_stack import WorkspaceStack
+from infrastructure.snapshot_stack import SnapshotStack
+from infrastructure.cache_stack import CacheStack
+from infrastructure.knowledge_stack import KnowledgeStack
+from infrastructure.budgets import ResourceBudget
+
+# Stack key -> (stack name, stacks whose constructs it takes, stacks whose
+# SSM parameters it reads). Only construct dependencies are synthesized
+# alongside a selected stack; parameter dependencies just order deploys.
+STACKS = {
+    "network": ("WestTekNetwork", [], []),
+    "storage": ("WestTekStorage", ["network"], []),
+    "cache": ("WestTekCache", ["network"], []),
+    "auth": ("WestTekAuth", [], []),
+    "compute": ("WestTekCompute", ["network"], ["storage", "cache"]),
+    "snapshot": ("WestTekSnapshot", ["network"], ["storage", "compute"]),
+    "workspace": ("WestTekWorkspace", ["network"], []),
+    "knowledge": ("WestTekKnowledge", [], ["storage"]),
+}
+
+
+def selected_stacks(app: cdk.App) -> set:
+    """
+    Stacks to synthesize: the "stacks" context key (comma-separated keys,
+    e.g. -c stacks=compute,snapshot) plus their construct dependencies.
+    All stacks when unset.
+    """
+    requested = app.node.try_get_context("stacks")
+    if not requested:
+        return set(STACKS)
+    if isinstance(requested, str):
+        requested = [key.strip() for key in requested.split(",") if key.strip()]
+
+    unknown = set(requested) - set(STACKS)
+    if unknown:
+        raise ValueError(f"Unknown stacks {sorted(unknown)}; choose from {list(STACKS)}")
+
+    selected = set()
+    pending = list(requested)
+    while pending:
+        key = pending.pop()
+        if key not in selected:
+            selected.add(key)
+            pending.extend(STACKS[key][1])
+    return selected
+
 
 app = cdk.App()
 
@@ -13,36 +58,72 @@ env = cdk.Environment(
     region=app.node.try_get_context("region") or "us-east-1"
 )
 
+selected = selected_stacks(app)
+stacks = {}
+
 # Network foundation
-network_stack = NetworkStack(app, "WestTekNetwork", env=env)
+if "network" in selected:
+    network_stack = stacks["network"] = NetworkStack(app, "WestTekNetwork", env=env)
 
 # Storage layer
-storage_stack = StorageStack(
-    app, "WestTekStorage",
-    vpc=network_stack.vpc,
-    efs_security_group=network_stack.efs_security_group,
-    env=env
-)
+if "storage" in selected:
+    stacks["storage"] = StorageStack(
+        app, "WestTekStorage",
+        vpc=network_stack.vpc,
+        efs_security_group=network_stack.efs_security_group,
+        env=env
+    )
+
+# Metadata cache
+if "cache" in selected:
+    stacks["cache"] = CacheStack(
+        app, "WestTekCache",
+        vpc=network_stack.vpc,
+        env=env
+    )
 
 # Authentication
-auth_stack = AuthStack(app, "WestTekAuth", env=env)
+if "auth" in selected:
+    stacks["auth"] = AuthStack(app, "WestTekAuth", env=env)
 
 # Compute layer
-compute_stack = ComputeStack(
-    app, "WestTekCompute",
-    vpc=network_stack.vpc,
-    efs_file_system=storage_stack.efs_file_system,
-    jupyter_ecr_repo=storage_stack.jupyter_ecr_repo,
-    api_ecr_repo=storage_stack.api_ecr_repo,
-    user_pool=auth_stack.user_pool,
-    env=env
-)
+if "compute" in selected:
+    stacks["compute"] = ComputeStack(
+        app, "WestTekCompute",
+        vpc=network_stack.vpc,
+        efs_security_group=network_stack.efs_security_group,
+        env=env
+    )
+
+# Environment snapshots
+if "snapshot" in selected:
+    stacks["snapshot"] = SnapshotStack(
+        app, "WestTekSnapshot",
+        vpc=network_stack.vpc,
+        ecs_security_group=network_stack.ecs_security_group,
+        efs_security_group=network_stack.efs_security_group,
+        env=env
+    )
 
 # Workspace access layer
-workspace_stack = WorkspaceStack(
-    app, "WestTekWorkspace",
-    vpc=network_stack.vpc,
-    env=env
-)
+if "workspace" in selected:
+    stacks["workspace"] = WorkspaceStack(
+        app, "WestTekWorkspace",
+        vpc=network_stack.vpc,
+        env=env
+    )
+
+# Knowledge Base ingestion of snapshots
+if "knowledge" in selected:
+    stacks["knowledge"] = KnowledgeStack(app, "WestTekKnowledge", env=env)
+
+# Parameter producers deploy first when both are in this app
+for key, stack in stacks.items():
+    for producer in STACKS[key][2]:
+        if producer in stacks:
+            stack.add_dependency(stacks[producer])
+
+# Resource budget and performance invariants; violations fail synth
+cdk.Aspects.of(app).add(ResourceBudget(app))
 
 app.synth()
@@ -0,0 +1 @@
+# West Tek Environment Manager API
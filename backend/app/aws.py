@@ -0,0 +1,156 @@
+"""
+Pooled AWS clients for the API.
+
+A launch or snapshot request fans out to ECS, DynamoDB, S3 and Bedrock,
+and boto3's defaults (10 pooled connections per client, legacy retries, a
+new client per module) make concurrent requests queue for connections and
+retry throttles in lockstep. Here every service gets one client per
+process, shared by all callers (botocore clients are thread-safe), with:
+
+- a connection pool sized for the API's concurrency (AWS_MAX_POOL_CONNECTIONS)
+- adaptive retries, which rate-limit the client itself once AWS throttles
+- short connect and read timeouts, so a stuck connection fails fast
+
+AsyncAwsClients exposes the same clients to asyncio code in the style of
+aioboto3 (``await clients.client("dynamodb").get_item(...)``). Calls run on
+a thread pool no larger than the connection pool, and identical concurrent
+reads (same operation, same arguments) share a single request.
+
+stub() swaps in a client of your own for a service, e.g. so a benchmark can
+run the real WarmPool against a local stand-in that lacks some operations.
+"""
+import asyncio
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+DEFAULT_MAX_POOL_CONNECTIONS = 64
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_CONNECT_TIMEOUT = 2
+DEFAULT_READ_TIMEOUT = 10
+
+# Operations without side effects, safe to share between concurrent callers
+READ_OPERATION_PREFIXES = ("get_", "describe_", "list_", "head_", "batch_get_", "query", "scan")
+
+# Clients served instead of boto3's, by service name (see stub())
+_STUBS: Dict[str, Any] = {}
+
+
+def client_config() -> Config:
+    return Config(
+        max_pool_connections=int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", DEFAULT_MAX_POOL_CONNECTIONS)),
+        retries={
+            "mode": "adaptive",
+            "max_attempts": int(os.environ.get("AWS_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+        },
+        connect_timeout=float(os.environ.get("AWS_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+        read_timeout=float(os.environ.get("AWS_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+        tcp_keepalive=True,
+    )
+
+
+def client(service: str, endpoint_url: Optional[str] = None):
+    """The process-wide client for a service."""
+    if service in _STUBS:
+        return _STUBS[service]
+    return _pooled_client(service, endpoint_url)
+
+
+@functools.lru_cache(maxsize=None)
+def _pooled_client(service: str, endpoint_url: Optional[str] = None):
+    return boto3.session.Session().client(service, config=client_config(), endpoint_url=endpoint_url)
+
+
+def stub(service: str, stubbed_client: Any) -> None:
+    """
+    Serve stubbed_client from client() (and AsyncAwsClients) for a service.
+    Objects keep the clients they were constructed with, so stub first.
+    Resources are not affected.
+    """
+    _STUBS[service] = stubbed_client
+
+
+def resource(service: str, endpoint_url: Optional[str] = None):
+    """
+    A resource with the tuned client config. Resources are not thread-safe,
+    so each caller gets its own; create one per object, not per call.
+    """
+    return boto3.session.Session().resource(service, config=client_config(), endpoint_url=endpoint_url)
+
+
+def is_read(operation: str) -> bool:
+    return operation.startswith(READ_OPERATION_PREFIXES)
+
+
+class AsyncAwsClients:
+    """asyncio front end for the pooled clients, with read coalescing."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        coalesce_reads: Optional[bool] = None,
+        endpoint_url: Optional[str] = None,
+    ) -> None:
+        # More threads than pooled connections would only queue on the pool
+        self.max_workers = max_workers or int(
+            os.environ.get("AWS_MAX_POOL_CONNECTIONS", DEFAULT_MAX_POOL_CONNECTIONS)
+        )
+        self.coalesce_reads = (
+            coalesce_reads if coalesce_reads is not None
+            else os.environ.get("AWS_COALESCE_READS", "true").lower() == "true"
+        )
+        self.endpoint_url = endpoint_url
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="aws")
+        self._in_flight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self.coalesced = 0
+
+    def client(self, service: str) -> "AsyncClient":
+        return AsyncClient(self, service)
+
+    async def call(self, service: str, operation: str, **kwargs) -> Any:
+        if not (self.coalesce_reads and is_read(operation)):
+            return await self._run(service, operation, kwargs)
+
+        key = (service, operation, json.dumps(kwargs, sort_keys=True, default=repr))
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            # shield: one caller's cancellation must not cancel the shared call
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.ensure_future(self._run(service, operation, kwargs))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _run(self, service: str, operation: str, kwargs: dict) -> Any:
+        method = getattr(client(service, self.endpoint_url), operation)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(method, **kwargs))
+
+    async def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncAwsClients":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+class AsyncClient:
+    """``await client.<operation>(**kwargs)`` for one service."""
+
+    def __init__(self, clients: AsyncAwsClients, service: str) -> None:
+        self._clients = clients
+        self._service = service
+
+    def __getattr__(self, operation: str):
+        async def call(**kwargs):
+            return await self._clients.call(self._service, operation, **kwargs)
+        return call
@@ -0,0 +1,155 @@
+"""
+Read-through cache for environment metadata.
+
+Dashboard reads go to Valkey first and fall back to EnvironmentMetadataTable
+on a miss; every write through MetadataRepository deletes the cached entry
+after the table write succeeds, so the next read repopulates it. Writers
+outside the API (the snapshot engine, Step Functions, the spot, reaper and
+restore Lambdas) are covered by the table's stream: the cache invalidator
+Lambda (services/cache_invalidator) evicts the same way. TTLs are jittered
+so entries written together do not all expire together.
+
+Eviction also bumps a per-key generation, and a miss only caches what it
+loaded if the generation is unchanged (checked atomically in a script). A
+read that loaded the old item before a write therefore cannot put it back
+after the write's eviction.
+
+Any Redis-protocol client works, so tests and local runs can point
+CACHE_HOST at a local redis/valkey container.
+"""
+import json
+import os
+import random
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+from . import aws
+from .metrics import timed
+
+DEFAULT_TTL_SECONDS = 300
+# Misses are cached briefly so unknown ids do not hammer the table
+NEGATIVE_TTL_SECONDS = 30
+TTL_JITTER = 0.1
+# Outlives any table read; an expired generation only skips one cache fill
+GENERATION_TTL_SECONDS = 3600
+
+_MISSING = "__missing__"
+
+# KEYS: entry, generation. ARGV: generation seen before loading, value, TTL
+SET_IF_CURRENT = """
+if (redis.call('GET', KEYS[2]) or '') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+"""
+
+# KEYS: entry, generation. ARGV: generation TTL
+EVICT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+redis.call('DEL', KEYS[1])
+"""
+
+
+def _json_default(value):
+    # DynamoDB numbers come back as Decimal
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def redis_from_env():
+    import redis
+
+    return redis.Redis(
+        host=os.environ.get("CACHE_HOST", "localhost"),
+        port=int(os.environ.get("CACHE_PORT", "6379")),
+        ssl=os.environ.get("CACHE_TLS", "false").lower() == "true",
+        socket_timeout=0.25,
+        socket_connect_timeout=0.5,
+        health_check_interval=30
+    )
+
+
+class ReadThroughCache:
+    def __init__(self, client, namespace: str, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+        self.client = client
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _generation_key(self, key: str) -> str:
+        return f"{self.namespace}:generation:{key}"
+
+    def _ttl(self, ttl: int) -> int:
+        return max(1, int(ttl * random.uniform(1 - TTL_JITTER, 1 + TTL_JITTER)))
+
+    def get(self, key: str, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """Return the cached value, or load, cache and return it."""
+        try:
+            cached, generation = self.client.mget(self._key(key), self._generation_key(key))
+        except Exception:
+            # A cache outage must not take the dashboard down with it
+            return loader()
+
+        if cached is not None:
+            value = json.loads(cached)
+            return None if value == _MISSING else value
+
+        value = loader()
+        ttl = self.ttl_seconds if value is not None else NEGATIVE_TTL_SECONDS
+        try:
+            self.client.eval(
+                SET_IF_CURRENT, 2, self._key(key), self._generation_key(key),
+                generation or "",
+                json.dumps(_MISSING if value is None else value, default=_json_default),
+                self._ttl(ttl)
+            )
+        except Exception:
+            pass
+        return value
+
+    def evict(self, key: str) -> None:
+        """Drop the entry and bump its generation. Raises if the cache is unreachable."""
+        self.client.eval(EVICT, 2, self._key(key), self._generation_key(key), GENERATION_TTL_SECONDS)
+
+    def invalidate(self, key: str) -> None:
+        try:
+            self.evict(key)
+        except Exception:
+            # Entry expires on its own; the TTL bounds staleness
+            pass
+
+
+class MetadataRepository:
+    """EnvironmentMetadataTable access with read-through caching."""
+
+    def __init__(self, table=None, cache: Optional[ReadThroughCache] = None) -> None:
+        self.table = table or aws.resource("dynamodb").Table(os.environ["METADATA_TABLE"])
+        self.cache = cache or ReadThroughCache(redis_from_env(), namespace="environment")
+
+    @timed("metadata.get")
+    def get_environment(self, environment_id: str) -> Optional[dict]:
+        return self.cache.get(
+            environment_id,
+            lambda: self.table.get_item(Key={"environment_id": environment_id}).get("Item")
+        )
+
+    def put_environment(self, item: dict) -> None:
+        self.table.put_item(Item=item)
+        self.cache.invalidate(item["environment_id"])
+
+    def update_environment(self, environment_id: str, **update_kwargs) -> dict:
+        """Pass-through to UpdateItem (UpdateExpression etc.) that invalidates the entry."""
+        response = self.table.update_item(
+            Key={"environment_id": environment_id},
+            ReturnValues="ALL_NEW",
+            **update_kwargs
+        )
+        self.cache.invalidate(environment_id)
+        return response["Attributes"]
+
+    def delete_environment(self, environment_id: str) -> None:
+        self.table.delete_item(Key={"environment_id": environment_id})
+        self.cache.invalidate(environment_id)
@@ -0,0 +1,46 @@
+"""
+Hot-path timings as CloudWatch Embedded Metric Format (EMF) log lines.
+
+Each record is one JSON line on stdout; the awslogs driver ships it and
+CloudWatch extracts the metric, so timing a call costs a json.dumps and a
+write, with no API call on the request path. Metrics land in
+EMF_NAMESPACE as "Latency" (milliseconds) with an "Operation" dimension.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+NAMESPACE = os.environ.get("EMF_NAMESPACE", "WestTek/API")
+
+
+def emit(metric: str, value: float, unit: str = "Milliseconds", **dimensions) -> None:
+    """Write a single EMF record."""
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [sorted(dimensions)],
+                "Metrics": [{"Name": metric, "Unit": unit}],
+            }],
+        },
+        metric: value,
+        **dimensions,
+    }
+    sys.stdout.write(json.dumps(record) + "\n")
+    sys.stdout.flush()
+
+
+@contextmanager
+def timed(operation: str):
+    """
+    Emit the wall-clock time of the block as Latency{Operation=operation}.
+    Also works as a decorator.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit("Latency", round((time.perf_counter() - start) * 1000, 3), Operation=operation)
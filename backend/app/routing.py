@@ -0,0 +1,175 @@
+"""
+Per-task Jupyter routes on the API load balancer.
+
+Every Jupyter task serves under /user/<task_id>/ (its base_url is derived
+from the task metadata at start-up), so a launch only has to create a
+target group holding the task's IP and a listener rule for
+/user/<task_id>/*. Stopping the task deletes both (backend/app/sessions.py).
+Target groups are named <prefix><task_id> truncated to the 32-character
+limit and tagged with their rule's ARN, so neither step lists the
+listener's rules: a rule's priority is picked from a hash of the task ID
+and probed forward on a clash.
+
+An ALB holds at most 100 listener rules and 100 target groups by default
+(Service Quotas: "Rules per Application Load Balancer", "Target groups per
+Application Load Balancer"), which caps concurrently routed tasks at about
+100; past that, register raises RouteLimitExceeded.
+"""
+import hashlib
+import os
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+from . import aws
+from .metrics import timed
+
+JUPYTER_PORT = 8888
+
+# Probes per launch; with at most ~100 rules in a range of thousands of
+# priorities, a clash on every probe means something else is wrong
+MAX_PRIORITY_PROBES = 8
+
+# Raised by CreateRule when the load balancer is at its quota
+QUOTA_ERRORS = ("TooManyRules", "TooManyTargetGroups", "TooManyActions")
+
+
+class RouteLimitExceeded(RuntimeError):
+    """The load balancer has no room for another per-task route."""
+
+
+def task_id(task_arn: str) -> str:
+    return task_arn.rsplit("/", 1)[-1]
+
+
+class JupyterRouter:
+    def __init__(
+        self,
+        listener_arn: Optional[str] = None,
+        vpc_id: Optional[str] = None,
+        target_group_prefix: Optional[str] = None,
+        rule_priorities: Optional[str] = None,
+    ) -> None:
+        self.listener_arn = listener_arn or os.environ["ALB_LISTENER_ARN"]
+        self.vpc_id = vpc_id or os.environ["ALB_VPC_ID"]
+        self.target_group_prefix = target_group_prefix or os.environ.get("JUPYTER_TARGET_GROUP_PREFIX", "wtj-")
+        low, high = (rule_priorities or os.environ.get("JUPYTER_RULE_PRIORITIES", "1000-49999")).split("-")
+        self.priority_range = (int(low), int(high))
+        self.elbv2 = aws.client("elbv2")
+
+    def path_prefix(self, task_arn: str) -> str:
+        return f"/user/{task_id(task_arn)}/"
+
+    def _target_group_name(self, task_arn: str) -> str:
+        return f"{self.target_group_prefix}{task_id(task_arn)}"[:32]
+
+    def _priority(self, task_arn: str, probe: int) -> int:
+        """The probe'th candidate priority for a task, spread over the range by its ID."""
+        low, high = self.priority_range
+        start = int(hashlib.md5(task_id(task_arn).encode()).hexdigest(), 16)
+        return low + (start + probe) % (high - low + 1)
+
+    @timed("routing.register")
+    def register(self, task_arn: str, private_ip: str, environment_id: str) -> str:
+        """Route /user/<task_id>/* to the task. Returns the path prefix."""
+        prefix = self.path_prefix(task_arn)
+        target_group_arn = self.elbv2.create_target_group(
+            Name=self._target_group_name(task_arn),
+            Protocol="HTTP",
+            ProtocolVersion="HTTP1",
+            Port=JUPYTER_PORT,
+            VpcId=self.vpc_id,
+            TargetType="ip",
+            # /api answers without authentication once the server is up
+            HealthCheckPath=f"{prefix}api",
+            HealthCheckIntervalSeconds=10,
+            HealthCheckTimeoutSeconds=5,
+            HealthyThresholdCount=2,
+            UnhealthyThresholdCount=3,
+            Tags=[
+                {"Key": "environment_id", "Value": environment_id},
+                {"Key": "task_arn", "Value": task_arn},
+            ],
+        )["TargetGroups"][0]["TargetGroupArn"]
+        # Nothing routes to the target group until the rule exists, so a
+        # failure from here on deletes it rather than leaking it
+        try:
+            self.elbv2.modify_target_group_attributes(
+                TargetGroupArn=target_group_arn,
+                Attributes=[
+                    {"Key": "load_balancing.algorithm.type", "Value": "least_outstanding_requests"},
+                    {"Key": "deregistration_delay.timeout_seconds", "Value": "10"},
+                ],
+            )
+            self.elbv2.register_targets(
+                TargetGroupArn=target_group_arn,
+                Targets=[{"Id": private_ip, "Port": JUPYTER_PORT}],
+            )
+            rule_arn = self._create_rule(task_arn, target_group_arn, environment_id)
+        except Exception:
+            self.elbv2.delete_target_group(TargetGroupArn=target_group_arn)
+            raise
+        self.elbv2.add_tags(
+            ResourceArns=[target_group_arn],
+            Tags=[{"Key": "rule_arn", "Value": rule_arn}],
+        )
+        return prefix
+
+    def _create_rule(self, task_arn: str, target_group_arn: str, environment_id: str) -> str:
+        prefix = self.path_prefix(task_arn)
+        for probe in range(MAX_PRIORITY_PROBES):
+            try:
+                return self.elbv2.create_rule(
+                    ListenerArn=self.listener_arn,
+                    Priority=self._priority(task_arn, probe),
+                    Conditions=[{"Field": "path-pattern", "Values": [f"{prefix}*"]}],
+                    Actions=[{"Type": "forward", "TargetGroupArn": target_group_arn}],
+                    Tags=[{"Key": "environment_id", "Value": environment_id}],
+                )["Rules"][0]["RuleArn"]
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code in QUOTA_ERRORS:
+                    raise RouteLimitExceeded(
+                        f"Load balancer is at its rule or target group quota ({code}); "
+                        f"raise it in Service Quotas or stop idle tasks"
+                    ) from e
+                if code != "PriorityInUse":
+                    raise
+        raise RuntimeError(f"Could not allocate a listener rule for {task_arn}")
+
+    def deregister(self, task_arn: str) -> None:
+        """Remove the task's listener rule and target group, if present."""
+        try:
+            target_groups = self.elbv2.describe_target_groups(
+                Names=[self._target_group_name(task_arn)]
+            )["TargetGroups"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TargetGroupNotFound":
+                raise
+            return
+
+        for target_group in target_groups:
+            target_group_arn = target_group["TargetGroupArn"]
+            descriptions = self.elbv2.describe_tags(ResourceArns=[target_group_arn])["TagDescriptions"]
+            tags = {tag["Key"]: tag["Value"] for tag in descriptions[0]["Tags"]} if descriptions else {}
+            if "rule_arn" in tags:
+                self._delete_rule(tags["rule_arn"])
+            elif target_group["LoadBalancerArns"]:
+                # Register stopped between the rule and its tag
+                self._delete_rules_for(task_arn)
+            self.elbv2.delete_target_group(TargetGroupArn=target_group_arn)
+
+    def _delete_rule(self, rule_arn: str) -> None:
+        try:
+            self.elbv2.delete_rule(RuleArn=rule_arn)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "RuleNotFound":
+                raise
+
+    def _delete_rules_for(self, task_arn: str) -> None:
+        pattern = f"{self.path_prefix(task_arn)}*"
+        for page in self.elbv2.get_paginator("describe_rules").paginate(ListenerArn=self.listener_arn):
+            for rule in page["Rules"]:
+                for condition in rule["Conditions"]:
+                    if pattern in condition.get("Values", []):
+                        self._delete_rule(rule["RuleArn"])
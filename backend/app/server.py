@@ -0,0 +1,42 @@
+"""
+HTTP entry point for the API container.
+
+GET /healthz is the ALB health check. It answers from memory without
+touching DynamoDB, the cache or ECS, so a slow dependency cannot take
+every API task out of the target group at once.
+"""
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HEALTH_PATH = "/healthz"
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == HEALTH_PATH:
+            self._respond(200, b"ok")
+        else:
+            self._respond(404, b"not found")
+
+    def _respond(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Health checks arrive every few seconds per target; keep them out of the logs
+        if not self.path.startswith(HEALTH_PATH):
+            super().log_message(format, *args)
+
+
+def main():
+    server = ThreadingHTTPServer(("0.0.0.0", int(os.environ.get("PORT", "8000"))), APIRequestHandler)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Stopping Jupyter tasks, whoever stops them.
+
+Besides the task itself, a running Jupyter session holds a warm pool claim
+when it came from the pool (task protection and one slot of the tier's
+desired count, see backend/app/warm_pool.py) and a target group and
+listener rule on the API load balancer (backend/app/routing.py). The API's
+release, the idle reaper, the spot interruption handler and the warm pool
+registrar's STOPPED events all go through JupyterSessions, so no stop path
+leaks either one. Every step is idempotent: a task released by the API and
+then reported STOPPED is cleaned up once.
+"""
+from typing import Optional
+
+from . import aws
+from .routing import JupyterRouter
+from .warm_pool import WarmPool
+
+
+class JupyterSessions:
+    def __init__(
+        self,
+        pool: Optional[WarmPool] = None,
+        router: Optional[JupyterRouter] = None,
+    ) -> None:
+        self.pool = pool or WarmPool()
+        self.router = router or JupyterRouter()
+        self.ecs = aws.client("ecs")
+
+    def release(self, task_arn: str, group: Optional[str], reason: str) -> None:
+        """
+        Stop a task and free what it holds. group is the task's ECS group
+        ("service:<name>" for warm pool tasks), from DescribeTasks or the
+        task state change event.
+        """
+        tier = self.pool.tier_for_group(group)
+        if tier is None:
+            self.ecs.stop_task(cluster=self.pool.cluster, task=task_arn, reason=reason)
+        else:
+            self.pool.release(tier, task_arn, reason)
+        self.router.deregister(task_arn)
+
+    def stopped(self, task_arn: str, group: Optional[str]) -> None:
+        """Free what a task that stopped on its own (or is stopping) still holds."""
+        tier = self.pool.tier_for_group(group)
+        if tier is not None:
+            self.pool.settle(tier, task_arn)
+        self.router.deregister(task_arn)
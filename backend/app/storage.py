@@ -0,0 +1,111 @@
+"""
+Per-researcher notebook storage on the shared EFS file system.
+
+Every researcher/environment pair gets its own EFS access point rooted at
+/researchers/<researcher_id>/<environment_id>, so a task can only see its
+own files. ECS volumes are fixed per task definition, so launching against
+a new access point registers a task definition copied from the tier's
+Jupyter family with the notebook-storage volume pointed at it. The copy
+goes in its own family, <tier family>-<access point ID>: registered on the
+tier's family it would become that family's latest revision, and anything
+resolving the family name would mount one researcher's files. Each size
+tier (small, standard, large, highmem, ...) is its own family;
+JUPYTER_TASK_DEFINITIONS maps tier names to families. After an AWS Backup
+restore, the next launch passes the restored file system and access point
+from the metadata table (restored_file_system_id / restored_access_point_id).
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+from . import aws
+
+NOTEBOOK_VOLUME = "notebook-storage"
+
+# jovyan in the jupyter/* images
+JUPYTER_UID = 1000
+JUPYTER_GID = 100
+
+# Fields describe_task_definition returns that register_task_definition rejects
+READ_ONLY_FIELDS = (
+    "taskDefinitionArn", "revision", "status", "requiresAttributes",
+    "compatibilities", "registeredAt", "registeredBy", "deregisteredAt",
+)
+
+
+class ResearcherStorage:
+    def __init__(
+        self,
+        file_system_id: Optional[str] = None,
+        task_definition: Optional[str] = None,
+    ) -> None:
+        self.file_system_id = file_system_id or os.environ["NOTEBOOK_FILE_SYSTEM_ID"]
+        self.task_definition = task_definition or os.environ["JUPYTER_TASK_DEFINITION"]
+        self.task_definitions = json.loads(os.environ.get("JUPYTER_TASK_DEFINITIONS", "{}"))
+        self.efs = aws.client("efs")
+        self.ecs = aws.client("ecs")
+
+    def ensure_access_point(self, researcher_id: str, environment_id: str) -> str:
+        """Create (or return the existing) access point for an environment."""
+        # The client token makes the create idempotent for the same pair; a
+        # SHA-256 hex digest is exactly the 64-character limit, so long IDs
+        # cannot truncate into another pair's token. A repeat create is
+        # answered with AccessPointAlreadyExists, naming the existing one.
+        try:
+            response = self.efs.create_access_point(
+                ClientToken=hashlib.sha256(f"{researcher_id}/{environment_id}".encode()).hexdigest(),
+                FileSystemId=self.file_system_id,
+                PosixUser={"Uid": JUPYTER_UID, "Gid": JUPYTER_GID},
+                RootDirectory={
+                    "Path": f"/researchers/{researcher_id}/{environment_id}",
+                    "CreationInfo": {
+                        "OwnerUid": JUPYTER_UID,
+                        "OwnerGid": JUPYTER_GID,
+                        "Permissions": "750",
+                    },
+                },
+                Tags=[
+                    {"Key": "researcher_id", "Value": researcher_id},
+                    {"Key": "environment_id", "Value": environment_id},
+                ],
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "AccessPointAlreadyExists":
+                raise
+            return e.response["AccessPointId"]
+        return response["AccessPointId"]
+
+    def task_definition_for(self, tier: Optional[str] = None) -> str:
+        """Task definition family for a size tier; the default family when tier is None."""
+        if tier is None:
+            return self.task_definition
+        if tier not in self.task_definitions:
+            raise ValueError(f"Unknown Jupyter task tier '{tier}' (known: {sorted(self.task_definitions)})")
+        return self.task_definitions[tier]
+
+    def register_task_definition(
+        self,
+        access_point_id: str,
+        tier: Optional[str] = None,
+        file_system_id: Optional[str] = None,
+    ) -> str:
+        """
+        Register a Jupyter task definition, in the access point's own family,
+        that mounts the access point, on file_system_id when given (a restored
+        file system) and on the notebook file system otherwise.
+        """
+        family = self.task_definition_for(tier)
+        definition = self.ecs.describe_task_definition(taskDefinition=family)["taskDefinition"]
+        for field in READ_ONLY_FIELDS:
+            definition.pop(field, None)
+        definition["family"] = f"{family}-{access_point_id}"
+
+        for volume in definition["volumes"]:
+            if volume["name"] == NOTEBOOK_VOLUME:
+                volume["efsVolumeConfiguration"]["authorizationConfig"]["accessPointId"] = access_point_id
+                volume["efsVolumeConfiguration"]["fileSystemId"] = file_system_id or self.file_system_id
+
+        return self.ecs.register_task_definition(**definition)["taskDefinition"]["taskDefinitionArn"]
@@ -0,0 +1,202 @@
+"""
+Claim and release pre-started Jupyter tasks from the warm pool.
+
+A claim flips one "available" item to "claimed" with a conditional write, so
+two concurrent launches can never receive the same task. The claimed task is
+protected from service scale-in and the tier's desired count is raised by
+one so ECS starts a replacement warm task. Release reverses both steps.
+
+Warm tasks start before anyone owns them, so they mount no notebook storage
+(their work directory is task storage). Only launches that need no
+researcher access point may claim one; a researcher who needs their own
+files gets a cold RunTask on their registered task definition
+(backend/app/storage.py).
+
+Claims are counted per tier in the warm pool table (the COUNTER_KEY item,
+updated with an atomic ADD), and the desired count is always set from that
+count: the tier's scalable-target minimum (its pool size, moved by scheduled
+actions) plus the claimed tasks, capped at its maximum. Every writer re-reads
+the counter after update_service and applies again if it moved, so
+concurrent claims and releases converge instead of losing updates to a
+read-modify-write race.
+"""
+import json
+import os
+import time
+from typing import Optional, Tuple
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from . import aws
+from .metrics import timed
+
+# Claimed tasks are protected for at most this long (ECS maximum is 48h)
+TASK_PROTECTION_MINUTES = 2880
+
+# Sort key of the per-tier claim counter; it has no status, so claims skip it
+COUNTER_KEY = "#claimed"
+
+# Scheduled actions move the minimum a few times a day at most
+CAPACITY_CACHE_SECONDS = 60
+MAX_APPLY_ROUNDS = 5
+
+
+class WarmPool:
+    def __init__(
+        self,
+        table_name: Optional[str] = None,
+        cluster: Optional[str] = None,
+        services: Optional[dict] = None,
+    ) -> None:
+        self.table = aws.resource("dynamodb").Table(
+            table_name or os.environ["WARM_POOL_TABLE"]
+        )
+        self.cluster = cluster or os.environ["CLUSTER_NAME"]
+        self.services = services or json.loads(os.environ.get("WARM_POOL_SERVICES", "{}"))
+        self.ecs = aws.client("ecs")
+        self.autoscaling = aws.client("application-autoscaling")
+        self._capacities = {}
+
+    def tier_for_group(self, group: Optional[str]) -> Optional[str]:
+        """The tier of a task from its ECS group ("service:<name>"), or None for other tasks."""
+        for tier, service in self.services.items():
+            if group == f"service:{service}":
+                return tier
+        return None
+
+    @timed("warm_pool.claim")
+    def claim(self, tier: str, environment_id: str, lab_id: str) -> Optional[dict]:
+        """
+        Hand a running task to an environment. Returns the claimed item, or
+        None when the pool is empty and the caller should fall back to RunTask.
+        """
+        query = {
+            "KeyConditionExpression": Key("tier").eq(tier),
+            "FilterExpression": Attr("status").eq("available"),
+        }
+        while True:
+            response = self.table.query(**query)
+            for item in response["Items"]:
+                try:
+                    claimed = self.table.update_item(
+                        Key={"tier": tier, "task_arn": item["task_arn"]},
+                        UpdateExpression="SET #s = :claimed, environment_id = :env, claimed_at = :now",
+                        ConditionExpression="#s = :available",
+                        ExpressionAttributeNames={"#s": "status"},
+                        ExpressionAttributeValues={
+                            ":claimed": "claimed",
+                            ":available": "available",
+                            ":env": environment_id,
+                            ":now": int(time.time()),
+                        },
+                        ReturnValues="ALL_NEW"
+                    )["Attributes"]
+                except ClientError as e:
+                    if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                        continue  # Lost the race for this task, try the next one
+                    raise
+
+                self.ecs.update_task_protection(
+                    cluster=self.cluster,
+                    tasks=[claimed["task_arn"]],
+                    protectionEnabled=True,
+                    expiresInMinutes=TASK_PROTECTION_MINUTES
+                )
+                # The drift-collector sidecar picks its environment up from these
+                self.ecs.tag_resource(
+                    resourceArn=claimed["task_arn"],
+                    tags=[
+                        {"key": "environment_id", "value": environment_id},
+                        {"key": "lab_id", "value": lab_id},
+                    ]
+                )
+                self._count(tier, 1)
+                self._apply_desired_count(tier)
+                return claimed
+
+            # The filter applies per page, so an empty page is not an empty pool
+            if "LastEvaluatedKey" not in response:
+                return None
+            query["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def release(self, tier: str, task_arn: str, reason: str = "Released from warm pool") -> None:
+        """Stop a claimed task and shrink the tier back to its pool size."""
+        settled = self._settle(tier, task_arn)
+        # Unprotected first: if the scheduler scales in before the stop
+        # lands, this task is a candidate like any other
+        self.ecs.update_task_protection(
+            cluster=self.cluster,
+            tasks=[task_arn],
+            protectionEnabled=False
+        )
+        # Count first, stop second: the other way round the scheduler sees
+        # the tier one task short and starts a replacement
+        if settled:
+            self._apply_desired_count(tier)
+        self.ecs.stop_task(
+            cluster=self.cluster,
+            task=task_arn,
+            reason=reason
+        )
+
+    def settle(self, tier: str, task_arn: str) -> None:
+        """Forget a task that has stopped; if it was still claimed, give its slot back."""
+        if self._settle(tier, task_arn):
+            self._apply_desired_count(tier)
+
+    def _settle(self, tier: str, task_arn: str) -> bool:
+        """Delete the task's item. True if it was claimed, i.e. this caller owns the decrement."""
+        previous = self.table.delete_item(
+            Key={"tier": tier, "task_arn": task_arn},
+            ReturnValues="ALL_OLD"
+        ).get("Attributes", {})
+        if previous.get("status") != "claimed":
+            return False
+        self._count(tier, -1)
+        return True
+
+    def _count(self, tier: str, delta: int) -> None:
+        self.table.update_item(
+            Key={"tier": tier, "task_arn": COUNTER_KEY},
+            UpdateExpression="ADD claimed :delta, version :one",
+            ExpressionAttributeValues={":delta": delta, ":one": 1}
+        )
+
+    def _claimed(self, tier: str) -> Tuple[int, int]:
+        """(claimed tasks, counter version) for a tier."""
+        item = self.table.get_item(
+            Key={"tier": tier, "task_arn": COUNTER_KEY},
+            ConsistentRead=True
+        ).get("Item", {})
+        return max(int(item.get("claimed", 0)), 0), int(item.get("version", 0))
+
+    def _capacity(self, tier: str) -> Tuple[int, int]:
+        """(minimum, maximum) of the tier's scalable target."""
+        cached = self._capacities.get(tier)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        target = self.autoscaling.describe_scalable_targets(
+            ServiceNamespace="ecs",
+            ResourceIds=[f"service/{self.cluster}/{self.services[tier]}"],
+            ScalableDimension="ecs:service:DesiredCount"
+        )["ScalableTargets"][0]
+        capacity = (target["MinCapacity"], target["MaxCapacity"])
+        self._capacities[tier] = (time.monotonic() + CAPACITY_CACHE_SECONDS, capacity)
+        return capacity
+
+    def _apply_desired_count(self, tier: str) -> None:
+        claimed, version = self._claimed(tier)
+        for _ in range(MAX_APPLY_ROUNDS):
+            minimum, maximum = self._capacity(tier)
+            self.ecs.update_service(
+                cluster=self.cluster,
+                service=self.services[tier],
+                desiredCount=min(minimum + claimed, maximum)
+            )
+            # Another writer moved the counter while we applied; whoever
+            # applies last sees the final version and stops
+            claimed, latest = self._claimed(tier)
+            if latest == version:
+                return
+            version = latest
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of representative numpy/scipy/pandas notebook kernels,
+for comparing CPU architectures (x86_64 vs ARM64/Graviton) before moving
+a lab via the cpu_architecture context key.
+
+Run the same command inside the Jupyter image on each architecture, e.g.
+as a one-off Fargate task or locally with `docker run --platform`:
+
+    python3 benchmarks/arch_kernels.py --size 2000 --repeat 5
+
+and compare the per-kernel medians. Cost per run is median seconds times
+the Fargate vCPU/GiB price for the architecture.
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import fft, linalg, optimize, signal, sparse, stats
+from scipy.sparse import linalg as sparse_linalg
+
+
+def bench_matmul(rng, n):
+    a = rng.standard_normal((n, n))
+    b = rng.standard_normal((n, n))
+    return lambda: a @ b
+
+
+def bench_svd(rng, n):
+    a = rng.standard_normal((n // 2, n // 4))
+    return lambda: linalg.svd(a, full_matrices=False)
+
+
+def bench_solve(rng, n):
+    a = rng.standard_normal((n, n)) + n * np.eye(n)
+    b = rng.standard_normal(n)
+    return lambda: linalg.solve(a, b)
+
+
+def bench_fft(rng, n):
+    x = rng.standard_normal(n * 1024)
+    return lambda: fft.rfft(x)
+
+
+def bench_filter(rng, n):
+    x = rng.standard_normal(n * 512)
+    sos = signal.butter(8, 0.125, output="sos")
+    return lambda: signal.sosfiltfilt(sos, x)
+
+
+def bench_sparse_cg(rng, n):
+    size = n * 50
+    diagonals = [np.full(size, 4.0), np.full(size - 1, -1.0), np.full(size - 1, -1.0)]
+    a = sparse.diags(diagonals, [0, -1, 1], format="csr")
+    b = rng.standard_normal(size)
+    return lambda: sparse_linalg.cg(a, b, maxiter=500)
+
+
+def bench_optimize(rng, n):
+    x0 = rng.standard_normal(min(n // 20, 200))
+    return lambda: optimize.minimize(optimize.rosen, x0, jac=optimize.rosen_der, method="L-BFGS-B")
+
+
+def bench_stats(rng, n):
+    a = rng.standard_normal(n * 500)
+    b = rng.standard_normal(n * 500) + 0.01
+    return lambda: (stats.ttest_ind(a, b), stats.spearmanr(a[:n * 50], b[:n * 50]))
+
+
+def bench_groupby(rng, n):
+    rows = n * 1000
+    frame = pd.DataFrame({
+        "lab": rng.integers(0, 50, rows),
+        "sample": rng.integers(0, 10_000, rows),
+        "value": rng.standard_normal(rows),
+    })
+    return lambda: frame.groupby(["lab", "sample"])["value"].agg(["mean", "std", "count"])
+
+
+def bench_merge(rng, n):
+    rows = n * 500
+    left = pd.DataFrame({"key": rng.integers(0, rows, rows), "a": rng.standard_normal(rows)})
+    right = pd.DataFrame({"key": np.arange(rows), "b": rng.standard_normal(rows)})
+    return lambda: left.merge(right, on="key", how="left")
+
+
+def bench_rolling(rng, n):
+    index = pd.date_range("2020-01-01", periods=n * 500, freq="s")
+    series = pd.Series(rng.standard_normal(len(index)), index=index)
+    return lambda: series.rolling("5min").mean()
+
+
+def bench_csv_roundtrip(rng, n):
+    frame = pd.DataFrame(rng.standard_normal((n * 50, 10)), columns=[f"c{i}" for i in range(10)])
+    return lambda: pd.read_csv(io.StringIO(frame.to_csv(index=False)))
+
+
+KERNELS = {
+    "numpy_matmul": bench_matmul,
+    "scipy_svd": bench_svd,
+    "scipy_solve": bench_solve,
+    "scipy_fft": bench_fft,
+    "scipy_sosfiltfilt": bench_filter,
+    "scipy_sparse_cg": bench_sparse_cg,
+    "scipy_lbfgs": bench_optimize,
+    "scipy_stats": bench_stats,
+    "pandas_groupby": bench_groupby,
+    "pandas_merge": bench_merge,
+    "pandas_rolling": bench_rolling,
+    "pandas_csv_roundtrip": bench_csv_roundtrip,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="numpy/scipy/pandas kernel micro-benchmarks")
+    parser.add_argument("--size", type=int, default=1000, help="problem size scale")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--kernels", nargs="*", default=list(KERNELS), choices=list(KERNELS))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    results = {}
+    for name in args.kernels:
+        run = KERNELS[name](rng, args.size)
+        run()  # warm-up: imports, BLAS thread pools, caches
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            "median_s": round(statistics.median(timings), 5),
+            "min_s": round(min(timings), 5),
+        }
+
+    print(json.dumps({
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "size": args.size,
+        "repeat": args.repeat,
+        "kernels": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+API AWS client throughput: boto3 defaults vs. the pooled clients in
+backend/app/aws.py, with and without read coalescing.
+
+Replays a launch-like mix of concurrent calls (DynamoDB GetItem on a few
+hot environments plus a long tail, S3 HeadObject on snapshot manifests)
+against moto server and reports throughput and latency per client setup:
+
+    default    boto3.client() defaults (10 connections, legacy retries),
+               one thread per concurrent request
+    pooled     AsyncAwsClients without coalescing
+    coalesced  AsyncAwsClients, identical in-flight reads shared
+
+Start moto server first:
+
+    pip install "moto[server]"
+    moto_server -p 5000
+    python3 benchmarks/aws_client_throughput.py --requests 5000 --concurrency 128
+
+Results are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from app.aws import AsyncAwsClients  # noqa: E402
+
+TABLE = "bench-environment-metadata"
+BUCKET = "bench-snapshots"
+
+
+def setup(endpoint_url, environments):
+    dynamodb = boto3.client("dynamodb", endpoint_url=endpoint_url)
+    try:
+        dynamodb.delete_table(TableName=TABLE)
+    except dynamodb.exceptions.ResourceNotFoundException:
+        pass
+    dynamodb.create_table(
+        TableName=TABLE,
+        BillingMode="PAY_PER_REQUEST",
+        AttributeDefinitions=[{"AttributeName": "environment_id", "AttributeType": "S"}],
+        KeySchema=[{"AttributeName": "environment_id", "KeyType": "HASH"}]
+    )
+    s3 = boto3.client("s3", endpoint_url=endpoint_url)
+    s3.create_bucket(Bucket=BUCKET)
+    for i in range(environments):
+        dynamodb.put_item(
+            TableName=TABLE,
+            Item={"environment_id": {"S": f"env-{i}"}, "session_status": {"S": "RUNNING"}}
+        )
+        s3.put_object(Bucket=BUCKET, Key=f"manifests/env-{i}/latest.json", Body=b"{}")
+
+
+def workload(requests, environments, hot_environments, hot_fraction, seed):
+    """(service, operation, kwargs) calls; hot_fraction of them hit hot_environments."""
+    rng = random.Random(seed)
+    calls = []
+    for _ in range(requests):
+        hot = rng.random() < hot_fraction
+        env = f"env-{rng.randrange(hot_environments if hot else environments)}"
+        if rng.random() < 0.7:
+            calls.append(("dynamodb", "get_item",
+                          {"TableName": TABLE, "Key": {"environment_id": {"S": env}}}))
+        else:
+            calls.append(("s3", "head_object",
+                          {"Bucket": BUCKET, "Key": f"manifests/{env}/latest.json"}))
+    return calls
+
+
+async def _timed(latencies, call):
+    start = time.perf_counter()
+    await call
+    latencies.append(time.perf_counter() - start)
+
+
+async def run_default(endpoint_url, calls, concurrency):
+    clients = {service: boto3.client(service, endpoint_url=endpoint_url) for service in ("dynamodb", "s3")}
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(service, operation, kwargs):
+        async with semaphore:
+            method = getattr(clients[service], operation)
+            await _timed(latencies, loop.run_in_executor(executor, lambda: method(**kwargs)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(*call) for call in calls))
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    return latencies, elapsed, 0
+
+
+async def run_pooled(endpoint_url, calls, concurrency, coalesce):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    async with AsyncAwsClients(coalesce_reads=coalesce, endpoint_url=endpoint_url) as clients:
+        async def one(service, operation, kwargs):
+            async with semaphore:
+                await _timed(latencies, clients.call(service, operation, **kwargs))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(*call) for call in calls))
+        elapsed = time.perf_counter() - start
+        coalesced = clients.coalesced
+    return latencies, elapsed, coalesced
+
+
+def summarize(latencies, elapsed, coalesced):
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "coalesced": coalesced,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API AWS client throughput against moto server")
+    parser.add_argument("--endpoint-url", default="http://localhost:5000")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--environments", type=int, default=500)
+    parser.add_argument("--hot-environments", type=int, default=5)
+    parser.add_argument("--hot-fraction", type=float, default=0.5)
+    parser.add_argument("--pool-connections", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # moto accepts any credentials
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ["AWS_MAX_POOL_CONNECTIONS"] = str(args.pool_connections)
+
+    setup(args.endpoint_url, args.environments)
+    calls = workload(args.requests, args.environments, args.hot_environments, args.hot_fraction, args.seed)
+
+    results = {
+        "default": summarize(*asyncio.run(run_default(args.endpoint_url, calls, args.concurrency))),
+        "pooled": summarize(*asyncio.run(run_pooled(args.endpoint_url, calls, args.concurrency, False))),
+        "coalesced": summarize(*asyncio.run(run_pooled(args.endpoint_url, calls, args.concurrency, True))),
+    }
+    print(json.dumps({
+        "endpoint_url": args.endpoint_url,
+        "concurrency": args.concurrency,
+        "pool_connections": args.pool_connections,
+        "hot_fraction": args.hot_fraction,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
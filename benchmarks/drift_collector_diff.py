@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the drift-collector diff/debounce path.
+
+Replays synthetic `pip freeze` manifests through DriftCollector the way
+the sidecar sees them: mostly unchanged polls, occasional installs that
+pass through half-finished states, upgrades and removals. Reports cost per
+poll and how many raw changes the debounce window collapses, and the
+compressed size of the resulting SQS batches. Runs offline:
+
+    python3 benchmarks/drift_collector_diff.py --packages 800 --polls 2000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "drift_collector"))
+from collector import DriftCollector, diff_state, encode_batches, parse_freeze, to_events  # noqa: E402
+
+
+def synthetic_manifest(count):
+    return {f"package-{i:05d}": f"{random.randint(0, 3)}.{random.randint(0, 30)}.{random.randint(0, 9)}"
+            for i in range(count)}
+
+
+def render_freeze(packages):
+    return "\n".join(f"{name}=={version}" for name, version in sorted(packages.items()))
+
+
+def mutate(packages, install_burst):
+    """
+    One researcher action as the sidecar sees it over successive polls:
+    pip uninstalls before it installs, and installs land a few at a time.
+    """
+    packages = dict(packages)
+    action = random.random()
+    if action < 0.5:
+        name = random.choice(list(packages))
+        major, minor, _ = packages[name].split(".")
+        removed = dict(packages)
+        removed.pop(name)
+        packages[name] = f"{major}.{int(minor) + 1}.0"
+        return [removed, packages]
+    if action < 0.7:
+        packages.pop(random.choice(list(packages)))
+        return [packages]
+    states = []
+    for _ in range(install_burst):
+        packages[f"new-{random.getrandbits(32):08x}"] = "1.0.0"
+        states.append(dict(packages))
+    return states
+
+
+def main():
+    parser = argparse.ArgumentParser(description="drift-collector diff/debounce micro-benchmark")
+    parser.add_argument("--packages", type=int, default=500)
+    parser.add_argument("--configs", type=int, default=20)
+    parser.add_argument("--polls", type=int, default=1000)
+    parser.add_argument("--poll-seconds", type=float, default=15)
+    parser.add_argument("--debounce-seconds", type=float, default=60)
+    parser.add_argument("--change-rate", type=float, default=0.05,
+                        help="probability a poll starts a researcher action")
+    parser.add_argument("--install-burst", type=int, default=8)
+    args = parser.parse_args()
+
+    random.seed(42)
+    packages = synthetic_manifest(args.packages)
+    configs = {f"/home/jovyan/.jupyter/config-{i}.py": f"{i:064x}" for i in range(args.configs)}
+    freeze_text = render_freeze(packages)
+
+    collector = DriftCollector(debounce_seconds=args.debounce_seconds)
+    queued_states = []
+    parse_ms, observe_ms = [], []
+    raw_changes = settled_changes = 0
+    settled = []
+    previous = (packages, configs)
+
+    for poll in range(args.polls):
+        if not queued_states and random.random() < args.change_rate:
+            queued_states = mutate(packages, args.install_burst)
+        if queued_states:
+            packages = queued_states.pop(0)
+            freeze_text = render_freeze(packages)
+
+        start = time.perf_counter()
+        parsed = parse_freeze(freeze_text)
+        parse_ms.append((time.perf_counter() - start) * 1000)
+
+        raw_changes += len(diff_state(previous, (parsed, configs)))
+        previous = (parsed, configs)
+
+        start = time.perf_counter()
+        changes = collector.observe(parsed, configs, now=poll * args.poll_seconds)
+        observe_ms.append((time.perf_counter() - start) * 1000)
+
+        settled_changes += len(changes)
+        settled.extend(changes)
+
+    events = to_events(settled, "env-bench", "lab-bench")
+    raw_bytes = sum(len(json.dumps(event)) for event in events)
+    start = time.perf_counter()
+    batches = encode_batches(events)
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({
+        "packages": args.packages,
+        "polls": args.polls,
+        "parse_ms": {"p50": round(statistics.median(parse_ms), 3), "max": round(max(parse_ms), 3)},
+        "observe_ms": {"p50": round(statistics.median(observe_ms), 3), "max": round(max(observe_ms), 3)},
+        "raw_poll_to_poll_changes": raw_changes,
+        "published_changes": settled_changes,
+        "sqs_messages": len(batches),
+        "event_bytes": raw_bytes,
+        "message_bytes": sum(len(batch) for batch in batches),
+        "encode_ms": round(encode_ms, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Drift table query latency: old schema vs. the sharded/GSI schema.
+
+Loads the same synthetic drift events (one deliberately noisy environment
+plus a long tail) into both layouts on DynamoDB Local and times the
+dashboard query "all CRITICAL drift in a lab in the last hour":
+
+    before  pk=environment_id, sk=timestamp  -> Scan + filter
+    after   services/drift/keys.py layout    -> Query ByLabSeverity shards
+
+Start DynamoDB Local first:
+
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python3 benchmarks/drift_table_latency.py --events 50000
+
+Results are printed as JSON.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "drift"))
+from keys import event_item, lab_severity_partitions  # noqa: E402
+
+BEFORE_TABLE = "bench-drift-before"
+AFTER_TABLE = "bench-drift-after"
+
+
+def create_tables(client):
+    for name in (BEFORE_TABLE, AFTER_TABLE):
+        try:
+            client.delete_table(TableName=name)
+            client.get_waiter("table_not_exists").wait(TableName=name)
+        except client.exceptions.ResourceNotFoundException:
+            pass
+
+    client.create_table(
+        TableName=BEFORE_TABLE,
+        BillingMode="PAY_PER_REQUEST",
+        AttributeDefinitions=[
+            {"AttributeName": "environment_id", "AttributeType": "S"},
+            {"AttributeName": "timestamp", "AttributeType": "S"},
+        ],
+        KeySchema=[
+            {"AttributeName": "environment_id", "KeyType": "HASH"},
+            {"AttributeName": "timestamp", "KeyType": "RANGE"},
+        ]
+    )
+    client.create_table(
+        TableName=AFTER_TABLE,
+        BillingMode="PAY_PER_REQUEST",
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+            {"AttributeName": "lab_severity_pk", "AttributeType": "S"},
+            {"AttributeName": "severity_pk", "AttributeType": "S"},
+        ],
+        KeySchema=[
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "ByLabSeverity",
+                "KeySchema": [
+                    {"AttributeName": "lab_severity_pk", "KeyType": "HASH"},
+                    {"AttributeName": "sk", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+            {
+                "IndexName": "BySeverity",
+                "KeySchema": [
+                    {"AttributeName": "severity_pk", "KeyType": "HASH"},
+                    {"AttributeName": "sk", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "KEYS_ONLY"},
+            },
+        ]
+    )
+    for name in (BEFORE_TABLE, AFTER_TABLE):
+        client.get_waiter("table_exists").wait(TableName=name)
+
+
+def synthetic_events(count, labs, environments, hours):
+    """One environment produces half of all events; severities skew minor."""
+    now = datetime.now(timezone.utc)
+    env_ids = [f"env-{i:04d}" for i in range(environments)]
+    lab_of = {env: f"lab-{i % labs:02d}" for i, env in enumerate(env_ids)}
+    for _ in range(count):
+        env = env_ids[0] if random.random() < 0.5 else random.choice(env_ids)
+        at = now - timedelta(seconds=random.uniform(0, hours * 3600))
+        yield {
+            "environment_id": env,
+            "lab_id": lab_of[env],
+            "severity": random.choices(("CRITICAL", "MINOR", "INFO"), weights=(2, 30, 68))[0],
+            "timestamp": at.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "event_id": uuid.uuid4().hex,
+            "package": f"pkg{random.randint(0, 500)}",
+        }
+
+
+def load(resource, events):
+    before = resource.Table(BEFORE_TABLE)
+    after = resource.Table(AFTER_TABLE)
+    with before.batch_writer(overwrite_by_pkeys=["environment_id", "timestamp"]) as b, \
+            after.batch_writer() as a:
+        for event in events:
+            b.put_item(Item=event)
+            a.put_item(Item=event_item(event))
+
+
+def query_before(resource, lab_id, since):
+    table = resource.Table(BEFORE_TABLE)
+    kwargs = {
+        "FilterExpression": Attr("lab_id").eq(lab_id)
+        & Attr("severity").eq("CRITICAL")
+        & Attr("timestamp").gte(since)
+    }
+    items = []
+    while True:
+        page = table.scan(**kwargs)
+        items.extend(page["Items"])
+        if "LastEvaluatedKey" not in page:
+            return items
+        kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
+def query_after(resource, executor, lab_id, since):
+    table = resource.Table(AFTER_TABLE)
+
+    def one_shard(partition):
+        return table.query(
+            IndexName="ByLabSeverity",
+            KeyConditionExpression=Key("lab_severity_pk").eq(partition) & Key("sk").gte(since)
+        )["Items"]
+
+    shards = executor.map(one_shard, lab_severity_partitions(lab_id, "CRITICAL"))
+    return [item for shard in shards for item in shard]
+
+
+def timed(fn, repeats):
+    samples, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[max(int(len(samples) * 0.95) - 1, 0)], 2),
+        "results": len(result),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drift table query latency before/after")
+    parser.add_argument("--endpoint", default="http://localhost:8000")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--labs", type=int, default=8)
+    parser.add_argument("--environments", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=48)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    session = boto3.session.Session(
+        aws_access_key_id="local", aws_secret_access_key="local", region_name="us-east-1"
+    )
+    client = session.client("dynamodb", endpoint_url=args.endpoint)
+    resource = session.resource("dynamodb", endpoint_url=args.endpoint)
+
+    create_tables(client)
+    start = time.perf_counter()
+    load(resource, synthetic_events(args.events, args.labs, args.environments, args.hours))
+    load_seconds = time.perf_counter() - start
+
+    lab_id = "lab-00"  # owns the noisy environment
+    since = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat(timespec="milliseconds")
+    since = since.replace("+00:00", "Z")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        report = {
+            "events": args.events,
+            "load_seconds": round(load_seconds, 2),
+            "critical_in_lab_last_hour": {
+                "before": timed(lambda: query_before(resource, lab_id, since), args.repeats),
+                "after": timed(lambda: query_after(resource, executor, lab_id, since), args.repeats),
+            },
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
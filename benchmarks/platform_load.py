@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end load test of the launch, snapshot and drift-ingest flows.
+
+Synthesizes the CDK app (or reads an existing cdk.out), creates
+EnvironmentMetadataTable, WarmPoolTable and DriftTrackingTable locally with
+the key schemas and indexes from the WestTekStorage template, creates a
+snapshots bucket and an ECS cluster with the Jupyter task definition
+families from WestTekCompute, then drives each workload from --concurrency
+simulated researchers:
+
+    launch    backend/app as the API runs it: MetadataRepository read,
+              WarmPool.claim, or ResearcherStorage access point and task
+              definition plus RunTask when the pool is empty, then a
+              MetadataRepository write
+    snapshot  services/snapshot_engine against the local S3 bucket, with a
+              parent manifest after the first round, then a metadata write
+    drift     services/drift/ingest.py BatchWriteItem of event batches
+              (services/drift/keys.py layout)
+
+Start moto server (S3, ECS and DynamoDB), optionally with DynamoDB Local
+for more realistic DynamoDB behaviour:
+
+    pip install "moto[server]" boto3      # and redis for --cache-url
+    moto_server -p 5000
+    docker run -p 8000:8000 amazon/dynamodb-local     # optional
+    python3 benchmarks/platform_load.py --concurrency 200 \\
+        --dynamodb-endpoint-url http://localhost:8000
+
+moto does not model task protection, service desired counts, scalable
+targets or EFS access points, so those clients are stubbed through
+app.aws.stub (ServiceStubs below); everything else is the real code path.
+The metadata cache is a Redis-protocol server given with --cache-url (e.g.
+a local valkey container); without one, reads go to the table as they do
+during a cache outage.
+
+--context takes the same JSON as cdk -c, so a schema or capacity change
+can be synthesized and compared with the previous run. Results (p50/p95/
+p99 latency and throughput per workload, plus the schemas used) are
+printed as JSON.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.join(ROOT, "services", "snapshot_engine"))
+sys.path.insert(0, os.path.join(ROOT, "services", "drift"))
+
+from synth_time import base_context, synth  # noqa: E402
+
+# Logical ID prefixes in WestTekStorage -> local table names
+TABLES = {
+    "EnvironmentMetadataTable": "load-environment-metadata",
+    "WarmPoolTable": "load-warm-pool",
+    "DriftTrackingTable": "load-drift-tracking",
+}
+BUCKET = "load-snapshots"
+CLUSTER = "load-cluster"
+FILE_SYSTEM = "fs-load"
+WARM_TIER = "scipy"
+WARM_SERVICE = "load-warm-scipy"
+
+
+def load_templates(cdk_out, context):
+    """Synthesize into a temporary cdk.out unless one is given."""
+    if cdk_out is None:
+        cdk_out = tempfile.mkdtemp(prefix="platform-load-")
+        synth({**base_context(), **context, "stacks": "storage,compute"}, cdk_out)
+    templates = {}
+    for stack in ("WestTekStorage", "WestTekCompute"):
+        with open(os.path.join(cdk_out, f"{stack}.template.json")) as f:
+            templates[stack] = json.load(f)
+    return templates
+
+
+def table_schemas(template):
+    """create_table arguments for each table in TABLES, as synthesized."""
+    schemas = {}
+    for logical_id, resource in template["Resources"].items():
+        if resource["Type"] != "AWS::DynamoDB::Table":
+            continue
+        for prefix, name in TABLES.items():
+            # CDK appends an 8-character hash to the construct ID
+            if not re.fullmatch(f"{prefix}[0-9A-F]{{8}}", logical_id):
+                continue
+            properties = resource["Properties"]
+            schema = {
+                "TableName": name,
+                "KeySchema": properties["KeySchema"],
+                "AttributeDefinitions": properties["AttributeDefinitions"],
+                "BillingMode": "PAY_PER_REQUEST",
+            }
+            indexes = [
+                {"IndexName": index["IndexName"], "KeySchema": index["KeySchema"],
+                 "Projection": index["Projection"]}
+                for index in properties.get("GlobalSecondaryIndexes") or []
+            ]
+            if indexes:
+                schema["GlobalSecondaryIndexes"] = indexes
+            schemas[prefix] = schema
+    missing = set(TABLES) - set(schemas)
+    if missing:
+        raise SystemExit(f"Tables not found in WestTekStorage: {sorted(missing)}")
+    return schemas
+
+
+def jupyter_families(template, warm=False):
+    """Cold-launch families (with notebook storage), or the warm pool's with warm=True."""
+    return sorted(
+        resource["Properties"]["Family"]
+        for logical_id, resource in template["Resources"].items()
+        if resource["Type"] == "AWS::ECS::TaskDefinition" and logical_id.startswith("Jupyter")
+        and ("WarmTaskDefinition" in logical_id) == warm
+    )
+
+
+class ServiceStubs:
+    """Answers for the calls moto does not model, with the desired counts set."""
+
+    def __init__(self, pool_size, max_size):
+        self.pool_size = pool_size
+        self.max_size = max_size
+        self.desired_counts = {}
+        self.lock = threading.Lock()
+
+    def update_task_protection(self, **kwargs):
+        return {"protectedTasks": [], "failures": []}
+
+    def update_service(self, cluster, service, desiredCount):
+        with self.lock:
+            self.desired_counts[service] = desiredCount
+        return {"service": {"serviceName": service, "desiredCount": desiredCount}}
+
+    def describe_scalable_targets(self, **kwargs):
+        return {"ScalableTargets": [{"MinCapacity": self.pool_size, "MaxCapacity": self.max_size}]}
+
+    def create_access_point(self, ClientToken, **kwargs):
+        return {"AccessPointId": f"fsap-{ClientToken[:17]}"}
+
+
+class PartialStub:
+    """A real client with some operations answered by a stub."""
+
+    def __init__(self, client, stub, operations):
+        self._client = client
+        self._stub = stub
+        self._operations = operations
+
+    def __getattr__(self, name):
+        if name in self._operations:
+            return getattr(self._stub, name)
+        return getattr(self._client, name)
+
+
+class UnavailableCache:
+    """Metadata cache stand-in that is always down, so reads fall back to the table."""
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            raise ConnectionError("No --cache-url given")
+        return call
+
+
+def setup(aws, schemas, families, warm_families, warm_tasks):
+    dynamodb = aws.client("dynamodb")
+    for schema in schemas.values():
+        try:
+            dynamodb.delete_table(TableName=schema["TableName"])
+            dynamodb.get_waiter("table_not_exists").wait(TableName=schema["TableName"])
+        except dynamodb.exceptions.ResourceNotFoundException:
+            pass
+        dynamodb.create_table(**schema)
+        dynamodb.get_waiter("table_exists").wait(TableName=schema["TableName"])
+
+    s3 = aws.client("s3")
+    try:
+        s3.create_bucket(Bucket=BUCKET)
+    except s3.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    ecs = aws.client("ecs")
+    ecs.create_cluster(clusterName=CLUSTER)
+    for family in families + warm_families:
+        # ResearcherStorage.register_task_definition repoints this volume
+        volumes = [] if family in warm_families else [{
+            "name": "notebook-storage",
+            "efsVolumeConfiguration": {
+                "fileSystemId": FILE_SYSTEM,
+                "transitEncryption": "ENABLED",
+                "authorizationConfig": {"accessPointId": "fsap-shared", "iam": "ENABLED"},
+            },
+        }]
+        ecs.register_task_definition(
+            family=family,
+            requiresCompatibilities=["FARGATE"],
+            networkMode="awsvpc",
+            cpu="2048",
+            memory="4096",
+            containerDefinitions=[{"name": "JupyterContainer", "image": "jupyter", "essential": True}],
+            volumes=volumes
+        )
+
+    # Warm tasks, registered the way services/warm_pool_registrar does
+    for _ in range(warm_tasks):
+        task = _run_task(ecs, (warm_families or families)[0], [])
+        dynamodb.put_item(
+            TableName=TABLES["WarmPoolTable"],
+            Item={"tier": {"S": WARM_TIER}, "task_arn": {"S": task["taskArn"]},
+                  "status": {"S": "available"}, "private_ip": {"S": "10.0.0.1"},
+                  "expires_at": {"N": str(int(time.time()) + 3600)}}
+        )
+
+
+def _run_task(ecs, family, tags):
+    kwargs = {
+        "cluster": CLUSTER,
+        "taskDefinition": family,
+        "launchType": "FARGATE",
+        "count": 1,
+        "networkConfiguration": {"awsvpcConfiguration": {"subnets": ["subnet-load"], "assignPublicIp": "DISABLED"}},
+    }
+    if tags:
+        kwargs["tags"] = tags
+    return ecs.run_task(**kwargs)["tasks"][0]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def run(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            fn(*args)
+        except Exception as e:
+            with self.lock:
+                name = type(e).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+            return
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start)
+
+    def summary(self, elapsed):
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+
+        return {
+            "operations": len(ordered),
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "operations_per_second": round(len(ordered) / elapsed, 1) if elapsed else None,
+            "mean_ms": round(statistics.mean(ordered) * 1000, 2) if ordered else None,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+        }
+
+
+class Flows:
+    """One simulated researcher's calls, against the local stand-ins."""
+
+    def __init__(self, aws, families, snapshot_root, cache_client, args):
+        self.ecs = aws.client("ecs")
+        self.s3 = aws.client("s3")
+        self.families = families
+        self.snapshot_root = snapshot_root
+        self.cache_client = cache_client
+        self.args = args
+        self.snapshots = {}
+        self.snapshot_lock = threading.Lock()
+        self.local = threading.local()
+
+    def _api(self):
+        """The backend objects, one set per thread (boto3 resources are not thread-safe)."""
+        if not hasattr(self.local, "metadata"):
+            from app.cache import MetadataRepository, ReadThroughCache
+            from app.storage import ResearcherStorage
+            from app.warm_pool import WarmPool
+
+            self.local.metadata = MetadataRepository(
+                cache=ReadThroughCache(self.cache_client, namespace="environment")
+            )
+            self.local.pool = WarmPool()
+            self.local.storage = ResearcherStorage()
+        return self.local
+
+    def environment_ids(self):
+        return [f"env-{i:04d}" for i in range(self.args.researchers)]
+
+    def launch(self, environment_id):
+        api = self._api()
+        lab_id = self._lab(environment_id)
+        api.metadata.get_environment(environment_id)
+
+        claimed = api.pool.claim(WARM_TIER, environment_id, lab_id)
+        if claimed is not None:
+            task_arn = claimed["task_arn"]
+        else:
+            researcher_id = f"researcher-{environment_id.rsplit('-', 1)[1]}"
+            access_point_id = api.storage.ensure_access_point(researcher_id, environment_id)
+            # JUPYTER_TASK_DEFINITIONS maps each family to itself (see main)
+            task_definition = api.storage.register_task_definition(
+                access_point_id, tier=random.choice(self.families)
+            )
+            task_arn = _run_task(self.ecs, task_definition, [
+                {"key": "environment_id", "value": environment_id},
+                {"key": "lab_id", "value": lab_id},
+            ])["taskArn"]
+
+        api.metadata.put_environment({
+            "environment_id": environment_id,
+            "lab_id": lab_id,
+            "session_status": "RUNNING",
+            "task_arn": task_arn,
+            "launched_at": int(time.time()),
+        })
+
+    def snapshot(self, environment_id):
+        from engine import create_snapshot
+        from store import S3ChunkStore
+
+        root = self._environment_directory(environment_id)
+        with self.snapshot_lock:
+            parent = self.snapshots.get(environment_id)
+        snapshot_id = uuid.uuid4().hex[:12]
+        manifest, _ = create_snapshot(
+            root, S3ChunkStore(BUCKET, client=self.s3), environment_id, snapshot_id,
+            parent=parent, workers=self.args.snapshot_workers
+        )
+        with self.snapshot_lock:
+            self.snapshots[environment_id] = manifest
+        self._api().metadata.update_environment(
+            environment_id,
+            UpdateExpression="SET last_snapshot_id = :snapshot",
+            ExpressionAttributeValues={":snapshot": snapshot_id}
+        )
+
+    def _environment_directory(self, environment_id):
+        """A researcher's files; one file changes between snapshots."""
+        root = os.path.join(self.snapshot_root, environment_id)
+        if not os.path.isdir(root):
+            os.makedirs(root)
+            for i in range(self.args.snapshot_files):
+                with open(os.path.join(root, f"file-{i:03d}.bin"), "wb") as f:
+                    f.write(os.urandom(self.args.snapshot_file_kb * 1024))
+        else:
+            changed = random.randrange(self.args.snapshot_files)
+            with open(os.path.join(root, f"file-{changed:03d}.bin"), "wb") as f:
+                f.write(os.urandom(self.args.snapshot_file_kb * 1024))
+        return root
+
+    def drift(self, environment_id):
+        import ingest
+        from keys import event_item
+
+        now = datetime.now(timezone.utc)
+        items = [
+            event_item({
+                "environment_id": environment_id,
+                "lab_id": self._lab(environment_id),
+                "severity": random.choices(("CRITICAL", "MINOR", "INFO"), weights=(2, 30, 68))[0],
+                "timestamp": (now - timedelta(milliseconds=i)).isoformat(timespec="milliseconds")
+                .replace("+00:00", "Z"),
+                "event_id": uuid.uuid4().hex,
+                "package": f"pkg{random.randint(0, 500)}",
+            })
+            for i in range(self.args.drift_batch)
+        ]
+        unprocessed = ingest.write_items(items)
+        if unprocessed:
+            raise RuntimeError(f"{len(unprocessed)} drift events unprocessed")
+
+    def _lab(self, environment_id):
+        return f"lab-{int(environment_id.rsplit('-', 1)[1]) % self.args.labs:02d}"
+
+
+def run_workload(flows, name, operations, concurrency):
+    environments = flows.environment_ids()
+    targets = [environments[i % len(environments)] for i in range(operations)]
+    recorder = Recorder()
+    fn = getattr(flows, name)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda environment_id: recorder.run(fn, environment_id), targets))
+    return recorder.summary(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of launch, snapshot and drift flows")
+    parser.add_argument("--endpoint-url", default="http://localhost:5000", help="moto server")
+    parser.add_argument("--dynamodb-endpoint-url", help="e.g. DynamoDB Local; defaults to --endpoint-url")
+    parser.add_argument("--cdk-out", help="existing synth output; synthesized into a temp dir when unset")
+    parser.add_argument("--context", default="{}", help="cdk context overrides as JSON")
+    parser.add_argument("--workloads", default="launch,snapshot,drift")
+    parser.add_argument("--researchers", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--operations", type=int, default=1000, help="per workload")
+    parser.add_argument("--labs", type=int, default=8)
+    parser.add_argument("--warm-tasks", type=int, default=20)
+    parser.add_argument("--warm-max", type=int, default=200, help="warm service maximum size")
+    parser.add_argument("--cache-url", help="Redis-protocol metadata cache, e.g. redis://localhost:6379")
+    parser.add_argument("--snapshot-files", type=int, default=16)
+    parser.add_argument("--snapshot-file-kb", type=int, default=256)
+    parser.add_argument("--snapshot-workers", type=int, default=4)
+    parser.add_argument("--drift-batch", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    # Every boto3 client, including the ones the imported modules create,
+    # goes to the local stand-ins; moto accepts any credentials
+    os.environ["AWS_ENDPOINT_URL"] = args.endpoint_url
+    if args.dynamodb_endpoint_url:
+        os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = args.dynamodb_endpoint_url
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ["AWS_MAX_POOL_CONNECTIONS"] = str(args.concurrency)
+    os.environ["DRIFT_TABLE"] = TABLES["DriftTrackingTable"]
+
+    from app import aws  # noqa: E402  (reads the settings above)
+
+    context = json.loads(args.context)
+    templates = load_templates(args.cdk_out, context)
+    schemas = table_schemas(templates["WestTekStorage"])
+    families = jupyter_families(templates["WestTekCompute"])
+    warm_families = jupyter_families(templates["WestTekCompute"], warm=True)
+
+    # Settings backend/app reads, as ComputeStack sets them on the API
+    os.environ.update({
+        "METADATA_TABLE": TABLES["EnvironmentMetadataTable"],
+        "WARM_POOL_TABLE": TABLES["WarmPoolTable"],
+        "CLUSTER_NAME": CLUSTER,
+        "WARM_POOL_SERVICES": json.dumps({WARM_TIER: WARM_SERVICE}),
+        "NOTEBOOK_FILE_SYSTEM_ID": FILE_SYSTEM,
+        "JUPYTER_TASK_DEFINITION": families[0],
+        "JUPYTER_TASK_DEFINITIONS": json.dumps({family: family for family in families}),
+    })
+    stubs = ServiceStubs(args.warm_tasks, args.warm_max)
+    aws.stub("ecs", PartialStub(aws.client("ecs"), stubs, ("update_task_protection", "update_service")))
+    aws.stub("application-autoscaling", stubs)
+    aws.stub("efs", stubs)
+    if args.cache_url:
+        import redis
+
+        cache_client = redis.Redis.from_url(args.cache_url)
+    else:
+        cache_client = UnavailableCache()
+
+    setup(aws, schemas, families, warm_families, args.warm_tasks)
+    with tempfile.TemporaryDirectory(prefix="platform-load-files-") as snapshot_root:
+        flows = Flows(aws, families, snapshot_root, cache_client, args)
+        results = {}
+        for workload in [w.strip() for w in args.workloads.split(",") if w.strip()]:
+            if workload not in ("launch", "snapshot", "drift"):
+                raise SystemExit(f"Unknown workload {workload}")
+            results[workload] = run_workload(flows, workload, args.operations, args.concurrency)
+
+    print(json.dumps({
+        "endpoint_url": args.endpoint_url,
+        "dynamodb_endpoint_url": args.dynamodb_endpoint_url or args.endpoint_url,
+        "context": context,
+        "researchers": args.researchers,
+        "concurrency": args.concurrency,
+        "operations_per_workload": args.operations,
+        "schemas": {
+            name: {
+                "digest": hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()[:16],
+                "indexes": [index["IndexName"] for index in schema.get("GlobalSecondaryIndexes", [])],
+            }
+            for name, schema in schemas.items()
+        },
+        "jupyter_families": families,
+        "cache": "redis" if args.cache_url else "unavailable",
+        "warm_desired_counts": stubs.desired_counts,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-kernel for a Jupyter image with and without a SOCI index.
+
+Runs against a local registry (registry:2) standing in for ECR, so the
+numbers isolate the effect of lazy loading from network distance to AWS.
+Needs nerdctl, the soci CLI and a running soci-snapshotter-grpc; run as
+root (or with rootful containerd access):
+
+    sudo python3 benchmarks/soci_time_to_kernel.py \\
+        --image quay.io/jupyter/scipy-notebook:latest --runs 3
+
+Each run drops the image from the local content store first so every start
+is a cold pull. Results are printed as JSON.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.request
+
+REGISTRY_NAME = "westtek-bench-registry"
+
+
+def sh(*args, check=True):
+    return subprocess.run(args, check=check, capture_output=True, text=True).stdout.strip()
+
+
+def start_registry(port):
+    sh("nerdctl", "rm", "-f", REGISTRY_NAME, check=False)
+    sh("nerdctl", "run", "-d", "--name", REGISTRY_NAME, "-p", f"{port}:5000", "registry:2")
+
+
+def seed_registry(source_image, local_image, min_layer_size):
+    sh("nerdctl", "pull", source_image)
+    sh("nerdctl", "tag", source_image, local_image)
+    sh("nerdctl", "push", "--insecure-registry", local_image)
+    sh("soci", "create", "--min-layer-size", str(min_layer_size), local_image)
+    sh("soci", "push", "--plain-http", local_image)
+
+
+def drop_local_copy(local_image):
+    sh("nerdctl", "rmi", "-f", local_image, check=False)
+    sh("nerdctl", "image", "prune", "-a", "-f", check=False)
+
+
+def wait_for_kernel(port, timeout):
+    """Poll until the server accepts a kernel start request."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}/api/kernels", data=b"{}", method="POST"
+            )
+            with urllib.request.urlopen(request, timeout=5) as response:
+                if response.status == 201:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"Kernel did not start within {timeout}s")
+
+
+def time_to_first_kernel(local_image, snapshotter, port, timeout):
+    drop_local_copy(local_image)
+    name = f"westtek-bench-{snapshotter}"
+    sh("nerdctl", "rm", "-f", name, check=False)
+
+    start = time.monotonic()
+    sh(
+        "nerdctl", "--snapshotter", snapshotter, "run", "-d",
+        "--insecure-registry", "--name", name, "-p", f"{port}:8888",
+        local_image,
+        "start-notebook.py", "--IdentityProvider.token=", "--ServerApp.disable_check_xsrf=True",
+    )
+    try:
+        wait_for_kernel(port, timeout)
+        return time.monotonic() - start
+    finally:
+        sh("nerdctl", "rm", "-f", name, check=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--image", default="quay.io/jupyter/scipy-notebook:latest")
+    parser.add_argument("--registry-port", type=int, default=5000)
+    parser.add_argument("--jupyter-port", type=int, default=18888)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=int, default=900)
+    parser.add_argument("--min-layer-size", type=int, default=10 * 1024 * 1024)
+    args = parser.parse_args()
+
+    local_image = f"127.0.0.1:{args.registry_port}/bench/jupyter:latest"
+    start_registry(args.registry_port)
+    try:
+        seed_registry(args.image, local_image, args.min_layer_size)
+
+        results = {}
+        for snapshotter in ("overlayfs", "soci"):
+            samples = [
+                time_to_first_kernel(local_image, snapshotter, args.jupyter_port, args.timeout)
+                for _ in range(args.runs)
+            ]
+            results[snapshotter] = {
+                "runs": len(samples),
+                "median_seconds": round(statistics.median(samples), 2),
+                "min_seconds": round(min(samples), 2),
+                "max_seconds": round(max(samples), 2),
+            }
+    finally:
+        sh("nerdctl", "rm", "-f", REGISTRY_NAME, check=False)
+
+    print(json.dumps({"image": args.image, "time_to_first_kernel": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
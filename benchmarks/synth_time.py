@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Synth-time benchmark and template snapshot check for the CDK app.
+
+Runs app.py the way the CDK CLI does (CDK_CONTEXT_JSON + CDK_OUTDIR) for
+the full app and for each stack selected on its own (-c stacks=<key>),
+and reports wall-clock synth time plus template size and resource count
+per stack. Runs offline; needs node and the Python requirements.
+
+    python3 benchmarks/synth_time.py --repeat 3
+    python3 benchmarks/synth_time.py --check      # compare with the snapshot
+    python3 benchmarks/synth_time.py --update     # rewrite the snapshot
+
+The snapshot (benchmarks/synth_snapshot.json) records each template's
+resource types and a digest of the template with asset hashes masked, so a
+change that adds, removes or edits resources shows up in review. --check
+exits non-zero when a digest changes, a template grows by more than
+--max-growth-percent, or synth reports errors (e.g. the resource budget
+in infrastructure/budgets.py).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SNAPSHOT = os.path.join(ROOT, "benchmarks", "synth_snapshot.json")
+
+STACK_KEYS = ["network", "storage", "cache", "auth", "compute", "snapshot", "workspace", "knowledge"]
+
+# Asset hashes change with any Lambda/container source edit; mask them
+HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def synth(context, outdir):
+    env = dict(os.environ)
+    env["CDK_CONTEXT_JSON"] = json.dumps(context)
+    env["CDK_OUTDIR"] = outdir
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "app.py"], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return time.perf_counter() - start
+
+
+def describe_templates(outdir):
+    stacks = {}
+    for name in sorted(os.listdir(outdir)):
+        if not name.endswith(".template.json"):
+            continue
+        with open(os.path.join(outdir, name)) as f:
+            raw = f.read()
+        template = json.loads(raw)
+        resources = template.get("Resources", {})
+        normalized = HASH_PATTERN.sub("<hash>", json.dumps(template, sort_keys=True))
+        stacks[name[:-len(".template.json")]] = {
+            "template_bytes": len(raw),
+            "resources": len(resources),
+            "resource_types": dict(sorted(Counter(r["Type"] for r in resources.values()).items())),
+            "digest": hashlib.sha256(normalized.encode()).hexdigest()[:16],
+        }
+    return stacks
+
+
+def synth_errors(outdir):
+    with open(os.path.join(outdir, "manifest.json")) as f:
+        manifest = json.load(f)
+    return [
+        f"{path}: {entry['data']}"
+        for artifact in manifest.get("artifacts", {}).values()
+        for path, entries in (artifact.get("metadata") or {}).items()
+        for entry in entries
+        if entry["type"] == "aws:cdk:error"
+    ]
+
+
+def base_context():
+    with open(os.path.join(ROOT, "cdk.json")) as f:
+        return json.load(f).get("context", {})
+
+
+def check(current, snapshot, max_growth_percent):
+    problems = []
+    for stack, expected in snapshot.items():
+        actual = current.get(stack)
+        if actual is None:
+            problems.append(f"{stack}: missing from synth output")
+            continue
+        if actual["digest"] != expected["digest"]:
+            added = Counter(actual["resource_types"]) - Counter(expected["resource_types"])
+            removed = Counter(expected["resource_types"]) - Counter(actual["resource_types"])
+            problems.append(
+                f"{stack}: template changed (added {dict(added) or '-'}, removed {dict(removed) or '-'})"
+            )
+        growth = (actual["template_bytes"] - expected["template_bytes"]) * 100 / expected["template_bytes"]
+        if growth > max_growth_percent:
+            problems.append(f"{stack}: template grew {growth:.1f} % (limit {max_growth_percent} %)")
+    for stack in set(current) - set(snapshot):
+        problems.append(f"{stack}: new stack, not in snapshot")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CDK synth-time benchmark and template snapshot check")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--subsets", nargs="*", default=STACK_KEYS,
+                        help="stack keys to also synthesize on their own")
+    parser.add_argument("--check", action="store_true", help="compare with the snapshot")
+    parser.add_argument("--update", action="store_true", help="rewrite the snapshot")
+    parser.add_argument("--max-growth-percent", type=float, default=10)
+    args = parser.parse_args()
+
+    context = base_context()
+    runs = {"all": None, **{key: key for key in args.subsets}}
+    timings = {}
+    stacks = {}
+    errors = []
+
+    for label, subset in runs.items():
+        run_context = dict(context, **({"stacks": subset} if subset else {}))
+        seconds = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as outdir:
+                seconds.append(synth(run_context, outdir))
+                if subset is None:
+                    stacks = describe_templates(outdir)
+                    errors = synth_errors(outdir)
+        timings[label] = {
+            "median_s": round(statistics.median(seconds), 2),
+            "min_s": round(min(seconds), 2),
+        }
+
+    result = {
+        "repeat": args.repeat,
+        "synth_seconds": timings,
+        "templates": {
+            stack: {key: info[key] for key in ("template_bytes", "resources", "digest")}
+            for stack, info in stacks.items()
+        },
+        "total_template_bytes": sum(info["template_bytes"] for info in stacks.values()),
+        "total_resources": sum(info["resources"] for info in stacks.values()),
+        "synth_errors": errors,
+    }
+
+    if args.update:
+        with open(SNAPSHOT, "w") as f:
+            json.dump(stacks, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.check:
+        with open(SNAPSHOT) as f:
+            problems = check(stacks, json.load(f), args.max_growth_percent)
+        result["snapshot_problems"] = problems + errors
+
+    print(json.dumps(result, indent=2))
+    if args.check and result["snapshot_problems"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_iam as iam,
+    Duration,
+    Stack,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "alb_routing" context key. The idle timeout must outlast
+# quiet Jupyter websockets (kernels idle between cells); the API health
+# check hits /healthz, which answers without touching any dependency.
+DEFAULT_ALB_ROUTING = {
+    "http2": True,
+    "idle_timeout_seconds": 1800,
+    "health_check_path": "/healthz",
+    "health_check_interval_seconds": 10,
+    "health_check_timeout_seconds": 5,
+    "healthy_threshold": 2,
+    "unhealthy_threshold": 2,
+    "deregistration_delay_seconds": 30,
+    "slow_start_seconds": 30,
+    "jupyter_rule_priority_min": 1000,
+    "jupyter_rule_priority_max": 49999,
+}
+
+# Per-task target groups are created at launch with this name prefix
+# (see backend/app/routing.py), so IAM can be scoped to them. Each routed
+# task takes one listener rule and one target group, and an ALB allows 100
+# of each by default ("Rules per Application Load Balancer" and "Target
+# groups per Application Load Balancer" in Service Quotas): raise both
+# before running more than about 100 Jupyter tasks at once. The priority
+# range only has to be much wider than that, since priorities are hashed.
+JUPYTER_TARGET_GROUP_PREFIX = "wtj-"
+JUPYTER_PORT = 8888
+
+
+def alb_routing_config(scope: Construct) -> dict:
+    return context_config(scope, "alb_routing", DEFAULT_ALB_ROUTING)
+
+
+def create_api_target_group(scope: Construct, construct_id: str, vpc: ec2.IVpc, port: int) -> elbv2.ApplicationTargetGroup:
+    """API target group with the fast health check, slow start and least outstanding requests."""
+    config = alb_routing_config(scope)
+    return elbv2.ApplicationTargetGroup(
+        scope, construct_id,
+        vpc=vpc,
+        port=port,
+        protocol=elbv2.ApplicationProtocol.HTTP,
+        target_type=elbv2.TargetType.IP,
+        health_check=elbv2.HealthCheck(
+            path=config["health_check_path"],
+            interval=Duration.seconds(config["health_check_interval_seconds"]),
+            timeout=Duration.seconds(config["health_check_timeout_seconds"]),
+            healthy_threshold_count=config["healthy_threshold"],
+            unhealthy_threshold_count=config["unhealthy_threshold"],
+            healthy_http_codes="200"
+        ),
+        # New API tasks ramp up instead of taking a full share of requests
+        slow_start=Duration.seconds(config["slow_start_seconds"]),
+        load_balancing_algorithm_type=elbv2.TargetGroupLoadBalancingAlgorithmType.LEAST_OUTSTANDING_REQUESTS,
+        deregistration_delay=Duration.seconds(config["deregistration_delay_seconds"])
+    )
+
+
+class JupyterRouting(Construct):
+    """
+    Routing surface for per-task Jupyter traffic on the API load balancer.
+
+    Each Jupyter task serves under /user/<task_id>/ (see
+    jupyter/jupyter_server_config.py). At launch the API creates a
+    target group for the task and a listener rule for /user/<task_id>/*
+    (backend/app/routing.py); every path that stops the task deletes both
+    (backend/app/sessions.py).
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        load_balancer: elbv2.ApplicationLoadBalancer,
+        listener: elbv2.ApplicationListener,
+        vpc: ec2.IVpc,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = alb_routing_config(self)
+        self.load_balancer = load_balancer
+        self.listener = listener
+        self.vpc = vpc
+
+    @property
+    def environment(self) -> dict:
+        """Settings the API needs to register per-task routes."""
+        return {
+            "ALB_LISTENER_ARN": self.listener.listener_arn,
+            "ALB_VPC_ID": self.vpc.vpc_id,
+            "JUPYTER_TARGET_GROUP_PREFIX": JUPYTER_TARGET_GROUP_PREFIX,
+            "JUPYTER_RULE_PRIORITIES": (
+                f"{self.config['jupyter_rule_priority_min']}-{self.config['jupyter_rule_priority_max']}"
+            ),
+        }
+
+    def grant_register(self, grantee: iam.IGrantable) -> None:
+        """Allow creating and removing per-task target groups and listener rules."""
+        stack = Stack.of(self)
+        elb_arn = f"arn:{stack.partition}:elasticloadbalancing:{stack.region}:{stack.account}"
+
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "elasticloadbalancing:CreateTargetGroup",
+                    "elasticloadbalancing:ModifyTargetGroupAttributes",
+                    "elasticloadbalancing:RegisterTargets",
+                    "elasticloadbalancing:DeregisterTargets",
+                    "elasticloadbalancing:AddTags"
+                ],
+                resources=[f"{elb_arn}:targetgroup/{JUPYTER_TARGET_GROUP_PREFIX}*/*"]
+            )
+        )
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["elasticloadbalancing:CreateRule", "elasticloadbalancing:AddTags"],
+                resources=[
+                    self.listener.listener_arn,
+                    f"{elb_arn}:listener-rule/{self.load_balancer.load_balancer_full_name}/*"
+                ]
+            )
+        )
+        self.grant_deregister(grantee)
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["elasticloadbalancing:DescribeTargetHealth"],
+                resources=["*"]
+            )
+        )
+
+    def grant_deregister(self, grantee: iam.IGrantable) -> None:
+        """Allow removing per-task target groups and listener rules."""
+        stack = Stack.of(self)
+        elb_arn = f"arn:{stack.partition}:elasticloadbalancing:{stack.region}:{stack.account}"
+
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["elasticloadbalancing:DeleteTargetGroup"],
+                resources=[f"{elb_arn}:targetgroup/{JUPYTER_TARGET_GROUP_PREFIX}*/*"]
+            )
+        )
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["elasticloadbalancing:DeleteRule"],
+                resources=[f"{elb_arn}:listener-rule/{self.load_balancer.load_balancer_full_name}/*"]
+            )
+        )
+        # Describe calls do not support resource-level permissions
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "elasticloadbalancing:DescribeRules",
+                    "elasticloadbalancing:DescribeTargetGroups",
+                    "elasticloadbalancing:DescribeTags"
+                ],
+                resources=["*"]
+            )
+        )
@@ -0,0 +1,116 @@
+from typing import Dict
+
+from aws_cdk import (
+    aws_dynamodb as dynamodb,
+    aws_ecs as ecs,
+    aws_iam as iam,
+    aws_s3 as s3,
+    Stack,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "api_aws_clients" context key, passed to the pooled
+# clients in backend/app/aws.py. The thread pool matches
+# max_pool_connections, so it also caps concurrent AWS calls per task.
+DEFAULT_API_AWS_CLIENTS = {
+    "max_pool_connections": 64,
+    "max_attempts": 5,
+    "connect_timeout_seconds": 2,
+    "read_timeout_seconds": 10,
+    "coalesce_reads": True,
+    # e.g. ["anthropic.claude-3-haiku-20240307-v1:0"]; empty grants no Bedrock access
+    "bedrock_model_ids": [],
+}
+
+
+class ApiAwsAccess(Construct):
+    """
+    What the API calls on every launch or snapshot request: RunTask for the
+    Jupyter families, snapshot manifests in S3, drift reads and Bedrock
+    models. Grants go to the API task role; client settings are returned
+    by .environment.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        role: iam.IRole,
+        cluster: ecs.ICluster,
+        jupyter_task_definitions: Dict[str, ecs.TaskDefinition],
+        snapshots_bucket: s3.IBucket,
+        drift_table: dynamodb.ITable,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "api_aws_clients", DEFAULT_API_AWS_CLIENTS)
+        self.snapshots_bucket = snapshots_bucket
+        self.drift_table = drift_table
+        stack = Stack.of(self)
+
+        # Cold launches, on the tier families and the per-access-point
+        # families the API registers for researchers (<family>-<access point>)
+        role.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:RunTask"],
+                resources=[
+                    f"arn:{stack.partition}:ecs:{stack.region}:{stack.account}:"
+                    f"task-definition/{family}:*"
+                    for task_definition in jupyter_task_definitions.values()
+                    for family in (task_definition.family, f"{task_definition.family}-fsap-*")
+                ],
+                conditions={"ArnEquals": {"ecs:cluster": cluster.cluster_arn}}
+            )
+        )
+        role.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:StopTask", "ecs:DescribeTasks"],
+                resources=["*"],
+                conditions={"ArnEquals": {"ecs:cluster": cluster.cluster_arn}}
+            )
+        )
+        # RunTask tags the task with its environment; TagResource has no
+        # ecs:cluster condition key, so scope by task ARN
+        role.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:TagResource"],
+                resources=[
+                    f"arn:{stack.partition}:ecs:{stack.region}:{stack.account}:task/{cluster.cluster_name}/*"
+                ]
+            )
+        )
+
+        # Snapshot listings read manifests; drift dashboards read events
+        snapshots_bucket.grant_read(role)
+        drift_table.grant_read_data(role)
+
+        if self.config["bedrock_model_ids"]:
+            role.add_to_principal_policy(
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["bedrock:InvokeModel", "bedrock:InvokeModelWithResponseStream"],
+                    resources=[
+                        f"arn:{stack.partition}:bedrock:{stack.region}::foundation-model/{model_id}"
+                        for model_id in self.config["bedrock_model_ids"]
+                    ]
+                )
+            )
+
+    @property
+    def environment(self) -> dict:
+        """Client pool and retry settings plus the resources granted above."""
+        return {
+            "AWS_MAX_POOL_CONNECTIONS": str(self.config["max_pool_connections"]),
+            "AWS_MAX_ATTEMPTS": str(self.config["max_attempts"]),
+            "AWS_CONNECT_TIMEOUT": str(self.config["connect_timeout_seconds"]),
+            "AWS_READ_TIMEOUT": str(self.config["read_timeout_seconds"]),
+            "AWS_COALESCE_READS": str(self.config["coalesce_reads"]).lower(),
+            "SNAPSHOTS_BUCKET": self.snapshots_bucket.bucket_name,
+            "DRIFT_TABLE": self.drift_table.table_name,
+            "BEDROCK_MODEL_IDS": ",".join(self.config["bedrock_model_ids"]),
+        }
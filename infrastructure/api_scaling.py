@@ -0,0 +1,88 @@
+from aws_cdk import (
+    aws_applicationautoscaling as appscaling,
+    aws_ecs as ecs,
+    aws_elasticloadbalancingv2 as elbv2,
+    Duration,
+    TimeZone,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "api_scaling" context key. Set any *_target value to
+# null to drop that policy.
+DEFAULT_API_SCALING = {
+    "min_capacity": 2,
+    "max_capacity": 10,
+    "cpu_target_percent": 60,
+    "memory_target_percent": 75,
+    "requests_per_target": 500,
+    "scale_in_cooldown_seconds": 300,
+    "scale_out_cooldown_seconds": 60,
+    # e.g. [{"name": "GrantDeadline", "schedule": "cron(0 12 ? * MON-FRI *)",
+    #        "min_capacity": 6, "time_zone": "America/New_York"}]
+    "scheduled_scaling": [],
+}
+
+
+class ApiServiceScaling(Construct):
+    """
+    Target-tracking and scheduled scaling for the API Fargate service.
+    Settings are read from the "api_scaling" cdk context key.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        service: ecs.FargateService,
+        target_group: elbv2.ApplicationTargetGroup,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "api_scaling", DEFAULT_API_SCALING)
+
+        scale_in_cooldown = Duration.seconds(self.config["scale_in_cooldown_seconds"])
+        scale_out_cooldown = Duration.seconds(self.config["scale_out_cooldown_seconds"])
+
+        self.scalable_target = service.auto_scale_task_count(
+            min_capacity=self.config["min_capacity"],
+            max_capacity=self.config["max_capacity"]
+        )
+
+        if self.config["cpu_target_percent"] is not None:
+            self.scalable_target.scale_on_cpu_utilization(
+                "CpuTargetTracking",
+                target_utilization_percent=self.config["cpu_target_percent"],
+                scale_in_cooldown=scale_in_cooldown,
+                scale_out_cooldown=scale_out_cooldown
+            )
+
+        if self.config["memory_target_percent"] is not None:
+            self.scalable_target.scale_on_memory_utilization(
+                "MemoryTargetTracking",
+                target_utilization_percent=self.config["memory_target_percent"],
+                scale_in_cooldown=scale_in_cooldown,
+                scale_out_cooldown=scale_out_cooldown
+            )
+
+        # Requires the target group to already be attached to a listener
+        if self.config["requests_per_target"] is not None:
+            self.scalable_target.scale_on_request_count(
+                "RequestCountTargetTracking",
+                requests_per_target=self.config["requests_per_target"],
+                target_group=target_group,
+                scale_in_cooldown=scale_in_cooldown,
+                scale_out_cooldown=scale_out_cooldown
+            )
+
+        # Scheduled scale-up for known peak windows (grant deadlines, term start)
+        for window in self.config["scheduled_scaling"]:
+            time_zone = window.get("time_zone")
+            self.scalable_target.scale_on_schedule(
+                window["name"],
+                schedule=appscaling.Schedule.expression(window["schedule"]),
+                min_capacity=window.get("min_capacity"),
+                max_capacity=window.get("max_capacity"),
+                time_zone=TimeZone.of(time_zone) if time_zone else None
+            )
@@ -1,11 +1,16 @@
 from aws_cdk import (
     Stack,
+    aws_cloudwatch as cloudwatch,
     aws_cognito as cognito,
     RemovalPolicy,
     CfnOutput,
+    Duration,
 )
 from constructs import Construct
 
+from infrastructure.observability import StackObservability
+from infrastructure.stack_params import publish
+
 
 class AuthStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
@@ -66,6 +71,32 @@ class AuthStack(Stack):
             )
         )
 
+        # Sign-in volume and throttling
+        def cognito_metric(metric_name):
+            return cloudwatch.Metric(
+                namespace="AWS/Cognito",
+                metric_name=metric_name,
+                dimensions_map={
+                    "UserPool": self.user_pool.user_pool_id,
+                    "UserPoolClient": self.user_pool_client.user_pool_client_id
+                },
+                statistic="Sum",
+                period=Duration.minutes(5)
+            )
+
+        self.observability = StackObservability(self, "Observability")
+        self.observability.add_metrics(
+            "Sign-ins and token refreshes",
+            [cognito_metric("SignInSuccesses"), cognito_metric("TokenRefreshSuccesses")]
+        )
+        self.observability.add_metrics(
+            "Cognito throttles",
+            [cognito_metric("SignInThrottles"), cognito_metric("TokenRefreshThrottles")]
+        )
+
+        publish(self, "auth/user-pool-id", self.user_pool.user_pool_id)
+        publish(self, "auth/user-pool-client-id", self.user_pool_client.user_pool_client_id)
+
         CfnOutput(self, "UserPoolId", value=self.user_pool.user_pool_id)
         CfnOutput(self, "UserPoolClientId", value=self.user_pool_client.user_pool_client_id)
         CfnOutput(
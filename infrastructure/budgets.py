@@ -0,0 +1,170 @@
+import json
+
+import jsii
+from aws_cdk import (
+    Annotations,
+    IAspect,
+    Stack,
+    aws_dynamodb as dynamodb,
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_efs as efs,
+    aws_lambda as lambda_,
+    aws_logs as logs,
+)
+from constructs import IConstruct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "resource_budget" context key. The budget records what
+# the stacks cost and how data flows today; a change that goes past it
+# fails synth (cdk synth/deploy exit non-zero on errors) until the budget
+# is raised on purpose in the same change.
+DEFAULT_RESOURCE_BUDGET = {
+    # NAT gateways per VPC, and private subnets whose default route uses a
+    # NAT gateway in another AZ (billed per GB in both directions)
+    "max_nat_gateways": 1,
+    "max_cross_az_nat_routes": 1,
+    # Log groups must expire; null only checks that a retention is set
+    "max_log_retention_days": 365,
+    "efs_throughput_modes": ["elastic", "provisioned"],
+    # Endpoints that keep image pulls, logs and data access off the NAT
+    "required_gateway_endpoints": ["s3", "dynamodb"],
+    "required_interface_endpoints": ["ecr.api", "ecr.dkr", "logs"],
+    # Tables whose items are transient and must keep their TTL
+    "ttl_tables": ["DriftTrackingTable", "WarmPoolTable"],
+    # Tables allowed to use provisioned capacity
+    "provisioned_tables": [],
+}
+
+# Lambdas CDK adds for its own custom resources (log retention, AwsCustomResource
+# singletons) manage their own logs and are not checked
+FRAMEWORK_FUNCTION_PREFIXES = ("AWS", "LogRetention")
+
+
+def resource_budget(scope: IConstruct) -> dict:
+    return context_config(scope, "resource_budget", DEFAULT_RESOURCE_BUDGET)
+
+
+def _resolved(node: IConstruct, value) -> str:
+    return json.dumps(Stack.of(node).resolve(value), sort_keys=True)
+
+
+@jsii.implements(IAspect)
+class ResourceBudget:
+    """
+    Synth-time resource budget and performance invariants.
+
+    Applied to the whole app (Aspects.of(app).add(ResourceBudget(app))).
+    Reports every violation as an error on the offending construct:
+
+    - VPCs: NAT gateway count, cross-AZ NAT routes, required endpoints
+    - Log groups and Lambda functions: bounded retention
+    - EFS: throughput mode, no One Zone file systems
+    - DynamoDB: on-demand billing, TTL on transient tables
+    - ECS services: an auto scaling target instead of a fixed desired_count
+    """
+    def __init__(self, scope: IConstruct) -> None:
+        self.budget = resource_budget(scope)
+
+    def visit(self, node: IConstruct) -> None:
+        if isinstance(node, ec2.Vpc):
+            self._check_vpc(node)
+        elif isinstance(node, logs.CfnLogGroup):
+            self._check_log_group(node)
+        elif isinstance(node, lambda_.Function):
+            self._check_function(node)
+        elif isinstance(node, efs.CfnFileSystem):
+            self._check_file_system(node)
+        elif isinstance(node, dynamodb.CfnTable):
+            self._check_table(node)
+        elif isinstance(node, ecs.BaseService):
+            self._check_service(node)
+
+    def _error(self, node: IConstruct, message: str) -> None:
+        Annotations.of(node).add_error(f"[resource_budget] {message}")
+
+    def _check_vpc(self, vpc: ec2.Vpc) -> None:
+        # NAT gateways live in the public subnets; map each to its AZ
+        nat_zones = {}
+        for subnet in vpc.public_subnets:
+            nat = subnet.node.try_find_child("NATGateway")
+            if nat is not None:
+                nat_zones[_resolved(vpc, nat.ref)] = _resolved(vpc, subnet.availability_zone)
+
+        if len(nat_zones) > self.budget["max_nat_gateways"]:
+            self._error(
+                vpc,
+                f"{len(nat_zones)} NAT gateways, budget is {self.budget['max_nat_gateways']} "
+                "(raise max_nat_gateways to accept the cost)"
+            )
+
+        cross_az = 0
+        for subnet in vpc.private_subnets:
+            route = subnet.node.try_find_child("DefaultRoute")
+            if isinstance(route, ec2.CfnRoute) and route.nat_gateway_id:
+                zone = nat_zones.get(_resolved(vpc, route.nat_gateway_id))
+                if zone is not None and zone != _resolved(vpc, subnet.availability_zone):
+                    cross_az += 1
+        if cross_az > self.budget["max_cross_az_nat_routes"]:
+            self._error(
+                vpc,
+                f"{cross_az} private subnets route through a NAT gateway in another AZ, "
+                f"budget is {self.budget['max_cross_az_nat_routes']}"
+            )
+
+        # Endpoints are children of the VPC; match on the service name suffix
+        service_names = [
+            _resolved(vpc, child.service_name)
+            for child in vpc.node.find_all()
+            if isinstance(child, ec2.CfnVPCEndpoint)
+        ]
+        required = self.budget["required_gateway_endpoints"] + self.budget["required_interface_endpoints"]
+        for name in required:
+            if not any(f'.{name}"' in service_name for service_name in service_names):
+                self._error(vpc, f"missing VPC endpoint for {name}")
+
+    def _check_log_group(self, log_group: logs.CfnLogGroup) -> None:
+        retention = log_group.retention_in_days
+        if retention is None:
+            self._error(log_group, "log group has no retention (never expires)")
+        elif self.budget["max_log_retention_days"] is not None and retention > self.budget["max_log_retention_days"]:
+            self._error(
+                log_group,
+                f"log retention {retention} days exceeds {self.budget['max_log_retention_days']}"
+            )
+
+    def _check_function(self, function: lambda_.Function) -> None:
+        if function.node.id.startswith(FRAMEWORK_FUNCTION_PREFIXES):
+            return
+        # Without log_retention the function's /aws/lambda log group never expires
+        if function.node.try_find_child("LogRetention") is None:
+            self._error(function, "Lambda function has no log_retention (log group never expires)")
+
+    def _check_file_system(self, file_system: efs.CfnFileSystem) -> None:
+        mode = (file_system.throughput_mode or "bursting").lower()
+        if mode not in self.budget["efs_throughput_modes"]:
+            self._error(
+                file_system,
+                f"EFS throughput mode {mode} is not one of {self.budget['efs_throughput_modes']}"
+            )
+        # One Zone file systems make every mount from the other AZ cross-AZ
+        if file_system.availability_zone_name:
+            self._error(file_system, "One Zone EFS file system: mounts from other AZs cross AZs")
+
+    def _check_table(self, table: dynamodb.CfnTable) -> None:
+        name = table.node.scope.node.id
+        if table.billing_mode != "PAY_PER_REQUEST" and name not in self.budget["provisioned_tables"]:
+            self._error(table, f"{name} uses provisioned capacity (add it to provisioned_tables to allow)")
+
+        if name in self.budget["ttl_tables"]:
+            spec = table.time_to_live_specification
+            if spec is None or not getattr(spec, "enabled", False):
+                self._error(table, f"{name} must keep its TTL attribute enabled")
+
+    def _check_service(self, service: ecs.BaseService) -> None:
+        # auto_scale_task_count() adds a TaskCount child; a service without
+        # it is pinned to its desired_count
+        if service.node.try_find_child("TaskCount") is None:
+            self._error(service, "ECS service has no auto scaling target (fixed desired_count)")
@@ -0,0 +1,77 @@
+from aws_cdk import (
+    aws_dynamodb as dynamodb,
+    aws_ec2 as ec2,
+    aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_logs as logs,
+    Duration,
+)
+from constructs import Construct
+
+from infrastructure.service_code import service_code
+
+
+class MetadataCacheInvalidator(Construct):
+    """
+    Evicts cached environment metadata for every EnvironmentMetadataTable
+    write, from the table's stream (services/cache_invalidator). The API
+    invalidates its own writes inline; this covers everything else that
+    writes the table. Runs in the isolated subnets next to the cache, which
+    is all it talks to.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.IVpc,
+        metadata_table: dynamodb.ITable,
+        cache_security_group_id: str,
+        cache_endpoint_address: str,
+        cache_endpoint_port: str,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.security_group = ec2.SecurityGroup(
+            self, "SecurityGroup",
+            vpc=vpc,
+            description="Metadata cache invalidator Lambda",
+            allow_all_outbound=True
+        )
+        # CacheStack deploys first and cannot reference this group
+        ec2.CfnSecurityGroupIngress(
+            self, "CacheIngress",
+            group_id=cache_security_group_id,
+            source_security_group_id=self.security_group.security_group_id,
+            ip_protocol="tcp",
+            from_port=6379,
+            to_port=6379,
+            description="Allow Valkey from the cache invalidator"
+        )
+
+        self.function = lambda_.Function(
+            self, "InvalidatorFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.handler",
+            code=service_code("cache_invalidator", "backend/app"),
+            timeout=Duration.seconds(30),
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED),
+            security_groups=[self.security_group],
+            environment={
+                "CACHE_HOST": cache_endpoint_address,
+                "CACHE_PORT": cache_endpoint_port,
+                "CACHE_TLS": "true",
+            },
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+
+        # Small batches: the point is to evict soon after the write
+        self.function.add_event_source(
+            lambda_event_sources.DynamoEventSource(
+                metadata_table,
+                starting_position=lambda_.StartingPosition.LATEST,
+                batch_size=100,
+                bisect_batch_on_error=True,
+                retry_attempts=5
+            )
+        )
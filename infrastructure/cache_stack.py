@@ -0,0 +1,109 @@
+from aws_cdk import (
+    Stack,
+    aws_cloudwatch as cloudwatch,
+    aws_ec2 as ec2,
+    aws_elasticache as elasticache,
+    CfnOutput,
+    Duration,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+from infrastructure.observability import StackObservability
+from infrastructure.stack_params import export_legacy, publish
+
+
+# Defaults for the "cache" context key
+DEFAULT_CACHE = {
+    "engine": "valkey",
+    "engine_version": "7.2",
+    "node_type": "cache.t4g.small",
+    "replicas": 1,
+}
+
+
+class CacheStack(Stack):
+    """
+    Valkey (Redis-compatible) replication group in the isolated subnets,
+    used by the API as a read-through cache in front of
+    EnvironmentMetadataTable. Client access is opened by ComputeStack.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        **kwargs
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.config = context_config(self, "cache", DEFAULT_CACHE)
+
+        # Security group for the cache; no ingress until a client is allowed
+        self.cache_security_group = ec2.SecurityGroup(
+            self, "CacheSecurityGroup",
+            vpc=vpc,
+            description="Security group for the metadata cache",
+            allow_all_outbound=False
+        )
+
+        subnet_group = elasticache.CfnSubnetGroup(
+            self, "CacheSubnetGroup",
+            description="Isolated subnets for the metadata cache",
+            subnet_ids=vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED).subnet_ids
+        )
+
+        replicas = self.config["replicas"]
+        self.replication_group = elasticache.CfnReplicationGroup(
+            self, "MetadataCache",
+            replication_group_description="Read-through cache for environment metadata",
+            engine=self.config["engine"],
+            engine_version=self.config["engine_version"],
+            cache_node_type=self.config["node_type"],
+            num_cache_clusters=1 + replicas,
+            automatic_failover_enabled=replicas > 0,
+            multi_az_enabled=replicas > 0,
+            cache_subnet_group_name=subnet_group.ref,
+            security_group_ids=[self.cache_security_group.security_group_id],
+            transit_encryption_enabled=True,
+            at_rest_encryption_enabled=True,
+            port=6379
+        )
+
+        self.endpoint_address = self.replication_group.attr_primary_end_point_address
+        self.endpoint_port = self.replication_group.attr_primary_end_point_port
+
+        # Node-level metrics for the primary (member clusters are <id>-00N)
+        def cache_metric(metric_name, statistic="Average"):
+            return cloudwatch.Metric(
+                namespace="AWS/ElastiCache",
+                metric_name=metric_name,
+                dimensions_map={"CacheClusterId": f"{self.replication_group.ref}-001"},
+                statistic=statistic,
+                period=Duration.minutes(1)
+            )
+
+        self.observability = StackObservability(self, "Observability")
+        self.observability.add_metrics(
+            "Metadata cache hit rate and engine CPU",
+            [cache_metric("CacheHitRate"), cache_metric("EngineCPUUtilization")]
+        )
+        self.observability.add_metrics(
+            "Metadata cache connections and evictions",
+            [cache_metric("CurrConnections"), cache_metric("Evictions", "Sum")]
+        )
+
+        # Client access is opened by ComputeStack using these
+        publish(self, "cache/security-group-id", self.cache_security_group.security_group_id)
+        publish(self, "cache/endpoint-address", self.endpoint_address)
+        publish(self, "cache/endpoint-port", self.endpoint_port)
+
+        export_legacy(
+            self,
+            self.cache_security_group.security_group_id,
+            self.endpoint_address,
+            self.endpoint_port,
+        )
+
+        CfnOutput(self, "CacheEndpoint", value=self.endpoint_address)
+        CfnOutput(self, "CachePort", value=self.endpoint_port)
@@ -0,0 +1,141 @@
+from typing import List
+
+import jsii
+from aws_cdk import (
+    aws_dynamodb as dynamodb,
+    aws_ecs as ecs,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_logs as logs,
+    aws_stepfunctions_tasks as tasks,
+    Duration,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+from infrastructure.service_code import service_code
+
+
+# Defaults for the "capacity_providers" context key: a weighted
+# FARGATE/FARGATE_SPOT strategy per workload class. "base" tasks always run
+# on that provider; the rest are split by weight. Interactive Jupyter stays
+# on on-demand by default; move it to spot by adding FARGATE_SPOT here,
+# interrupted kernels are checkpointed to EFS (jupyter/westtek_checkpoint.py).
+DEFAULT_CAPACITY_PROVIDERS = {
+    "api": [
+        {"provider": "FARGATE", "base": 2, "weight": 1},
+        {"provider": "FARGATE_SPOT", "weight": 1},
+    ],
+    "jupyter": [
+        {"provider": "FARGATE", "weight": 1},
+    ],
+    "batch": [
+        {"provider": "FARGATE_SPOT", "weight": 3},
+        {"provider": "FARGATE", "weight": 1},
+    ],
+}
+
+
+def capacity_provider_strategies(scope: Construct, workload: str) -> List[ecs.CapacityProviderStrategy]:
+    """Weighted capacity provider strategy for a workload class."""
+    config = context_config(scope, "capacity_providers", DEFAULT_CAPACITY_PROVIDERS)
+    return [
+        ecs.CapacityProviderStrategy(
+            capacity_provider=entry["provider"],
+            base=entry.get("base"),
+            weight=entry.get("weight")
+        )
+        for entry in config[workload]
+    ]
+
+
+def capacity_provider_strategy_json(scope: Construct, workload: str) -> List[dict]:
+    """The same strategy in RunTask API shape, for callers launching tasks at runtime."""
+    return [
+        {
+            "capacityProvider": strategy.capacity_provider,
+            "base": strategy.base or 0,
+            "weight": strategy.weight or 0,
+        }
+        for strategy in capacity_provider_strategies(scope, workload)
+    ]
+
+
+@jsii.implements(tasks.IEcsLaunchTarget)
+class CapacityProviderLaunchTarget:
+    """
+    Step Functions ECS launch target that uses a capacity provider strategy.
+    EcsFargateLaunchTarget always renders LaunchType=FARGATE, which rules
+    out Fargate Spot.
+    """
+    def __init__(self, strategies: List[ecs.CapacityProviderStrategy]) -> None:
+        self.strategies = strategies
+
+    def bind(self, _task, *, task_definition, cluster=None) -> tasks.EcsLaunchTargetConfig:
+        return tasks.EcsLaunchTargetConfig(
+            parameters={
+                "PlatformVersion": ecs.FargatePlatformVersion.LATEST.value,
+                "CapacityProviderStrategy": [
+                    {
+                        "CapacityProvider": strategy.capacity_provider,
+                        "Base": strategy.base or 0,
+                        "Weight": strategy.weight or 0,
+                    }
+                    for strategy in self.strategies
+                ],
+            }
+        )
+
+
+class SpotInterruptionHandler(Construct):
+    """
+    Marks environments INTERRUPTED in the metadata table when Fargate Spot
+    reclaims their Jupyter task, so the API can offer a checkpoint restore,
+    and frees the task's warm pool slot and routes with the backend's
+    JupyterSessions (bundled with the function; the stack supplies its
+    settings and grants).
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        cluster: ecs.Cluster,
+        metadata_table: dynamodb.Table,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.function = lambda_.Function(
+            self, "HandlerFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.handler",
+            code=service_code("spot_interruption", "backend/app"),
+            timeout=Duration.seconds(30),
+            environment={
+                "METADATA_TABLE": metadata_table.table_name
+            },
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+        metadata_table.grant_read_write_data(self.function)
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:ListTagsForResource"],
+                resources=[f"arn:{cluster.stack.partition}:ecs:{cluster.stack.region}:"
+                           f"{cluster.stack.account}:task/{cluster.cluster_name}/*"]
+            )
+        )
+
+        self.rule = events.Rule(
+            self, "SpotInterruptionRule",
+            event_pattern=events.EventPattern(
+                source=["aws.ecs"],
+                detail_type=["ECS Task State Change"],
+                detail={
+                    "clusterArn": [cluster.cluster_arn],
+                    "stopCode": ["SpotInterruption"]
+                }
+            ),
+            targets=[targets.LambdaFunction(self.function)]
+        )
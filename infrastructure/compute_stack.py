@@ -4,15 +4,36 @@ from aws_cdk import (
     aws_ec2 as ec2,
     aws_efs as efs,
     aws_ecr as ecr,
+    aws_dynamodb as dynamodb,
     aws_iam as iam,
-    aws_logs as logs,
-    aws_cognito as cognito,
+    aws_s3 as s3,
     aws_elasticloadbalancingv2 as elbv2,
     Duration,
     CfnOutput,
 )
 from constructs import Construct
 
+from infrastructure.alb_routing import JUPYTER_PORT, JupyterRouting, alb_routing_config, create_api_target_group
+from infrastructure.api_access import ApiAwsAccess
+from infrastructure.api_scaling import ApiServiceScaling
+from infrastructure.cache_invalidation import MetadataCacheInvalidator
+from infrastructure.capacity import (
+    SpotInterruptionHandler,
+    capacity_provider_strategies,
+    capacity_provider_strategy_json,
+)
+from infrastructure.config import context_config
+from infrastructure.drift_ingestion import DriftIngestion
+from infrastructure.efs_restore import grant_restored_file_system_access
+from infrastructure.idle_reaper import IdleReaper
+from infrastructure.images import asset_platform, image_reference, runtime_platform
+from infrastructure.jupyter_tiers import DEFAULT_JUPYTER_TASK_TIER, jupyter_task_tiers
+from infrastructure.log_pipeline import TaskLogPipeline
+from infrastructure.observability import API_METRICS_NAMESPACE, StackObservability, add_adot_collector
+from infrastructure.stack_params import export_legacy, lookup, publish
+from infrastructure.storage_stack import DEFAULT_DRIFT_TRACKING
+from infrastructure.warm_pool import DEFAULT_WARM_POOL, JupyterWarmPool
+
 
 class ComputeStack(Stack):
     def __init__(
@@ -20,14 +41,45 @@ class ComputeStack(Stack):
         scope: Construct,
         construct_id: str,
         vpc: ec2.Vpc,
-        efs_file_system: efs.FileSystem,
-        jupyter_ecr_repo: ecr.Repository,
-        api_ecr_repo: ecr.Repository,
-        user_pool: cognito.UserPool,
+        efs_security_group: ec2.SecurityGroup,
         **kwargs
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # Storage and cache resources, resolved from the SSM parameters
+        # StorageStack and CacheStack publish (infrastructure/stack_params.py)
+        efs_file_system = efs.FileSystem.from_file_system_attributes(
+            self, "NotebookFileSystem",
+            file_system_id=lookup(self, "storage/efs-file-system-id"),
+            security_group=efs_security_group
+        )
+        notebook_access_point_id = lookup(self, "storage/notebook-access-point-id")
+        jupyter_ecr_repo = ecr.Repository.from_repository_name(
+            self, "JupyterECRRepo", lookup(self, "storage/jupyter-ecr-repo-name")
+        )
+        api_ecr_repo = ecr.Repository.from_repository_name(
+            self, "APIECRRepo", lookup(self, "storage/api-ecr-repo-name")
+        )
+        warm_pool_table = dynamodb.Table.from_table_name(
+            self, "WarmPoolTable", lookup(self, "storage/warm-pool-table-name")
+        )
+        metadata_table = dynamodb.Table.from_table_attributes(
+            self, "EnvironmentMetadataTable",
+            table_name=lookup(self, "storage/metadata-table-name"),
+            table_stream_arn=lookup(self, "storage/metadata-table-stream-arn")
+        )
+        drift_table = dynamodb.Table.from_table_name(
+            self, "DriftTrackingTable", lookup(self, "storage/drift-table-name")
+        )
+        snapshots_bucket = s3.Bucket.from_bucket_name(
+            self, "SnapshotsBucket", lookup(self, "storage/snapshots-bucket-name")
+        )
+        # Same context key StorageStack reads, so both agree on the shard counts
+        drift_config = context_config(self, "drift_tracking", DEFAULT_DRIFT_TRACKING)
+        cache_security_group_id = lookup(self, "cache/security-group-id")
+        cache_endpoint_address = lookup(self, "cache/endpoint-address")
+        cache_endpoint_port = lookup(self, "cache/endpoint-port")
+
         # Security group for ECS tasks
         self.ecs_security_group = ec2.SecurityGroup(
             self, "ECSTaskSecurityGroup",
@@ -57,12 +109,43 @@ class ComputeStack(Stack):
             connection=ec2.Port.tcp(8000),
             description="Allow traffic from ALB"
         )
+        self.ecs_security_group.add_ingress_rule(
+            peer=self.alb_security_group,
+            connection=ec2.Port.tcp(JUPYTER_PORT),
+            description="Allow Jupyter traffic from ALB"
+        )
+
+        # Allow ECS tasks to reach the metadata cache. The rule lives in this
+        # stack because CacheStack deploys first and cannot reference ours.
+        ec2.CfnSecurityGroupIngress(
+            self, "CacheIngressFromECSTasks",
+            group_id=cache_security_group_id,
+            source_security_group_id=self.ecs_security_group.security_group_id,
+            ip_protocol="tcp",
+            from_port=6379,
+            to_port=6379,
+            description="Allow Valkey from ECS tasks"
+        )
+
+        # Jupyter and warm-pool tasks run in this security group, not in
+        # NetworkStack's ECS group, so they need their own NFS rule on the
+        # notebook (and any restored) file system's mount targets
+        ec2.CfnSecurityGroupIngress(
+            self, "EfsIngressFromECSTasks",
+            group_id=efs_security_group.security_group_id,
+            source_security_group_id=self.ecs_security_group.security_group_id,
+            ip_protocol="tcp",
+            from_port=2049,
+            to_port=2049,
+            description="Allow NFS from ECS tasks"
+        )
 
         # ECS Cluster
         self.cluster = ecs.Cluster(
             self, "WestTekCluster",
             vpc=vpc,
-            container_insights=True
+            container_insights=True,
+            enable_fargate_capacity_providers=True
         )
 
         # Task execution role
@@ -91,23 +174,29 @@ class ComputeStack(Stack):
             self, "APITaskDefinition",
             memory_limit_mib=2048,
             cpu=1024,
+            runtime_platform=runtime_platform(self, "api"),
             execution_role=task_execution_role,
             task_role=api_task_role
         )
 
+        # awslogs or a FireLens router per task definition (configured via
+        # the "log_pipeline" context key)
+        self.log_pipeline = TaskLogPipeline(self, "LogPipeline")
+
         # API Container (placeholder - will be built separately)
         api_container = self.api_task_definition.add_container(
             "APIContainer",
-            image=ecs.ContainerImage.from_registry("public.ecr.aws/docker/library/python:3.11-slim"),
-            logging=ecs.LogDrivers.aws_logs(
-                stream_prefix="api",
-                log_retention=logs.RetentionDays.ONE_WEEK
+            image=ecs.ContainerImage.from_ecr_repository(
+                api_ecr_repo, image_reference(self, "api")
+            ),
+            logging=self.log_pipeline.logging(
+                self.api_task_definition, "api", "api", asset_platform(self, "api")
             ),
             environment={
                 "ENVIRONMENT": "production"
             },
-            # Placeholder command to keep container running
-            command=["python3", "-m", "http.server", "8000"],
+            # Serves the /healthz endpoint the ALB checks
+            command=["python3", "-m", "app.server"],
             essential=True
         )
 
@@ -115,98 +204,363 @@ class ComputeStack(Stack):
             ecs.PortMapping(container_port=8000, protocol=ecs.Protocol.TCP)
         )
 
-        # Application Load Balancer for API (internal)
+        # X-Ray/OTLP collector sidecar; hot-path timings go out as EMF
+        # (backend/app/metrics.py)
+        add_adot_collector(self.api_task_definition, api_container)
+        api_container.add_environment("EMF_NAMESPACE", API_METRICS_NAMESPACE)
+
+        # Application Load Balancer for API and Jupyter traffic (internal,
+        # configured via the "alb_routing" context key)
+        alb_routing = alb_routing_config(self)
         self.api_alb = elbv2.ApplicationLoadBalancer(
             self, "APIALB",
             vpc=vpc,
             internet_facing=False,
+            http2_enabled=alb_routing["http2"],
+            idle_timeout=Duration.seconds(alb_routing["idle_timeout_seconds"]),
             security_group=self.alb_security_group,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS)
         )
 
-        # API Service
+        # API Service (task count is managed by ApiServiceScaling below)
         self.api_service = ecs.FargateService(
             self, "APIService",
             cluster=self.cluster,
             task_definition=self.api_task_definition,
-            desired_count=1,  # Start with 1 for testing
+            capacity_provider_strategies=capacity_provider_strategies(self, "api"),
             assign_public_ip=False,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
             security_groups=[self.ecs_security_group]
         )
 
         # Target group and listener
-        api_target_group = elbv2.ApplicationTargetGroup(
-            self, "APITargetGroup",
-            vpc=vpc,
-            port=8000,
-            protocol=elbv2.ApplicationProtocol.HTTP,
-            target_type=elbv2.TargetType.IP,
-            health_check=elbv2.HealthCheck(
-                path="/",
-                interval=Duration.seconds(60),
-                timeout=Duration.seconds(30),
-                healthy_threshold_count=2,
-                unhealthy_threshold_count=3
-            ),
-            deregistration_delay=Duration.seconds(30)
-        )
+        api_target_group = create_api_target_group(self, "APITargetGroup", vpc=vpc, port=8000)
 
         self.api_service.attach_to_application_target_group(api_target_group)
 
-        self.api_alb.add_listener(
+        self.api_listener = self.api_alb.add_listener(
             "APIListener",
             port=80,
             default_target_groups=[api_target_group]
         )
 
-        # Jupyter Task Definition (template for dynamic tasks)
+        # /user/<task_id>/* rules to per-task Jupyter target groups,
+        # registered by the API at launch
+        self.jupyter_routing = JupyterRouting(
+            self, "JupyterRouting",
+            load_balancer=self.api_alb,
+            listener=self.api_listener,
+            vpc=vpc
+        )
+
+        # Autoscaling for the API tier (configured via the "api_scaling" context key)
+        self.api_scaling = ApiServiceScaling(
+            self, "APIServiceScaling",
+            service=self.api_service,
+            target_group=api_target_group
+        )
+
+        # Jupyter Task Definitions (templates for dynamic tasks), one per
+        # size tier (configured via the "jupyter_task_tiers" context key)
         jupyter_task_role = iam.Role(
             self, "JupyterTaskRole",
             assumed_by=iam.ServicePrincipal("ecs-tasks.amazonaws.com")
         )
 
-        self.jupyter_task_definition = ecs.FargateTaskDefinition(
-            self, "JupyterTaskDefinition",
-            memory_limit_mib=4096,
-            cpu=2048,
-            execution_role=task_execution_role,
-            task_role=jupyter_task_role
+        efs_file_system.grant(
+            jupyter_task_role,
+            "elasticfilesystem:ClientMount",
+            "elasticfilesystem:ClientWrite"
+        )
+        # Sessions relaunched on a file system the restore workflow created
+        grant_restored_file_system_access(
+            jupyter_task_role, efs_file_system.file_system_id,
+            "elasticfilesystem:ClientMount",
+            "elasticfilesystem:ClientWrite"
         )
 
-        # Add EFS volume to Jupyter task
-        self.jupyter_task_definition.add_volume(
-            name="notebook-storage",
-            efs_volume_configuration=ecs.EfsVolumeConfiguration(
-                file_system_id=efs_file_system.file_system_id
-            )
+        # Drift-collector sidecar and batched ingestion into DriftTrackingTable
+        # (configured via the "drift_ingestion" context key)
+        self.drift_ingestion = DriftIngestion(
+            self, "DriftIngestion",
+            cluster=self.cluster,
+            drift_table=drift_table,
+            drift_config=drift_config
         )
 
-        # Jupyter Container (placeholder)
-        jupyter_container = self.jupyter_task_definition.add_container(
-            "JupyterContainer",
-            image=ecs.ContainerImage.from_registry("jupyter/scipy-notebook:latest"),
-            logging=ecs.LogDrivers.aws_logs(
-                stream_prefix="jupyter",
-                log_retention=logs.RetentionDays.ONE_WEEK
-            ),
-            environment={
-                "JUPYTER_ENABLE_LAB": "yes"
-            },
-            essential=True
+        # Jupyter Container, pinned to an exact image so snapshots are reproducible
+        jupyter_image = image_reference(self, "jupyter")
+
+        # Parks idle researcher tasks (configured via the "idle_reaper" context key)
+        self.idle_reaper = IdleReaper(
+            self, "IdleReaper",
+            cluster=self.cluster,
+            vpc=vpc,
+            task_security_group=self.ecs_security_group,
+            metadata_table=metadata_table
         )
 
-        jupyter_container.add_port_mappings(
-            ecs.PortMapping(container_port=8888, protocol=ecs.Protocol.TCP)
+        # Warm pool tasks start before anyone owns them, so they get their own
+        # task definitions without notebook storage: handing out the shared
+        # notebook access point would put every researcher on a warm task in
+        # one directory. Only launches that need no researcher access point
+        # claim warm tasks (see backend/app/warm_pool.py).
+        warm_task_tiers = {
+            tier_config.get("task_tier", DEFAULT_JUPYTER_TASK_TIER)
+            for tier_config in context_config(self, "jupyter_warm_pool", DEFAULT_WARM_POOL)["tiers"].values()
+        }
+        task_tiers = jupyter_task_tiers(self)
+        variants = [(tier, tier_config, False) for tier, tier_config in task_tiers.items()] + [
+            (tier, task_tiers[tier], True) for tier in sorted(warm_task_tiers)
+        ]
+
+        self.jupyter_task_definitions = {}
+        self.jupyter_warm_task_definitions = {}
+        for tier, tier_config, warm in variants:
+            # The default tier keeps the original construct ID
+            task_definition_id = (
+                f"Jupyter{tier.capitalize()}WarmTaskDefinition" if warm
+                else "JupyterTaskDefinition" if tier == DEFAULT_JUPYTER_TASK_TIER
+                else f"Jupyter{tier.capitalize()}TaskDefinition"
+            )
+            task_definition = ecs.FargateTaskDefinition(
+                self, task_definition_id,
+                memory_limit_mib=tier_config["memory_mib"],
+                cpu=tier_config["cpu"],
+                ephemeral_storage_gib=tier_config.get("ephemeral_storage_gib"),
+                runtime_platform=runtime_platform(self, "jupyter"),
+                execution_role=task_execution_role,
+                task_role=jupyter_task_role
+            )
+            if warm:
+                self.jupyter_warm_task_definitions[tier] = task_definition
+            else:
+                self.jupyter_task_definitions[tier] = task_definition
+
+                # Add EFS volume to Jupyter task. Mounts go through an access point
+                # with IAM auth and TLS; researcher launches swap in their own access
+                # point when the API registers a task definition revision.
+                task_definition.add_volume(
+                    name="notebook-storage",
+                    efs_volume_configuration=ecs.EfsVolumeConfiguration(
+                        file_system_id=efs_file_system.file_system_id,
+                        transit_encryption="ENABLED",
+                        authorization_config=ecs.AuthorizationConfig(
+                            access_point_id=notebook_access_point_id,
+                            iam="ENABLED"
+                        )
+                    )
+                )
+
+            jupyter_container = task_definition.add_container(
+                "JupyterContainer",
+                image=ecs.ContainerImage.from_ecr_repository(jupyter_ecr_repo, jupyter_image),
+                logging=self.log_pipeline.logging(
+                    task_definition, "jupyter", "jupyter", asset_platform(self, "jupyter")
+                ),
+                environment={
+                    "JUPYTER_ENABLE_LAB": "yes",
+                    "JUPYTER_IMAGE": jupyter_ecr_repo.repository_uri_for_tag_or_digest(jupyter_image),
+                    "JUPYTER_TASK_TIER": tier
+                },
+                # Room for the checkpoint extension to save kernels on SIGTERM
+                # (Fargate Spot gives two minutes' notice)
+                stop_timeout=Duration.seconds(120),
+                essential=True
+            )
+
+            jupyter_container.add_port_mappings(
+                ecs.PortMapping(container_port=JUPYTER_PORT, protocol=ecs.Protocol.TCP)
+            )
+
+            # Warm tasks keep /home/jovyan/work in task storage
+            if not warm:
+                jupyter_container.add_mount_points(
+                    ecs.MountPoint(
+                        source_volume="notebook-storage",
+                        container_path="/home/jovyan/work",
+                        read_only=False
+                    )
+                )
+
+            # Shared scratch volume where Jupyter writes package/config state
+            task_definition.add_volume(name="drift-state")
+            jupyter_container.add_mount_points(
+                ecs.MountPoint(
+                    source_volume="drift-state",
+                    container_path="/var/run/drift",
+                    read_only=False
+                )
+            )
+
+            self.drift_ingestion.add_collector(
+                task_definition,
+                watched_container=jupyter_container,
+                state_volume="drift-state",
+                platform=asset_platform(self, "jupyter")
+            )
+
+            # Jupyter's runtime directory, read by the idle-monitor sidecar
+            task_definition.add_volume(name="jupyter-runtime")
+            jupyter_container.add_mount_points(
+                ecs.MountPoint(
+                    source_volume="jupyter-runtime",
+                    container_path="/var/run/jupyter",
+                    read_only=False
+                )
+            )
+
+            self.idle_reaper.add_monitor(
+                task_definition,
+                watched_container=jupyter_container,
+                runtime_volume="jupyter-runtime",
+                platform=asset_platform(self, "jupyter")
+            )
+
+            if warm:
+                continue
+            CfnOutput(
+                self, f"JupyterTaskDefinitionArn{tier.capitalize()}",
+                value=task_definition.task_definition_arn,
+                description=f"Jupyter task definition for the '{tier}' tier "
+                            f"({tier_config['cpu'] / 1024:g} vCPU / {tier_config['memory_mib'] / 1024:g} GiB)"
+            )
+
+        self.jupyter_task_definition = self.jupyter_task_definitions[DEFAULT_JUPYTER_TASK_TIER]
+
+        # Pre-started Jupyter tasks (configured via the "jupyter_warm_pool" context key)
+        self.jupyter_warm_pool = JupyterWarmPool(
+            self, "JupyterWarmPool",
+            cluster=self.cluster,
+            warm_pool_table=warm_pool_table,
+            security_groups=[self.ecs_security_group],
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS)
         )
 
-        jupyter_container.add_mount_points(
-            ecs.MountPoint(
-                source_volume="notebook-storage",
-                container_path="/home/jovyan/work",
-                read_only=False
+        for tier, tier_config in self.jupyter_warm_pool.config["tiers"].items():
+            task_tier = tier_config.get("task_tier", DEFAULT_JUPYTER_TASK_TIER)
+            self.jupyter_warm_pool.add_tier(tier, self.jupyter_warm_task_definitions[task_tier])
+
+        self.jupyter_warm_pool.grant_claim(api_task_role)
+
+        # Per-researcher access points and task definition revisions
+        api_task_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "elasticfilesystem:CreateAccessPoint",
+                    "elasticfilesystem:DescribeAccessPoints",
+                    "elasticfilesystem:TagResource"
+                ],
+                resources=[
+                    efs_file_system.file_system_arn,
+                    f"arn:{self.partition}:elasticfilesystem:{self.region}:{self.account}:access-point/*"
+                ]
             )
         )
+        api_task_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:DescribeTaskDefinition", "ecs:RegisterTaskDefinition"],
+                resources=["*"]
+            )
+        )
+        api_task_role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["iam:PassRole"],
+                resources=[task_execution_role.role_arn, jupyter_task_role.role_arn]
+            )
+        )
+
+        # Environment metadata, read through the cache (backend/app/cache.py)
+        metadata_table.grant_read_write_data(api_task_role)
+        api_container.add_environment("METADATA_TABLE", metadata_table.table_name)
+        api_container.add_environment("CACHE_HOST", cache_endpoint_address)
+        api_container.add_environment("CACHE_PORT", cache_endpoint_port)
+        api_container.add_environment("CACHE_TLS", "true")
+
+        # Evicts cached entries for writes that bypass the API
+        self.metadata_cache_invalidator = MetadataCacheInvalidator(
+            self, "MetadataCacheInvalidator",
+            vpc=vpc,
+            metadata_table=metadata_table,
+            cache_security_group_id=cache_security_group_id,
+            cache_endpoint_address=cache_endpoint_address,
+            cache_endpoint_port=cache_endpoint_port
+        )
+
+        # RunTask, S3, drift reads and Bedrock for the pooled AWS clients
+        # (backend/app/aws.py, configured via the "api_aws_clients" context key)
+        self.api_aws_access = ApiAwsAccess(
+            self, "APIAwsAccess",
+            role=api_task_role,
+            cluster=self.cluster,
+            jupyter_task_definitions=self.jupyter_task_definitions,
+            snapshots_bucket=snapshots_bucket,
+            drift_table=drift_table
+        )
+        for name, value in self.api_aws_access.environment.items():
+            api_container.add_environment(name, value)
+
+        api_container.add_environment("CLUSTER_NAME", self.cluster.cluster_name)
+        api_container.add_environment("NOTEBOOK_FILE_SYSTEM_ID", efs_file_system.file_system_id)
+        api_container.add_environment("JUPYTER_TASK_DEFINITION", self.jupyter_task_definition.family)
+        api_container.add_environment(
+            "JUPYTER_TASK_DEFINITIONS",
+            self.to_json_string({
+                tier: task_definition.family
+                for tier, task_definition in self.jupyter_task_definitions.items()
+            })
+        )
+        for name, value in self.jupyter_warm_pool.environment.items():
+            api_container.add_environment(name, value)
+
+        # Launch strategy for on-demand RunTask calls and interruption tracking
+        # (configured via the "capacity_providers" context key)
+        api_container.add_environment(
+            "JUPYTER_CAPACITY_PROVIDER_STRATEGY",
+            self.to_json_string(capacity_provider_strategy_json(self, "jupyter"))
+        )
+        self.spot_interruption_handler = SpotInterruptionHandler(
+            self, "SpotInterruptionHandler",
+            cluster=self.cluster,
+            metadata_table=metadata_table
+        )
+
+        # Every path that stops a Jupyter task gives back its warm pool slot
+        # and deletes its routes (backend/app/sessions.py)
+        self.jupyter_warm_pool.grant_settle(self.spot_interruption_handler.function)
+        self.jupyter_warm_pool.grant_release(self.idle_reaper.function)
+        for function in (
+            self.jupyter_warm_pool.registrar,
+            self.spot_interruption_handler.function,
+            self.idle_reaper.function,
+        ):
+            self.jupyter_routing.grant_deregister(function)
+            for name, value in {**self.jupyter_warm_pool.environment, **self.jupyter_routing.environment}.items():
+                function.add_environment(name, value)
+
+        self.jupyter_routing.grant_register(api_task_role)
+        for name, value in self.jupyter_routing.environment.items():
+            api_container.add_environment(name, value)
+
+        # Dashboard and SLO alarms (configured via the "observability" context key)
+        self.observability = StackObservability(self, "Observability")
+        self.observability.add_load_balancer(self.api_alb, api_target_group, "API")
+        self.observability.add_api_hot_paths()
+        self.observability.add_metrics("Idle reaper", self.idle_reaper.metrics())
+        self.observability.add_ecs_services({
+            "API": self.api_service,
+            **{
+                f"warm pool ({tier})": service
+                for tier, service in self.jupyter_warm_pool.services.items()
+            }
+        })
+
+        publish(self, "compute/cluster-name", self.cluster.cluster_name)
+
+        export_legacy(self, self.cluster.cluster_arn)
 
         CfnOutput(self, "ClusterName", value=self.cluster.cluster_name)
         CfnOutput(self, "APILoadBalancerDNS", value=self.api_alb.load_balancer_dns_name)
@@ -0,0 +1,16 @@
+import json
+from typing import Any, Dict
+
+from constructs import Construct
+
+
+def context_config(scope: Construct, key: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Read a dict of settings from cdk context and merge it over defaults.
+    Values passed on the command line (cdk synth -c key='{...}') arrive as
+    JSON strings, so those are decoded first.
+    """
+    overrides = scope.node.try_get_context(key) or {}
+    if isinstance(overrides, str):
+        overrides = json.loads(overrides)
+    return {**defaults, **overrides}
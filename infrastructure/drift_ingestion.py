@@ -0,0 +1,160 @@
+import os
+
+from aws_cdk import (
+    aws_dynamodb as dynamodb,
+    aws_ecr_assets as ecr_assets,
+    aws_ecs as ecs,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_logs as logs,
+    aws_sqs as sqs,
+    Duration,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+from infrastructure.service_code import service_code
+
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "services")
+
+# Defaults for the "drift_ingestion" context key. The collector only
+# publishes a change after it has been stable for debounce_seconds.
+DEFAULT_DRIFT_INGESTION = {
+    "poll_seconds": 15,
+    "debounce_seconds": 60,
+    "consumer_batch_size": 100,
+    "consumer_batching_window_seconds": 30,
+    "consumer_max_concurrency": 5,
+}
+
+
+class DriftIngestion(Construct):
+    """
+    Batched drift ingestion: drift-collector sidecars publish compressed
+    event batches to an SQS buffer, and a Lambda consumer drains it into
+    DriftTrackingTable with BatchWriteItem. Bounded consumer concurrency
+    caps the table's write rate however many kernels are running.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        cluster: ecs.ICluster,
+        drift_table: dynamodb.Table,
+        drift_config: dict,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.cluster = cluster
+
+        self.config = context_config(self, "drift_ingestion", DEFAULT_DRIFT_INGESTION)
+
+        self.dead_letter_queue = sqs.Queue(
+            self, "DriftIngestDLQ",
+            retention_period=Duration.days(14),
+            encryption=sqs.QueueEncryption.SQS_MANAGED
+        )
+
+        self.queue = sqs.Queue(
+            self, "DriftIngestQueue",
+            visibility_timeout=Duration.minutes(6),
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+            dead_letter_queue=sqs.DeadLetterQueue(
+                queue=self.dead_letter_queue,
+                max_receive_count=5
+            )
+        )
+
+        self.consumer = lambda_.Function(
+            self, "DriftIngestFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="ingest.handler",
+            # decode_batch comes from the collector, so both sides share the format
+            code=service_code("drift", "services/drift_collector/collector.py"),
+            timeout=Duration.minutes(1),
+            memory_size=512,
+            environment={
+                "DRIFT_TABLE": drift_table.table_name,
+                "DRIFT_LAB_SHARDS": str(drift_config["lab_shards"]),
+                "DRIFT_SEVERITY_SHARDS": str(drift_config["severity_shards"]),
+                "DRIFT_RAW_EVENT_TTL_DAYS": str(drift_config["raw_event_ttl_days"])
+            },
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+        drift_table.grant_write_data(self.consumer)
+
+        self.consumer.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                self.queue,
+                batch_size=self.config["consumer_batch_size"],
+                max_batching_window=Duration.seconds(self.config["consumer_batching_window_seconds"]),
+                max_concurrency=self.config["consumer_max_concurrency"],
+                report_batch_item_failures=True
+            )
+        )
+
+    def add_collector(
+        self,
+        task_definition: ecs.FargateTaskDefinition,
+        watched_container: ecs.ContainerDefinition,
+        state_volume: str,
+        platform: ecr_assets.Platform = ecr_assets.Platform.LINUX_AMD64,
+    ) -> ecs.ContainerDefinition:
+        """Add the drift-collector sidecar next to a Jupyter container."""
+        collector = task_definition.add_container(
+            "DriftCollectorContainer",
+            # Must match the task's CPU architecture
+            image=ecs.ContainerImage.from_asset(
+                os.path.join(SERVICES_DIR, "drift_collector"),
+                platform=platform
+            ),
+            logging=ecs.LogDrivers.aws_logs(
+                stream_prefix="drift-collector",
+                log_retention=logs.RetentionDays.ONE_WEEK
+            ),
+            environment={
+                "DRIFT_QUEUE_URL": self.queue.queue_url,
+                "DRIFT_STATE_DIR": "/var/run/drift",
+                "DRIFT_POLL_SECONDS": str(self.config["poll_seconds"]),
+                "DRIFT_DEBOUNCE_SECONDS": str(self.config["debounce_seconds"])
+            },
+            cpu=128,
+            memory_reservation_mib=128,
+            # Losing drift telemetry must never kill a researcher's kernel
+            essential=False
+        )
+
+        # jupyter/drift-snapshot.sh writes the state the collector polls;
+        # both sides poll on the same interval
+        watched_container.add_environment("DRIFT_POLL_SECONDS", str(self.config["poll_seconds"]))
+
+        collector.add_mount_points(
+            ecs.MountPoint(
+                source_volume=state_volume,
+                container_path="/var/run/drift",
+                read_only=True
+            )
+        )
+
+        # Start after Jupyter so the shared volume is populated from its image
+        collector.add_container_dependencies(
+            ecs.ContainerDependency(
+                container=watched_container,
+                condition=ecs.ContainerDependencyCondition.START
+            )
+        )
+
+        self.queue.grant_send_messages(task_definition.task_role)
+        # Warm tasks claimed after start read their environment tags with
+        # DescribeTasks; the metadata endpoint's taskWithTags is EC2-only
+        task_definition.task_role.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:DescribeTasks"],
+                resources=["*"],
+                conditions={"ArnEquals": {"ecs:cluster": self.cluster.cluster_arn}}
+            )
+        )
+        return collector
@@ -0,0 +1,73 @@
+from aws_cdk import (
+    aws_backup as backup,
+    aws_efs as efs,
+    aws_events as events,
+    aws_iam as iam,
+    Duration,
+    RemovalPolicy,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "efs_backup" context key. Recovery points feed the
+# restore workflow (infrastructure/efs_restore.py). cold_storage_after_days
+# needs delete_after_days at least 90 days later; replication_region adds
+# an EFS replica in another region (null disables it).
+DEFAULT_EFS_BACKUP = {
+    "schedule": "cron(0 5 * * ? *)",
+    "delete_after_days": 35,
+    "cold_storage_after_days": None,
+    "replication_region": None,
+}
+
+
+class NotebookBackup(Construct):
+    """
+    AWS Backup plan for the notebook file system, plus the role AWS Backup
+    assumes when the restore workflow starts a restore job.
+    """
+    def __init__(self, scope: Construct, construct_id: str, file_system: efs.FileSystem) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "efs_backup", DEFAULT_EFS_BACKUP)
+
+        self.vault = backup.BackupVault(
+            self, "Vault",
+            removal_policy=RemovalPolicy.RETAIN
+        )
+
+        cold_after = self.config["cold_storage_after_days"]
+        self.plan = backup.BackupPlan(self, "Plan", backup_vault=self.vault)
+        self.plan.add_rule(
+            backup.BackupPlanRule(
+                rule_name="NotebookDaily",
+                schedule_expression=events.Schedule.expression(self.config["schedule"]),
+                delete_after=Duration.days(self.config["delete_after_days"]),
+                move_to_cold_storage_after=Duration.days(cold_after) if cold_after else None,
+                start_window=Duration.hours(1),
+                completion_window=Duration.hours(8)
+            )
+        )
+        self.plan.add_selection(
+            "NotebookFileSystem",
+            resources=[backup.BackupResource.from_efs_file_system(file_system)]
+        )
+
+        self.restore_role = iam.Role(
+            self, "RestoreRole",
+            assumed_by=iam.ServicePrincipal("backup.amazonaws.com"),
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name(
+                    "service-role/AWSBackupServiceRolePolicyForRestores"
+                )
+            ]
+        )
+
+        # Replication is a property of the file system itself
+        if self.config["replication_region"]:
+            file_system.node.default_child.add_property_override(
+                "ReplicationConfiguration",
+                {"Destinations": [{"Region": self.config["replication_region"]}]}
+            )
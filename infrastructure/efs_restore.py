@@ -0,0 +1,288 @@
+import os
+
+from aws_cdk import (
+    Stack,
+    aws_dynamodb as dynamodb,
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_efs as efs,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_logs as logs,
+    aws_stepfunctions as sfn,
+    aws_stepfunctions_tasks as tasks,
+    Duration,
+)
+from constructs import Construct
+
+from infrastructure.capacity import capacity_provider_strategy_json
+from infrastructure.config import context_config
+
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "services")
+
+# Defaults for the "efs_restore" context key
+DEFAULT_EFS_RESTORE = {
+    "poll_interval_seconds": 30,
+    "timeout_hours": 12,
+}
+
+# Set by services/efs_restore on file systems it restores
+RESTORED_FROM_TAG = "westtek-restored-from"
+
+
+def grant_restored_file_system_access(role: iam.Role, source_file_system_id: str, *actions: str) -> None:
+    """Grant EFS client actions on file systems restored from source_file_system_id."""
+    stack = Stack.of(role)
+    role.add_to_principal_policy(
+        iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=list(actions),
+            resources=[f"arn:{stack.partition}:elasticfilesystem:{stack.region}:{stack.account}:file-system/*"],
+            conditions={"StringEquals": {f"aws:ResourceTag/{RESTORED_FROM_TAG}": source_file_system_id}}
+        )
+    )
+
+
+class EfsRestoreWorkflow(Construct):
+    """
+    Restores an environment from an AWS Backup recovery point of the
+    notebook file system and hands back a file system and access point the
+    next Jupyter launch mounts. Steps run in services/efs_restore; the
+    relocate step runs the snapshot task in MODE=relocate to move the
+    restored directory out of AWS Backup's aws-backup-restore_* directory.
+    There is no read-ahead: EFS serves restored data at normal latency, and
+    reading it all would add a full pass to the critical path. Input:
+
+        {"environment_id": "...", "recovery_point_arn": "...",
+         "path": "researchers/<researcher>/<env>",
+         "target": "access_point" | "file_system"}
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        cluster: ecs.ICluster,
+        vpc: ec2.IVpc,
+        file_system: efs.IFileSystem,
+        metadata_table: dynamodb.ITable,
+        relocate_task_definition: ecs.FargateTaskDefinition,
+        relocate_container: ecs.ContainerDefinition,
+        task_security_group: ec2.ISecurityGroup,
+        efs_security_group: ec2.ISecurityGroup,
+        backup_vault_name: str,
+        restore_role_arn: str,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "efs_restore", DEFAULT_EFS_RESTORE)
+        stack = Stack.of(self)
+        subnets = vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS)
+
+        self.function = lambda_.Function(
+            self, "StepFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.handler",
+            code=lambda_.Code.from_asset(os.path.join(SERVICES_DIR, "efs_restore")),
+            timeout=Duration.seconds(60),
+            environment={
+                "METADATA_TABLE": metadata_table.table_name,
+                "SOURCE_FILE_SYSTEM_ID": file_system.file_system_id,
+                "BACKUP_VAULT_NAME": backup_vault_name,
+                "RESTORE_ROLE_ARN": restore_role_arn,
+                "CLUSTER_NAME": cluster.cluster_name,
+                "RELOCATE_TASK_DEFINITION": relocate_task_definition.family,
+                "RELOCATE_CONTAINER": relocate_container.container_name,
+                "SUBNET_IDS": stack.to_json_string(subnets.subnet_ids),
+                "TASK_SECURITY_GROUP_ID": task_security_group.security_group_id,
+                "EFS_SECURITY_GROUP_ID": efs_security_group.security_group_id,
+                "CAPACITY_PROVIDER_STRATEGY": stack.to_json_string(
+                    capacity_provider_strategy_json(self, "batch")
+                ),
+            },
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+
+        metadata_table.grant_read_write_data(self.function)
+
+        # Restore jobs, run as the AWS Backup restore role
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "backup:StartRestoreJob",
+                    "backup:DescribeRestoreJob",
+                    "backup:GetRecoveryPointRestoreMetadata"
+                ],
+                resources=["*"]
+            )
+        )
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["iam:PassRole"],
+                resources=[
+                    restore_role_arn,
+                    relocate_task_definition.task_role.role_arn,
+                    relocate_task_definition.obtain_execution_role().role_arn
+                ]
+            )
+        )
+
+        # Mount targets and access points on the source or restored file system.
+        # CreateMountTarget creates the ENIs as the caller.
+        efs_arn = f"arn:{stack.partition}:elasticfilesystem:{stack.region}:{stack.account}"
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "elasticfilesystem:CreateAccessPoint",
+                    "elasticfilesystem:CreateMountTarget",
+                    "elasticfilesystem:DescribeMountTargets",
+                    "elasticfilesystem:TagResource"
+                ],
+                resources=[f"{efs_arn}:file-system/*", f"{efs_arn}:access-point/*"]
+            )
+        )
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "ec2:CreateNetworkInterface",
+                    "ec2:DescribeNetworkInterfaces",
+                    "ec2:DescribeSubnets"
+                ],
+                resources=["*"]
+            )
+        )
+
+        # Relocate task, on a task definition revision for a new file system
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:RunTask"],
+                resources=[
+                    f"arn:{stack.partition}:ecs:{stack.region}:{stack.account}:"
+                    f"task-definition/{relocate_task_definition.family}:*"
+                ]
+            )
+        )
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:DescribeTasks"],
+                resources=[
+                    f"arn:{stack.partition}:ecs:{stack.region}:{stack.account}:"
+                    f"task/{cluster.cluster_name}/*"
+                ]
+            )
+        )
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:DescribeTaskDefinition", "ecs:RegisterTaskDefinition"],
+                resources=["*"]
+            )
+        )
+
+        # The relocate task moves the restored directory, so it needs root
+        grant_restored_file_system_access(
+            relocate_task_definition.task_role, file_system.file_system_id,
+            "elasticfilesystem:ClientMount",
+            "elasticfilesystem:ClientWrite",
+            "elasticfilesystem:ClientRootAccess"
+        )
+
+        self.state_machine = sfn.StateMachine(
+            self, "StateMachine",
+            definition_body=sfn.DefinitionBody.from_chainable(self._definition(metadata_table)),
+            timeout=Duration.hours(self.config["timeout_hours"])
+        )
+
+    def _step(self, name: str, action: str, result_path: str) -> tasks.LambdaInvoke:
+        step = tasks.LambdaInvoke(
+            self, name,
+            lambda_function=self.function,
+            payload=sfn.TaskInput.from_object({
+                "action": action,
+                "state": sfn.JsonPath.entire_payload,
+                # Idempotency token for every create call
+                "execution": sfn.JsonPath.string_at("$$.Execution.Name")
+            }),
+            payload_response_only=True,
+            result_path=result_path
+        )
+        step.add_retry(
+            errors=["Lambda.TooManyRequestsException", "Lambda.ServiceException"],
+            interval=Duration.seconds(5),
+            max_attempts=3,
+            backoff_rate=2
+        )
+        return step
+
+    def _definition(self, metadata_table: dynamodb.ITable) -> sfn.IChainable:
+        poll = Duration.seconds(self.config["poll_interval_seconds"])
+
+        mark_failed = tasks.DynamoUpdateItem(
+            self, "MarkRestoreFailed",
+            table=metadata_table,
+            key={
+                "environment_id": tasks.DynamoAttributeValue.from_string(
+                    sfn.JsonPath.string_at("$.environment_id")
+                )
+            },
+            update_expression="SET restore_status = :status",
+            expression_attribute_values={
+                ":status": tasks.DynamoAttributeValue.from_string("FAILED"),
+            },
+            result_path=sfn.JsonPath.DISCARD
+        ).next(sfn.Fail(self, "RestoreFailed"))
+
+        start_restore = self._step("StartRestore", "start_restore", "$.restore")
+        wait_restore = sfn.Wait(self, "WaitForRestore", time=sfn.WaitTime.duration(poll))
+        describe_restore = self._step("DescribeRestore", "describe_restore", "$.restore")
+
+        prepare = self._step("PrepareFileSystem", "prepare_file_system", "$.file_system")
+        wait_file_system = sfn.Wait(self, "WaitForMountTargets", time=sfn.WaitTime.duration(poll))
+
+        start_relocate = self._step("StartRelocate", "start_relocate", "$.relocate")
+        wait_relocate = sfn.Wait(self, "WaitForRelocate", time=sfn.WaitTime.duration(poll))
+        describe_relocate = self._step("DescribeRelocate", "describe_relocate", "$.relocate")
+
+        create_access_point = self._step("CreateAccessPoint", "create_access_point", "$.access_point")
+
+        for step in (start_restore, describe_restore, prepare, start_relocate, describe_relocate, create_access_point):
+            step.add_catch(mark_failed, result_path="$.error")
+
+        relocate_done = sfn.Choice(self, "RelocateDone?")
+        relocate_done.when(
+            sfn.Condition.string_equals("$.relocate.status", "SUCCEEDED"),
+            create_access_point.next(sfn.Succeed(self, "RestoreSucceeded"))
+        )
+        relocate_done.when(sfn.Condition.string_equals("$.relocate.status", "FAILED"), mark_failed)
+        relocate_done.otherwise(wait_relocate)
+        wait_relocate.next(describe_relocate).next(relocate_done)
+
+        file_system_ready = sfn.Choice(self, "FileSystemReady?")
+        file_system_ready.when(
+            sfn.Condition.boolean_equals("$.file_system.ready", True),
+            start_relocate.next(wait_relocate)
+        )
+        file_system_ready.otherwise(wait_file_system.next(prepare))
+
+        restore_done = sfn.Choice(self, "RestoreDone?")
+        restore_done.when(
+            sfn.Condition.string_equals("$.restore.status", "COMPLETED"),
+            prepare.next(file_system_ready)
+        )
+        restore_done.when(
+            sfn.Condition.or_(
+                sfn.Condition.string_equals("$.restore.status", "FAILED"),
+                sfn.Condition.string_equals("$.restore.status", "ABORTED")
+            ),
+            mark_failed
+        )
+        restore_done.otherwise(wait_restore)
+        wait_restore.next(describe_restore).next(restore_done)
+
+        return start_restore.next(wait_restore)
@@ -0,0 +1,174 @@
+import os
+
+from aws_cdk import (
+    aws_cloudwatch as cloudwatch,
+    aws_dynamodb as dynamodb,
+    aws_ec2 as ec2,
+    aws_ecr_assets as ecr_assets,
+    aws_ecs as ecs,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_logs as logs,
+    Duration,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+from infrastructure.service_code import service_code
+
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "services")
+
+# Defaults for the "idle_reaper" context key. A Jupyter task counts as idle
+# once nothing has happened on its server for idle_timeout_minutes; busy
+# kernels keep it alive unless cull_busy, open browser tabs do not unless
+# cull_connected is false. Set "enabled" to false to stop parking tasks.
+DEFAULT_IDLE_REAPER = {
+    "enabled": True,
+    "idle_timeout_minutes": 120,
+    "schedule_minutes": 10,
+    "cull_connected": True,
+    "cull_busy": False,
+    "monitor_port": 8890,
+}
+
+MONITOR_CONTAINER = "IdleMonitorContainer"
+METRICS_NAMESPACE = "WestTek/IdleReaper"
+
+
+class IdleReaper(Construct):
+    """
+    Scale-to-zero for researcher Jupyter tasks: an idle-monitor sidecar in
+    each task reports the server's kernel and activity state, and a
+    scheduled Lambda in the VPC parks tasks idle past the timeout (metadata
+    table first, then StopTask, which checkpoints kernels to EFS on SIGTERM).
+    Parking releases the task through the backend's JupyterSessions, bundled
+    with the function; the stack supplies its warm pool and routing settings.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        cluster: ecs.ICluster,
+        vpc: ec2.IVpc,
+        task_security_group: ec2.SecurityGroup,
+        metadata_table: dynamodb.ITable,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "idle_reaper", DEFAULT_IDLE_REAPER)
+        port = self.config["monitor_port"]
+
+        self.security_group = ec2.SecurityGroup(
+            self, "SecurityGroup",
+            vpc=vpc,
+            description="Idle reaper Lambda",
+            allow_all_outbound=True
+        )
+        task_security_group.add_ingress_rule(
+            peer=self.security_group,
+            connection=ec2.Port.tcp(port),
+            description="Allow the idle reaper to read idle-monitor sidecars"
+        )
+
+        self.function = lambda_.Function(
+            self, "ReaperFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.handler",
+            code=service_code("idle_reaper", "backend/app"),
+            timeout=Duration.seconds(120),
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            security_groups=[self.security_group],
+            # Overlapping runs would park the same task twice
+            reserved_concurrent_executions=1,
+            environment={
+                "METADATA_TABLE": metadata_table.table_name,
+                "CLUSTER_NAME": cluster.cluster_name,
+                "MONITOR_CONTAINER": MONITOR_CONTAINER,
+                "MONITOR_PORT": str(port),
+                "IDLE_TIMEOUT_SECONDS": str(self.config["idle_timeout_minutes"] * 60),
+                "METRICS_NAMESPACE": METRICS_NAMESPACE,
+            },
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+
+        metadata_table.grant_read_write_data(self.function)
+        self.function.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:ListTasks", "ecs:DescribeTasks", "ecs:StopTask"],
+                resources=["*"],
+                conditions={"ArnEquals": {"ecs:cluster": cluster.cluster_arn}}
+            )
+        )
+
+        self.rule = events.Rule(
+            self, "Schedule",
+            schedule=events.Schedule.rate(Duration.minutes(self.config["schedule_minutes"])),
+            enabled=self.config["enabled"],
+            targets=[targets.LambdaFunction(self.function, retry_attempts=0)]
+        )
+
+    def add_monitor(
+        self,
+        task_definition: ecs.FargateTaskDefinition,
+        watched_container: ecs.ContainerDefinition,
+        runtime_volume: str,
+        platform: ecr_assets.Platform = ecr_assets.Platform.LINUX_AMD64,
+    ) -> ecs.ContainerDefinition:
+        """Add the idle-monitor sidecar next to a Jupyter container."""
+        monitor = task_definition.add_container(
+            MONITOR_CONTAINER,
+            # Must match the task's CPU architecture
+            image=ecs.ContainerImage.from_asset(
+                os.path.join(SERVICES_DIR, "idle_monitor"),
+                platform=platform
+            ),
+            logging=ecs.LogDrivers.aws_logs(
+                stream_prefix="idle-monitor",
+                log_retention=logs.RetentionDays.ONE_WEEK
+            ),
+            environment={
+                "JUPYTER_RUNTIME_DIR": "/var/run/jupyter",
+                "MONITOR_PORT": str(self.config["monitor_port"]),
+                "CULL_CONNECTED": str(self.config["cull_connected"]).lower(),
+                "CULL_BUSY": str(self.config["cull_busy"]).lower(),
+            },
+            cpu=64,
+            memory_reservation_mib=64,
+            # A missing monitor only means the task is never parked
+            essential=False
+        )
+        monitor.add_port_mappings(
+            ecs.PortMapping(container_port=self.config["monitor_port"], protocol=ecs.Protocol.TCP)
+        )
+
+        # jpserver-<pid>.json carries the server's port, base_url and token
+        monitor.add_mount_points(
+            ecs.MountPoint(
+                source_volume=runtime_volume,
+                container_path="/var/run/jupyter",
+                read_only=True
+            )
+        )
+        monitor.add_container_dependencies(
+            ecs.ContainerDependency(
+                container=watched_container,
+                condition=ecs.ContainerDependencyCondition.START
+            )
+        )
+        return monitor
+
+    def metrics(self) -> list:
+        return [
+            cloudwatch.Metric(
+                namespace=METRICS_NAMESPACE,
+                metric_name=metric_name,
+                statistic="Sum",
+                period=Duration.minutes(self.config["schedule_minutes"])
+            )
+            for metric_name in ("TasksParked", "MonitorUnreachable")
+        ]
@@ -0,0 +1,119 @@
+from aws_cdk import (
+    aws_ecr as ecr,
+    aws_ecr_assets as ecr_assets,
+    aws_ecs as ecs,
+    Annotations,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "container_images" context key. Set "digest" to the
+# sha256 digest of the pushed image to pin a task definition to it; the tag
+# is only used while no digest is configured.
+DEFAULT_CONTAINER_IMAGES = {
+    "jupyter": {"tag": "latest", "digest": None},
+    "api": {"tag": "latest", "digest": None},
+}
+
+# Defaults for the "cpu_architecture" context key, per task definition.
+# Images are built multi-arch (see DEPLOYMENT.md), so switching a task to
+# ARM64 (Graviton) only needs a redeploy; compare first with
+# benchmarks/arch_kernels.py.
+DEFAULT_CPU_ARCHITECTURE = {
+    "api": "X86_64",
+    "jupyter": "X86_64",
+}
+
+CPU_ARCHITECTURES = {
+    "X86_64": (ecs.CpuArchitecture.X86_64, ecr_assets.Platform.LINUX_AMD64),
+    "ARM64": (ecs.CpuArchitecture.ARM64, ecr_assets.Platform.LINUX_ARM64),
+}
+
+# Defaults for the "ecr_pull_through_cache" context key. Docker Hub requires
+# a Secrets Manager secret named "ecr-pullthroughcache/..." holding the
+# registry credentials, so its rule is only created when an ARN is given.
+DEFAULT_PULL_THROUGH_CACHE = {
+    "ecr_public": True,
+    "quay": True,
+    "docker_hub_credential_arn": None,
+}
+
+
+class PullThroughCache(Construct):
+    """
+    ECR pull-through cache rules for the upstream registries our base images
+    come from. Image builds pull e.g.
+    <account>.dkr.ecr.<region>.amazonaws.com/quay/jupyter/scipy-notebook
+    so base layers are cached in-region instead of crossing the NAT gateway.
+    """
+    def __init__(self, scope: Construct, construct_id: str) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "ecr_pull_through_cache", DEFAULT_PULL_THROUGH_CACHE)
+        self.rules = {}
+
+        if self.config["ecr_public"]:
+            self.rules["ecr-public"] = ecr.CfnPullThroughCacheRule(
+                self, "ECRPublicRule",
+                ecr_repository_prefix="ecr-public",
+                upstream_registry_url="public.ecr.aws"
+            )
+
+        if self.config["quay"]:
+            self.rules["quay"] = ecr.CfnPullThroughCacheRule(
+                self, "QuayRule",
+                ecr_repository_prefix="quay",
+                upstream_registry_url="quay.io"
+            )
+
+        if self.config["docker_hub_credential_arn"]:
+            self.rules["docker-hub"] = ecr.CfnPullThroughCacheRule(
+                self, "DockerHubRule",
+                ecr_repository_prefix="docker-hub",
+                upstream_registry_url="registry-1.docker.io",
+                credential_arn=self.config["docker_hub_credential_arn"]
+            )
+
+
+def image_reference(scope: Construct, name: str) -> str:
+    """
+    Tag or digest for the image configured under container_images.<name>.
+    Digests win over tags; a tag-only image gets a synth warning, since a
+    tag can be moved after a snapshot has recorded it.
+    """
+    images = context_config(scope, "container_images", DEFAULT_CONTAINER_IMAGES)
+    image = {**DEFAULT_CONTAINER_IMAGES.get(name, {}), **images.get(name, {})}
+
+    if image.get("digest"):
+        return image["digest"]
+
+    Annotations.of(scope).add_warning(
+        f"Container image '{name}' is not digest-pinned; set "
+        f"container_images.{name}.digest to the pushed image digest"
+    )
+    return image["tag"]
+
+
+def _cpu_architecture(scope: Construct, name: str) -> tuple:
+    architectures = context_config(scope, "cpu_architecture", DEFAULT_CPU_ARCHITECTURE)
+    architecture = architectures[name].upper()
+    if architecture not in CPU_ARCHITECTURES:
+        raise ValueError(
+            f"cpu_architecture.{name} must be one of {sorted(CPU_ARCHITECTURES)}, got '{architecture}'"
+        )
+    return CPU_ARCHITECTURES[architecture]
+
+
+def runtime_platform(scope: Construct, name: str) -> ecs.RuntimePlatform:
+    """Fargate runtime platform for the task definition configured under cpu_architecture.<name>."""
+    return ecs.RuntimePlatform(
+        cpu_architecture=_cpu_architecture(scope, name)[0],
+        operating_system_family=ecs.OperatingSystemFamily.LINUX
+    )
+
+
+def asset_platform(scope: Construct, name: str) -> ecr_assets.Platform:
+    """Build platform for CDK-built sidecar images that share a task with <name>."""
+    return _cpu_architecture(scope, name)[1]
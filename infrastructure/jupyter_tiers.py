@@ -0,0 +1,69 @@
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "jupyter_task_tiers" context key: one Jupyter task
+# definition per tier, selectable per launch. cpu is in CPU units
+# (1024 = 1 vCPU), memory_mib in MiB, ephemeral_storage_gib sizes /tmp
+# scratch (21-200 GiB; null keeps Fargate's 20 GiB default).
+DEFAULT_JUPYTER_TASK_TIERS = {
+    "small": {"cpu": 1024, "memory_mib": 4096, "ephemeral_storage_gib": None},
+    "standard": {"cpu": 2048, "memory_mib": 4096, "ephemeral_storage_gib": None},
+    "large": {"cpu": 4096, "memory_mib": 16384, "ephemeral_storage_gib": 100},
+    "highmem": {"cpu": 16384, "memory_mib": 122880, "ephemeral_storage_gib": 200},
+}
+
+# Tier used when a launch does not ask for one, and by the warm pool
+DEFAULT_JUPYTER_TASK_TIER = "standard"
+
+# Legal Fargate (Linux) memory per CPU size: (min MiB, max MiB, step MiB)
+FARGATE_MEMORY_BY_CPU = {
+    256: (512, 2048, None),
+    512: (1024, 4096, 1024),
+    1024: (2048, 8192, 1024),
+    2048: (4096, 16384, 1024),
+    4096: (8192, 30720, 1024),
+    8192: (16384, 61440, 4096),
+    16384: (32768, 122880, 8192),
+}
+
+EPHEMERAL_STORAGE_GIB = (21, 200)
+
+
+def validate_fargate_size(name: str, cpu: int, memory_mib: int, ephemeral_storage_gib=None) -> None:
+    """Raise ValueError unless cpu/memory/ephemeral storage is a legal Fargate task size."""
+    if cpu not in FARGATE_MEMORY_BY_CPU:
+        raise ValueError(
+            f"Jupyter task tier '{name}': cpu {cpu} is not a Fargate size "
+            f"({sorted(FARGATE_MEMORY_BY_CPU)})"
+        )
+
+    low, high, step = FARGATE_MEMORY_BY_CPU[cpu]
+    legal = memory_mib in (512, 1024, 2048) if step is None else (
+        low <= memory_mib <= high and memory_mib % step == 0
+    )
+    if not legal:
+        raise ValueError(
+            f"Jupyter task tier '{name}': {memory_mib} MiB is not valid for cpu {cpu} "
+            f"({low}-{high} MiB" + (f" in {step} MiB steps)" if step else ")")
+        )
+
+    if ephemeral_storage_gib is not None:
+        low, high = EPHEMERAL_STORAGE_GIB
+        if not low <= ephemeral_storage_gib <= high:
+            raise ValueError(
+                f"Jupyter task tier '{name}': ephemeral_storage_gib must be {low}-{high}, "
+                f"got {ephemeral_storage_gib}"
+            )
+
+
+def jupyter_task_tiers(scope: Construct) -> dict:
+    """Validated tier settings; synth fails on an illegal Fargate combination."""
+    tiers = context_config(scope, "jupyter_task_tiers", DEFAULT_JUPYTER_TASK_TIERS)
+    if DEFAULT_JUPYTER_TASK_TIER not in tiers:
+        raise ValueError(f"jupyter_task_tiers must define the '{DEFAULT_JUPYTER_TASK_TIER}' tier")
+
+    for name, tier in tiers.items():
+        validate_fargate_size(name, tier["cpu"], tier["memory_mib"], tier.get("ephemeral_storage_gib"))
+    return tiers
@@ -0,0 +1,311 @@
+import json
+import os
+
+from aws_cdk import (
+    Stack,
+    aws_bedrock as bedrock,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_logs as logs,
+    aws_opensearchserverless as aoss,
+    aws_s3 as s3,
+    aws_sqs as sqs,
+    CfnOutput,
+    Duration,
+    RemovalPolicy,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+from infrastructure.observability import StackObservability
+from infrastructure.snapshot_retention import CHUNK_PREFIX, MANIFEST_PREFIX
+from infrastructure.stack_params import lookup
+
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "services")
+
+# Defaults for the "knowledge_ingestion" context key.
+#
+# Point knowledge_base_id/data_source_id at an existing Knowledge Base, or
+# set vector_store to have this stack create one on an OpenSearch
+# Serverless collection whose vector index already exists, e.g.
+#   {"collection_arn": "arn:aws:aoss:...:collection/abc123",
+#    "collection_name": "westtek-knowledge", "vector_index_name": "snapshots",
+#    "vector_field": "embedding", "text_field": "text", "metadata_field": "metadata"}
+# With neither, documents are still staged and no ingestion job is started.
+DEFAULT_KNOWLEDGE_INGESTION = {
+    "knowledge_base_id": None,
+    "data_source_id": None,
+    "vector_store": None,
+    "embedding_model_id": "amazon.titan-embed-text-v2:0",
+    "include_suffixes": [".ipynb", ".py", ".md", ".rst", ".txt", ".yml", ".yaml", ".toml", ".cfg"],
+    "max_file_bytes": 5 * 1024 * 1024,
+    # Staged parts; the Knowledge Base chunks each part for embedding
+    "max_document_bytes": 256 * 1024,
+    "chunk_max_tokens": 512,
+    "chunk_overlap_percent": 15,
+    "stage_batching_window_seconds": 60,
+    "debounce_minutes": 15,
+    "trigger_schedule_minutes": 5,
+}
+
+# Layout of the data-source bucket (services/knowledge_ingestion/staging.py)
+DOCUMENT_PREFIX = "documents/"
+STATE_PREFIX = "state/"
+
+
+class KnowledgeStack(Stack):
+    """
+    Incremental Bedrock Knowledge Base ingestion of environment snapshots.
+    Every new manifest in SnapshotsBucket is diffed by content hash against
+    what is already staged, and only new or changed notebooks, package
+    manifests and docs are written to the data-source bucket; a scheduled
+    trigger batches the changes into debounced ingestion jobs (see
+    services/knowledge_ingestion).
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        **kwargs
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.config = context_config(self, "knowledge_ingestion", DEFAULT_KNOWLEDGE_INGESTION)
+
+        snapshots_bucket = s3.Bucket.from_bucket_name(
+            self, "SnapshotsBucket", lookup(self, "storage/snapshots-bucket-name")
+        )
+
+        # Derived from snapshots, so it is not versioned: a rewrite is a re-ingest
+        self.data_source_bucket = s3.Bucket(
+            self, "KnowledgeDataSourceBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            removal_policy=RemovalPolicy.RETAIN
+        )
+
+        self.knowledge_base_id, self.data_source_id = self._knowledge_base()
+
+        # New manifests, via EventBridge (SnapshotsBucket has it enabled)
+        self.dead_letter_queue = sqs.Queue(
+            self, "ManifestDLQ",
+            retention_period=Duration.days(14),
+            encryption=sqs.QueueEncryption.SQS_MANAGED
+        )
+        self.queue = sqs.Queue(
+            self, "ManifestQueue",
+            visibility_timeout=Duration.minutes(30),
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+            dead_letter_queue=sqs.DeadLetterQueue(queue=self.dead_letter_queue, max_receive_count=3)
+        )
+        events.Rule(
+            self, "ManifestCreatedRule",
+            event_pattern=events.EventPattern(
+                source=["aws.s3"],
+                detail_type=["Object Created"],
+                detail={
+                    "bucket": {"name": [snapshots_bucket.bucket_name]},
+                    "object": {"key": [{"prefix": MANIFEST_PREFIX}]}
+                }
+            ),
+            targets=[targets.SqsQueue(self.queue)]
+        )
+
+        environment = {
+            "SNAPSHOTS_BUCKET": snapshots_bucket.bucket_name,
+            "DATA_SOURCE_BUCKET": self.data_source_bucket.bucket_name,
+            "KNOWLEDGE_BASE_ID": self.knowledge_base_id or "",
+            "DATA_SOURCE_ID": self.data_source_id or "",
+            "INCLUDE_SUFFIXES": json.dumps(self.config["include_suffixes"]),
+            "MAX_FILE_BYTES": str(self.config["max_file_bytes"]),
+            "MAX_DOCUMENT_BYTES": str(self.config["max_document_bytes"]),
+            "DEBOUNCE_SECONDS": str(self.config["debounce_minutes"] * 60),
+        }
+
+        self.stage_function = lambda_.Function(
+            self, "StageFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.stage",
+            code=lambda_.Code.from_asset(os.path.join(SERVICES_DIR, "knowledge_ingestion")),
+            timeout=Duration.minutes(15),
+            memory_size=1024,
+            environment=environment,
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+        snapshots_bucket.grant_read(self.stage_function, f"{MANIFEST_PREFIX}*")
+        snapshots_bucket.grant_read(self.stage_function, f"{CHUNK_PREFIX}*")
+        self.data_source_bucket.grant_read_write(self.stage_function)
+
+        # Two consumers may stage the same environment at once; the handler
+        # writes its state conditionally and keeps the newest manifest's
+        self.stage_function.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                self.queue,
+                batch_size=10,
+                max_batching_window=Duration.seconds(self.config["stage_batching_window_seconds"]),
+                max_concurrency=2
+            )
+        )
+
+        self.trigger_function = lambda_.Function(
+            self, "TriggerFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.trigger",
+            code=lambda_.Code.from_asset(os.path.join(SERVICES_DIR, "knowledge_ingestion")),
+            timeout=Duration.seconds(30),
+            environment=environment,
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+        self.data_source_bucket.grant_read_write(self.trigger_function, f"{STATE_PREFIX}*")
+        if self.knowledge_base_id:
+            self.trigger_function.add_to_role_policy(
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["bedrock:StartIngestionJob", "bedrock:ListIngestionJobs"],
+                    resources=[
+                        f"arn:{self.partition}:bedrock:{self.region}:{self.account}:"
+                        f"knowledge-base/{self.knowledge_base_id}"
+                    ]
+                )
+            )
+        events.Rule(
+            self, "TriggerSchedule",
+            schedule=events.Schedule.rate(Duration.minutes(self.config["trigger_schedule_minutes"])),
+            enabled=bool(self.knowledge_base_id),
+            targets=[targets.LambdaFunction(self.trigger_function, retry_attempts=0)]
+        )
+
+        self.observability = StackObservability(self, "Observability")
+        self.observability.add_metrics("Knowledge ingestion", [
+            self.queue.metric_approximate_age_of_oldest_message(),
+            self.dead_letter_queue.metric_approximate_number_of_messages_visible(),
+            self.stage_function.metric_errors(),
+            self.trigger_function.metric_errors(),
+        ])
+
+        CfnOutput(self, "KnowledgeDataSourceBucketName", value=self.data_source_bucket.bucket_name)
+        if self.knowledge_base_id:
+            CfnOutput(self, "KnowledgeBaseId", value=self.knowledge_base_id)
+
+    def _knowledge_base(self):
+        """(knowledge base ID, data source ID): configured, created here, or (None, None)."""
+        if self.config["knowledge_base_id"]:
+            if not self.config["data_source_id"]:
+                raise ValueError("knowledge_ingestion.data_source_id is required with knowledge_base_id")
+            return self.config["knowledge_base_id"], self.config["data_source_id"]
+
+        vector_store = self.config["vector_store"]
+        if not vector_store:
+            return None, None
+
+        embedding_model_arn = (
+            f"arn:{self.partition}:bedrock:{self.region}::foundation-model/{self.config['embedding_model_id']}"
+        )
+        role = iam.Role(
+            self, "KnowledgeBaseRole",
+            assumed_by=iam.ServicePrincipal(
+                "bedrock.amazonaws.com",
+                conditions={"StringEquals": {"aws:SourceAccount": self.account}}
+            )
+        )
+        role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["bedrock:InvokeModel"],
+                resources=[embedding_model_arn]
+            )
+        )
+        role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["aoss:APIAccessAll"],
+                resources=[vector_store["collection_arn"]]
+            )
+        )
+        self.data_source_bucket.grant_read(role)
+
+        access_policy = aoss.CfnAccessPolicy(
+            self, "VectorStoreAccessPolicy",
+            name=f"{vector_store['collection_name']}-kb"[:32],
+            type="data",
+            policy=json.dumps([{
+                "Rules": [
+                    {
+                        "ResourceType": "index",
+                        "Resource": [f"index/{vector_store['collection_name']}/*"],
+                        "Permission": [
+                            "aoss:DescribeIndex", "aoss:ReadDocument", "aoss:WriteDocument",
+                            "aoss:UpdateIndex", "aoss:CreateIndex"
+                        ]
+                    },
+                    {
+                        "ResourceType": "collection",
+                        "Resource": [f"collection/{vector_store['collection_name']}"],
+                        "Permission": ["aoss:DescribeCollectionItems"]
+                    }
+                ],
+                "Principal": [role.role_arn]
+            }])
+        )
+
+        knowledge_base = bedrock.CfnKnowledgeBase(
+            self, "KnowledgeBase",
+            name="westtek-environment-snapshots",
+            description="Notebooks, package manifests and docs from researcher environment snapshots",
+            role_arn=role.role_arn,
+            knowledge_base_configuration=bedrock.CfnKnowledgeBase.KnowledgeBaseConfigurationProperty(
+                type="VECTOR",
+                vector_knowledge_base_configuration=(
+                    bedrock.CfnKnowledgeBase.VectorKnowledgeBaseConfigurationProperty(
+                        embedding_model_arn=embedding_model_arn
+                    )
+                )
+            ),
+            storage_configuration=bedrock.CfnKnowledgeBase.StorageConfigurationProperty(
+                type="OPENSEARCH_SERVERLESS",
+                opensearch_serverless_configuration=(
+                    bedrock.CfnKnowledgeBase.OpenSearchServerlessConfigurationProperty(
+                        collection_arn=vector_store["collection_arn"],
+                        vector_index_name=vector_store["vector_index_name"],
+                        field_mapping=bedrock.CfnKnowledgeBase.OpenSearchServerlessFieldMappingProperty(
+                            vector_field=vector_store["vector_field"],
+                            text_field=vector_store["text_field"],
+                            metadata_field=vector_store["metadata_field"]
+                        )
+                    )
+                )
+            )
+        )
+        # The role must be able to reach the index when the KB is created
+        knowledge_base.node.add_dependency(role)
+        knowledge_base.add_dependency(access_policy)
+
+        data_source = bedrock.CfnDataSource(
+            self, "SnapshotDocuments",
+            knowledge_base_id=knowledge_base.attr_knowledge_base_id,
+            name="snapshot-documents",
+            # Unstaged documents leave the index with the next sync
+            data_deletion_policy="DELETE",
+            data_source_configuration=bedrock.CfnDataSource.DataSourceConfigurationProperty(
+                type="S3",
+                s3_configuration=bedrock.CfnDataSource.S3DataSourceConfigurationProperty(
+                    bucket_arn=self.data_source_bucket.bucket_arn,
+                    inclusion_prefixes=[DOCUMENT_PREFIX]
+                )
+            ),
+            vector_ingestion_configuration=bedrock.CfnDataSource.VectorIngestionConfigurationProperty(
+                chunking_configuration=bedrock.CfnDataSource.ChunkingConfigurationProperty(
+                    chunking_strategy="FIXED_SIZE",
+                    fixed_size_chunking_configuration=bedrock.CfnDataSource.FixedSizeChunkingConfigurationProperty(
+                        max_tokens=self.config["chunk_max_tokens"],
+                        overlap_percentage=self.config["chunk_overlap_percent"]
+                    )
+                )
+            )
+        )
+        return knowledge_base.attr_knowledge_base_id, data_source.attr_data_source_id
@@ -0,0 +1,162 @@
+import os
+from typing import Optional
+
+from aws_cdk import (
+    aws_ecr_assets as ecr_assets,
+    aws_ecs as ecs,
+    aws_logs as logs,
+    aws_s3 as s3,
+    Duration,
+    RemovalPolicy,
+    Stack,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "services")
+
+# Defaults for the "log_pipeline" context key. "drivers" picks the log
+# driver of each task definition's app container: "awslogs" (one
+# CloudWatch log event per line) or "firelens" (Fluent Bit sidecar, see
+# services/log_router). With FireLens, lines matching hot_log_pattern
+# (no spaces; EMF metric lines contain "_aws") go to a CloudWatch log group
+# kept for hot_retention (a logs.RetentionDays name), and every line is
+# archived to S3 in gzipped batches under archive_prefix.
+DEFAULT_LOG_PIPELINE = {
+    "drivers": {"api": "awslogs", "jupyter": "awslogs"},
+    "hot_log_pattern": "(ERROR|CRITICAL|Traceback|Exception|_aws)",
+    "hot_retention": "THREE_DAYS",
+    "flush_seconds": 5,
+    "archive_prefix": "task-logs/",
+    "archive_file_size_mb": 50,
+    "archive_upload_timeout_minutes": 10,
+    "archive_infrequent_access_days": 30,
+    "archive_glacier_days": 90,
+    "archive_expiration_days": 3650,
+}
+
+LOG_DRIVERS = ("awslogs", "firelens")
+
+
+class TaskLogPipeline(Construct):
+    """
+    Log drivers for the app containers of the API and Jupyter task
+    definitions, chosen per task definition by the "log_pipeline" context
+    key. The archive bucket and hot log groups are only created once a task
+    definition uses FireLens.
+    """
+    def __init__(self, scope: Construct, construct_id: str) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "log_pipeline", DEFAULT_LOG_PIPELINE)
+        for name, driver in self.config["drivers"].items():
+            if driver not in LOG_DRIVERS:
+                raise ValueError(f"log_pipeline.drivers.{name} must be one of {LOG_DRIVERS}, got {driver}")
+        self.archive_bucket: Optional[s3.Bucket] = None
+        self.hot_log_groups = {}
+
+    def driver(self, name: str) -> str:
+        return self.config["drivers"].get(name, "awslogs")
+
+    def _archive(self) -> s3.Bucket:
+        if self.archive_bucket is None:
+            prefix = self.config["archive_prefix"]
+            self.archive_bucket = s3.Bucket(
+                self, "LogArchiveBucket",
+                encryption=s3.BucketEncryption.S3_MANAGED,
+                block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+                enforce_ssl=True,
+                removal_policy=RemovalPolicy.RETAIN,
+                lifecycle_rules=[
+                    s3.LifecycleRule(
+                        id="TaskLogArchive",
+                        prefix=prefix,
+                        transitions=[
+                            s3.Transition(
+                                storage_class=s3.StorageClass.INFREQUENT_ACCESS,
+                                transition_after=Duration.days(self.config["archive_infrequent_access_days"])
+                            ),
+                            s3.Transition(
+                                storage_class=s3.StorageClass.GLACIER_INSTANT_RETRIEVAL,
+                                transition_after=Duration.days(self.config["archive_glacier_days"])
+                            ),
+                        ],
+                        expiration=Duration.days(self.config["archive_expiration_days"]),
+                        abort_incomplete_multipart_upload_after=Duration.days(7)
+                    )
+                ]
+            )
+        return self.archive_bucket
+
+    def logging(
+        self,
+        task_definition: ecs.TaskDefinition,
+        name: str,
+        stream_prefix: str,
+        platform: ecr_assets.Platform = ecr_assets.Platform.LINUX_AMD64,
+    ) -> ecs.LogDriver:
+        """
+        Log driver for the app container of task_definition. With FireLens,
+        adds the log router to the task definition first.
+        """
+        if self.driver(name) == "awslogs":
+            return ecs.LogDrivers.aws_logs(
+                stream_prefix=stream_prefix,
+                log_retention=logs.RetentionDays.ONE_WEEK
+            )
+
+        archive = self._archive()
+        if name not in self.hot_log_groups:
+            self.hot_log_groups[name] = logs.LogGroup(
+                self, f"{name.capitalize()}HotLogGroup",
+                retention=getattr(logs.RetentionDays, self.config["hot_retention"]),
+                removal_policy=RemovalPolicy.DESTROY
+            )
+        hot_log_group = self.hot_log_groups[name]
+
+        task_definition.add_firelens_log_router(
+            "LogRouterContainer",
+            # Must match the task's CPU architecture
+            image=ecs.ContainerImage.from_asset(
+                os.path.join(SERVICES_DIR, "log_router"),
+                platform=platform
+            ),
+            firelens_config=ecs.FirelensConfig(
+                type=ecs.FirelensLogRouterType.FLUENTBIT,
+                options=ecs.FirelensOptions(
+                    config_file_type=ecs.FirelensConfigFileType.FILE,
+                    config_file_value="/fluent-bit/etc/extra.conf",
+                    enable_ecs_log_metadata=True
+                )
+            ),
+            environment={
+                "AWS_REGION": Stack.of(self).region,
+                "FLUSH_SECONDS": str(self.config["flush_seconds"]),
+                "HOT_LOG_PATTERN": self.config["hot_log_pattern"],
+                "HOT_LOG_GROUP": hot_log_group.log_group_name,
+                "HOT_LOG_STREAM_PREFIX": f"{stream_prefix}/",
+                "ARCHIVE_BUCKET": archive.bucket_name,
+                "ARCHIVE_PREFIX": self.config["archive_prefix"],
+                "ARCHIVE_FILE_SIZE": f"{self.config['archive_file_size_mb']}M",
+                "ARCHIVE_UPLOAD_TIMEOUT": f"{self.config['archive_upload_timeout_minutes']}m",
+                "LOG_FAMILY": task_definition.family,
+            },
+            # The router's own logs are low volume
+            logging=ecs.LogDrivers.aws_logs(
+                stream_prefix=f"{stream_prefix}-log-router",
+                log_retention=logs.RetentionDays.ONE_WEEK
+            ),
+            cpu=128,
+            memory_reservation_mib=128,
+            # Log delivery must never take the API or a kernel down; this
+            # also leaves the app container as the task's default container
+            essential=False
+        )
+
+        hot_log_group.grant_write(task_definition.task_role)
+        archive.grant_put(task_definition.task_role, f"{self.config['archive_prefix']}*")
+        # All routing lives in extra.conf, so the driver itself has no options
+        return ecs.LogDrivers.firelens()
+
@@ -1,20 +1,55 @@
 from aws_cdk import (
     Stack,
+    aws_cloudwatch as cloudwatch,
     aws_ec2 as ec2,
+    aws_iam as iam,
     CfnOutput,
+    Duration,
 )
 from constructs import Construct
 
+from infrastructure.config import context_config
+from infrastructure.observability import StackObservability
+
+
+# Defaults for the "network" context key. Endpoint names are the AWS service
+# short names; anything not listed keeps going through the NAT gateway.
+DEFAULT_NETWORK = {
+    "nat_gateway_per_az": False,
+    "gateway_endpoints": ["s3", "dynamodb"],
+    "interface_endpoints": ["ecr.api", "ecr.dkr", "logs", "sts", "secretsmanager"],
+}
+
+GATEWAY_ENDPOINT_SERVICES = {
+    "s3": ec2.GatewayVpcEndpointAwsService.S3,
+    "dynamodb": ec2.GatewayVpcEndpointAwsService.DYNAMODB,
+}
+
+INTERFACE_ENDPOINT_SERVICES = {
+    "ecr.api": ec2.InterfaceVpcEndpointAwsService.ECR,
+    "ecr.dkr": ec2.InterfaceVpcEndpointAwsService.ECR_DOCKER,
+    "logs": ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_LOGS,
+    "sts": ec2.InterfaceVpcEndpointAwsService.STS,
+    "secretsmanager": ec2.InterfaceVpcEndpointAwsService.SECRETS_MANAGER,
+    "elasticfilesystem": ec2.InterfaceVpcEndpointAwsService.ELASTIC_FILESYSTEM,
+    "ecs": ec2.InterfaceVpcEndpointAwsService.ECS,
+    "ssm": ec2.InterfaceVpcEndpointAwsService.SSM,
+}
+
 
 class NetworkStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
-        # VPC with public and private subnets across 2 AZs
+        self.config = context_config(self, "network", DEFAULT_NETWORK)
+        max_azs = 2
+
+        # VPC with public and private subnets across 2 AZs. One NAT per AZ
+        # keeps private subnet egress from crossing AZs.
         self.vpc = ec2.Vpc(
             self, "WestTekVPC",
-            max_azs=2,
-            nat_gateways=1,
+            max_azs=max_azs,
+            nat_gateways=max_azs if self.config["nat_gateway_per_az"] else 1,
             subnet_configuration=[
                 ec2.SubnetConfiguration(
                     name="Public",
@@ -34,6 +69,44 @@ class NetworkStack(Stack):
             ]
         )
 
+        # Gateway endpoints (S3, DynamoDB) are free and attach to every
+        # subnet route table. Policies only allow resources in this account,
+        # plus the regional bucket ECR serves image layers from.
+        self.gateway_endpoints = {}
+        for name in self.config["gateway_endpoints"]:
+            endpoint = self.vpc.add_gateway_endpoint(
+                f"{name.capitalize()}GatewayEndpoint",
+                service=GATEWAY_ENDPOINT_SERVICES[name]
+            )
+            endpoint.add_to_policy(
+                iam.PolicyStatement(
+                    principals=[iam.AnyPrincipal()],
+                    actions=[f"{name}:*"],
+                    resources=["*"],
+                    conditions={"StringEquals": {"aws:ResourceAccount": self.account}}
+                )
+            )
+            if name == "s3":
+                endpoint.add_to_policy(
+                    iam.PolicyStatement(
+                        principals=[iam.AnyPrincipal()],
+                        actions=["s3:GetObject"],
+                        resources=[f"arn:{self.partition}:s3:::prod-{self.region}-starport-layer-bucket/*"]
+                    )
+                )
+            self.gateway_endpoints[name] = endpoint
+
+        # Interface endpoints for image pulls, log shipping and credentials,
+        # placed in the private subnets and reachable from the whole VPC
+        self.interface_endpoints = {}
+        for name in self.config["interface_endpoints"]:
+            self.interface_endpoints[name] = self.vpc.add_interface_endpoint(
+                f"{name.replace('.', '-').title().replace('-', '')}InterfaceEndpoint",
+                service=INTERFACE_ENDPOINT_SERVICES[name],
+                subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+                private_dns_enabled=True
+            )
+
         # Security group for ECS tasks
         self.ecs_security_group = ec2.SecurityGroup(
             self, "ECSSecurityGroup",
@@ -72,4 +145,34 @@ class NetworkStack(Stack):
             description="Allow MongoDB from ECS tasks"
         )
 
+        # NAT gateway egress and port exhaustion
+        nat_gateway_ids = [
+            subnet.node.try_find_child("NATGateway").ref
+            for subnet in self.vpc.public_subnets
+            if subnet.node.try_find_child("NATGateway") is not None
+        ]
+
+        def nat_metric(metric_name, nat_gateway_id):
+            return cloudwatch.Metric(
+                namespace="AWS/NATGateway",
+                metric_name=metric_name,
+                dimensions_map={"NatGatewayId": nat_gateway_id},
+                statistic="Sum",
+                period=Duration.minutes(5)
+            )
+
+        self.observability = StackObservability(self, "Observability")
+        self.observability.add_metrics(
+            "NAT gateway bytes out",
+            [nat_metric("BytesOutToDestination", nat_id) for nat_id in nat_gateway_ids]
+        )
+        self.observability.add_metrics(
+            "NAT gateway port allocation errors and drops",
+            [
+                nat_metric(metric_name, nat_id)
+                for nat_id in nat_gateway_ids
+                for metric_name in ("ErrorPortAllocation", "PacketsDropCount")
+            ]
+        )
+
         CfnOutput(self, "VPCId", value=self.vpc.vpc_id)
@@ -0,0 +1,442 @@
+from typing import Dict, List, Optional
+
+from aws_cdk import (
+    aws_cloudwatch as cloudwatch,
+    aws_cloudwatch_actions as cw_actions,
+    aws_dynamodb as dynamodb,
+    aws_ecs as ecs,
+    aws_efs as efs,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_iam as iam,
+    aws_logs as logs,
+    aws_sns as sns,
+    aws_stepfunctions as sfn,
+    Duration,
+    Stack,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "observability" context key. SLO alarms follow the
+# multi-window burn-rate pattern: the error-budget alarm fires only when
+# both the long and the short window burn faster than burn_rate, so it
+# catches real outages quickly without paging on a single bad minute.
+DEFAULT_OBSERVABILITY = {
+    "api_latency_p50_ms": 200,
+    "api_latency_p99_ms": 1000,
+    "availability_slo_percent": 99.9,
+    "burn_rate": 14.4,
+    "burn_rate_long_window_minutes": 60,
+    "burn_rate_short_window_minutes": 5,
+    "latency_evaluation_periods": 5,
+    "latency_datapoints_to_alarm": 3,
+    "adot_collector": True,
+    "adot_collector_version": "v0.41.1",
+}
+
+# EMF namespace for API hot-path timings (backend/app/metrics.py); the
+# "Latency" metric carries an "Operation" dimension per hot path
+API_METRICS_NAMESPACE = "WestTek/API"
+API_HOT_PATHS = ["metadata.get", "warm_pool.claim", "routing.register"]
+
+# Log group the ADOT collector's default ECS config writes EMF to
+ADOT_EMF_LOG_GROUP = "/aws/ecs/application/metrics"
+
+
+class StackObservability(Construct):
+    """
+    Per-stack CloudWatch dashboard plus the alarms for the resources added
+    to it. Alarm actions go to alarm_topic, or to a topic created here on
+    the first alarm.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        alarm_topic: Optional[sns.ITopic] = None,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "observability", DEFAULT_OBSERVABILITY)
+        self._alarm_topic = alarm_topic
+        self.dashboard = cloudwatch.Dashboard(
+            self, "Dashboard",
+            dashboard_name=Stack.of(self).stack_name,
+            default_interval=Duration.hours(3)
+        )
+
+    @property
+    def alarm_topic(self) -> sns.ITopic:
+        if self._alarm_topic is None:
+            self._alarm_topic = sns.Topic(self, "AlarmTopic")
+        return self._alarm_topic
+
+    def _alarm(self, alarm: cloudwatch.AlarmBase) -> cloudwatch.AlarmBase:
+        alarm.add_alarm_action(cw_actions.SnsAction(self.alarm_topic))
+        return alarm
+
+    def add_load_balancer(
+        self,
+        load_balancer: elbv2.ApplicationLoadBalancer,
+        target_group: elbv2.ApplicationTargetGroup,
+        name: str,
+    ) -> None:
+        """ALB latency/error widgets and the latency and availability SLO alarms."""
+        config = self.config
+        target_metrics = target_group.metrics
+
+        p50 = target_metrics.target_response_time(statistic="p50", period=Duration.minutes(1))
+        p99 = target_metrics.target_response_time(statistic="p99", period=Duration.minutes(1))
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f"{name} ALB latency (all targets)",
+                left=[
+                    load_balancer.metrics.target_response_time(statistic="p50", label="p50"),
+                    load_balancer.metrics.target_response_time(statistic="p99", label="p99"),
+                ],
+                width=8
+            ),
+            cloudwatch.GraphWidget(
+                title=f"{name} target response time",
+                left=[p50.with_(label="p50"), p99.with_(label="p99")],
+                left_annotations=[
+                    cloudwatch.HorizontalAnnotation(value=config["api_latency_p99_ms"] / 1000, label="p99 SLO"),
+                ],
+                width=8
+            ),
+            cloudwatch.GraphWidget(
+                title=f"{name} requests and errors",
+                left=[target_metrics.request_count()],
+                right=[
+                    target_metrics.http_code_target(elbv2.HttpCodeTarget.TARGET_5XX_COUNT),
+                    load_balancer.metrics.http_code_elb(elbv2.HttpCodeElb.ELB_5XX_COUNT),
+                ],
+                width=8
+            )
+        )
+
+        for label, metric, threshold_ms in (
+            ("P50", p50, config["api_latency_p50_ms"]),
+            ("P99", p99, config["api_latency_p99_ms"]),
+        ):
+            self._alarm(cloudwatch.Alarm(
+                self, f"{name}Latency{label}Alarm",
+                metric=metric,
+                threshold=threshold_ms / 1000,
+                evaluation_periods=config["latency_evaluation_periods"],
+                datapoints_to_alarm=config["latency_datapoints_to_alarm"],
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+                alarm_description=f"{name} {label.lower()} latency is above its {threshold_ms} ms SLO"
+            ))
+
+        # Error budget burn over a long and a short window
+        error_budget = (100 - config["availability_slo_percent"]) / 100
+        burn_alarms = []
+        for window in ("long", "short"):
+            period = Duration.minutes(config[f"burn_rate_{window}_window_minutes"])
+            error_ratio = cloudwatch.MathExpression(
+                expression="IF(requests > 0, (target5xx + elb5xx) / requests, 0)",
+                using_metrics={
+                    "requests": target_metrics.request_count(period=period),
+                    "target5xx": target_metrics.http_code_target(
+                        elbv2.HttpCodeTarget.TARGET_5XX_COUNT, period=period
+                    ),
+                    "elb5xx": load_balancer.metrics.http_code_elb(
+                        elbv2.HttpCodeElb.ELB_5XX_COUNT, period=period
+                    ),
+                },
+                period=period,
+                label=f"{name} error ratio ({window} window)"
+            )
+            burn_alarms.append(cloudwatch.Alarm(
+                self, f"{name}ErrorBudgetBurn{window.capitalize()}Alarm",
+                metric=error_ratio,
+                threshold=config["burn_rate"] * error_budget,
+                evaluation_periods=1,
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+                alarm_description=f"{name} is burning its availability error budget ({window} window)"
+            ))
+
+        self._alarm(cloudwatch.CompositeAlarm(
+            self, f"{name}AvailabilitySLOAlarm",
+            alarm_rule=cloudwatch.AlarmRule.all_of(*burn_alarms),
+            alarm_description=(
+                f"{name} availability SLO ({config['availability_slo_percent']} %) "
+                f"error budget is burning at more than {config['burn_rate']}x"
+            )
+        ))
+
+    def add_ecs_services(self, services: Dict[str, ecs.BaseService]) -> None:
+        """CPU and memory utilisation per ECS service."""
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title="ECS CPU utilisation",
+                left=[service.metric_cpu_utilization(label=name) for name, service in services.items()],
+                left_y_axis=cloudwatch.YAxisProps(min=0, max=100),
+                width=12
+            ),
+            cloudwatch.GraphWidget(
+                title="ECS memory utilisation",
+                left=[service.metric_memory_utilization(label=name) for name, service in services.items()],
+                left_y_axis=cloudwatch.YAxisProps(min=0, max=100),
+                width=12
+            )
+        )
+
+    def add_file_system(self, file_system: efs.IFileSystem, name: str) -> None:
+        """EFS throughput (MiB/s) against what the file system permits."""
+        def efs_metric(metric_name, statistic="Sum"):
+            return cloudwatch.Metric(
+                namespace="AWS/EFS",
+                metric_name=metric_name,
+                dimensions_map={"FileSystemId": file_system.file_system_id},
+                statistic=statistic,
+                period=Duration.minutes(1)
+            )
+
+        # Metric IDs must be unique within a graph
+        throughput = {
+            label: cloudwatch.MathExpression(
+                expression=f"{metric_id} / PERIOD({metric_id}) / 1048576",
+                using_metrics={metric_id: efs_metric(metric_name)},
+                label=label,
+                period=Duration.minutes(1)
+            )
+            for label, metric_id, metric_name in (
+                ("read MiB/s", "readbytes", "DataReadIOBytes"),
+                ("write MiB/s", "writebytes", "DataWriteIOBytes"),
+                ("metered MiB/s", "meteredbytes", "MeteredIOBytes"),
+            )
+        }
+        permitted = cloudwatch.MathExpression(
+            expression="permitted / 1048576",
+            using_metrics={"permitted": efs_metric("PermittedThroughput", "Average")},
+            label="permitted MiB/s",
+            period=Duration.minutes(1)
+        )
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f"{name} EFS throughput",
+                left=[*throughput.values(), permitted],
+                width=12
+            ),
+            cloudwatch.GraphWidget(
+                title=f"{name} EFS I/O limit and connections",
+                left=[efs_metric("PercentIOLimit", "Maximum")],
+                right=[efs_metric("ClientConnections")],
+                width=12
+            )
+        )
+
+    def add_tables(self, tables: Dict[str, dynamodb.ITable]) -> None:
+        """DynamoDB read/write throttles per table, alarmed when sustained."""
+        read_throttles, write_throttles = [], []
+        for name, table in tables.items():
+            read_metric = table.metric("ReadThrottleEvents", statistic="Sum", label=name, period=Duration.minutes(1))
+            write_metric = table.metric("WriteThrottleEvents", statistic="Sum", label=name, period=Duration.minutes(1))
+            read_throttles.append(read_metric)
+            write_throttles.append(write_metric)
+
+            self._alarm(cloudwatch.Alarm(
+                self, f"{name}ThrottleAlarm",
+                metric=cloudwatch.MathExpression(
+                    expression="reads + writes",
+                    using_metrics={"reads": read_metric, "writes": write_metric},
+                    period=Duration.minutes(1)
+                ),
+                threshold=0,
+                evaluation_periods=5,
+                datapoints_to_alarm=3,
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+                alarm_description=f"{name} DynamoDB requests are being throttled"
+            ))
+
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(title="DynamoDB read throttles", left=read_throttles, width=12),
+            cloudwatch.GraphWidget(title="DynamoDB write throttles", left=write_throttles, width=12)
+        )
+
+    def add_state_machine(self, state_machine: sfn.StateMachine, name: str) -> None:
+        """Execution outcomes and duration; alarms on any failed execution."""
+        failed = state_machine.metric_failed(period=Duration.minutes(5))
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f"{name} executions",
+                left=[state_machine.metric_succeeded(), failed, state_machine.metric_timed_out()],
+                width=12
+            ),
+            cloudwatch.GraphWidget(
+                title=f"{name} execution time",
+                left=[
+                    state_machine.metric_time(statistic="p50", label="p50"),
+                    state_machine.metric_time(statistic="p99", label="p99"),
+                ],
+                width=12
+            )
+        )
+        self._alarm(cloudwatch.Alarm(
+            self, f"{name}FailedAlarm",
+            metric=failed,
+            threshold=0,
+            evaluation_periods=1,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            alarm_description=f"{name} executions failed"
+        ))
+
+    def add_streaming_fleet(self, fleet_name: str, name: str) -> None:
+        """Streaming capacity against sessions; alarms when users are turned away."""
+        def fleet_metric(metric_name, statistic="Average"):
+            return cloudwatch.Metric(
+                namespace="AWS/AppStream",
+                metric_name=metric_name,
+                dimensions_map={"Fleet": fleet_name},
+                statistic=statistic,
+                period=Duration.minutes(1),
+                label=metric_name
+            )
+
+        insufficient = fleet_metric("InsufficientCapacityError", statistic="Sum")
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f"{name} capacity",
+                left=[
+                    fleet_metric("ActualCapacity"),
+                    fleet_metric("InUseCapacity"),
+                    fleet_metric("AvailableCapacity"),
+                    fleet_metric("PendingCapacity"),
+                ],
+                right=[insufficient],
+                width=12
+            ),
+            cloudwatch.GraphWidget(
+                title=f"{name} capacity utilisation",
+                left=[fleet_metric("CapacityUtilization")],
+                left_y_axis=cloudwatch.YAxisProps(min=0, max=100),
+                width=12
+            )
+        )
+        self._alarm(cloudwatch.Alarm(
+            self, f"{name.title().replace(' ', '')}InsufficientCapacityAlarm",
+            metric=insufficient,
+            threshold=0,
+            evaluation_periods=3,
+            datapoints_to_alarm=2,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            alarm_description=f"{name} is turning session requests away"
+        ))
+
+    def add_metrics(self, title: str, metrics: List[cloudwatch.IMetric], width: int = 12) -> None:
+        """Free-form graph for resources without a dedicated helper."""
+        self.dashboard.add_widgets(cloudwatch.GraphWidget(title=title, left=metrics, width=width))
+
+    def add_api_hot_paths(self) -> None:
+        """p50/p99 of the API hot-path timings emitted as EMF."""
+        widgets = []
+        for statistic in ("p50", "p99"):
+            widgets.append(cloudwatch.GraphWidget(
+                title=f"API hot paths {statistic} (ms)",
+                left=[
+                    cloudwatch.Metric(
+                        namespace=API_METRICS_NAMESPACE,
+                        metric_name="Latency",
+                        dimensions_map={"Operation": operation},
+                        statistic=statistic,
+                        label=operation,
+                        period=Duration.minutes(1)
+                    )
+                    for operation in API_HOT_PATHS
+                ],
+                width=12
+            ))
+        self.dashboard.add_widgets(*widgets)
+
+
+def add_adot_collector(
+    task_definition: ecs.FargateTaskDefinition,
+    app_container: ecs.ContainerDefinition,
+) -> Optional[ecs.ContainerDefinition]:
+    """
+    Add the AWS Distro for OpenTelemetry collector as a sidecar. It receives
+    X-Ray segments (UDP 2000) and OTLP (4317/4318) from the app container
+    and forwards traces to X-Ray and metrics to CloudWatch as EMF.
+    """
+    config = context_config(task_definition, "observability", DEFAULT_OBSERVABILITY)
+    if not config["adot_collector"]:
+        return None
+
+    stack = Stack.of(task_definition)
+    # Pulled through the ECR pull-through cache (see infrastructure/images.py)
+    image = (
+        f"{stack.account}.dkr.ecr.{stack.region}.{stack.url_suffix}/ecr-public/"
+        f"aws-observability/aws-otel-collector:{config['adot_collector_version']}"
+    )
+    collector = task_definition.add_container(
+        "ADOTCollectorContainer",
+        image=ecs.ContainerImage.from_registry(image),
+        command=["--config=/etc/ecs/ecs-default-config.yaml"],
+        logging=ecs.LogDrivers.aws_logs(
+            stream_prefix="adot",
+            log_retention=logs.RetentionDays.ONE_WEEK
+        ),
+        health_check=ecs.HealthCheck(
+            command=["/healthcheck"],
+            interval=Duration.seconds(10),
+            timeout=Duration.seconds(5),
+            start_period=Duration.seconds(10)
+        ),
+        cpu=128,
+        memory_reservation_mib=128,
+        # Losing traces must never take the API down
+        essential=False
+    )
+
+    app_container.add_container_dependencies(
+        ecs.ContainerDependency(container=collector, condition=ecs.ContainerDependencyCondition.START)
+    )
+    app_container.add_environment("AWS_XRAY_DAEMON_ADDRESS", "localhost:2000")
+    app_container.add_environment("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317")
+    app_container.add_environment("OTEL_SERVICE_NAME", task_definition.family)
+
+    task_definition.obtain_execution_role().add_to_principal_policy(
+        iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=["ecr:BatchImportUpstreamImage", "ecr:CreateRepository"],
+            resources=[f"arn:{stack.partition}:ecr:{stack.region}:{stack.account}:repository/ecr-public/*"]
+        )
+    )
+    task_definition.task_role.add_to_principal_policy(
+        iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=[
+                "xray:PutTraceSegments",
+                "xray:PutTelemetryRecords",
+                "xray:GetSamplingRules",
+                "xray:GetSamplingTargets",
+                "xray:GetSamplingStatisticSummaries"
+            ],
+            resources=["*"]
+        )
+    )
+    task_definition.task_role.add_to_principal_policy(
+        iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=[
+                "logs:CreateLogGroup",
+                "logs:CreateLogStream",
+                "logs:PutLogEvents",
+                "logs:DescribeLogStreams"
+            ],
+            resources=[
+                f"arn:{stack.partition}:logs:{stack.region}:{stack.account}:log-group:{ADOT_EMF_LOG_GROUP}",
+                f"arn:{stack.partition}:logs:{stack.region}:{stack.account}:log-group:{ADOT_EMF_LOG_GROUP}:*"
+            ]
+        )
+    )
+    return collector
@@ -0,0 +1,60 @@
+import os
+import shutil
+
+import jsii
+from aws_cdk import (
+    AssetHashType,
+    BundlingOptions,
+    ILocalBundling,
+    aws_lambda as lambda_,
+)
+
+
+REPO_DIR = os.path.join(os.path.dirname(__file__), "..")
+SERVICES_DIR = os.path.join(REPO_DIR, "services")
+
+
+@jsii.implements(ILocalBundling)
+class _CopySources:
+    """Copies the service directory and the shared paths into the asset."""
+    def __init__(self, sources) -> None:
+        self.sources = sources
+
+    def try_bundle(self, output_dir: str, *, image, **kwargs) -> bool:
+        for source in self.sources:
+            target = os.path.join(output_dir, os.path.basename(source.rstrip("/")))
+            if os.path.isdir(source):
+                shutil.copytree(source, target, dirs_exist_ok=True,
+                                ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+            else:
+                shutil.copy2(source, target)
+        return True
+
+
+def service_code(service: str, *shared: str) -> lambda_.Code:
+    """
+    Lambda code for services/<service>, plus shared files or packages from
+    elsewhere in the repo (paths relative to the repo root) copied next to
+    its modules, e.g. service_code("drift", "services/drift_collector/collector.py")
+    lets ingest.py import collector, and "backend/app" ships as package app.
+    Bundling is a local copy, no Docker; the asset hash covers the output so
+    edits to a shared path redeploy every function that ships it.
+    """
+    service_dir = os.path.join(SERVICES_DIR, service)
+    if not shared:
+        return lambda_.Code.from_asset(service_dir)
+
+    sources = [
+        os.path.join(service_dir, name)
+        for name in sorted(os.listdir(service_dir))
+        if name != "__pycache__"
+    ] + [os.path.join(REPO_DIR, path) for path in shared]
+    return lambda_.Code.from_asset(
+        service_dir,
+        asset_hash_type=AssetHashType.OUTPUT,
+        bundling=BundlingOptions(
+            # Required by BundlingOptions; _CopySources always does the bundling
+            image=lambda_.Runtime.PYTHON_3_11.bundling_image,
+            local=_CopySources(sources)
+        )
+    )
@@ -0,0 +1,150 @@
+from aws_cdk import (
+    aws_s3 as s3,
+    Duration,
+    RemovalPolicy,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Key layout written by services/snapshot_engine
+CHUNK_PREFIX = "chunks/"
+MANIFEST_PREFIX = "manifests/"
+
+# S3 bills IA/Glacier IR objects as at least 128 KiB, so tiering smaller
+# chunks costs more than it saves
+MIN_TIERED_OBJECT_BYTES = 128 * 1024
+
+# Retention profiles for the snapshots bucket. Chunks are shared across
+# snapshots, so a years-old chunk can back today's snapshot: the default
+# profiles stop at Glacier Instant Retrieval, which restores without a
+# thaw. "cold_archive" moves chunks to Deep Archive and then restores
+# need an S3 restore (hours) before the engine can read them.
+RETENTION_PROFILES = {
+    "standard": {
+        "chunk_transitions": [("INFREQUENT_ACCESS", 30), ("GLACIER_INSTANT_RETRIEVAL", 180)],
+        "noncurrent_transitions": [("GLACIER_INSTANT_RETRIEVAL", 30)],
+        "noncurrent_expiration_days": 365,
+        "noncurrent_versions_to_retain": 1,
+    },
+    "decade": {
+        "chunk_transitions": [("INFREQUENT_ACCESS", 30), ("GLACIER_INSTANT_RETRIEVAL", 90)],
+        "noncurrent_transitions": [("DEEP_ARCHIVE", 30)],
+        "noncurrent_expiration_days": 3650,
+        "noncurrent_versions_to_retain": 3,
+    },
+    "cold_archive": {
+        "chunk_transitions": [
+            ("INFREQUENT_ACCESS", 30),
+            ("GLACIER_INSTANT_RETRIEVAL", 90),
+            ("DEEP_ARCHIVE", 365),
+        ],
+        "noncurrent_transitions": [("DEEP_ARCHIVE", 1)],
+        "noncurrent_expiration_days": 3650,
+        "noncurrent_versions_to_retain": 3,
+    },
+}
+
+# Defaults for the "snapshot_retention" context key
+DEFAULT_SNAPSHOT_RETENTION = {
+    "profile": "decade",
+    "abort_incomplete_upload_days": 7,
+    "inventory_frequency": "weekly",
+    "inventory_retention_days": 180,
+}
+
+
+def _storage_class(name: str) -> s3.StorageClass:
+    return getattr(s3.StorageClass, name)
+
+
+class SnapshotRetentionPolicy(Construct):
+    """
+    Lifecycle tiering and S3 Inventory for a snapshots bucket, driven by a
+    named retention profile from the "snapshot_retention" context key.
+    """
+    def __init__(self, scope: Construct, construct_id: str, bucket: s3.Bucket) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "snapshot_retention", DEFAULT_SNAPSHOT_RETENTION)
+        self.profile = RETENTION_PROFILES[self.config["profile"]]
+
+        # Chunks age through cheaper classes; noncurrent versions only
+        # appear when an object is overwritten or deleted
+        bucket.add_lifecycle_rule(
+            id="TierSnapshotChunks",
+            prefix=CHUNK_PREFIX,
+            object_size_greater_than=MIN_TIERED_OBJECT_BYTES,
+            transitions=[
+                s3.Transition(
+                    storage_class=_storage_class(storage_class),
+                    transition_after=Duration.days(days)
+                )
+                for storage_class, days in self.profile["chunk_transitions"]
+            ]
+        )
+
+        # Manifests are small and read unpredictably (restores, KB sync)
+        bucket.add_lifecycle_rule(
+            id="IntelligentTierManifests",
+            prefix=MANIFEST_PREFIX,
+            transitions=[
+                s3.Transition(
+                    storage_class=s3.StorageClass.INTELLIGENT_TIERING,
+                    transition_after=Duration.days(0)
+                )
+            ]
+        )
+
+        bucket.add_lifecycle_rule(
+            id="ExpireNoncurrentVersions",
+            abort_incomplete_multipart_upload_after=Duration.days(
+                self.config["abort_incomplete_upload_days"]
+            ),
+            noncurrent_version_transitions=[
+                s3.NoncurrentVersionTransition(
+                    storage_class=_storage_class(storage_class),
+                    transition_after=Duration.days(days)
+                )
+                for storage_class, days in self.profile["noncurrent_transitions"]
+            ],
+            noncurrent_version_expiration=Duration.days(self.profile["noncurrent_expiration_days"]),
+            noncurrent_versions_to_retain=self.profile["noncurrent_versions_to_retain"],
+            expired_object_delete_marker=True
+        )
+
+        # Inventory reports (Parquet, queryable with Athena) for offline
+        # analysis of storage growth per prefix and storage class
+        self.inventory_bucket = s3.Bucket(
+            self, "InventoryBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            removal_policy=RemovalPolicy.RETAIN,
+            lifecycle_rules=[
+                s3.LifecycleRule(
+                    expiration=Duration.days(self.config["inventory_retention_days"])
+                )
+            ]
+        )
+
+        bucket.add_inventory(
+            inventory_id="SnapshotStorageGrowth",
+            destination=s3.InventoryDestination(
+                bucket=self.inventory_bucket,
+                prefix="snapshots"
+            ),
+            format=s3.InventoryFormat.PARQUET,
+            frequency=(
+                s3.InventoryFrequency.DAILY
+                if self.config["inventory_frequency"] == "daily"
+                else s3.InventoryFrequency.WEEKLY
+            ),
+            include_object_versions=s3.InventoryObjectVersion.ALL,
+            optional_fields=[
+                "Size",
+                "LastModifiedDate",
+                "StorageClass",
+                "IntelligentTieringAccessTier",
+            ]
+        )
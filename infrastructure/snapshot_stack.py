@@ -0,0 +1,217 @@
+import os
+
+from aws_cdk import (
+    Stack,
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_efs as efs,
+    aws_s3 as s3,
+    aws_dynamodb as dynamodb,
+    aws_logs as logs,
+    aws_stepfunctions as sfn,
+    aws_stepfunctions_tasks as tasks,
+    Duration,
+    CfnOutput,
+)
+from constructs import Construct
+
+from infrastructure.capacity import CapacityProviderLaunchTarget, capacity_provider_strategies
+from infrastructure.efs_restore import EfsRestoreWorkflow
+from infrastructure.observability import StackObservability
+from infrastructure.stack_params import lookup
+
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "services")
+
+
+class SnapshotStack(Stack):
+    """
+    Incremental environment snapshots. A Fargate task chunks an EFS
+    directory into SnapshotsBucket (see services/snapshot_engine) and a state
+    machine runs it for snapshot and restore requests:
+
+        {"mode": "snapshot" | "restore", "environment_id": "...",
+         "snapshot_id": "...", "path": "researchers/<researcher>/<env>"}
+
+    A second state machine restores environments from the AWS Backup
+    recovery points of the notebook file system (see efs_restore.py).
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        ecs_security_group: ec2.SecurityGroup,
+        efs_security_group: ec2.SecurityGroup,
+        **kwargs
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        # Cluster, file system, bucket and table, resolved from the SSM
+        # parameters ComputeStack and StorageStack publish
+        cluster = ecs.Cluster.from_cluster_attributes(
+            self, "Cluster",
+            cluster_name=lookup(self, "compute/cluster-name"),
+            vpc=vpc,
+            security_groups=[]
+        )
+        efs_file_system = efs.FileSystem.from_file_system_attributes(
+            self, "NotebookFileSystem",
+            file_system_id=lookup(self, "storage/efs-file-system-id"),
+            security_group=efs_security_group
+        )
+        snapshots_bucket = s3.Bucket.from_bucket_name(
+            self, "SnapshotsBucket", lookup(self, "storage/snapshots-bucket-name")
+        )
+        metadata_table = dynamodb.Table.from_table_name(
+            self, "EnvironmentMetadataTable", lookup(self, "storage/metadata-table-name")
+        )
+
+        # Hashing and parallel uploads are CPU-bound, so size for throughput
+        self.snapshot_task_definition = ecs.FargateTaskDefinition(
+            self, "SnapshotTaskDefinition",
+            cpu=4096,
+            memory_limit_mib=8192
+        )
+
+        # The whole file system is mounted so any environment can be captured
+        self.snapshot_task_definition.add_volume(
+            name="efs-root",
+            efs_volume_configuration=ecs.EfsVolumeConfiguration(
+                file_system_id=efs_file_system.file_system_id,
+                transit_encryption="ENABLED",
+                authorization_config=ecs.AuthorizationConfig(iam="ENABLED")
+            )
+        )
+
+        snapshot_container = self.snapshot_task_definition.add_container(
+            "SnapshotContainer",
+            image=ecs.ContainerImage.from_asset(os.path.join(SERVICES_DIR, "snapshot_engine")),
+            logging=ecs.LogDrivers.aws_logs(
+                stream_prefix="snapshot",
+                log_retention=logs.RetentionDays.ONE_WEEK
+            ),
+            environment={
+                "SNAPSHOTS_BUCKET": snapshots_bucket.bucket_name,
+                "METADATA_TABLE": metadata_table.table_name,
+                "EFS_MOUNT": "/mnt/efs",
+                "WORKERS": "32"
+            },
+            essential=True
+        )
+
+        snapshot_container.add_mount_points(
+            ecs.MountPoint(
+                source_volume="efs-root",
+                container_path="/mnt/efs",
+                read_only=False
+            )
+        )
+
+        task_role = self.snapshot_task_definition.task_role
+        efs_file_system.grant_root_access(task_role)
+        snapshots_bucket.grant_read_write(task_role)
+        metadata_table.grant_read_write_data(task_role)
+
+        # State machine: run the task, record failures against the environment
+        run_task = tasks.EcsRunTask(
+            self, "RunSnapshotTask",
+            integration_pattern=sfn.IntegrationPattern.RUN_JOB,
+            cluster=cluster,
+            task_definition=self.snapshot_task_definition,
+            # Snapshots are restartable, so they run on the "batch" strategy
+            launch_target=CapacityProviderLaunchTarget(
+                capacity_provider_strategies(self, "batch")
+            ),
+            subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            # NetworkStack's ECS security group is the one EFS accepts NFS from
+            security_groups=[ecs_security_group],
+            container_overrides=[
+                tasks.ContainerOverride(
+                    container_definition=snapshot_container,
+                    environment=[
+                        tasks.TaskEnvironmentVariable(
+                            name="MODE", value=sfn.JsonPath.string_at("$.mode")
+                        ),
+                        tasks.TaskEnvironmentVariable(
+                            name="ENVIRONMENT_ID", value=sfn.JsonPath.string_at("$.environment_id")
+                        ),
+                        tasks.TaskEnvironmentVariable(
+                            name="SNAPSHOT_ID", value=sfn.JsonPath.string_at("$.snapshot_id")
+                        ),
+                        tasks.TaskEnvironmentVariable(
+                            name="SOURCE_PATH", value=sfn.JsonPath.string_at("$.path")
+                        ),
+                        tasks.TaskEnvironmentVariable(
+                            name="TARGET_PATH", value=sfn.JsonPath.string_at("$.path")
+                        ),
+                    ]
+                )
+            ],
+            result_path=sfn.JsonPath.DISCARD,
+            task_timeout=sfn.Timeout.duration(Duration.hours(6))
+        )
+
+        # Fargate capacity errors and spot interruptions are transient
+        run_task.add_retry(
+            errors=["ECS.AmazonECSException", "States.TaskFailed"],
+            interval=Duration.seconds(30),
+            max_attempts=2,
+            backoff_rate=2
+        )
+
+        mark_failed = tasks.DynamoUpdateItem(
+            self, "MarkSnapshotFailed",
+            table=metadata_table,
+            key={
+                "environment_id": tasks.DynamoAttributeValue.from_string(
+                    sfn.JsonPath.string_at("$.environment_id")
+                )
+            },
+            update_expression="SET snapshot_status = :status, failed_snapshot_id = :id",
+            expression_attribute_values={
+                ":status": tasks.DynamoAttributeValue.from_string("FAILED"),
+                ":id": tasks.DynamoAttributeValue.from_string(
+                    sfn.JsonPath.string_at("$.snapshot_id")
+                ),
+            },
+            result_path=sfn.JsonPath.DISCARD
+        ).next(sfn.Fail(self, "SnapshotFailed"))
+
+        run_task.add_catch(mark_failed, result_path="$.error")
+
+        self.state_machine = sfn.StateMachine(
+            self, "SnapshotStateMachine",
+            definition_body=sfn.DefinitionBody.from_chainable(
+                run_task.next(sfn.Succeed(self, "SnapshotSucceeded"))
+            ),
+            timeout=Duration.hours(12)
+        )
+
+        # Restores from AWS Backup recovery points; the same task moves the
+        # restored directory into place (configured via the "efs_restore"
+        # context key)
+        self.efs_restore = EfsRestoreWorkflow(
+            self, "EfsRestore",
+            cluster=cluster,
+            vpc=vpc,
+            file_system=efs_file_system,
+            metadata_table=metadata_table,
+            relocate_task_definition=self.snapshot_task_definition,
+            relocate_container=snapshot_container,
+            task_security_group=ecs_security_group,
+            efs_security_group=efs_security_group,
+            backup_vault_name=lookup(self, "storage/backup-vault-name"),
+            restore_role_arn=lookup(self, "storage/backup-restore-role-arn")
+        )
+
+        self.observability = StackObservability(self, "Observability")
+        self.observability.add_state_machine(self.state_machine, "Snapshot")
+        self.observability.add_state_machine(self.efs_restore.state_machine, "Restore")
+
+        CfnOutput(self, "SnapshotStateMachineArn", value=self.state_machine.state_machine_arn)
+        CfnOutput(self, "RestoreStateMachineArn", value=self.efs_restore.state_machine.state_machine_arn)
+        CfnOutput(
+            self, "SnapshotTaskDefinitionArn",
+            value=self.snapshot_task_definition.task_definition_arn
+        )
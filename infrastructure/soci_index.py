@@ -0,0 +1,125 @@
+from aws_cdk import (
+    aws_codebuild as codebuild,
+    aws_ecr as ecr,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_logs as logs,
+    Duration,
+    Stack,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "soci_index" context key. Layers smaller than
+# min_layer_size_mib are pulled eagerly; indexing them costs more than it saves.
+DEFAULT_SOCI_INDEX = {
+    "soci_version": "0.9.0",
+    "min_layer_size_mib": 10,
+}
+
+
+class SociIndexBuilder(Construct):
+    """
+    Builds a Seekable OCI (SOCI) index next to every image pushed to the
+    registered repositories. Fargate picks the index up automatically and
+    lazy-loads layers, so large Jupyter images start before the full pull
+    completes. Call add_repository() once per Jupyter image tier.
+    """
+    def __init__(self, scope: Construct, construct_id: str) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "soci_index", DEFAULT_SOCI_INDEX)
+        stack = Stack.of(self)
+
+        # soci needs containerd, so the build runs privileged and starts its
+        # own containerd rather than going through docker
+        self.project = codebuild.Project(
+            self, "IndexProject",
+            description="Creates and pushes SOCI indexes for pushed Jupyter images",
+            environment=codebuild.BuildEnvironment(
+                build_image=codebuild.LinuxBuildImage.STANDARD_7_0,
+                compute_type=codebuild.ComputeType.LARGE,
+                privileged=True
+            ),
+            environment_variables={
+                "SOCI_VERSION": codebuild.BuildEnvironmentVariable(
+                    value=self.config["soci_version"]
+                ),
+                "MIN_LAYER_SIZE": codebuild.BuildEnvironmentVariable(
+                    value=str(self.config["min_layer_size_mib"] * 1024 * 1024)
+                ),
+                "REGISTRY": codebuild.BuildEnvironmentVariable(
+                    value=f"{stack.account}.dkr.ecr.{stack.region}.{stack.url_suffix}"
+                ),
+            },
+            build_spec=codebuild.BuildSpec.from_object({
+                "version": "0.2",
+                "phases": {
+                    "install": {
+                        "commands": [
+                            "curl -fsSL https://github.com/awslabs/soci-snapshotter/releases/download/"
+                            "v${SOCI_VERSION}/soci-snapshotter-${SOCI_VERSION}-linux-amd64.tar.gz"
+                            " | tar -xz -C /usr/local/bin soci",
+                            "nohup containerd > /tmp/containerd.log 2>&1 &",
+                            "sleep 3",
+                        ]
+                    },
+                    # Multi-arch images get one index per platform
+                    "build": {
+                        "commands": [
+                            "IMAGE=${REGISTRY}/${REPOSITORY_NAME}@${IMAGE_DIGEST}",
+                            "PASSWORD=$(aws ecr get-login-password)",
+                            "ctr image pull --all-platforms --user AWS:${PASSWORD} ${IMAGE}",
+                            "soci create --all-platforms --min-layer-size ${MIN_LAYER_SIZE} ${IMAGE}",
+                            "soci push --all-platforms --user AWS:${PASSWORD} ${IMAGE}",
+                        ]
+                    },
+                },
+            }),
+            timeout=Duration.minutes(60),
+            logging=codebuild.LoggingOptions(
+                cloud_watch=codebuild.CloudWatchLoggingOptions(
+                    log_group=logs.LogGroup(
+                        self, "IndexLogs",
+                        retention=logs.RetentionDays.ONE_WEEK
+                    )
+                )
+            )
+        )
+
+    def add_repository(self, repository: ecr.IRepository) -> None:
+        """Index every tagged image pushed to this repository."""
+        repository.grant_pull_push(self.project)
+
+        # The SOCI index itself is pushed by digest only, so requiring an
+        # image tag keeps the rule from re-triggering on its own output.
+        repository.on_event(
+            "SociIndexOnPush",
+            event_pattern=events.EventPattern(
+                detail_type=["ECR Image Action"],
+                detail={
+                    "action-type": ["PUSH"],
+                    "result": ["SUCCESS"],
+                    "image-tag": events.Match.exists()
+                }
+            ),
+            target=targets.CodeBuildProject(
+                self.project,
+                event=events.RuleTargetInput.from_object({
+                    "environmentVariablesOverride": [
+                        {
+                            "name": "REPOSITORY_NAME",
+                            "value": events.EventField.from_path("$.detail.repository-name"),
+                            "type": "PLAINTEXT"
+                        },
+                        {
+                            "name": "IMAGE_DIGEST",
+                            "value": events.EventField.from_path("$.detail.image-digest"),
+                            "type": "PLAINTEXT"
+                        },
+                    ]
+                })
+            )
+        )
@@ -0,0 +1,45 @@
+from aws_cdk import (
+    Stack,
+    aws_ssm as ssm,
+)
+from constructs import Construct
+
+
+# Stacks publish the identifiers other stacks need under this prefix and
+# consumers resolve them at deploy time, instead of passing constructs
+# between stacks. A consumer then has no CloudFormation exports pinned on
+# its producer, and either side can be synthesized and deployed on its own
+# (see STACKS in app.py). Consumers pick up a changed value on their next
+# deploy. NetworkStack's VPC and security groups are still passed as
+# constructs: nearly every stack needs them and they rarely change.
+PARAMETER_PREFIX = "/westtek"
+
+
+def parameter_name(name: str) -> str:
+    return f"{PARAMETER_PREFIX}/{name}"
+
+
+def publish(scope: Construct, name: str, value: str, description: str = None) -> ssm.StringParameter:
+    """Publish a value under /westtek/<name>, e.g. publish(self, "storage/metadata-table-name", ...)."""
+    construct_id = "".join(part.capitalize() for part in name.replace("/", "-").split("-")) + "Parameter"
+    return ssm.StringParameter(
+        scope, construct_id,
+        parameter_name=parameter_name(name),
+        string_value=value,
+        description=description
+    )
+
+
+def lookup(scope: Construct, name: str) -> str:
+    """Deploy-time reference to a value another stack published."""
+    return ssm.StringParameter.value_for_string_parameter(scope, parameter_name(name))
+
+
+def export_legacy(scope: Construct, *values: str) -> None:
+    """Keep the CloudFormation exports of values when the "legacy_exports" context is set."""
+    # One-release bridge for deployments that predate the SSM parameters:
+    # keeps the exports older consumer templates import (see DEPLOYMENT.md)
+    if scope.node.try_get_context("legacy_exports"):
+        stack = Stack.of(scope)
+        for value in values:
+            stack.export_value(value)
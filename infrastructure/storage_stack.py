@@ -1,3 +1,5 @@
+import os
+
 from aws_cdk import (
     Stack,
     aws_s3 as s3,
@@ -5,11 +7,59 @@ from aws_cdk import (
     aws_efs as efs,
     aws_ec2 as ec2,
     aws_dynamodb as dynamodb,
+    aws_cloudwatch as cloudwatch,
+    aws_cloudwatch_actions as cw_actions,
+    aws_sns as sns,
+    aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_logs as logs,
+    Duration,
     RemovalPolicy,
+    Size,
     CfnOutput,
 )
 from constructs import Construct
 
+from infrastructure.config import context_config
+from infrastructure.efs_backup import NotebookBackup
+from infrastructure.images import PullThroughCache
+from infrastructure.observability import StackObservability
+from infrastructure.snapshot_retention import SnapshotRetentionPolicy
+from infrastructure.soci_index import SociIndexBuilder
+from infrastructure.stack_params import export_legacy, publish
+
+
+# Defaults for the "notebook_storage" context key. throughput_mode is one of
+# elastic, provisioned or bursting; provisioned_throughput_mibps only applies
+# to provisioned. Alarms fire before the file system starts throttling.
+DEFAULT_NOTEBOOK_STORAGE = {
+    "throughput_mode": "elastic",
+    "provisioned_throughput_mibps": 128,
+    "burst_credit_alarm_gib": 512,
+    "percent_io_limit_alarm": 90,
+}
+
+THROUGHPUT_MODES = {
+    "elastic": efs.ThroughputMode.ELASTIC,
+    "provisioned": efs.ThroughputMode.PROVISIONED,
+    "bursting": efs.ThroughputMode.BURSTING,
+}
+
+# Defaults for the "drift_tracking" context key. Writers and readers of
+# DriftTrackingTable must agree on lab_shards and severity_shards (see
+# services/drift/keys.py).
+DEFAULT_DRIFT_TRACKING = {
+    "lab_shards": 4,
+    "severity_shards": 8,
+    "raw_event_ttl_days": 90,
+}
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "services")
+
+# jovyan in the jupyter/* images
+JUPYTER_UID = "1000"
+JUPYTER_GID = "100"
+
 
 class StorageStack(Stack):
     def __init__(
@@ -22,15 +72,27 @@ class StorageStack(Stack):
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        storage_config = context_config(self, "notebook_storage", DEFAULT_NOTEBOOK_STORAGE)
+        throughput_mode = storage_config["throughput_mode"]
+
         # S3 bucket for environment snapshots
         self.snapshots_bucket = s3.Bucket(
             self, "SnapshotsBucket",
             versioned=True,
             encryption=s3.BucketEncryption.S3_MANAGED,
             block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            # New manifests start Knowledge Base staging (KnowledgeStack)
+            event_bridge_enabled=True,
             removal_policy=RemovalPolicy.RETAIN
         )
 
+        # Lifecycle tiering and inventory for decade-scale retention
+        # (configured via the "snapshot_retention" context key)
+        self.snapshot_retention = SnapshotRetentionPolicy(
+            self, "SnapshotRetention",
+            bucket=self.snapshots_bucket
+        )
+
         # S3 bucket for frontend hosting
         self.frontend_bucket = s3.Bucket(
             self, "FrontendBucket",
@@ -53,26 +115,141 @@ class StorageStack(Stack):
             removal_policy=RemovalPolicy.RETAIN
         )
 
+        # SOCI indexes so Fargate can lazy-load the multi-GB Jupyter images
+        # (configured via the "soci_index" context key)
+        self.soci_index_builder = SociIndexBuilder(self, "SociIndexBuilder")
+        self.soci_index_builder.add_repository(self.jupyter_ecr_repo)
+
+        # Pull-through cache so base images are pulled once into ECR
+        # (configured via the "ecr_pull_through_cache" context key)
+        self.pull_through_cache = PullThroughCache(self, "PullThroughCache")
+
         # EFS for persistent notebook storage
         self.efs_file_system = efs.FileSystem(
             self, "NotebookStorage",
             vpc=vpc,
             encrypted=True,
             performance_mode=efs.PerformanceMode.GENERAL_PURPOSE,
-            throughput_mode=efs.ThroughputMode.BURSTING,
+            throughput_mode=THROUGHPUT_MODES[throughput_mode],
+            provisioned_throughput_per_second=(
+                Size.mebibytes(storage_config["provisioned_throughput_mibps"])
+                if throughput_mode == "provisioned" else None
+            ),
             security_group=efs_security_group,
             removal_policy=RemovalPolicy.RETAIN
         )
 
-        # DynamoDB table for drift tracking
+        # Access point for unassigned Jupyter tasks (template, warm pool).
+        # Researcher launches get their own access point under /researchers,
+        # created by the API (backend/app/storage.py).
+        self.notebook_access_point = self.efs_file_system.add_access_point(
+            "NotebookAccessPoint",
+            path="/notebooks",
+            posix_user=efs.PosixUser(uid=JUPYTER_UID, gid=JUPYTER_GID),
+            create_acl=efs.Acl(owner_uid=JUPYTER_UID, owner_gid=JUPYTER_GID, permissions="750")
+        )
+
+        # Daily recovery points for the restore workflow in SnapshotStack
+        # (configured via the "efs_backup" context key)
+        self.notebook_backup = NotebookBackup(self, "NotebookBackup", file_system=self.efs_file_system)
+
+        # Alarms that warn before notebook I/O gets throttled
+        self.storage_alarm_topic = sns.Topic(self, "StorageAlarmTopic")
+
+        percent_io_limit_alarm = cloudwatch.Alarm(
+            self, "EFSPercentIOLimitAlarm",
+            metric=cloudwatch.Metric(
+                namespace="AWS/EFS",
+                metric_name="PercentIOLimit",
+                dimensions_map={"FileSystemId": self.efs_file_system.file_system_id},
+                statistic="Maximum",
+                period=Duration.minutes(1)
+            ),
+            threshold=storage_config["percent_io_limit_alarm"],
+            evaluation_periods=5,
+            datapoints_to_alarm=3,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+            alarm_description="Notebook EFS is close to its General Purpose I/O limit"
+        )
+        percent_io_limit_alarm.add_alarm_action(cw_actions.SnsAction(self.storage_alarm_topic))
+
+        # Burst credits only gate throughput outside elastic mode
+        if throughput_mode != "elastic":
+            burst_credit_alarm = cloudwatch.Alarm(
+                self, "EFSBurstCreditBalanceAlarm",
+                metric=cloudwatch.Metric(
+                    namespace="AWS/EFS",
+                    metric_name="BurstCreditBalance",
+                    dimensions_map={"FileSystemId": self.efs_file_system.file_system_id},
+                    statistic="Minimum",
+                    period=Duration.minutes(5)
+                ),
+                threshold=Size.gibibytes(storage_config["burst_credit_alarm_gib"]).to_bytes(),
+                evaluation_periods=3,
+                comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_THRESHOLD,
+                alarm_description="Notebook EFS burst credits are running out"
+            )
+            burst_credit_alarm.add_alarm_action(cw_actions.SnsAction(self.storage_alarm_topic))
+
+        # DynamoDB table for drift tracking. Raw events are partitioned per
+        # environment per hour and expire after raw_event_ttl_days; the key
+        # layout lives in services/drift/keys.py. The move from the
+        # environment_id/timestamp keys replaced the table; DEPLOYMENT.md
+        # covers backfilling from the retained old one.
+        self.drift_config = context_config(self, "drift_tracking", DEFAULT_DRIFT_TRACKING)
         self.drift_table = dynamodb.Table(
             self, "DriftTrackingTable",
             partition_key=dynamodb.Attribute(
-                name="environment_id",
+                name="pk",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="sk",
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            point_in_time_recovery=True,
+            time_to_live_attribute="expires_at",
+            stream=dynamodb.StreamViewType.NEW_IMAGE,
+            removal_policy=RemovalPolicy.RETAIN
+        )
+
+        # "All critical drift in a lab in the last hour"
+        self.drift_table.add_global_secondary_index(
+            index_name="ByLabSeverity",
+            partition_key=dynamodb.Attribute(
+                name="lab_severity_pk",
                 type=dynamodb.AttributeType.STRING
             ),
             sort_key=dynamodb.Attribute(
-                name="timestamp",
+                name="sk",
+                type=dynamodb.AttributeType.STRING
+            )
+        )
+
+        # Platform-wide drift by severity and hour, sharded by event
+        self.drift_table.add_global_secondary_index(
+            index_name="BySeverity",
+            partition_key=dynamodb.Attribute(
+                name="severity_pk",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="sk",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.KEYS_ONLY
+        )
+
+        # Hourly drift counts per environment and per lab, kept indefinitely
+        self.drift_rollup_table = dynamodb.Table(
+            self, "DriftRollupTable",
+            partition_key=dynamodb.Attribute(
+                name="scope",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="period",
                 type=dynamodb.AttributeType.STRING
             ),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
@@ -80,7 +257,36 @@ class StorageStack(Stack):
             removal_policy=RemovalPolicy.RETAIN
         )
 
-        # DynamoDB table for environment metadata
+        # Stream consumer that maintains the rollups
+        drift_rollup_function = lambda_.Function(
+            self, "DriftRollupFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="rollup.handler",
+            code=lambda_.Code.from_asset(os.path.join(SERVICES_DIR, "drift")),
+            timeout=Duration.seconds(60),
+            environment={
+                "DRIFT_ROLLUP_TABLE": self.drift_rollup_table.table_name
+            },
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+        self.drift_rollup_table.grant_read_write_data(drift_rollup_function)
+
+        drift_rollup_function.add_event_source(
+            lambda_event_sources.DynamoEventSource(
+                self.drift_table,
+                starting_position=lambda_.StartingPosition.LATEST,
+                batch_size=1000,
+                max_batching_window=Duration.seconds(10),
+                bisect_batch_on_error=True,
+                retry_attempts=3,
+                filters=[
+                    lambda_.FilterCriteria.filter({"eventName": lambda_.FilterRule.is_equal("INSERT")})
+                ]
+            )
+        )
+
+        # DynamoDB table for environment metadata. The stream drives cache
+        # invalidation for every writer (infrastructure/cache_invalidation.py)
         self.metadata_table = dynamodb.Table(
             self, "EnvironmentMetadataTable",
             partition_key=dynamodb.Attribute(
@@ -89,10 +295,77 @@ class StorageStack(Stack):
             ),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
             point_in_time_recovery=True,
+            stream=dynamodb.StreamViewType.KEYS_ONLY,
             removal_policy=RemovalPolicy.RETAIN
         )
 
+        # DynamoDB table for claiming pre-started (warm) Jupyter tasks.
+        # Items only live as long as their task, so nothing here is retained.
+        self.warm_pool_table = dynamodb.Table(
+            self, "WarmPoolTable",
+            partition_key=dynamodb.Attribute(
+                name="tier",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="task_arn",
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="expires_at",
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # Dashboard for notebook storage and table throttling; alarms share
+        # the storage alarm topic
+        self.observability = StackObservability(
+            self, "Observability",
+            alarm_topic=self.storage_alarm_topic
+        )
+        self.observability.add_file_system(self.efs_file_system, "Notebook")
+        self.observability.add_tables({
+            "DriftTracking": self.drift_table,
+            "DriftRollup": self.drift_rollup_table,
+            "EnvironmentMetadata": self.metadata_table,
+            "WarmPool": self.warm_pool_table,
+        })
+
+        # Identifiers ComputeStack and SnapshotStack resolve at deploy time
+        publish(self, "storage/efs-file-system-id", self.efs_file_system.file_system_id)
+        publish(self, "storage/notebook-access-point-id", self.notebook_access_point.access_point_id)
+        publish(self, "storage/jupyter-ecr-repo-name", self.jupyter_ecr_repo.repository_name)
+        publish(self, "storage/api-ecr-repo-name", self.api_ecr_repo.repository_name)
+        publish(self, "storage/snapshots-bucket-name", self.snapshots_bucket.bucket_name)
+        publish(self, "storage/metadata-table-name", self.metadata_table.table_name)
+        publish(self, "storage/metadata-table-stream-arn", self.metadata_table.table_stream_arn)
+        publish(self, "storage/warm-pool-table-name", self.warm_pool_table.table_name)
+        publish(self, "storage/drift-table-name", self.drift_table.table_name)
+        publish(self, "storage/backup-vault-name", self.notebook_backup.vault.backup_vault_name)
+        publish(self, "storage/backup-restore-role-arn", self.notebook_backup.restore_role.role_arn)
+
+        export_legacy(
+            self,
+            self.efs_file_system.file_system_id,
+            self.efs_file_system.file_system_arn,
+            self.notebook_access_point.access_point_id,
+            self.jupyter_ecr_repo.repository_name,
+            self.jupyter_ecr_repo.repository_arn,
+            self.api_ecr_repo.repository_name,
+            self.api_ecr_repo.repository_arn,
+            self.snapshots_bucket.bucket_name,
+            self.snapshots_bucket.bucket_arn,
+            self.metadata_table.table_name,
+            self.metadata_table.table_arn,
+            self.warm_pool_table.table_name,
+            self.warm_pool_table.table_arn,
+            self.drift_table.table_name,
+            self.drift_table.table_arn,
+        )
+
         CfnOutput(self, "SnapshotsBucketName", value=self.snapshots_bucket.bucket_name)
         CfnOutput(self, "JupyterECRRepoUri", value=self.jupyter_ecr_repo.repository_uri)
         CfnOutput(self, "APIECRRepoUri", value=self.api_ecr_repo.repository_uri)
         CfnOutput(self, "EFSFileSystemId", value=self.efs_file_system.file_system_id)
+        CfnOutput(self, "NotebookBackupVaultName", value=self.notebook_backup.vault.backup_vault_name)
+        CfnOutput(self, "StorageAlarmTopicArn", value=self.storage_alarm_topic.topic_arn)
+        CfnOutput(self, "WarmPoolTableName", value=self.warm_pool_table.table_name)
@@ -0,0 +1,195 @@
+from aws_cdk import (
+    aws_appstream as appstream,
+    aws_applicationautoscaling as appscaling,
+    aws_cloudwatch as cloudwatch,
+    aws_ec2 as ec2,
+    aws_iam as iam,
+    aws_s3 as s3,
+    Duration,
+    Stack,
+    TimeZone,
+)
+from constructs import Construct
+
+from infrastructure.config import context_config
+
+
+# Defaults for the "streaming_fleet" context key.
+#
+# ELASTIC fleets (the default, Ubuntu Pro 24.04 with app blocks) draw
+# streaming instances from an AWS-managed pool and only cap concurrency at
+# max_concurrent_sessions; they do not support Application Auto Scaling.
+# ON_DEMAND and ALWAYS_ON fleets need image_name and scale between
+# min_capacity and max_capacity instances on session utilization, with
+# scheduled_capacity raising the floor for lab hours.
+DEFAULT_STREAMING_FLEET = {
+    "fleet_type": "ELASTIC",
+    "instance_type": "stream.standard.medium",
+    "platform": "UBUNTU_PRO_2404",
+    "image_name": None,
+    "max_concurrent_sessions": 50,
+    "min_capacity": 2,
+    "max_capacity": 50,
+    "target_utilization_percent": 75,
+    "scale_in_cooldown_seconds": 900,
+    "scale_out_cooldown_seconds": 120,
+    "scheduled_capacity": [
+        {"name": "LabHoursStart", "schedule": "cron(30 7 ? * MON-FRI *)",
+         "min_capacity": 10, "time_zone": "America/New_York"},
+        {"name": "LabHoursEnd", "schedule": "cron(0 19 ? * MON-FRI *)",
+         "min_capacity": 2, "time_zone": "America/New_York"},
+    ],
+    "disconnect_timeout_seconds": 900,
+    "idle_disconnect_timeout_seconds": 600,
+    "max_user_duration_seconds": 28800,
+}
+
+FLEET_TYPES = ("ELASTIC", "ON_DEMAND", "ALWAYS_ON")
+
+# Application Auto Scaling acts on AppStream fleets through this role
+# (WorkspaceStack creates it if the account does not have it yet)
+AUTOSCALING_ROLE_PATH = (
+    "aws-service-role/appstream.application-autoscaling.amazonaws.com/"
+    "AWSServiceRoleForApplicationAutoScaling_AppStreamFleet"
+)
+
+
+class StreamingFleet(Construct):
+    """
+    WorkSpaces Applications (AppStream 2.0) fleet, stack and association
+    for browser access to Jupyter, as L1 resources. Settings are read from
+    the "streaming_fleet" cdk context key.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.IVpc,
+        security_group: ec2.ISecurityGroup,
+        home_folder_bucket: s3.IBucket,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "streaming_fleet", DEFAULT_STREAMING_FLEET)
+        fleet_type = self.config["fleet_type"]
+        if fleet_type not in FLEET_TYPES:
+            raise ValueError(f"streaming_fleet.fleet_type must be one of {FLEET_TYPES}, got {fleet_type}")
+        if fleet_type != "ELASTIC" and not self.config["image_name"]:
+            raise ValueError(f"streaming_fleet.image_name is required for {fleet_type} fleets")
+
+        elastic = fleet_type == "ELASTIC"
+        self.fleet = appstream.CfnFleet(
+            self, "Fleet",
+            name="west-tek-jupyter-fleet",
+            description="Fleet for accessing Jupyter environments",
+            fleet_type=fleet_type,
+            instance_type=self.config["instance_type"],
+            platform=self.config["platform"] if elastic else None,
+            image_name=None if elastic else self.config["image_name"],
+            max_concurrent_sessions=self.config["max_concurrent_sessions"] if elastic else None,
+            compute_capacity=None if elastic else appstream.CfnFleet.ComputeCapacityProperty(
+                desired_instances=self.config["min_capacity"]
+            ),
+            vpc_config=appstream.CfnFleet.VpcConfigProperty(
+                subnet_ids=vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnet_ids,
+                security_group_ids=[security_group.security_group_id]
+            ),
+            stream_view="DESKTOP",
+            disconnect_timeout_in_seconds=self.config["disconnect_timeout_seconds"],
+            idle_disconnect_timeout_in_seconds=self.config["idle_disconnect_timeout_seconds"],
+            max_user_duration_in_seconds=self.config["max_user_duration_seconds"],
+            enable_default_internet_access=False
+        )
+
+        self.stack = appstream.CfnStack(
+            self, "Stack",
+            name="west-tek-jupyter-stack",
+            description="Stack for accessing Jupyter notebook environments",
+            storage_connectors=[
+                appstream.CfnStack.StorageConnectorProperty(
+                    connector_type="HOMEFOLDERS",
+                    resource_identifier=home_folder_bucket.bucket_name
+                )
+            ],
+            user_settings=[
+                appstream.CfnStack.UserSettingProperty(action=action, permission=permission)
+                for action, permission in (
+                    ("CLIPBOARD_COPY_FROM_LOCAL_DEVICE", "ENABLED"),
+                    ("CLIPBOARD_COPY_TO_LOCAL_DEVICE", "ENABLED"),
+                    ("FILE_UPLOAD", "ENABLED"),
+                    ("FILE_DOWNLOAD", "ENABLED"),
+                    ("PRINTING_TO_LOCAL_DEVICE", "DISABLED"),
+                )
+            ],
+            application_settings=appstream.CfnStack.ApplicationSettingsProperty(
+                enabled=True,
+                settings_group="JupyterSettings"
+            )
+        )
+
+        self.association = appstream.CfnStackFleetAssociation(
+            self, "StackFleetAssociation",
+            fleet_name=self.fleet.ref,
+            stack_name=self.stack.ref
+        )
+
+        self.scalable_target = None
+        if not elastic:
+            self._add_scaling()
+
+    def _add_scaling(self) -> None:
+        """Session-utilization scaling and lab-hour schedules for instance-based fleets."""
+        stack = Stack.of(self)
+        self.scalable_target = appscaling.ScalableTarget(
+            self, "FleetCapacity",
+            service_namespace=appscaling.ServiceNamespace.APPSTREAM,
+            resource_id=f"fleet/{self.fleet.ref}",
+            scalable_dimension="appstream:fleet:DesiredCapacity",
+            min_capacity=self.config["min_capacity"],
+            max_capacity=self.config["max_capacity"],
+            role=iam.Role.from_role_arn(
+                self, "AutoScalingRole",
+                f"arn:{stack.partition}:iam::{stack.account}:role/{AUTOSCALING_ROLE_PATH}"
+            )
+        )
+
+        # Keep a share of instances free so new sessions start without queueing
+        self.scalable_target.scale_to_track_metric(
+            "SessionUtilizationTracking",
+            target_value=self.config["target_utilization_percent"],
+            predefined_metric=appscaling.PredefinedMetric.APPSTREAM_AVERAGE_CAPACITY_UTILIZATION,
+            scale_in_cooldown=Duration.seconds(self.config["scale_in_cooldown_seconds"]),
+            scale_out_cooldown=Duration.seconds(self.config["scale_out_cooldown_seconds"])
+        )
+
+        # Users already turned away: add capacity in a larger step
+        self.scalable_target.scale_on_metric(
+            "InsufficientCapacityStep",
+            metric=self.metric("InsufficientCapacityError", statistic="Maximum"),
+            scaling_steps=[
+                appscaling.ScalingInterval(upper=0, change=0),
+                appscaling.ScalingInterval(lower=1, change=2),
+                appscaling.ScalingInterval(lower=5, change=5),
+            ],
+            adjustment_type=appscaling.AdjustmentType.CHANGE_IN_CAPACITY,
+            cooldown=Duration.seconds(self.config["scale_out_cooldown_seconds"])
+        )
+
+        for window in self.config["scheduled_capacity"]:
+            time_zone = window.get("time_zone")
+            self.scalable_target.scale_on_schedule(
+                window["name"],
+                schedule=appscaling.Schedule.expression(window["schedule"]),
+                min_capacity=window.get("min_capacity"),
+                max_capacity=window.get("max_capacity"),
+                time_zone=TimeZone.of(time_zone) if time_zone else None
+            )
+
+    def metric(self, metric_name: str, statistic: str = "Average") -> cloudwatch.Metric:
+        return cloudwatch.Metric(
+            namespace="AWS/AppStream",
+            metric_name=metric_name,
+            dimensions_map={"Fleet": self.fleet.ref},
+            statistic=statistic,
+            period=Duration.minutes(1)
+        )
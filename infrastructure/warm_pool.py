@@ -0,0 +1,212 @@
+from aws_cdk import (
+    aws_applicationautoscaling as appscaling,
+    aws_dynamodb as dynamodb,
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_logs as logs,
+    Duration,
+    Stack,
+    TimeZone,
+)
+from constructs import Construct
+
+from infrastructure.capacity import capacity_provider_strategies
+from infrastructure.config import context_config
+from infrastructure.service_code import service_code
+
+# Defaults for the "jupyter_warm_pool" context key. Each tier keeps
+# pool_size unassigned tasks running; claimed tasks are replaced until the
+# service reaches max_size. scheduled_targets resize the pool by time of day,
+# e.g. [{"name": "LabHours", "schedule": "cron(0 8 ? * MON-FRI *)",
+#        "pool_size": 6, "time_zone": "America/New_York"}]
+# task_tier picks the Jupyter task size (see infrastructure/jupyter_tiers.py).
+# Set "tiers" to {} to disable the warm pool.
+DEFAULT_WARM_POOL = {
+    "tiers": {
+        "scipy": {
+            "task_tier": "standard",
+            "pool_size": 2,
+            "max_size": 20,
+            "scheduled_targets": [],
+        },
+    },
+}
+
+
+class JupyterWarmPool(Construct):
+    """
+    Keeps pre-started, unassigned Jupyter tasks running per image tier.
+
+    Each tier is an ECS service whose tasks register themselves in the warm
+    pool table once RUNNING. A launch claims an available task with a
+    conditional update (see backend/app/warm_pool.py) instead of waiting for
+    a cold RunTask. Desired counts are set from the table's per-tier claim
+    counter on top of the scalable target's minimum, so claims, releases
+    and the registrar's clean-up of stopped claimed tasks never race.
+    """
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        cluster: ecs.Cluster,
+        warm_pool_table: dynamodb.Table,
+        security_groups: list,
+        vpc_subnets: ec2.SubnetSelection,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.config = context_config(self, "jupyter_warm_pool", DEFAULT_WARM_POOL)
+        self.cluster = cluster
+        self.warm_pool_table = warm_pool_table
+        self.security_groups = security_groups
+        self.vpc_subnets = vpc_subnets
+        self.services = {}
+
+        # Registers RUNNING warm tasks in the table and drops STOPPED ones,
+        # with the API's WarmPool class
+        self.registrar = lambda_.Function(
+            self, "RegistrarFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.handler",
+            code=service_code("warm_pool_registrar", "backend/app"),
+            timeout=Duration.seconds(30),
+            environment={
+                "WARM_POOL_TABLE": warm_pool_table.table_name,
+                "CLUSTER_NAME": cluster.cluster_name
+            },
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+        warm_pool_table.grant_read_write_data(self.registrar)
+        self._grant_scaling(self.registrar)
+
+        self.task_state_rule = events.Rule(
+            self, "TaskStateChangeRule",
+            event_pattern=events.EventPattern(
+                source=["aws.ecs"],
+                detail_type=["ECS Task State Change"],
+                detail={
+                    "clusterArn": [cluster.cluster_arn],
+                    "lastStatus": ["RUNNING", "STOPPED"]
+                }
+            ),
+            targets=[targets.LambdaFunction(self.registrar)]
+        )
+
+    def add_tier(
+        self,
+        tier: str,
+        task_definition: ecs.FargateTaskDefinition,
+    ) -> ecs.FargateService:
+        """Create the warm service for a tier using its context settings."""
+        tier_config = self.config["tiers"][tier]
+
+        service = ecs.FargateService(
+            self, f"{tier.capitalize()}WarmService",
+            cluster=self.cluster,
+            task_definition=task_definition,
+            desired_count=tier_config["pool_size"],
+            capacity_provider_strategies=capacity_provider_strategies(self, "jupyter"),
+            assign_public_ip=False,
+            vpc_subnets=self.vpc_subnets,
+            security_groups=self.security_groups,
+            enable_ecs_managed_tags=True,
+            propagate_tags=ecs.PropagatedTagSource.SERVICE
+        )
+
+        scalable_target = service.auto_scale_task_count(
+            min_capacity=tier_config["pool_size"],
+            max_capacity=tier_config["max_size"]
+        )
+
+        # Time-of-day pool sizes, e.g. larger during lab hours
+        for target in tier_config.get("scheduled_targets", []):
+            time_zone = target.get("time_zone")
+            scalable_target.scale_on_schedule(
+                f"{tier.capitalize()}{target['name']}",
+                schedule=appscaling.Schedule.expression(target["schedule"]),
+                min_capacity=target["pool_size"],
+                time_zone=TimeZone.of(time_zone) if time_zone else None
+            )
+
+        self.services[tier] = service
+        self.registrar.add_environment("WARM_POOL_SERVICES", self.environment["WARM_POOL_SERVICES"])
+        self.registrar.add_to_role_policy(self._service_statement([service]))
+        return service
+
+    @property
+    def environment(self) -> dict:
+        """Settings backend/app/warm_pool.py reads."""
+        return {
+            "WARM_POOL_TABLE": self.warm_pool_table.table_name,
+            "CLUSTER_NAME": self.cluster.cluster_name,
+            "WARM_POOL_SERVICES": Stack.of(self).to_json_string({
+                tier: service.service_name for tier, service in self.services.items()
+            }),
+        }
+
+    def _service_statement(self, services) -> iam.PolicyStatement:
+        return iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=["ecs:UpdateService", "ecs:DescribeServices"],
+            resources=[service.service_arn for service in services]
+        )
+
+    def _grant_scaling(self, grantee: iam.IGrantable) -> None:
+        # Pool sizes come from the scalable targets, which scheduled actions move;
+        # DescribeScalableTargets has no resource-level permissions
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["application-autoscaling:DescribeScalableTargets"],
+                resources=["*"]
+            )
+        )
+
+    def grant_settle(self, grantee: iam.IGrantable) -> None:
+        """Allow a principal to give back the slots of claimed tasks that stopped."""
+        self.warm_pool_table.grant_read_write_data(grantee)
+        if self.services:
+            grantee.grant_principal.add_to_principal_policy(self._service_statement(self.services.values()))
+        self._grant_scaling(grantee)
+
+    def grant_release(self, grantee: iam.IGrantable) -> None:
+        """Allow a principal to stop claimed tasks and give their slots back."""
+        self.grant_settle(grantee)
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:UpdateTaskProtection", "ecs:StopTask"],
+                resources=["*"],
+                conditions={"ArnEquals": {"ecs:cluster": self.cluster.cluster_arn}}
+            )
+        )
+
+    def grant_claim(self, grantee: iam.IGrantable) -> None:
+        """Allow a principal (the API task role) to claim and release warm tasks."""
+        if not self.services:
+            return
+
+        self.grant_release(grantee)
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:DescribeTasks"],
+                resources=["*"],
+                conditions={"ArnEquals": {"ecs:cluster": self.cluster.cluster_arn}}
+            )
+        )
+        # TagResource has no ecs:cluster condition key, so scope by task ARN
+        stack = Stack.of(self)
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["ecs:TagResource"],
+                resources=[
+                    f"arn:{stack.partition}:ecs:{stack.region}:{stack.account}:task/{self.cluster.cluster_name}/*"
+                ]
+            )
+        )
@@ -11,12 +11,16 @@ from aws_cdk import (
 )
 from constructs import Construct
 
+from infrastructure.observability import StackObservability
+from infrastructure.streaming_fleet import StreamingFleet
+
 
 class WorkspaceStack(Stack):
     """
     WorkSpaces Application stack for streaming Jupyter environments.
     Note: WorkSpaces Applications with Ubuntu Pro 24.04 Elastic fleets is a new feature.
-    CDK L2 constructs may not be available yet, so we use L1 (Cfn) constructs.
+    CDK L2 constructs are not available yet, so the fleet uses L1 (Cfn) constructs
+    (see streaming_fleet.py).
     """
     def __init__(
         self,
@@ -115,10 +119,23 @@ class WorkspaceStack(Stack):
             description="Allow access to internal ALB"
         )
 
-        # Note: As of now, WorkSpaces Applications with Ubuntu Pro 24.04 Elastic fleets
-        # may need to be configured via AWS Console or CLI as CDK support is limited.
-        # This is a placeholder for when full CDK support becomes available.
-        
+        # Streaming fleet, stack and association (configured via the
+        # "streaming_fleet" context key)
+        self.streaming_fleet = StreamingFleet(
+            self, "StreamingFleet",
+            vpc=vpc,
+            security_group=self.workspaces_security_group,
+            home_folder_bucket=self.workspaces_bucket
+        )
+        # Application Auto Scaling needs its AppStream service-linked role
+        if self.streaming_fleet.scalable_target is not None:
+            self.streaming_fleet.scalable_target.node.add_dependency(
+                self.create_autoscaling_service_linked_role
+            )
+
+        self.observability = StackObservability(self, "Observability")
+        self.observability.add_streaming_fleet(self.streaming_fleet.fleet.ref, "Streaming fleet")
+
         CfnOutput(self, "AppStreamServiceRoleArn", value=self.appstream_service_role.role_arn)
         CfnOutput(self, "WorkSpacesBucketName", value=self.workspaces_bucket.bucket_name)
         CfnOutput(
@@ -126,9 +143,11 @@ class WorkspaceStack(Stack):
             value=self.workspaces_service_role.role_arn,
             description="IAM role ARN for WorkSpaces Applications service"
         )
+        CfnOutput(self, "AppStreamFleetName", value=self.streaming_fleet.fleet.ref)
+        CfnOutput(self, "AppStreamStackName", value=self.streaming_fleet.stack.ref)
         CfnOutput(
-            self, "WorkSpacesSetupInstructions",
-            value="Configure WorkSpaces Applications Elastic fleet with Ubuntu Pro 24.04 via AWS Console"
+            self, "AppStreamURL",
+            value=f"https://appstream2.{self.region}.aws.amazon.com/authenticate"
         )
         CfnOutput(
             self, "WorkSpacesSecurityGroupId",
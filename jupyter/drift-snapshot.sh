@@ -0,0 +1,17 @@
+#!/bin/bash
+# Started from before-notebook.d. Writes the package list and config file
+# hashes to the shared drift volume for the drift-collector sidecar.
+DRIFT_STATE_DIR=${DRIFT_STATE_DIR:-/var/run/drift}
+DRIFT_POLL_SECONDS=${DRIFT_POLL_SECONDS:-15}
+
+(
+  while true; do
+    pip list --format=freeze 2>/dev/null > "${DRIFT_STATE_DIR}/packages.txt.tmp" \
+      && mv "${DRIFT_STATE_DIR}/packages.txt.tmp" "${DRIFT_STATE_DIR}/packages.txt"
+    find "${HOME}/.jupyter" "${HOME}/.local/share/jupyter/kernels" /opt/conda/share/jupyter/kernels \
+      -type f \( -name '*.py' -o -name '*.json' \) -print0 2>/dev/null \
+      | sort -z | xargs -0 -r sha256sum > "${DRIFT_STATE_DIR}/config-hashes.txt.tmp" \
+      && mv "${DRIFT_STATE_DIR}/config-hashes.txt.tmp" "${DRIFT_STATE_DIR}/config-hashes.txt"
+    sleep "${DRIFT_POLL_SECONDS}"
+  done
+) &
@@ -0,0 +1,13 @@
+# Serve under /user/<task_id>/ so the ALB can route /user/<task_id>/* to
+# this task (see backend/app/routing.py). The task ID comes from the ECS
+# task metadata endpoint, so warm-pool tasks know their prefix before
+# they are claimed. Outside ECS the server keeps its default base_url.
+import json
+import os
+import urllib.request
+
+metadata_uri = os.environ.get("ECS_CONTAINER_METADATA_URI_V4")
+if metadata_uri:
+    with urllib.request.urlopen(f"{metadata_uri}/task", timeout=5) as response:
+        task_arn = json.load(response)["TaskARN"]
+    c.ServerApp.base_url = f"/user/{task_arn.rsplit('/', 1)[-1]}/"  # noqa: F821
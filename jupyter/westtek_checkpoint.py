@@ -0,0 +1,100 @@
+"""
+Jupyter server extension that checkpoints running kernels on SIGTERM.
+
+ECS sends SIGTERM before stopping a task (including Fargate Spot
+reclaims, which give two minutes' notice; see stop_timeout on the
+Jupyter container). Each kernel's session is pickled with dill to the
+researcher's EFS directory and a manifest is written alongside, then the
+server shuts down as usual. The spot-interruption Lambda records the
+manifest location in the environment metadata table.
+"""
+import asyncio
+import json
+import os
+import signal
+import time
+
+CHECKPOINT_DIR = os.environ.get("WESTTEK_CHECKPOINT_DIR", "/home/jovyan/work/.checkpoints")
+# Leave headroom inside the 120 s stop timeout for server shutdown
+CHECKPOINT_TIMEOUT_SECONDS = int(os.environ.get("WESTTEK_CHECKPOINT_TIMEOUT_SECONDS", "90"))
+
+DUMP_SESSION = """
+import dill as _westtek_dill
+_westtek_dill.dump_session({path!r})
+del _westtek_dill
+"""
+
+
+def _jupyter_server_extension_points():
+    return [{"module": "westtek_checkpoint"}]
+
+
+async def _checkpoint_kernel(kernel_manager, kernel_id, timeout):
+    path = os.path.join(CHECKPOINT_DIR, f"{kernel_id}.pkl")
+    client = kernel_manager.get_kernel(kernel_id).client()
+    client.start_channels()
+    try:
+        reply = await client.execute_interactive(
+            DUMP_SESSION.format(path=path),
+            store_history=False,
+            timeout=timeout,
+            output_hook=lambda msg: None
+        )
+        status = reply["content"]["status"]
+    except Exception as e:
+        status = f"error: {e}"
+    finally:
+        client.stop_channels()
+    return {"kernel_id": kernel_id, "path": path, "status": status}
+
+
+async def checkpoint_kernels(serverapp):
+    """Checkpoint every running kernel in parallel and write the manifest."""
+    kernel_manager = serverapp.kernel_manager
+    kernel_ids = list(kernel_manager.list_kernel_ids())
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+
+    results = await asyncio.gather(*(
+        _checkpoint_kernel(kernel_manager, kernel_id, CHECKPOINT_TIMEOUT_SECONDS)
+        for kernel_id in kernel_ids
+    ))
+
+    sessions = {}
+    session_manager = getattr(serverapp, "session_manager", None)
+    if session_manager is not None:
+        for session in await session_manager.list_sessions():
+            sessions[session["kernel"]["id"]] = session.get("path")
+    for result in results:
+        result["notebook"] = sessions.get(result["kernel_id"])
+
+    manifest_path = os.path.join(CHECKPOINT_DIR, "manifest.json")
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump({"created_at": int(time.time()), "kernels": results}, f, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    return results
+
+
+def _load_jupyter_server_extension(serverapp):
+    original_handler = signal.getsignal(signal.SIGTERM)
+    loop = asyncio.get_event_loop()
+
+    async def checkpoint_then_stop(signum, frame):
+        try:
+            results = await checkpoint_kernels(serverapp)
+            serverapp.log.info("Checkpointed %d kernel(s) to %s", len(results), CHECKPOINT_DIR)
+        except Exception:
+            serverapp.log.exception("Kernel checkpoint failed")
+        if callable(original_handler):
+            original_handler(signum, frame)
+        else:
+            serverapp.stop()
+
+    def on_sigterm(signum, frame):
+        # Only checkpoint once; a second SIGTERM falls straight through
+        signal.signal(signal.SIGTERM, original_handler)
+        loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(checkpoint_then_stop(signum, frame))
+        )
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    serverapp.log.info("westtek_checkpoint: kernels are checkpointed to %s on SIGTERM", CHECKPOINT_DIR)
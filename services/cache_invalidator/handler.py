@@ -0,0 +1,104 @@
+"""
+Evicts cached environment metadata when EnvironmentMetadataTable changes.
+
+Consumes the table's KEYS_ONLY stream, so the API's read-through cache
+(backend/app/cache.py) is invalidated for every writer, including those
+that never go through MetadataRepository: the snapshot engine, the Step
+Functions DynamoUpdateItem states, the spot interruption and idle reaper
+Lambdas and the restore workflow. Staleness after their writes is the
+stream's delivery delay rather than the cache TTL. Inserts are evicted too,
+since a read before the item existed caches the miss.
+
+The backend's app package is bundled with this function (see
+infrastructure/service_code.py). redis-py is not in the Lambda runtime and
+eviction is a single EVAL, so RespClient speaks just enough of the Redis
+protocol for ReadThroughCache.evict.
+"""
+import os
+import socket
+import ssl
+
+from app.cache import ReadThroughCache
+
+CONNECT_TIMEOUT_SECONDS = 2
+READ_TIMEOUT_SECONDS = 2
+
+
+class ResponseError(Exception):
+    pass
+
+
+class RespClient:
+    """Minimal RESP2 client: one connection, commands sent one at a time."""
+
+    def __init__(self, host: str, port: int, tls: bool) -> None:
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self._file = None
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT_SECONDS)
+        if self.tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+        sock.settimeout(READ_TIMEOUT_SECONDS)
+        return sock.makefile("rwb")
+
+    def execute(self, *args):
+        if self._file is None:
+            self._file = self._connect()
+        encoded = [str(arg).encode() if not isinstance(arg, bytes) else arg for arg in args]
+        request = b"*%d\r\n" % len(encoded) + b"".join(
+            b"$%d\r\n%s\r\n" % (len(arg), arg) for arg in encoded
+        )
+        try:
+            self._file.write(request)
+            self._file.flush()
+            return self._read()
+        except OSError:
+            # Reconnect on the next command (and on the stream's retry)
+            self._file = None
+            raise
+
+    def _read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Cache closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"-":
+            raise ResponseError(rest.decode())
+        if kind == b"+":
+            return rest
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            return None if length < 0 else self._file.read(length + 2)[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise ResponseError(f"Unexpected reply {line!r}")
+
+    def eval(self, script: str, numkeys: int, *args):
+        return self.execute("EVAL", script, numkeys, *args)
+
+
+CACHE = ReadThroughCache(
+    RespClient(
+        os.environ["CACHE_HOST"],
+        int(os.environ["CACHE_PORT"]),
+        os.environ.get("CACHE_TLS", "false").lower() == "true"
+    ),
+    namespace="environment"
+)
+
+
+def handler(event, context):
+    environment_ids = {
+        record["dynamodb"]["Keys"]["environment_id"]["S"]
+        for record in event["Records"]
+    }
+    # Unlike the API's invalidate, errors propagate so the stream retries
+    for environment_id in environment_ids:
+        CACHE.evict(environment_id)
+    return {"evicted": len(environment_ids)}
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Copy drift events from the pre-sharding DriftTrackingTable into the current one.
+
+The old table was keyed environment_id/timestamp. Changing the key schema
+makes CloudFormation create a new table, and RETAIN leaves the old one
+behind, unmanaged and still billed (see DEPLOYMENT.md). This scans the old
+table and rewrites every event with the key layout in keys.py:
+
+    python3 services/drift/backfill.py --source <old table> --target <new table>
+
+Events that predate event_id, lab_id or severity get a deterministic
+event_id and the UNKNOWN_LAB / DEFAULT_SEVERITY defaults, so a rerun
+overwrites the same items. The stream consumer counts the copies into
+DriftRollupTable on insert; overwrites are MODIFY records and are not
+counted twice. Events already older than raw_event_ttl_days are skipped
+instead of written and expired.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import boto3
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keys import LAB_SHARDS, RAW_EVENT_TTL_DAYS, SEVERITY_SHARDS, event_item  # noqa: E402
+
+UNKNOWN_LAB = "unknown"
+DEFAULT_SEVERITY = "INFO"
+
+
+def event_time(timestamp: str) -> float:
+    parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def migrate_item(item: Dict, now: float, shards: int = LAB_SHARDS, ttl_days: int = RAW_EVENT_TTL_DAYS,
+                 severity_shards: int = SEVERITY_SHARDS) -> Optional[Dict]:
+    """The current-layout item for an old one, or None if it would already have expired."""
+    event = dict(item)
+    event.setdefault(
+        "event_id", hashlib.md5(f"{item['environment_id']}#{item['timestamp']}".encode()).hexdigest()
+    )
+    event.setdefault("lab_id", UNKNOWN_LAB)
+    event.setdefault("severity", DEFAULT_SEVERITY)
+    migrated = event_item(event, shards=shards, ttl_days=ttl_days, severity_shards=severity_shards)
+    # Expire relative to the event, not to the copy
+    migrated["expires_at"] = int(event_time(item["timestamp"])) + ttl_days * 86400
+    return migrated if migrated["expires_at"] > now else None
+
+
+def copy_segment(source_name: str, target_name: str, segment: int, segments: int, config: Dict) -> Dict:
+    # Resources are not thread-safe; one per segment
+    dynamodb = boto3.session.Session().resource("dynamodb")
+    source, target = dynamodb.Table(source_name), dynamodb.Table(target_name)
+    counts = {"scanned": 0, "written": 0, "expired": 0}
+    now = time.time()
+    kwargs = {"Segment": segment, "TotalSegments": segments}
+    with target.batch_writer(overwrite_by_pkeys=["pk", "sk"]) as writer:
+        while True:
+            page = source.scan(**kwargs)
+            for item in page["Items"]:
+                counts["scanned"] += 1
+                migrated = migrate_item(item, now, **config)
+                if migrated is None:
+                    counts["expired"] += 1
+                    continue
+                writer.put_item(Item=migrated)
+                counts["written"] += 1
+            if "LastEvaluatedKey" not in page:
+                return counts
+            kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", required=True, help="retained table keyed environment_id/timestamp")
+    parser.add_argument("--target", required=True, help="current DriftTrackingTable")
+    parser.add_argument("--segments", type=int, default=8, help="parallel scan segments")
+    parser.add_argument("--lab-shards", type=int, default=LAB_SHARDS)
+    parser.add_argument("--severity-shards", type=int, default=SEVERITY_SHARDS)
+    parser.add_argument("--ttl-days", type=int, default=RAW_EVENT_TTL_DAYS)
+    args = parser.parse_args()
+
+    config = {"shards": args.lab_shards, "ttl_days": args.ttl_days, "severity_shards": args.severity_shards}
+    with ThreadPoolExecutor(max_workers=args.segments) as pool:
+        results = list(pool.map(
+            lambda segment: copy_segment(args.source, args.target, segment, args.segments, config),
+            range(args.segments)
+        ))
+    print(json.dumps({key: sum(result[key] for result in results) for key in results[0]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
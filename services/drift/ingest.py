@@ -0,0 +1,66 @@
+"""
+SQS consumer for drift-collector batches.
+
+Each message is a gzip+base64 batch of drift events. Events from every
+message in the invocation are written with BatchWriteItem (25 items per
+call), with unprocessed items retried under exponential backoff. Messages
+whose events could not be written are reported back as batch item failures
+so only they are redelivered.
+
+collector.py is bundled from services/drift_collector (see
+infrastructure/service_code.py), so decoding always matches the encoder.
+"""
+import os
+import random
+import time
+
+import boto3
+
+from collector import decode_batch
+from keys import event_item
+
+TABLE_NAME = os.environ["DRIFT_TABLE"]
+CLIENT = boto3.resource("dynamodb").meta.client
+BATCH_WRITE_LIMIT = 25
+MAX_ATTEMPTS = 6
+
+
+def write_items(items):
+    """Write items, returning the ones still unprocessed after retries."""
+    # BatchWriteItem rejects a whole call that puts the same key twice, and
+    # a redelivered message repeats its events; the last copy wins
+    items = list({(item["pk"], item["sk"]): item for item in items}.values())
+    unprocessed = []
+    for start in range(0, len(items), BATCH_WRITE_LIMIT):
+        # The resource's client takes plain Python types, no TypeSerializer needed
+        requests = [{"PutRequest": {"Item": item}} for item in items[start:start + BATCH_WRITE_LIMIT]]
+        for attempt in range(MAX_ATTEMPTS):
+            response = CLIENT.batch_write_item(RequestItems={TABLE_NAME: requests})
+            requests = response.get("UnprocessedItems", {}).get(TABLE_NAME, [])
+            if not requests:
+                break
+            time.sleep(min(2 ** attempt * 0.05, 2) * random.uniform(0.5, 1.5))
+        unprocessed.extend(request["PutRequest"]["Item"] for request in requests)
+    return unprocessed
+
+
+def handler(event, context):
+    items, message_of = [], {}
+    failures = set()
+
+    for record in event["Records"]:
+        try:
+            events = decode_batch(record["body"])
+        except (ValueError, OSError):
+            # Corrupt batch: let it go to the DLQ rather than block the queue
+            failures.add(record["messageId"])
+            continue
+        for drift_event in events:
+            item = event_item(drift_event)
+            items.append(item)
+            message_of[(item["pk"], item["sk"])] = record["messageId"]
+
+    for item in write_items(items):
+        failures.add(message_of[(item["pk"], item["sk"])])
+
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in sorted(failures)]}
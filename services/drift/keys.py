@@ -0,0 +1,92 @@
+"""
+Key layout for DriftTrackingTable and DriftRollupTable.
+
+Raw drift events are written under an hourly partition per environment
+(pk = "<environment_id>#<YYYY-MM-DDTHH>"), so one noisy environment spreads
+its writes over a new partition every hour instead of hammering a single key.
+
+Two GSIs cover the cross-environment reads:
+
+    ByLabSeverity  lab_severity_pk = "<lab_id>#<severity>#<shard>"           sk = event_sk
+    BySeverity     severity_pk     = "<severity>#<YYYY-MM-DDTHH>#<shard>"  sk = event_sk
+
+ByLabSeverity is sharded by environment so a busy lab still spreads across
+LAB_SHARDS partitions. BySeverity takes every event platform-wide, so an
+hour's INFO events would all land on one key; it is sharded by event_id
+over SEVERITY_SHARDS partitions. Readers of either index query every shard
+and merge.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+SEVERITIES = ("CRITICAL", "MINOR", "INFO")
+
+LAB_SHARDS = int(os.environ.get("DRIFT_LAB_SHARDS", "4"))
+SEVERITY_SHARDS = int(os.environ.get("DRIFT_SEVERITY_SHARDS", "8"))
+RAW_EVENT_TTL_DAYS = int(os.environ.get("DRIFT_RAW_EVENT_TTL_DAYS", "90"))
+
+HOUR_FORMAT = "%Y-%m-%dT%H"
+
+
+def hour_bucket(timestamp: str) -> str:
+    """'2026-10-18T13:04:05.123Z' -> '2026-10-18T13'."""
+    return timestamp[:13]
+
+
+def lab_shard(environment_id: str, shards: int = LAB_SHARDS) -> int:
+    # Stable across processes, unlike hash()
+    return int(hashlib.md5(environment_id.encode()).hexdigest(), 16) % shards
+
+
+def severity_shard(event_id: str, shards: int = SEVERITY_SHARDS) -> int:
+    return int(hashlib.md5(event_id.encode()).hexdigest(), 16) % shards
+
+
+def event_item(event: Dict, shards: int = LAB_SHARDS, ttl_days: int = RAW_EVENT_TTL_DAYS,
+               severity_shards: int = SEVERITY_SHARDS) -> Dict:
+    """
+    Build the stored item for a drift event with environment_id, lab_id,
+    severity, timestamp (ISO 8601 UTC) and event_id, plus any payload fields.
+    """
+    timestamp = event["timestamp"]
+    hour = hour_bucket(timestamp)
+    return {
+        **event,
+        "pk": f"{event['environment_id']}#{hour}",
+        "sk": f"{timestamp}#{event['event_id']}",
+        "lab_severity_pk": f"{event['lab_id']}#{event['severity']}#{lab_shard(event['environment_id'], shards)}",
+        "severity_pk": f"{event['severity']}#{hour}#{severity_shard(event['event_id'], severity_shards)}",
+        "expires_at": int(time.time()) + ttl_days * 86400,
+    }
+
+
+def hours_between(start: datetime, end: datetime) -> Iterator[str]:
+    """Hour buckets covering [start, end], oldest first."""
+    current = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    while current <= end:
+        yield current.strftime(HOUR_FORMAT)
+        current += timedelta(hours=1)
+
+
+def lab_severity_partitions(lab_id: str, severity: str, shards: int = LAB_SHARDS) -> List[str]:
+    return [f"{lab_id}#{severity}#{shard}" for shard in range(shards)]
+
+
+def severity_partitions(severity: str, hour: str, shards: int = SEVERITY_SHARDS) -> List[str]:
+    return [f"{severity}#{hour}#{shard}" for shard in range(shards)]
+
+
+def rollup_keys(item: Dict) -> List[Dict]:
+    """Hourly rollup rows an event counts towards: its environment and its lab."""
+    hour = hour_bucket(item["timestamp"])
+    return [
+        {"scope": f"env#{item['environment_id']}", "period": f"hour#{hour}"},
+        {"scope": f"lab#{item['lab_id']}", "period": f"hour#{hour}"},
+    ]
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
@@ -0,0 +1,43 @@
+"""
+DynamoDB Streams consumer that folds raw drift events into hourly
+per-environment and per-lab severity counts in DriftRollupTable.
+
+Counts are summed in memory per batch, so a burst of events for one
+environment costs one UpdateItem per rollup row rather than one per event.
+Streams delivery is at-least-once, so a retried batch can over-count; the
+rollups are for dashboards and trends, raw events stay the source of truth.
+"""
+import os
+from collections import Counter
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+
+from keys import rollup_keys
+
+ROLLUP_TABLE = boto3.resource("dynamodb").Table(os.environ["DRIFT_ROLLUP_TABLE"])
+_deserializer = TypeDeserializer()
+
+
+def _image(record):
+    return {k: _deserializer.deserialize(v) for k, v in record["dynamodb"]["NewImage"].items()}
+
+
+def handler(event, context):
+    counts = Counter()
+    for record in event["Records"]:
+        if record["eventName"] != "INSERT":
+            continue
+        item = _image(record)
+        for key in rollup_keys(item):
+            counts[(key["scope"], key["period"], item["severity"])] += 1
+
+    for (scope, period, severity), count in counts.items():
+        ROLLUP_TABLE.update_item(
+            Key={"scope": scope, "period": period},
+            UpdateExpression="ADD #severity :count, total :count",
+            ExpressionAttributeNames={"#severity": severity},
+            ExpressionAttributeValues={":count": count}
+        )
+
+    return {"rollup_updates": len(counts)}
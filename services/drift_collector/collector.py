@@ -0,0 +1,167 @@
+"""
+Diff and debounce logic for the drift-collector sidecar.
+
+The Jupyter container dumps `pip list --format=freeze` and config file
+hashes to a shared volume (jupyter/drift-snapshot.sh). Every poll the
+collector diffs that state against the last published baseline, but only
+emits a change once it has held still for debounce_seconds, so a
+half-finished `pip install` or an editor's save-rename does not produce a
+burst of events. Pure functions and a small state class, no AWS calls.
+"""
+import base64
+import gzip
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Packages whose removal or major version change can silently break results
+CORE_PACKAGES = frozenset({
+    "numpy", "scipy", "pandas", "scikit-learn", "matplotlib", "ipykernel",
+    "jupyterlab", "notebook", "python",
+})
+
+# SQS allows 256 KiB per message; leave room for the envelope
+MAX_MESSAGE_BYTES = 200 * 1024
+
+
+def parse_freeze(text: str) -> Dict[str, str]:
+    """'numpy==1.26.4' lines -> {'numpy': '1.26.4'}. Editable/URL installs keep their spec."""
+    packages = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "==" in line:
+            name, version = line.split("==", 1)
+        elif " @ " in line:
+            name, version = line.split(" @ ", 1)
+        else:
+            name, version = line, ""
+        packages[name.strip().lower().replace("_", "-")] = version.strip()
+    return packages
+
+
+def parse_hashes(text: str) -> Dict[str, str]:
+    """sha256sum output ('<hash>  <path>') -> {path: hash}."""
+    hashes = {}
+    for line in text.splitlines():
+        parts = line.strip().split(None, 1)
+        if len(parts) == 2:
+            hashes[parts[1].lstrip("*")] = parts[0]
+    return hashes
+
+
+def _major(version: str) -> str:
+    return version.split(".", 1)[0]
+
+
+def package_severity(name: str, before: Optional[str], after: Optional[str]) -> str:
+    if name in CORE_PACKAGES and (after is None or (before and _major(before) != _major(after))):
+        return "CRITICAL"
+    if before is None:
+        return "INFO"
+    return "MINOR"
+
+
+def diff_state(
+    baseline: Tuple[Dict[str, str], Dict[str, str]],
+    current: Tuple[Dict[str, str], Dict[str, str]],
+) -> Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]]:
+    """{(kind, name): (before, after)} for every package or config file that differs."""
+    changes = {}
+    for kind, old, new in (("package", baseline[0], current[0]), ("config", baseline[1], current[1])):
+        for name in old.keys() | new.keys():
+            before, after = old.get(name), new.get(name)
+            if before != after:
+                changes[(kind, name)] = (before, after)
+    return changes
+
+
+@dataclass
+class DriftCollector:
+    debounce_seconds: float = 60.0
+    baseline: Optional[Tuple[Dict[str, str], Dict[str, str]]] = None
+    # (kind, name) -> ((before, after), first time this exact change was seen)
+    pending: Dict[Tuple[str, str], Tuple[Tuple[Optional[str], Optional[str]], float]] = field(default_factory=dict)
+
+    def observe(self, packages: Dict[str, str], configs: Dict[str, str], now: float) -> List[Tuple]:
+        """
+        Feed one poll. Returns settled changes as (kind, name, before, after)
+        and folds them into the baseline. The first poll only sets the
+        baseline.
+        """
+        current = (packages, configs)
+        if self.baseline is None:
+            self.baseline = (dict(packages), dict(configs))
+            return []
+
+        changes = diff_state(self.baseline, current)
+
+        # Changes that reverted or moved on restart their debounce window
+        self.pending = {
+            key: (change, self.pending[key][1] if key in self.pending and self.pending[key][0] == change else now)
+            for key, change in changes.items()
+        }
+
+        settled = []
+        for key, (change, first_seen) in list(self.pending.items()):
+            if now - first_seen < self.debounce_seconds:
+                continue
+            kind, name = key
+            before, after = change
+            target = self.baseline[0] if kind == "package" else self.baseline[1]
+            if after is None:
+                target.pop(name, None)
+            else:
+                target[name] = after
+            settled.append((kind, name, before, after))
+            del self.pending[key]
+        return settled
+
+
+def to_events(changes: List[Tuple], environment_id: str, lab_id: str, timestamp: Optional[str] = None) -> List[Dict]:
+    timestamp = timestamp or datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    events = []
+    for kind, name, before, after in changes:
+        events.append({
+            "environment_id": environment_id,
+            "lab_id": lab_id,
+            "event_id": uuid.uuid4().hex,
+            "timestamp": timestamp,
+            "kind": kind,
+            "name": name,
+            "before": before,
+            "after": after,
+            "severity": package_severity(name, before, after) if kind == "package" else "MINOR",
+        })
+    return events
+
+
+def encode_batches(events: List[Dict], max_bytes: int = MAX_MESSAGE_BYTES) -> List[str]:
+    """
+    Pack events into as few gzip+base64 message bodies as fit under
+    max_bytes. Events are JSON lines, so the consumer can stream them.
+    """
+    batches, current = [], []
+
+    def flush():
+        if current:
+            batches.append(base64.b64encode(gzip.compress("\n".join(current).encode())).decode())
+
+    size = 0
+    for event in events:
+        line = json.dumps(event, separators=(",", ":"))
+        # Raw size is a safe upper bound; gzip only shrinks it
+        if current and size + len(line) + 1 > max_bytes * 3 // 4:
+            flush()
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    flush()
+    return batches
+
+
+def decode_batch(body: str) -> List[Dict]:
+    return [json.loads(line) for line in gzip.decompress(base64.b64decode(body)).decode().splitlines()]
@@ -0,0 +1,89 @@
+"""
+Drift-collector sidecar entrypoint.
+
+Polls the state files the Jupyter container writes to the shared drift
+volume, and publishes settled changes to the drift ingest queue in
+compressed batches. The environment is taken from ENVIRONMENT_ID/LAB_ID or,
+for warm pool tasks claimed after start, from the task's tags via
+ecs:DescribeTasks (the metadata endpoint's taskWithTags is EC2-only).
+"""
+import json
+import logging
+import os
+import time
+import urllib.request
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+from collector import DriftCollector, encode_batches, parse_freeze, parse_hashes, to_events
+
+STATE_DIR = os.environ.get("DRIFT_STATE_DIR", "/var/run/drift")
+POLL_SECONDS = float(os.environ.get("DRIFT_POLL_SECONDS", "15"))
+DEBOUNCE_SECONDS = float(os.environ.get("DRIFT_DEBOUNCE_SECONDS", "60"))
+QUEUE_URL = os.environ["DRIFT_QUEUE_URL"]
+
+logger = logging.getLogger("drift_collector")
+
+
+def read_state():
+    try:
+        with open(os.path.join(STATE_DIR, "packages.txt")) as f:
+            packages = parse_freeze(f.read())
+        with open(os.path.join(STATE_DIR, "config-hashes.txt")) as f:
+            configs = parse_hashes(f.read())
+    except FileNotFoundError:
+        return None
+    return packages, configs
+
+
+def resolve_assignment(ecs):
+    """(environment_id, lab_id), or None while the task is still unassigned."""
+    if os.environ.get("ENVIRONMENT_ID"):
+        return os.environ["ENVIRONMENT_ID"], os.environ.get("LAB_ID", "unknown")
+
+    metadata_uri = os.environ.get("ECS_CONTAINER_METADATA_URI_V4")
+    if not metadata_uri:
+        return None
+    with urllib.request.urlopen(f"{metadata_uri}/task", timeout=2) as response:
+        metadata = json.load(response)
+    tasks = ecs.describe_tasks(
+        cluster=metadata["Cluster"], tasks=[metadata["TaskARN"]], include=["TAGS"]
+    )["tasks"]
+    tags = {tag["key"]: tag["value"] for tag in (tasks[0].get("tags", []) if tasks else [])}
+    if "environment_id" not in tags:
+        return None
+    return tags["environment_id"], tags.get("lab_id", "unknown")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    sqs = boto3.client("sqs")
+    ecs = boto3.client("ecs")
+    collector = DriftCollector(debounce_seconds=DEBOUNCE_SECONDS)
+    assignment = None
+
+    while True:
+        state = read_state()
+        if state is not None:
+            changes = collector.observe(*state, now=time.monotonic())
+
+            if assignment is None:
+                try:
+                    assignment = resolve_assignment(ecs)
+                except (OSError, BotoCoreError, ClientError):
+                    # Retried next poll; a persistent failure (e.g. a missing
+                    # IAM grant) must show up in the logs, not as silence
+                    logger.exception("Could not resolve the task's environment tags")
+                    assignment = None
+
+            # Drift before assignment belongs to the image, not a researcher
+            if changes and assignment is not None:
+                for body in encode_batches(to_events(changes, *assignment)):
+                    sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=body)
+
+        time.sleep(POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
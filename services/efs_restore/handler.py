@@ -0,0 +1,227 @@
+"""
+Steps of the EFS restore workflow (infrastructure/efs_restore.py).
+
+The state machine invokes this function once per step with
+{"action": ..., "state": <execution state>, "execution": <name>} and
+stores the result under the step's result path; the execution name is the
+idempotency token for every create call. State carries the request:
+
+    {"environment_id": "...", "recovery_point_arn": "...",
+     "path": "researchers/<researcher>/<env>",
+     "target": "access_point" | "file_system"}
+
+"access_point" (the fast path) restores into the notebook file system and
+serves the result through a fresh access point; "file_system" restores to
+a new file system, which needs its own mount targets first. Either way the
+restored directory is moved by the relocate task (the snapshot task in
+MODE=relocate) to restores/<environment_id>/<restore_job_id> before the
+environment is marked READY.
+"""
+import json
+import os
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+BACKUP = boto3.client("backup")
+EFS = boto3.client("efs")
+ECS = boto3.client("ecs")
+TABLE = boto3.resource("dynamodb").Table(os.environ["METADATA_TABLE"])
+
+SOURCE_FILE_SYSTEM_ID = os.environ["SOURCE_FILE_SYSTEM_ID"]
+
+# jovyan in the jupyter/* images
+JUPYTER_UID = 1000
+JUPYTER_GID = 100
+
+# Restored file systems are tagged so task roles can mount them
+RESTORED_FROM_TAG = "westtek-restored-from"
+
+# Fields describe_task_definition returns that register_task_definition rejects
+READ_ONLY_FIELDS = (
+    "taskDefinitionArn", "revision", "status", "requiresAttributes",
+    "compatibilities", "registeredAt", "registeredBy", "deregisteredAt",
+)
+
+
+def _restore_path(state):
+    return f"restores/{state['environment_id']}/{state['restore']['restore_job_id']}"
+
+
+def _set_status(environment_id, status, **fields):
+    names = ["restore_status", *fields]
+    TABLE.update_item(
+        Key={"environment_id": environment_id},
+        UpdateExpression="SET " + ", ".join(f"{name} = :{name}" for name in names),
+        ExpressionAttributeValues={f":{name}": value for name, value in {"restore_status": status, **fields}.items()},
+    )
+
+
+def start_restore(state):
+    new_file_system = state.get("target", "access_point") == "file_system"
+    metadata = BACKUP.get_recovery_point_restore_metadata(
+        BackupVaultName=os.environ["BACKUP_VAULT_NAME"],
+        RecoveryPointArn=state["recovery_point_arn"],
+    )["RestoreMetadata"]
+    metadata.update({
+        "file-system-id": SOURCE_FILE_SYSTEM_ID,
+        "newFileSystem": "true" if new_file_system else "false",
+        "Encrypted": "true",
+        "PerformanceMode": "generalPurpose",
+        "CreationToken": state["execution"][:64],
+        # Only the environment's directory, not the whole file system
+        "ItemsToRestore": json.dumps([f"/{state['path'].strip('/')}"]),
+    })
+
+    job = BACKUP.start_restore_job(
+        RecoveryPointArn=state["recovery_point_arn"],
+        Metadata=metadata,
+        IamRoleArn=os.environ["RESTORE_ROLE_ARN"],
+        ResourceType="EFS",
+        IdempotencyToken=state["execution"],
+    )
+    _set_status(state["environment_id"], "RESTORING", restore_job_id=job["RestoreJobId"])
+    return {"restore_job_id": job["RestoreJobId"]}
+
+
+def describe_restore(state):
+    job = BACKUP.describe_restore_job(RestoreJobId=state["restore"]["restore_job_id"])
+    file_system_id = SOURCE_FILE_SYSTEM_ID
+    if state.get("target") == "file_system" and job.get("CreatedResourceArn"):
+        file_system_id = job["CreatedResourceArn"].rsplit("/", 1)[-1]
+    return {
+        "restore_job_id": job["RestoreJobId"],
+        "status": job["Status"],
+        "file_system_id": file_system_id,
+    }
+
+
+def prepare_file_system(state):
+    """Tag and add mount targets to a restored file system; idempotent, polled until ready."""
+    file_system_id = state["restore"]["file_system_id"]
+    if file_system_id == SOURCE_FILE_SYSTEM_ID:
+        return {"ready": True}
+
+    EFS.tag_resource(
+        ResourceId=file_system_id,
+        Tags=[
+            {"Key": RESTORED_FROM_TAG, "Value": SOURCE_FILE_SYSTEM_ID},
+            {"Key": "environment_id", "Value": state["environment_id"]},
+        ],
+    )
+    mount_targets = EFS.describe_mount_targets(FileSystemId=file_system_id)["MountTargets"]
+    existing = {target["SubnetId"] for target in mount_targets}
+    missing = [subnet_id for subnet_id in json.loads(os.environ["SUBNET_IDS"]) if subnet_id not in existing]
+    for subnet_id in missing:
+        try:
+            EFS.create_mount_target(
+                FileSystemId=file_system_id,
+                SubnetId=subnet_id,
+                SecurityGroups=[os.environ["EFS_SECURITY_GROUP_ID"]],
+            )
+        except ClientError as e:
+            # The file system is still being created, or a retry raced us
+            if e.response["Error"]["Code"] not in ("IncorrectFileSystemLifeCycleState", "MountTargetConflict"):
+                raise
+    if missing:
+        return {"ready": False}
+
+    return {"ready": all(target["LifeCycleState"] == "available" for target in mount_targets)}
+
+
+def _relocate_task_definition(file_system_id):
+    """The snapshot task definition, or a revision of it mounting the restored file system."""
+    family = os.environ["RELOCATE_TASK_DEFINITION"]
+    if file_system_id == SOURCE_FILE_SYSTEM_ID:
+        return family
+
+    definition = ECS.describe_task_definition(taskDefinition=family)["taskDefinition"]
+    for field in READ_ONLY_FIELDS:
+        definition.pop(field, None)
+    for volume in definition["volumes"]:
+        if "efsVolumeConfiguration" in volume:
+            volume["efsVolumeConfiguration"]["fileSystemId"] = file_system_id
+    return ECS.register_task_definition(**definition)["taskDefinition"]["taskDefinitionArn"]
+
+
+def start_relocate(state):
+    task = ECS.run_task(
+        cluster=os.environ["CLUSTER_NAME"],
+        taskDefinition=_relocate_task_definition(state["restore"]["file_system_id"]),
+        capacityProviderStrategy=json.loads(os.environ["CAPACITY_PROVIDER_STRATEGY"]),
+        networkConfiguration={
+            "awsvpcConfiguration": {
+                "subnets": json.loads(os.environ["SUBNET_IDS"]),
+                "securityGroups": [os.environ["TASK_SECURITY_GROUP_ID"]],
+                "assignPublicIp": "DISABLED",
+            }
+        },
+        overrides={
+            "containerOverrides": [{
+                "name": os.environ["RELOCATE_CONTAINER"],
+                "environment": [
+                    {"name": "MODE", "value": "relocate"},
+                    {"name": "ENVIRONMENT_ID", "value": state["environment_id"]},
+                    {"name": "SOURCE_PATH", "value": state["path"]},
+                    {"name": "TARGET_PATH", "value": _restore_path(state)},
+                ],
+            }]
+        },
+        clientToken=state["execution"][:64],
+    )
+    if task.get("failures"):
+        raise RuntimeError(f"Relocate task did not start: {task['failures']}")
+    return {"task_arn": task["tasks"][0]["taskArn"], "status": "RUNNING"}
+
+
+def describe_relocate(state):
+    task = ECS.describe_tasks(
+        cluster=os.environ["CLUSTER_NAME"], tasks=[state["relocate"]["task_arn"]]
+    )["tasks"][0]
+    if task["lastStatus"] != "STOPPED":
+        return {"task_arn": task["taskArn"], "status": "RUNNING"}
+
+    exit_codes = [container.get("exitCode") for container in task["containers"]]
+    status = "SUCCEEDED" if exit_codes and all(code == 0 for code in exit_codes) else "FAILED"
+    return {"task_arn": task["taskArn"], "status": status, "stopped_reason": task.get("stoppedReason", "")}
+
+
+def create_access_point(state):
+    file_system_id = state["restore"]["file_system_id"]
+    path = _restore_path(state)
+    access_point = EFS.create_access_point(
+        ClientToken=state["execution"][:64],
+        FileSystemId=file_system_id,
+        PosixUser={"Uid": JUPYTER_UID, "Gid": JUPYTER_GID},
+        RootDirectory={
+            "Path": f"/{path}",
+            "CreationInfo": {"OwnerUid": JUPYTER_UID, "OwnerGid": JUPYTER_GID, "Permissions": "750"},
+        },
+        Tags=[{"Key": "environment_id", "Value": state["environment_id"]}],
+    )
+
+    # The API launches the next session on this file system and access point
+    # (ResearcherStorage.register_task_definition(..., file_system_id=...))
+    _set_status(
+        state["environment_id"], "READY",
+        restored_file_system_id=file_system_id,
+        restored_access_point_id=access_point["AccessPointId"],
+        restored_recovery_point_arn=state["recovery_point_arn"],
+        restored_at=int(time.time()),
+    )
+    return {"access_point_id": access_point["AccessPointId"], "file_system_id": file_system_id}
+
+
+ACTIONS = {
+    "start_restore": start_restore,
+    "describe_restore": describe_restore,
+    "prepare_file_system": prepare_file_system,
+    "start_relocate": start_relocate,
+    "describe_relocate": describe_relocate,
+    "create_access_point": create_access_point,
+}
+
+
+def handler(event, context):
+    return ACTIONS[event["action"]](dict(event["state"], execution=event["execution"]))
@@ -0,0 +1,97 @@
+"""
+Idle detection for the idle-monitor sidecar.
+
+The sidecar reads the Jupyter server's own activity counters (GET
+api/status and api/kernels, the same data JupyterHub's idle culler uses)
+and reduces them to a single idle_since timestamp: the moment from which
+nothing has happened on the server. The reaper Lambda compares that with
+its idle timeout. Reads go through a fetch callable, so the logic runs
+against a fake Jupyter API (a dict of path -> JSON) without a server.
+"""
+import glob
+import json
+import os
+import urllib.request
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+
+@dataclass
+class Activity:
+    """What the server reports, timestamps as epoch seconds."""
+    started: float
+    last_activity: float
+    kernels: int
+    busy_kernels: int
+    connections: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def parse_timestamp(value: str) -> float:
+    """Jupyter's ISO 8601 timestamps ('2024-10-07T12:00:00.123456Z') -> epoch seconds."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def summarize(status: dict, kernels: List[dict]) -> Activity:
+    """Combine api/status with per-kernel state from api/kernels."""
+    last_activity = parse_timestamp(status["last_activity"])
+    for kernel in kernels:
+        if kernel.get("last_activity"):
+            last_activity = max(last_activity, parse_timestamp(kernel["last_activity"]))
+    return Activity(
+        started=parse_timestamp(status["started"]),
+        last_activity=last_activity,
+        kernels=len(kernels),
+        busy_kernels=sum(1 for kernel in kernels if kernel.get("execution_state") == "busy"),
+        connections=sum(kernel.get("connections", 0) for kernel in kernels),
+    )
+
+
+def idle_since(activity: Activity, cull_connected: bool, cull_busy: bool) -> Optional[float]:
+    """
+    When the server went idle, or None if it is in use. A busy kernel is in
+    use unless cull_busy (a training run can go hours without output); an
+    open browser tab is in use unless cull_connected (abandoned tabs keep
+    their websocket open overnight).
+    """
+    if activity.busy_kernels and not cull_busy:
+        return None
+    if activity.connections and not cull_connected:
+        return None
+    return max(activity.started, activity.last_activity)
+
+
+class JupyterApi:
+    """Authenticated reads from a Jupyter server's REST API."""
+
+    def __init__(self, fetch: Callable[[str], object]) -> None:
+        self.fetch = fetch
+
+    @classmethod
+    def from_runtime_dir(cls, runtime_dir: str, timeout: float = 5) -> Optional["JupyterApi"]:
+        """
+        Connect through the newest jpserver-<pid>.json the server wrote to
+        its runtime directory (as `jupyter server list` does), or None while
+        the server has not started yet.
+        """
+        server_files = sorted(glob.glob(os.path.join(runtime_dir, "jpserver-*.json")), key=os.path.getmtime)
+        if not server_files:
+            return None
+        with open(server_files[-1]) as f:
+            server = json.load(f)
+        base_url = f"http://127.0.0.1:{server['port']}{server['base_url']}"
+
+        def fetch(path):
+            request = urllib.request.Request(
+                f"{base_url}{path}", headers={"Authorization": f"token {server['token']}"}
+            )
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.load(response)
+
+        return cls(fetch)
+
+    def activity(self) -> Activity:
+        return summarize(self.fetch("api/status"), self.fetch("api/kernels"))
@@ -0,0 +1,64 @@
+"""
+Idle-monitor sidecar entrypoint.
+
+Serves GET /activity on MONITOR_PORT for the idle reaper Lambda: the
+Jupyter server's activity summary and idle_since (see activity.py), read
+from the server on each request. The Jupyter container writes its
+connection file to the shared runtime volume, so the sidecar finds the
+port, base_url and token without any extra configuration.
+"""
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from activity import JupyterApi, idle_since
+
+RUNTIME_DIR = os.environ.get("JUPYTER_RUNTIME_DIR", "/var/run/jupyter")
+MONITOR_PORT = int(os.environ.get("MONITOR_PORT", "8890"))
+CULL_CONNECTED = os.environ.get("CULL_CONNECTED", "true").lower() == "true"
+CULL_BUSY = os.environ.get("CULL_BUSY", "false").lower() == "true"
+
+
+def report() -> dict:
+    api = JupyterApi.from_runtime_dir(RUNTIME_DIR)
+    if api is None:
+        return {"status": "starting", "idle_since": None}
+    activity = api.activity()
+    return {
+        "status": "ok",
+        "observed_at": time.time(),
+        "idle_since": idle_since(activity, CULL_CONNECTED, CULL_BUSY),
+        "activity": activity.to_dict(),
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/activity":
+            self._respond(404, {"error": "not found"})
+            return
+        try:
+            self._respond(200, report())
+        except Exception as e:
+            # Unknown activity never counts as idle
+            self._respond(503, {"status": "error", "error": str(e), "idle_since": None})
+
+    def _respond(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    ThreadingHTTPServer(("0.0.0.0", MONITOR_PORT), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
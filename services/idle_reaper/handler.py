@@ -0,0 +1,147 @@
+"""
+Parks researcher Jupyter tasks that have been idle past the timeout.
+
+Runs on a schedule. Every RUNNING task in the cluster with an idle-monitor
+sidecar and an environment_id tag (claimed warm tasks and cold launches;
+unclaimed warm tasks belong to their pool) is asked for its activity over
+the task network. A task idle for IDLE_TIMEOUT_SECONDS is recorded as
+PARKED in the environment metadata table and released like any other stop
+(backend/app/sessions.py, bundled with this function): a claimed warm task
+loses its protection and gives its slot back to the pool, and the task's
+load balancer routes are deleted. StopTask sends SIGTERM, so the
+westtek_checkpoint server extension saves every kernel to the researcher's
+EFS directory before the task exits; the parked record keeps the checkpoint
+manifest and the task definition revision, so the next launch can skip
+registration and offer the restore.
+"""
+import json
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import ClientError
+
+from app.sessions import JupyterSessions
+
+ECS = boto3.client("ecs")
+TABLE = boto3.resource("dynamodb").Table(os.environ["METADATA_TABLE"])
+SESSIONS = JupyterSessions()
+
+CLUSTER_NAME = os.environ["CLUSTER_NAME"]
+MONITOR_CONTAINER = os.environ["MONITOR_CONTAINER"]
+MONITOR_PORT = int(os.environ["MONITOR_PORT"])
+IDLE_TIMEOUT_SECONDS = int(os.environ["IDLE_TIMEOUT_SECONDS"])
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "WestTek/IdleReaper")
+
+# Written by jupyter/westtek_checkpoint.py, relative to /home/jovyan/work
+CHECKPOINT_MANIFEST = ".checkpoints/manifest.json"
+
+
+def _running_tasks():
+    """Monitored, assigned tasks as (task, environment_id, private_ip)."""
+    paginator = ECS.get_paginator("list_tasks")
+    for page in paginator.paginate(cluster=CLUSTER_NAME, desiredStatus="RUNNING"):
+        if not page["taskArns"]:
+            continue
+        tasks = ECS.describe_tasks(cluster=CLUSTER_NAME, tasks=page["taskArns"], include=["TAGS"])["tasks"]
+        for task in tasks:
+            if task.get("lastStatus") != "RUNNING":
+                continue
+            if not any(container["name"] == MONITOR_CONTAINER for container in task["containers"]):
+                continue
+            tags = {tag["key"]: tag["value"] for tag in task.get("tags", [])}
+            if "environment_id" not in tags:
+                continue
+            private_ip = next(
+                (
+                    detail["value"]
+                    for attachment in task.get("attachments", [])
+                    for detail in attachment.get("details", [])
+                    if detail["name"] == "privateIPv4Address"
+                ),
+                None
+            )
+            if private_ip:
+                yield task, tags["environment_id"], private_ip
+
+
+def _activity(private_ip):
+    try:
+        with urllib.request.urlopen(f"http://{private_ip}:{MONITOR_PORT}/activity", timeout=5) as response:
+            return json.load(response)
+    except (OSError, ValueError):
+        return None
+
+
+def _park(task, environment_id, idle_seconds, now):
+    """Record the parked state, then release the task. False if the environment is unknown."""
+    task_arn = task["taskArn"]
+    try:
+        TABLE.update_item(
+            Key={"environment_id": environment_id},
+            UpdateExpression=(
+                "SET session_status = :status, parked_at = :now, parked_task_arn = :task, "
+                "parked_task_definition = :task_definition, idle_seconds = :idle, "
+                "checkpoint_manifest = :manifest"
+            ),
+            ConditionExpression="attribute_exists(environment_id)",
+            ExpressionAttributeValues={
+                ":status": "PARKED",
+                ":now": int(now),
+                ":task": task_arn,
+                ":task_definition": task["taskDefinitionArn"],
+                ":idle": int(idle_seconds),
+                ":manifest": CHECKPOINT_MANIFEST,
+            },
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return False
+
+    SESSIONS.release(
+        task_arn,
+        task.get("group"),
+        reason=f"Parked by idle reaper after {int(idle_seconds // 60)} idle minutes"
+    )
+    return True
+
+
+def _emit(**metrics):
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [[]],
+                "Metrics": [{"Name": name, "Unit": "Count"} for name in metrics],
+            }],
+        },
+        **metrics,
+    }
+    sys.stdout.write(json.dumps(record) + "\n")
+
+
+def handler(event, context):
+    candidates = list(_running_tasks())
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        reports = list(executor.map(lambda candidate: _activity(candidate[2]), candidates))
+
+    now = time.time()
+    parked, unreachable = [], 0
+    for (task, environment_id, _), report in zip(candidates, reports):
+        if report is None:
+            unreachable += 1
+            continue
+        # None while a kernel is busy, a tab is connected or the server is starting
+        if report.get("idle_since") is None:
+            continue
+        idle_seconds = now - report["idle_since"]
+        if idle_seconds >= IDLE_TIMEOUT_SECONDS and _park(task, environment_id, idle_seconds, now):
+            parked.append(environment_id)
+
+    _emit(TasksMonitored=len(candidates), TasksParked=len(parked), MonitorUnreachable=unreachable)
+    return {"monitored": len(candidates), "parked": parked, "unreachable": unreachable}
@@ -0,0 +1,198 @@
+"""
+Knowledge Base ingestion for environment snapshots.
+
+stage: SQS consumer for "Object Created" events on manifests/ in the
+snapshots bucket. Each batch is reduced to the newest manifest per
+environment, diffed against that environment's staged state (staging.py)
+and applied to the data-source bucket, then a pending marker is bumped.
+Two consumers can stage the same environment at once, so the state object
+is written with an S3 conditional put against the ETag it was planned
+from: the loser re-plans from the winner's state, or stops if its manifest
+is no newer than the staged one, and removes parts it wrote that the
+current state does not reference. Unstaged parts are deleted only after
+the state that drops them is in place.
+
+trigger: scheduled. Starts one ingestion job once staging has been quiet
+for DEBOUNCE_SECONDS and no job is running, so a burst of snapshots (a
+whole lab at the end of a session) becomes a single incremental sync.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import ClientError
+
+from staging import STATE_PREFIX, chunk_key, metadata_key, plan, state_key
+
+S3 = boto3.client("s3")
+BEDROCK = boto3.client("bedrock-agent")
+
+SNAPSHOTS_BUCKET = os.environ["SNAPSHOTS_BUCKET"]
+DATA_SOURCE_BUCKET = os.environ["DATA_SOURCE_BUCKET"]
+KNOWLEDGE_BASE_ID = os.environ.get("KNOWLEDGE_BASE_ID", "")
+DATA_SOURCE_ID = os.environ.get("DATA_SOURCE_ID", "")
+INCLUDE_SUFFIXES = tuple(json.loads(os.environ["INCLUDE_SUFFIXES"]))
+MAX_FILE_BYTES = int(os.environ["MAX_FILE_BYTES"])
+MAX_DOCUMENT_BYTES = int(os.environ["MAX_DOCUMENT_BYTES"])
+DEBOUNCE_SECONDS = int(os.environ["DEBOUNCE_SECONDS"])
+
+# staged_at of the newest staging run, and started_at of the newest job
+PENDING_KEY = f"{STATE_PREFIX}_pending.json"
+INGESTION_KEY = f"{STATE_PREFIX}_ingestion.json"
+
+
+def _get_json(key):
+    try:
+        return json.loads(S3.get_object(Bucket=DATA_SOURCE_BUCKET, Key=key)["Body"].read())
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
+
+
+def _put_json(key, body):
+    S3.put_object(Bucket=DATA_SOURCE_BUCKET, Key=key, Body=json.dumps(body).encode(),
+                  ContentType="application/json")
+
+
+def _get_state(environment_id):
+    """(staged state, ETag), or (None, None) before the environment's first staging."""
+    try:
+        response = S3.get_object(Bucket=DATA_SOURCE_BUCKET, Key=state_key(environment_id))
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None, None
+        raise
+    return json.loads(response["Body"].read()), response["ETag"]
+
+
+def _put_state(environment_id, state, etag):
+    """Replace the state only if it is still the one at etag; False if another run got there first."""
+    condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+    try:
+        S3.put_object(Bucket=DATA_SOURCE_BUCKET, Key=state_key(environment_id),
+                      Body=json.dumps(state).encode(), ContentType="application/json", **condition)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("PreconditionFailed", "ConditionalRequestConflict"):
+            return False
+        raise
+    return True
+
+
+def _referenced(state):
+    return {
+        key
+        for entry in (state or {}).get("files", {}).values()
+        for part in entry["parts"]
+        for key in (part, metadata_key(part))
+    }
+
+
+def _delete(keys):
+    keys = sorted(keys)
+    for start in range(0, len(keys), 1000):
+        S3.delete_objects(
+            Bucket=DATA_SOURCE_BUCKET,
+            Delete={"Objects": [{"Key": k} for k in keys[start:start + 1000]], "Quiet": True}
+        )
+
+
+def _read_file(entry):
+    data = b""
+    for digest in entry["chunks"]:
+        try:
+            data += S3.get_object(Bucket=SNAPSHOTS_BUCKET, Key=chunk_key(digest))["Body"].read()
+        except ClientError as e:
+            # Chunks tiered to Deep Archive need a restore first
+            if e.response["Error"]["Code"] == "InvalidObjectState":
+                return None
+            raise
+    return data
+
+
+def _stage_manifest(key):
+    manifest = json.loads(S3.get_object(Bucket=SNAPSHOTS_BUCKET, Key=key)["Body"].read())
+    environment_id = manifest["environment_id"]
+    summary = {"environment_id": environment_id, "snapshot_id": manifest["snapshot_id"]}
+    written = set()
+
+    while True:
+        previous, etag = _get_state(environment_id)
+        # A manifest delivered late, or staged concurrently by a newer one
+        if previous and previous.get("created_at", "") >= manifest["created_at"]:
+            _delete(written - _referenced(previous))
+            return {**summary, "superseded": True, "parts_written": 0, "parts_deleted": 0}
+
+        result = plan(
+            previous, manifest, _read_file,
+            include_suffixes=INCLUDE_SUFFIXES,
+            max_file_bytes=MAX_FILE_BYTES,
+            max_document_bytes=MAX_DOCUMENT_BYTES
+        )
+        result.state["created_at"] = manifest["created_at"]
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(
+                lambda item: S3.put_object(Bucket=DATA_SOURCE_BUCKET, Key=item[0], Body=item[1]),
+                result.puts.items()
+            ))
+        written.update(result.puts)
+        # State before deletes, so a failed run is simply redone from the old state
+        if _put_state(environment_id, result.state, etag):
+            break
+
+    _delete(set(result.deletes) | (written - _referenced(result.state)))
+    return {**summary, **result.stats}
+
+
+def stage(event, context):
+    # Newest manifest per environment; earlier ones in the batch are superseded
+    latest = {}
+    for record in event["Records"]:
+        detail = json.loads(record["body"])["detail"]
+        key = detail["object"]["key"]
+        environment_id = key.split("/")[1]
+        sent = int(record["attributes"]["SentTimestamp"])
+        if environment_id not in latest or sent >= latest[environment_id][0]:
+            latest[environment_id] = (sent, key)
+
+    results = [_stage_manifest(key) for _, key in latest.values()]
+    if any(r["parts_written"] or r["parts_deleted"] for r in results):
+        _put_json(PENDING_KEY, {"staged_at": time.time()})
+    print(json.dumps({"staged": results}))
+    return {"staged": len(results)}
+
+
+def trigger(event, context):
+    if not (KNOWLEDGE_BASE_ID and DATA_SOURCE_ID):
+        return {"status": "no_knowledge_base"}
+
+    pending = _get_json(PENDING_KEY)
+    last = _get_json(INGESTION_KEY) or {"started_at": 0}
+    now = time.time()
+    # A job picks up everything staged before it started
+    if pending is None or pending["staged_at"] <= last["started_at"]:
+        return {"status": "up_to_date"}
+    if now - pending["staged_at"] < DEBOUNCE_SECONDS:
+        return {"status": "debouncing"}
+
+    running = BEDROCK.list_ingestion_jobs(
+        knowledgeBaseId=KNOWLEDGE_BASE_ID,
+        dataSourceId=DATA_SOURCE_ID,
+        filters=[{"attribute": "STATUS", "operator": "EQ", "values": ["STARTING", "IN_PROGRESS"]}],
+        maxResults=1
+    )["ingestionJobSummaries"]
+    if running:
+        return {"status": "job_running", "ingestion_job_id": running[0]["ingestionJobId"]}
+
+    job = BEDROCK.start_ingestion_job(
+        knowledgeBaseId=KNOWLEDGE_BASE_ID,
+        dataSourceId=DATA_SOURCE_ID,
+        # 33+ characters; the same pending marker never starts two jobs
+        clientToken=f"westtek-ingestion-{DATA_SOURCE_ID}-{int(pending['staged_at'] * 1000)}",
+        description="Snapshot documents staged since the last ingestion"
+    )["ingestionJob"]
+    _put_json(INGESTION_KEY, {"started_at": now, "ingestion_job_id": job["ingestionJobId"]})
+    return {"status": "started", "ingestion_job_id": job["ingestionJobId"]}
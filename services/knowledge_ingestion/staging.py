@@ -0,0 +1,294 @@
+"""
+Change detection and staging for Knowledge Base ingestion.
+
+A snapshot manifest (services/snapshot_engine/manifest.py) already names
+every file by the SHA-256 of its chunks, so two manifests diff by content
+without reading any data. Only new or changed notebooks, package manifests
+and docs are read back from the chunk store, converted to text and staged
+in the data-source bucket; removed files are unstaged. Bedrock ingestion
+jobs sync incrementally, so documents left untouched keep their embeddings.
+
+Documents are staged in parts of at most max_document_bytes, split at
+notebook-cell or paragraph boundaries and named by their content hash. A
+part boundary falls where the block hash says so (once the part is at
+least half full), not at a fixed offset, so an edit early in a long
+notebook changes one or two parts instead of shifting every part after it.
+
+Pure functions over manifests and a read_file callable, no AWS calls. Run
+locally against fixture manifests and a LocalChunkStore directory:
+
+    python3 staging.py manifest.json --chunks <store dir> --out <dir> [--previous state.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+DOCUMENT_PREFIX = "documents/"
+STATE_PREFIX = "state/"
+# Key layout written by services/snapshot_engine/store.py
+CHUNK_PREFIX = "chunks/"
+
+DEFAULT_INCLUDE_SUFFIXES = (".ipynb", ".py", ".md", ".rst", ".txt", ".yml", ".yaml", ".toml", ".cfg")
+DEFAULT_MAX_FILE_BYTES = 5 * 1024 * 1024
+DEFAULT_MAX_DOCUMENT_BYTES = 256 * 1024
+
+# Directories whose files are never research documents
+EXCLUDED_DIRECTORIES = frozenset({
+    ".checkpoints", ".ipynb_checkpoints", ".git", "__pycache__", "site-packages",
+    "node_modules", ".cache", ".local",
+})
+
+# About one block in four may close a part once it is half full
+BOUNDARY_MASK = 0b11
+
+
+@dataclass
+class StagingPlan:
+    puts: Dict[str, bytes] = field(default_factory=dict)
+    deletes: List[str] = field(default_factory=list)
+    state: dict = field(default_factory=dict)
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+def file_hash(entry: dict) -> str:
+    """Content hash of a manifest entry, from its chunk digests."""
+    return hashlib.sha256("\n".join(entry["chunks"]).encode()).hexdigest()
+
+
+def is_document(path: str, include_suffixes=DEFAULT_INCLUDE_SUFFIXES) -> bool:
+    parts = path.split("/")
+    if any(part in EXCLUDED_DIRECTORIES for part in parts[:-1]):
+        return False
+    return path.endswith(tuple(include_suffixes))
+
+
+def select(manifest: dict, include_suffixes=DEFAULT_INCLUDE_SUFFIXES,
+           max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Dict[str, dict]:
+    """{path: entry} for the regular files worth ingesting."""
+    return {
+        entry["path"]: entry
+        for entry in manifest["files"]
+        if entry.get("link_target") is None
+        and not entry.get("directory")
+        and 0 < entry["size"] <= max_file_bytes
+        and is_document(entry["path"], include_suffixes)
+    }
+
+
+def diff(previous_files: Dict[str, dict], current: Dict[str, dict]):
+    """(changed or new paths, removed paths) between staged state and a manifest selection."""
+    changed = sorted(
+        path for path, entry in current.items()
+        if previous_files.get(path, {}).get("hash") != file_hash(entry)
+    )
+    removed = sorted(previous_files.keys() - current.keys())
+    return changed, removed
+
+
+def to_blocks(path: str, data: bytes) -> List[str]:
+    """Split a file into text blocks: notebook cells, or paragraphs for anything else."""
+    text = data.decode("utf-8", errors="replace")
+    if path.endswith(".ipynb"):
+        try:
+            notebook = json.loads(text)
+        except ValueError:
+            return []
+        language = notebook.get("metadata", {}).get("language_info", {}).get("name", "python")
+        blocks = []
+        for cell in notebook.get("cells", []):
+            source = cell.get("source", "")
+            source = "".join(source) if isinstance(source, list) else source
+            if not source.strip():
+                continue
+            # Outputs (plots, tables) are left out; they dwarf the code and rarely embed well
+            if cell.get("cell_type") == "code":
+                blocks.append(f"```{language}\n{source.rstrip()}\n```")
+            else:
+                blocks.append(source.rstrip())
+        return blocks
+    return [block.strip() for block in text.split("\n\n") if block.strip()]
+
+
+def _split_block(block: str, max_bytes: int) -> List[str]:
+    """Split one oversized block at line boundaries (or hard, for a single huge line)."""
+    pieces, current = [], ""
+    for line in block.splitlines(keepends=True):
+        while len(line.encode()) > max_bytes:
+            head = line.encode()[:max_bytes].decode("utf-8", errors="ignore")
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(head)
+            line = line[len(head):]
+        if current and len((current + line).encode()) > max_bytes:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def pack(blocks: List[str], max_bytes: int = DEFAULT_MAX_DOCUMENT_BYTES) -> List[str]:
+    """Group blocks into parts of at most max_bytes with content-defined boundaries."""
+    parts, current, size = [], [], 0
+    for block in blocks:
+        for piece in _split_block(block, max_bytes) if len(block.encode()) > max_bytes else [block]:
+            piece_size = len(piece.encode()) + 2
+            if current and size + piece_size > max_bytes:
+                parts.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += piece_size
+            boundary = hashlib.sha256(piece.encode()).digest()[0] & BOUNDARY_MASK == 0
+            if boundary and size >= max_bytes // 2:
+                parts.append("\n\n".join(current))
+                current, size = [], 0
+    if current:
+        parts.append("\n\n".join(current))
+    return parts
+
+
+def document_key(environment_id: str, path: str, part: str) -> str:
+    digest = hashlib.sha256(part.encode()).hexdigest()[:16]
+    return f"{DOCUMENT_PREFIX}{environment_id}/{path}/{digest}.md"
+
+
+def metadata_key(document: str) -> str:
+    """Bedrock reads filterable attributes from <document>.metadata.json."""
+    return f"{document}.metadata.json"
+
+
+def _metadata(environment_id: str, path: str) -> bytes:
+    # No snapshot ID here: it changes every snapshot and would re-embed everything
+    kind = "notebook" if path.endswith(".ipynb") else "code" if path.endswith(".py") else "document"
+    return json.dumps({"metadataAttributes": {
+        "environment_id": environment_id,
+        "path": path,
+        "kind": kind,
+        "name": posixpath.basename(path),
+    }}).encode()
+
+
+def state_key(environment_id: str) -> str:
+    return f"{STATE_PREFIX}{environment_id}.json"
+
+
+def plan(
+    previous_state: Optional[dict],
+    manifest: dict,
+    read_file: Callable[[dict], Optional[bytes]],
+    include_suffixes=DEFAULT_INCLUDE_SUFFIXES,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    max_document_bytes: int = DEFAULT_MAX_DOCUMENT_BYTES,
+) -> StagingPlan:
+    """
+    What to write and delete in the data-source bucket to move an
+    environment from previous_state to manifest. read_file returns a file's
+    bytes, or None if its chunks cannot be read (e.g. archived).
+    """
+    environment_id = manifest["environment_id"]
+    previous_files = (previous_state or {}).get("files", {})
+    current = select(manifest, include_suffixes, max_file_bytes)
+    changed, removed = diff(previous_files, current)
+
+    result = StagingPlan()
+    files = {path: previous_files[path] for path in current if path not in changed}
+    for path in removed:
+        for key in previous_files[path]["parts"]:
+            result.deletes += [key, metadata_key(key)]
+
+    unreadable = 0
+    for path in changed:
+        data = read_file(current[path])
+        if data is None:
+            unreadable += 1
+            # Keep whatever was staged before rather than dropping the document
+            if path in previous_files:
+                files[path] = previous_files[path]
+            continue
+        keys = []
+        for part in pack(to_blocks(path, data), max_document_bytes):
+            key = document_key(environment_id, path, part)
+            keys.append(key)
+            # Parts that survived the edit keep their key and their embeddings
+            if key not in previous_files.get(path, {}).get("parts", []):
+                result.puts[key] = part.encode()
+                result.puts[metadata_key(key)] = _metadata(environment_id, path)
+        for key in previous_files.get(path, {}).get("parts", []):
+            if key not in keys:
+                result.deletes += [key, metadata_key(key)]
+        files[path] = {"hash": file_hash(current[path]), "parts": keys}
+
+    result.state = {
+        "environment_id": environment_id,
+        "snapshot_id": manifest["snapshot_id"],
+        "files": files,
+    }
+    result.stats = {
+        "documents": len(files),
+        "changed": len(changed),
+        "removed": len(removed),
+        "unreadable": unreadable,
+        "parts_written": sum(1 for key in result.puts if not key.endswith(".metadata.json")),
+        "parts_deleted": sum(1 for key in result.deletes if not key.endswith(".metadata.json")),
+        "bytes_written": sum(len(body) for body in result.puts.values()),
+    }
+    return result
+
+
+def chunk_key(digest: str) -> str:
+    return f"{CHUNK_PREFIX}{digest[:2]}/{digest}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage a snapshot manifest for Knowledge Base ingestion")
+    parser.add_argument("manifest", help="snapshot manifest JSON")
+    parser.add_argument("--chunks", required=True, help="LocalChunkStore directory holding the chunks")
+    parser.add_argument("--out", required=True, help="directory standing in for the data-source bucket")
+    parser.add_argument("--previous", help="state JSON from an earlier run (default: <out>/state/<env>.json)")
+    parser.add_argument("--max-document-bytes", type=int, default=DEFAULT_MAX_DOCUMENT_BYTES)
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    previous_path = args.previous or os.path.join(args.out, state_key(manifest["environment_id"]))
+    previous = None
+    if os.path.exists(previous_path):
+        with open(previous_path) as f:
+            previous = json.load(f)
+
+    def read_file(entry):
+        data = b""
+        for digest in entry["chunks"]:
+            try:
+                with open(os.path.join(args.chunks, chunk_key(digest)), "rb") as f:
+                    data += f.read()
+            except FileNotFoundError:
+                return None
+        return data
+
+    result = plan(previous, manifest, read_file, max_document_bytes=args.max_document_bytes)
+    for key, body in result.puts.items():
+        path = os.path.join(args.out, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(body)
+    for key in result.deletes:
+        try:
+            os.remove(os.path.join(args.out, key))
+        except FileNotFoundError:
+            pass
+    state_path = os.path.join(args.out, state_key(manifest["environment_id"]))
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path, "w") as f:
+        json.dump(result.state, f, indent=2)
+    print(json.dumps(result.stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
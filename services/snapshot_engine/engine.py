@@ -0,0 +1,259 @@
+"""
+Incremental, content-addressed snapshots of an environment directory.
+
+Files are split into fixed-size chunks named by SHA-256. A snapshot only
+uploads chunks the store does not already hold, and files whose size and
+mtime match the parent manifest are not even re-read. Chunk boundaries are
+per file, so adding or removing a package only touches that package's
+files; content-defined chunking would buy little for this workload and
+cost a pure-Python rolling hash over every byte.
+
+Manifests record mode, owner and mtime for files, symlinks and directories.
+The snapshot task runs as root, so a restore hands everything back to its
+recorded owner; entries from older manifests without one, and directories
+the manifest does not list, go to the Jupyter user the access points
+(infrastructure/storage_stack.py) map researchers to.
+"""
+import hashlib
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+from manifest import FileEntry, Manifest, manifest_key
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_WORKERS = 16
+
+# jovyan in the jupyter/* images
+JUPYTER_UID = 1000
+JUPYTER_GID = 100
+
+
+def scan(root: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    Yield (relative path, lstat) for root itself ("."), then every
+    directory, regular file and symlink under it.
+    """
+    yield ".", os.lstat(root)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                st = entry.stat(follow_symlinks=False)
+                if stat.S_ISDIR(st.st_mode):
+                    stack.append(entry.path)
+                if stat.S_ISDIR(st.st_mode) or stat.S_ISREG(st.st_mode) or stat.S_ISLNK(st.st_mode):
+                    yield os.path.relpath(entry.path, root), st
+
+
+class _Uploader:
+    """Parallel chunk uploads with a cap on chunks held in memory."""
+
+    def __init__(self, store, workers: int, known: set) -> None:
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(workers * 2)
+        self.seen = set(known)
+        self.futures = []
+        self.uploaded_chunks = 0
+        self.uploaded_bytes = 0
+        self._lock = threading.Lock()
+
+    def submit(self, digest: str, data: bytes) -> None:
+        if digest in self.seen:
+            return
+        self.seen.add(digest)
+        self.slots.acquire()
+        future = self.executor.submit(self._upload, digest, data)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+
+    def _upload(self, digest: str, data: bytes) -> None:
+        if self.store.has(digest):
+            return
+        self.store.put(digest, data)
+        with self._lock:
+            self.uploaded_chunks += 1
+            self.uploaded_bytes += len(data)
+
+    def wait(self) -> None:
+        try:
+            for future in as_completed(self.futures):
+                future.result()
+        finally:
+            self.executor.shutdown()
+
+
+def create_snapshot(
+    root: str,
+    store,
+    environment_id: str,
+    snapshot_id: str,
+    parent: Optional[Manifest] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = DEFAULT_WORKERS,
+) -> Tuple[Manifest, Dict[str, int]]:
+    """
+    Snapshot root into store and write its manifest. Returns the manifest
+    and upload statistics.
+    """
+    # Chunk hashes from the parent can only be reused at the same chunk size
+    if parent is not None and parent.chunk_size != chunk_size:
+        parent = None
+    previous = {entry.path: entry for entry in parent.files} if parent else {}
+    uploader = _Uploader(store, workers, parent.chunk_set() if parent else set())
+
+    manifest = Manifest(
+        environment_id=environment_id,
+        snapshot_id=snapshot_id,
+        created_at=datetime.now(timezone.utc).isoformat(),
+        chunk_size=chunk_size,
+        parent_snapshot_id=parent.snapshot_id if parent else None
+    )
+    reused_files = 0
+
+    try:
+        for path, st in scan(root):
+            entry = FileEntry(
+                path=path,
+                mode=stat.S_IMODE(st.st_mode),
+                size=st.st_size,
+                mtime_ns=st.st_mtime_ns,
+                uid=st.st_uid,
+                gid=st.st_gid
+            )
+
+            if stat.S_ISDIR(st.st_mode):
+                entry.size = 0
+                entry.directory = True
+            elif stat.S_ISLNK(st.st_mode):
+                entry.size = 0
+                entry.link_target = os.readlink(os.path.join(root, path))
+            else:
+                prior = previous.get(path)
+                if prior and prior.link_target is None and not prior.directory \
+                        and prior.size == st.st_size \
+                        and prior.mtime_ns == st.st_mtime_ns:
+                    entry.chunks = list(prior.chunks)
+                    reused_files += 1
+                else:
+                    with open(os.path.join(root, path), "rb") as f:
+                        while True:
+                            data = f.read(chunk_size)
+                            if not data:
+                                break
+                            digest = hashlib.sha256(data).hexdigest()
+                            entry.chunks.append(digest)
+                            uploader.submit(digest, data)
+
+            manifest.files.append(entry)
+    finally:
+        uploader.wait()
+
+    # Manifest last, so it never references a chunk that failed to upload
+    store.put_object(
+        manifest_key(environment_id, snapshot_id),
+        manifest.to_json().encode(),
+        content_type="application/json"
+    )
+
+    return manifest, {
+        "files": len(manifest.files),
+        "reused_files": reused_files,
+        "total_bytes": manifest.total_size(),
+        "uploaded_chunks": uploader.uploaded_chunks,
+        "uploaded_bytes": uploader.uploaded_bytes,
+    }
+
+
+def load_manifest(store, environment_id: str, snapshot_id: str) -> Manifest:
+    return Manifest.from_json(store.get_object(manifest_key(environment_id, snapshot_id)).decode())
+
+
+def _parents(path: str) -> Iterator[str]:
+    """Relative paths of the directories above path, the restore target (".") first."""
+    parent = os.path.dirname(path)
+    parents = []
+    while parent:
+        parents.append(parent)
+        parent = os.path.dirname(parent)
+    return iter(["."] + parents[::-1])
+
+
+def restore_snapshot(
+    manifest: Manifest,
+    store,
+    target: str,
+    workers: int = DEFAULT_WORKERS,
+    default_uid: int = JUPYTER_UID,
+    default_gid: int = JUPYTER_GID,
+) -> Dict[str, int]:
+    """
+    Restore a manifest into target, fetching chunks in parallel. Entries
+    without a recorded owner, and directories the manifest does not list,
+    are owned by default_uid/default_gid.
+    """
+    os.makedirs(target, exist_ok=True)
+    listed = {os.path.normpath(entry.path) for entry in manifest.files if entry.directory}
+    unlisted = set()
+    jobs = []
+
+    # Lay out every file first so chunk writes can land in any order
+    for entry in manifest.files:
+        path = os.path.join(target, entry.path)
+        unlisted.update(parent for parent in _parents(os.path.normpath(entry.path))
+                        if parent not in listed)
+        if entry.directory:
+            os.makedirs(path, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if entry.link_target is not None:
+            if os.path.lexists(path):
+                os.remove(path)
+            os.symlink(entry.link_target, path)
+            continue
+        with open(path, "wb") as f:
+            f.truncate(entry.size)
+        for index, digest in enumerate(entry.chunks):
+            jobs.append((path, index * manifest.chunk_size, digest))
+
+    def fetch(job):
+        path, offset, digest = job
+        data = store.get(digest)
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            os.pwrite(fd, data, offset)
+        finally:
+            os.close(fd)
+        return len(data)
+
+    restored_bytes = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for written in executor.map(fetch, jobs):
+            restored_bytes += written
+
+    for parent in unlisted:
+        os.chown(os.path.join(target, parent), default_uid, default_gid)
+
+    # Owners, modes and mtimes last, so read-only files and directories were
+    # still writable above. chown before chmod: it clears setuid/setgid.
+    # Directories after their contents, deepest first, since creating the
+    # contents moved their mtimes.
+    ordered = sorted(manifest.files, key=lambda entry: (entry.directory, -entry.path.count("/")))
+    for entry in ordered:
+        path = os.path.join(target, entry.path)
+        uid = default_uid if entry.uid is None else entry.uid
+        gid = default_gid if entry.gid is None else entry.gid
+        if entry.link_target is not None:
+            os.lchown(path, uid, gid)
+            os.utime(path, ns=(entry.mtime_ns, entry.mtime_ns), follow_symlinks=False)
+            continue
+        os.chown(path, uid, gid)
+        os.chmod(path, entry.mode)
+        os.utime(path, ns=(entry.mtime_ns, entry.mtime_ns))
+
+    return {"files": len(manifest.files), "restored_bytes": restored_bytes}
@@ -0,0 +1,152 @@
+"""
+Snapshot task entrypoint, run by the snapshot state machine on Fargate.
+
+    MODE=snapshot  ENVIRONMENT_ID  SNAPSHOT_ID  SOURCE_PATH
+    MODE=restore   ENVIRONMENT_ID  SNAPSHOT_ID  TARGET_PATH
+    MODE=relocate  ENVIRONMENT_ID  SOURCE_PATH  TARGET_PATH
+
+relocate runs after an AWS Backup restore (infrastructure/efs_restore.py):
+it moves SOURCE_PATH out of the aws-backup-restore_* directory AWS Backup
+restores into, to TARGET_PATH. The move is a rename, not a copy.
+
+Paths are relative to the EFS mount. Locally, point SNAPSHOT_STORE_DIR at a
+directory to use the filesystem store instead of S3 and DynamoDB.
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+from engine import DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, create_snapshot, load_manifest, restore_snapshot
+from manifest import manifest_key
+from store import LocalChunkStore, S3ChunkStore
+
+EFS_MOUNT = os.environ.get("EFS_MOUNT", "/mnt/efs")
+
+# AWS Backup restores EFS items under aws-backup-restore_<timestamp>/ at the root
+RESTORE_DIR_PREFIX = "aws-backup-restore_"
+
+
+def _store():
+    if os.environ.get("SNAPSHOT_STORE_DIR"):
+        return LocalChunkStore(os.environ["SNAPSHOT_STORE_DIR"])
+    return S3ChunkStore(
+        os.environ["SNAPSHOTS_BUCKET"],
+        max_pool_connections=int(os.environ.get("WORKERS", DEFAULT_WORKERS)) + 1
+    )
+
+
+def _metadata_table():
+    if not os.environ.get("METADATA_TABLE"):
+        return None
+    import boto3
+    return boto3.resource("dynamodb").Table(os.environ["METADATA_TABLE"])
+
+
+def _resolve(path: str) -> str:
+    return os.path.join(EFS_MOUNT, path.lstrip("/"))
+
+
+def run_snapshot(store, table, environment_id, snapshot_id):
+    parent = None
+    if table is not None:
+        item = table.get_item(Key={"environment_id": environment_id}).get("Item", {})
+        if item.get("last_snapshot_id"):
+            parent = load_manifest(store, environment_id, item["last_snapshot_id"])
+
+    manifest, stats = create_snapshot(
+        _resolve(os.environ["SOURCE_PATH"]),
+        store,
+        environment_id,
+        snapshot_id,
+        parent=parent,
+        chunk_size=int(os.environ.get("CHUNK_SIZE", DEFAULT_CHUNK_SIZE)),
+        workers=int(os.environ.get("WORKERS", DEFAULT_WORKERS))
+    )
+
+    if table is not None:
+        table.update_item(
+            Key={"environment_id": environment_id},
+            UpdateExpression=(
+                "SET last_snapshot_id = :id, last_snapshot_manifest = :key, "
+                "last_snapshot_at = :at, last_snapshot_bytes = :bytes, snapshot_status = :status"
+            ),
+            ExpressionAttributeValues={
+                ":id": snapshot_id,
+                ":key": manifest_key(environment_id, snapshot_id),
+                ":at": manifest.created_at,
+                ":bytes": stats["total_bytes"],
+                ":status": "COMPLETE",
+            }
+        )
+    return stats
+
+
+def run_restore(store, table, environment_id, snapshot_id):
+    manifest = load_manifest(store, environment_id, snapshot_id)
+    stats = restore_snapshot(
+        manifest,
+        store,
+        _resolve(os.environ["TARGET_PATH"]),
+        workers=int(os.environ.get("WORKERS", DEFAULT_WORKERS))
+    )
+    if table is not None:
+        table.update_item(
+            Key={"environment_id": environment_id},
+            UpdateExpression="SET last_restored_snapshot_id = :id, last_restored_at = :at",
+            ExpressionAttributeValues={
+                ":id": snapshot_id,
+                ":at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+    return stats
+
+
+def find_restored_path(efs_root: str, relative_path: str) -> str:
+    """Newest restore directory holding relative_path, as an absolute path."""
+    candidates = sorted(
+        (name for name in os.listdir(efs_root) if name.startswith(RESTORE_DIR_PREFIX)),
+        reverse=True
+    )
+    for name in candidates:
+        path = os.path.join(efs_root, name, relative_path.strip("/"))
+        if os.path.isdir(path):
+            return path
+    raise FileNotFoundError(f"No {RESTORE_DIR_PREFIX}* directory under {efs_root} holds {relative_path}")
+
+
+def run_relocate():
+    target = _resolve(os.environ["TARGET_PATH"])
+    # A retried task finds the directory already moved
+    moved = not os.path.isdir(target)
+    if moved:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.rename(find_restored_path(EFS_MOUNT, os.environ["SOURCE_PATH"]), target)
+    return {"target_path": os.environ["TARGET_PATH"], "moved": moved}
+
+
+def main():
+    mode = os.environ["MODE"]
+    environment_id = os.environ["ENVIRONMENT_ID"]
+    snapshot_id = os.environ.get("SNAPSHOT_ID")
+
+    if mode == "relocate":
+        print(json.dumps({"mode": mode, "environment_id": environment_id, **run_relocate()}))
+        return
+
+    store = _store()
+    table = _metadata_table()
+
+    if mode == "snapshot":
+        stats = run_snapshot(store, table, environment_id, snapshot_id)
+    elif mode == "restore":
+        stats = run_restore(store, table, environment_id, snapshot_id)
+    else:
+        sys.exit(f"Unknown MODE {mode!r}")
+
+    print(json.dumps({"mode": mode, "environment_id": environment_id,
+                      "snapshot_id": snapshot_id, **stats}))
+
+
+if __name__ == "__main__":
+    main()
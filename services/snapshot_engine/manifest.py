@@ -0,0 +1,51 @@
+"""Snapshot manifest: which chunks make up which file."""
+import json
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Set
+
+
+@dataclass
+class FileEntry:
+    """
+    A regular file, symlink (link_target set) or directory (directory set;
+    "." is the snapshot root). uid and gid are None in manifests written
+    before ownership was recorded.
+    """
+    path: str
+    mode: int
+    size: int
+    mtime_ns: int
+    chunks: List[str] = field(default_factory=list)
+    link_target: Optional[str] = None
+    uid: Optional[int] = None
+    gid: Optional[int] = None
+    directory: bool = False
+
+
+@dataclass
+class Manifest:
+    environment_id: str
+    snapshot_id: str
+    created_at: str
+    chunk_size: int
+    files: List[FileEntry] = field(default_factory=list)
+    parent_snapshot_id: Optional[str] = None
+
+    def chunk_set(self) -> Set[str]:
+        return {digest for entry in self.files for digest in entry.chunks}
+
+    def total_size(self) -> int:
+        return sum(entry.size for entry in self.files)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, body: str) -> "Manifest":
+        data = json.loads(body)
+        data["files"] = [FileEntry(**entry) for entry in data["files"]]
+        return cls(**data)
+
+
+def manifest_key(environment_id: str, snapshot_id: str) -> str:
+    return f"manifests/{environment_id}/{snapshot_id}.json"
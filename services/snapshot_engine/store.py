@@ -0,0 +1,86 @@
+"""
+Chunk stores. Chunks are immutable and named by their SHA-256, so a chunk
+that already exists never needs to be written again.
+"""
+import os
+from typing import Optional
+
+CHUNK_PREFIX = "chunks/"
+
+
+class LocalChunkStore:
+    """Directory-backed store for running the engine locally."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _chunk_key(self, digest: str) -> str:
+        return f"{CHUNK_PREFIX}{digest[:2]}/{digest}"
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self._path(self._chunk_key(digest)))
+
+    def put(self, digest: str, data: bytes) -> None:
+        self.put_object(self._chunk_key(digest), data)
+
+    def get(self, digest: str) -> bytes:
+        return self.get_object(self._chunk_key(digest))
+
+    def put_object(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so a crashed upload never leaves a partial chunk
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_object(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+
+class S3ChunkStore:
+    """
+    SnapshotsBucket-backed store. Chunks are at most the engine's chunk size
+    (8 MiB by default), so each is a single PutObject/GetObject; parallelism
+    comes from the engine's workers, not multipart transfers.
+    """
+
+    def __init__(self, bucket: str, client=None, max_pool_connections: int = 32) -> None:
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        # At least one pooled connection per engine worker, or workers queue
+        self.client = client or boto3.client("s3", config=Config(max_pool_connections=max_pool_connections))
+
+    def _chunk_key(self, digest: str) -> str:
+        return f"{CHUNK_PREFIX}{digest[:2]}/{digest}"
+
+    def has(self, digest: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._chunk_key(digest))
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, digest: str, data: bytes) -> None:
+        self.put_object(self._chunk_key(digest), data)
+
+    def get(self, digest: str) -> bytes:
+        return self.get_object(self._chunk_key(digest))
+
+    def put_object(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+
+    def get_object(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
@@ -0,0 +1,66 @@
+"""
+Marks environments whose Jupyter task was reclaimed by Fargate Spot.
+
+Triggered by EventBridge "ECS Task State Change" events with stopCode
+SpotInterruption. Before the task stopped, the westtek_checkpoint server
+extension wrote kernel checkpoints to the researcher's EFS directory; this
+records where they are so the next launch can offer a restore, then frees
+the task's warm pool slot and routes through the backend's JupyterSessions
+(its app package is bundled with this function).
+"""
+import os
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+from app.sessions import JupyterSessions
+
+ECS = boto3.client("ecs")
+TABLE = boto3.resource("dynamodb").Table(os.environ["METADATA_TABLE"])
+SESSIONS = JupyterSessions()
+
+# Written by jupyter/westtek_checkpoint.py, relative to /home/jovyan/work
+CHECKPOINT_MANIFEST = ".checkpoints/manifest.json"
+
+
+def _environment_id(task_arn):
+    tags = ECS.list_tags_for_resource(resourceArn=task_arn).get("tags", [])
+    for tag in tags:
+        if tag["key"] == "environment_id":
+            return tag["value"]
+    return None
+
+
+def handler(event, context):
+    detail = event["detail"]
+    task_arn = detail["taskArn"]
+    SESSIONS.stopped(task_arn, detail.get("group"))
+
+    environment_id = _environment_id(task_arn)
+    if environment_id is None:
+        # Unclaimed warm task or batch job; nothing to mark
+        return {"status": "ignored", "task_arn": task_arn}
+
+    # The table's stream evicts the cached entry (services/cache_invalidator)
+    try:
+        TABLE.update_item(
+            Key={"environment_id": environment_id},
+            UpdateExpression=(
+                "SET session_status = :status, interrupted_at = :now, "
+                "interrupted_task_arn = :task, checkpoint_manifest = :manifest"
+            ),
+            ConditionExpression="attribute_exists(environment_id)",
+            ExpressionAttributeValues={
+                ":status": "INTERRUPTED",
+                ":now": int(time.time()),
+                ":task": task_arn,
+                ":manifest": CHECKPOINT_MANIFEST,
+            },
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return {"status": "unknown_environment", "environment_id": environment_id}
+
+    return {"status": "interrupted", "environment_id": environment_id}
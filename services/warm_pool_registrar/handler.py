@@ -0,0 +1,72 @@
+"""
+Keeps the warm pool table in step with ECS task state.
+
+Triggered by EventBridge "ECS Task State Change" events for the cluster.
+RUNNING tasks from a warm pool service are registered as available;
+STOPPED tasks are removed whether or not they were claimed. A task that
+stopped while still claimed (never released: a crash, an OOM kill) gives
+its slot back through WarmPool.settle, so the tier shrinks back to its
+pool size. Any STOPPED task, warm or cold, also loses its load balancer
+routes (JupyterSessions.stopped), whichever path stopped it. The backend's
+app package is bundled with this function (see infrastructure/service_code.py).
+"""
+import os
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+from app.sessions import JupyterSessions
+from app.warm_pool import WarmPool
+
+TABLE = boto3.resource("dynamodb").Table(os.environ["WARM_POOL_TABLE"])
+POOL = WarmPool()
+SESSIONS = JupyterSessions(pool=POOL)
+
+# Safety net so a lost STOPPED event cannot leave a phantom entry forever
+ITEM_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _private_ip(detail):
+    for attachment in detail.get("attachments", []):
+        for entry in attachment.get("details", []):
+            if entry.get("name") == "privateIPv4Address":
+                return entry.get("value")
+    return None
+
+
+def handler(event, context):
+    detail = event["detail"]
+    task_arn = detail["taskArn"]
+
+    if detail["lastStatus"] == "STOPPED":
+        SESSIONS.stopped(task_arn, detail.get("group"))
+        return {"status": "removed", "task_arn": task_arn}
+
+    tier = POOL.tier_for_group(detail.get("group"))
+    if tier is None:
+        # Not a warm pool task (API service, ad-hoc RunTask, ...)
+        return {"status": "ignored"}
+
+    if detail.get("desiredStatus") != "RUNNING":
+        return {"status": "ignored"}
+
+    try:
+        # Never overwrite a task that has already been claimed
+        TABLE.put_item(
+            Item={
+                "tier": tier,
+                "task_arn": task_arn,
+                "status": "available",
+                "private_ip": _private_ip(detail),
+                "started_at": detail.get("startedAt"),
+                "expires_at": int(time.time()) + ITEM_TTL_SECONDS,
+            },
+            ConditionExpression="attribute_not_exists(task_arn)"
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return {"status": "exists", "task_arn": task_arn}
+
+    return {"status": "registered", "task_arn": task_arn}
@@ -0,0 +1,85 @@
+"""
+Synthesizes app.py in-process, so the jsii runtime starts once per session,
+and hands tests aws_cdk.assertions.Template objects. The jsii runtime keeps
+the environment it started with, so rather than the CDK CLI's
+CDK_CONTEXT_JSON and CDK_OUTDIR the context and output directory are passed
+to app.py's cdk.App directly. Each distinct context is synthesized once; put
+"stacks" in the context to synthesize a subset.
+"""
+import json
+import os
+import runpy
+import sys
+import tempfile
+
+import aws_cdk as cdk
+import pytest
+from aws_cdk.assertions import Template
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION", "1")
+
+
+class Synth:
+    """Output of one synth: templates by stack name, plus synth errors."""
+
+    def __init__(self, outdir: str) -> None:
+        self.outdir = outdir
+        with open(os.path.join(outdir, "manifest.json")) as f:
+            self.manifest = json.load(f)
+
+    def template(self, stack: str) -> Template:
+        return Template.from_json(self.raw(stack))
+
+    def raw(self, stack: str) -> dict:
+        with open(os.path.join(self.outdir, f"{stack}.template.json")) as f:
+            return json.load(f)
+
+    @property
+    def errors(self) -> list:
+        return [
+            f"{path}: {entry['data']}"
+            for artifact in self.manifest.get("artifacts", {}).values()
+            for path, entries in (artifact.get("metadata") or {}).items()
+            for entry in entries
+            if entry["type"] == "aws:cdk:error"
+        ]
+
+
+def run_app(context: dict, outdir: str) -> None:
+    """Run app.py with cdk.json's context plus context, writing to outdir."""
+    with open(os.path.join(ROOT, "cdk.json")) as f:
+        full_context = json.load(f)["context"]
+    # Settings go in as JSON strings, as with cdk -c key='{...}': jsii
+    # drops None values, which would lose the nulls that disable features
+    full_context.update(
+        (key, json.dumps(value) if isinstance(value, dict) else value)
+        for key, value in context.items()
+    )
+    app_class = cdk.App
+    cwd = os.getcwd()
+    cdk.App = lambda: app_class(context=full_context, outdir=outdir)
+    os.chdir(ROOT)
+    try:
+        runpy.run_path(os.path.join(ROOT, "app.py"), run_name="__main__")
+    finally:
+        os.chdir(cwd)
+        cdk.App = app_class
+
+
+@pytest.fixture(scope="session")
+def synth(tmp_path_factory):
+    """synth(context=None) -> Synth, cached per context for the session."""
+    cache = {}
+
+    def synthesize(context=None) -> Synth:
+        key = json.dumps(context or {}, sort_keys=True)
+        if key not in cache:
+            outdir = tempfile.mkdtemp(dir=tmp_path_factory.getbasetemp())
+            run_app(context or {}, outdir)
+            cache[key] = Synth(outdir)
+        return cache[key]
+
+    return synthesize
@@ -0,0 +1,94 @@
+"""API service auto scaling (infrastructure/api_scaling.py) under the "api_scaling" context key."""
+import pytest
+
+POLICIES = {
+    "cpu_target_percent": "CpuTargetTracking",
+    "memory_target_percent": "MemoryTargetTracking",
+    "requests_per_target": "RequestCountTargetTracking",
+}
+
+
+def api_scaling(synth, **config):
+    compute = synth({"stacks": "compute", "api_scaling": config}).template("WestTekCompute")
+    (target_id, target), = compute.find_resources("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "Properties": {"ResourceId": {"Fn::Join": ["", [
+            "service/", {"Ref": "WestTekCluster94411BA4"}, "/", {"Fn::GetAtt": ["APIServiceC212E51D", "Name"]}
+        ]]}}
+    }).items()
+    policies = compute.find_resources("AWS::ApplicationAutoScaling::ScalingPolicy", {
+        "Properties": {"ScalingTargetId": {"Ref": target_id}}
+    })
+    return target["Properties"], policies
+
+
+def policy_configuration(policies, name):
+    (policy,) = [policy for logical_id, policy in policies.items() if name in logical_id]
+    return policy["Properties"]["TargetTrackingScalingPolicyConfiguration"]
+
+
+def test_defaults(synth):
+    target, policies = api_scaling(synth)
+    assert (target["MinCapacity"], target["MaxCapacity"]) == (2, 10)
+    assert len(policies) == 3
+
+    cpu = policy_configuration(policies, "CpuTargetTracking")
+    assert cpu["TargetValue"] == 60
+    assert cpu["PredefinedMetricSpecification"]["PredefinedMetricType"] == "ECSServiceAverageCPUUtilization"
+    assert (cpu["ScaleInCooldown"], cpu["ScaleOutCooldown"]) == (300, 60)
+
+    memory = policy_configuration(policies, "MemoryTargetTracking")
+    assert memory["TargetValue"] == 75
+    assert memory["PredefinedMetricSpecification"]["PredefinedMetricType"] == "ECSServiceAverageMemoryUtilization"
+
+    requests = policy_configuration(policies, "RequestCountTargetTracking")
+    assert requests["TargetValue"] == 500
+    assert requests["PredefinedMetricSpecification"]["PredefinedMetricType"] == "ALBRequestCountPerTarget"
+
+
+@pytest.mark.parametrize("dropped", [
+    ["cpu_target_percent"],
+    ["memory_target_percent"],
+    ["requests_per_target"],
+    ["cpu_target_percent", "memory_target_percent"],
+    ["memory_target_percent", "requests_per_target"],
+])
+def test_null_target_drops_policy(synth, dropped):
+    _, policies = api_scaling(synth, **{key: None for key in dropped})
+    for key, name in POLICIES.items():
+        present = any(name in logical_id for logical_id in policies)
+        assert present == (key not in dropped), name
+
+
+def test_overrides(synth):
+    target, policies = api_scaling(
+        synth,
+        min_capacity=3,
+        max_capacity=30,
+        cpu_target_percent=45,
+        scale_in_cooldown_seconds=600,
+    )
+    assert (target["MinCapacity"], target["MaxCapacity"]) == (3, 30)
+    cpu = policy_configuration(policies, "CpuTargetTracking")
+    assert (cpu["TargetValue"], cpu["ScaleInCooldown"]) == (45, 600)
+    # Unset keys keep their defaults
+    assert policy_configuration(policies, "MemoryTargetTracking")["TargetValue"] == 75
+
+
+def test_scheduled_scaling(synth):
+    target, _ = api_scaling(synth, scheduled_scaling=[
+        {"name": "GrantDeadline", "schedule": "cron(0 12 ? * MON-FRI *)",
+         "min_capacity": 6, "time_zone": "America/New_York"},
+        {"name": "Overnight", "schedule": "cron(0 2 * * ? *)", "max_capacity": 4},
+    ])
+    actions = {action["ScheduledActionName"]: action for action in target["ScheduledActions"]}
+    assert set(actions) == {"GrantDeadline", "Overnight"}
+    assert actions["GrantDeadline"]["Schedule"] == "cron(0 12 ? * MON-FRI *)"
+    assert actions["GrantDeadline"]["ScalableTargetAction"] == {"MinCapacity": 6}
+    assert actions["GrantDeadline"]["Timezone"] == "America/New_York"
+    assert actions["Overnight"]["ScalableTargetAction"] == {"MaxCapacity": 4}
+    assert "Timezone" not in actions["Overnight"]
+
+
+def test_no_scheduled_scaling_by_default(synth):
+    target, _ = api_scaling(synth)
+    assert "ScheduledActions" not in target
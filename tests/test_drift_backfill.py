@@ -0,0 +1,36 @@
+"""Backfill from the pre-sharding drift table (services/drift/backfill.py)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "drift"))
+
+from backfill import DEFAULT_SEVERITY, UNKNOWN_LAB, event_time, migrate_item  # noqa: E402
+from keys import event_item  # noqa: E402
+
+OLD = {"environment_id": "env-1", "timestamp": "2026-10-01T12:34:56.000Z", "package": "numpy"}
+DAY = 86400
+
+
+def test_old_item_gets_current_keys():
+    migrated = migrate_item(OLD, now=event_time(OLD["timestamp"]))
+    assert migrated["pk"] == "env-1#2026-10-01T12"
+    assert migrated["sk"].startswith("2026-10-01T12:34:56.000Z#")
+    assert migrated["lab_severity_pk"].startswith(f"{UNKNOWN_LAB}#{DEFAULT_SEVERITY}#")
+    assert migrated["package"] == "numpy"
+    # Deterministic, so a rerun overwrites instead of duplicating
+    assert migrate_item(OLD, now=0)["sk"] == migrated["sk"]
+
+
+def test_expiry_follows_the_event():
+    written = event_time(OLD["timestamp"])
+    assert migrate_item(OLD, now=written + 10 * DAY, ttl_days=90)["expires_at"] == int(written) + 90 * DAY
+    assert migrate_item(OLD, now=written + 91 * DAY, ttl_days=90) is None
+
+
+def test_current_fields_kept():
+    event = {**OLD, "event_id": "evt-1", "lab_id": "lab-7", "severity": "CRITICAL"}
+    migrated = migrate_item(event, now=0, shards=4, severity_shards=8)
+    expected = event_item(event, shards=4, severity_shards=8)
+    assert {key: migrated[key] for key in ("pk", "sk", "lab_severity_pk", "severity_pk")} == {
+        key: expected[key] for key in ("pk", "sk", "lab_severity_pk", "severity_pk")
+    }
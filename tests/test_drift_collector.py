@@ -0,0 +1,125 @@
+"""Drift collector diff/debounce (services/drift_collector/collector.py) and its task wiring."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "drift_collector"))
+
+from collector import (  # noqa: E402
+    DriftCollector,
+    decode_batch,
+    encode_batches,
+    package_severity,
+    parse_freeze,
+    parse_hashes,
+    to_events,
+)
+
+PACKAGES = {"numpy": "1.26.4", "requests": "2.31.0"}
+CONFIGS = {"/home/jovyan/.jupyter/jupyter_server_config.py": "aaa"}
+
+
+def test_parse_freeze():
+    assert parse_freeze(
+        "# comment\nNumPy==1.26.4\ntyping_extensions==4.9.0\n\n"
+        "mylib @ file:///home/jovyan/mylib\nbare\n"
+    ) == {
+        "numpy": "1.26.4",
+        "typing-extensions": "4.9.0",
+        "mylib": "file:///home/jovyan/mylib",
+        "bare": "",
+    }
+
+
+def test_parse_hashes():
+    assert parse_hashes("abc  /a b.py\ndef *binary.json\nmalformed\n") == {"/a b.py": "abc", "binary.json": "def"}
+
+
+@pytest.mark.parametrize("name, before, after, severity", [
+    ("numpy", "1.26.4", "2.0.0", "CRITICAL"),
+    ("numpy", "1.26.4", None, "CRITICAL"),
+    ("numpy", "1.26.3", "1.26.4", "MINOR"),
+    ("numpy", None, "1.26.4", "INFO"),
+    ("requests", "2.31.0", "3.0.0", "MINOR"),
+    ("requests", "2.31.0", None, "MINOR"),
+])
+def test_package_severity(name, before, after, severity):
+    assert package_severity(name, before, after) == severity
+
+
+def test_first_poll_sets_baseline():
+    collector = DriftCollector(debounce_seconds=60)
+    assert collector.observe(PACKAGES, CONFIGS, now=0) == []
+    assert collector.baseline == (PACKAGES, CONFIGS)
+
+
+def test_change_settles_after_debounce():
+    collector = DriftCollector(debounce_seconds=60)
+    collector.observe(PACKAGES, CONFIGS, now=0)
+    upgraded = {**PACKAGES, "numpy": "2.0.0"}
+    assert collector.observe(upgraded, CONFIGS, now=15) == []
+    assert collector.observe(upgraded, CONFIGS, now=60) == []
+    assert collector.observe(upgraded, CONFIGS, now=75) == [("package", "numpy", "1.26.4", "2.0.0")]
+    assert collector.baseline[0]["numpy"] == "2.0.0"
+    # Published once
+    assert collector.observe(upgraded, CONFIGS, now=200) == []
+
+
+def test_change_that_moves_on_restarts_debounce():
+    collector = DriftCollector(debounce_seconds=60)
+    collector.observe(PACKAGES, CONFIGS, now=0)
+    collector.observe({**PACKAGES, "numpy": "2.0.0rc1"}, CONFIGS, now=15)
+    # A half-finished install settles on another version
+    assert collector.observe({**PACKAGES, "numpy": "2.0.0"}, CONFIGS, now=45) == []
+    assert collector.observe({**PACKAGES, "numpy": "2.0.0"}, CONFIGS, now=90) == []
+    assert collector.observe({**PACKAGES, "numpy": "2.0.0"}, CONFIGS, now=105) == [
+        ("package", "numpy", "1.26.4", "2.0.0")
+    ]
+
+
+def test_reverted_change_never_published():
+    collector = DriftCollector(debounce_seconds=60)
+    collector.observe(PACKAGES, CONFIGS, now=0)
+    # An editor's save-rename: the file briefly disappears
+    collector.observe(PACKAGES, {}, now=15)
+    assert collector.observe(PACKAGES, CONFIGS, now=30) == []
+    assert collector.pending == {}
+    assert collector.observe(PACKAGES, CONFIGS, now=300) == []
+
+
+def test_removals_and_config_changes():
+    collector = DriftCollector(debounce_seconds=0)
+    collector.observe(PACKAGES, CONFIGS, now=0)
+    path = "/home/jovyan/.jupyter/jupyter_server_config.py"
+    changes = collector.observe({"numpy": "1.26.4", "scipy": "1.13.0"}, {path: "bbb"}, now=15)
+    assert sorted(changes) == [
+        ("config", path, "aaa", "bbb"),
+        ("package", "requests", "2.31.0", None),
+        ("package", "scipy", None, "1.13.0"),
+    ]
+    assert collector.baseline == ({"numpy": "1.26.4", "scipy": "1.13.0"}, {path: "bbb"})
+
+
+def test_batches_round_trip_under_limit():
+    changes = [("package", f"pkg-{i}", None, "1.0.0") for i in range(2000)]
+    events = to_events(changes, "env-1", "lab-1", timestamp="2024-10-07T12:00:00.000Z")
+    batches = encode_batches(events, max_bytes=16 * 1024)
+    assert len(batches) > 1
+    assert all(len(body) <= 16 * 1024 for body in batches)
+    assert [event for body in batches for event in decode_batch(body)] == events
+    assert {event["severity"] for event in events} == {"INFO"}
+
+
+def test_jupyter_and_collector_share_poll_interval(synth):
+    compute = synth({"stacks": "compute", "drift_ingestion": {"poll_seconds": 45}}).template("WestTekCompute")
+    task_definitions = compute.find_resources("AWS::ECS::TaskDefinition")
+    jupyter = [logical_id for logical_id in task_definitions if logical_id.startswith("Jupyter")]
+    assert jupyter
+    for logical_id in jupyter:
+        containers = {
+            container["Name"]: {variable["Name"]: variable["Value"] for variable in container.get("Environment", [])}
+            for container in task_definitions[logical_id]["Properties"]["ContainerDefinitions"]
+        }
+        assert containers["JupyterContainer"]["DRIFT_POLL_SECONDS"] == "45", logical_id
+        assert containers["DriftCollectorContainer"]["DRIFT_POLL_SECONDS"] == "45", logical_id
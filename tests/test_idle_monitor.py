@@ -0,0 +1,150 @@
+"""Idle detection (services/idle_monitor/activity.py) and the reaper's timeout (services/idle_reaper)."""
+import importlib.util
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+SERVICES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services")
+sys.path.insert(0, os.path.join(SERVICES, "idle_monitor"))
+
+from activity import Activity, JupyterApi, idle_since, parse_timestamp, summarize  # noqa: E402
+
+STARTED = "2024-10-07T08:00:00.000000Z"
+STATUS = {"started": STARTED, "last_activity": "2024-10-07T09:00:00.000000Z"}
+
+
+def epoch(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def kernel(state="idle", connections=0, last_activity=None):
+    return {"execution_state": state, "connections": connections, "last_activity": last_activity}
+
+
+def test_parse_timestamp_z_suffix():
+    assert parse_timestamp("2024-10-07T12:00:00.123456Z") == epoch("2024-10-07T12:00:00.123456")
+    assert parse_timestamp("2024-10-07T12:00:00Z") == parse_timestamp("2024-10-07T12:00:00+00:00")
+
+
+def test_summarize_counts_kernels():
+    activity = summarize(STATUS, [kernel("busy", 1), kernel("idle", 2), kernel("starting")])
+    assert activity == Activity(
+        started=epoch("2024-10-07T08:00:00"),
+        last_activity=epoch("2024-10-07T09:00:00"),
+        kernels=3,
+        busy_kernels=1,
+        connections=3,
+    )
+
+
+def test_kernel_activity_newer_than_status():
+    activity = summarize(STATUS, [
+        kernel(last_activity="2024-10-07T10:30:00.000000Z"),
+        kernel(last_activity="2024-10-07T08:30:00.000000Z"),
+        kernel(),
+    ])
+    assert activity.last_activity == epoch("2024-10-07T10:30:00")
+
+
+def test_status_activity_newer_than_kernels():
+    activity = summarize(STATUS, [kernel(last_activity="2024-10-07T08:30:00.000000Z")])
+    assert activity.last_activity == epoch("2024-10-07T09:00:00")
+
+
+@pytest.mark.parametrize("cull_busy, idle", [(False, False), (True, True)])
+def test_busy_kernel(cull_busy, idle):
+    activity = summarize(STATUS, [kernel("busy")])
+    result = idle_since(activity, cull_connected=False, cull_busy=cull_busy)
+    assert result == (epoch("2024-10-07T09:00:00") if idle else None)
+
+
+@pytest.mark.parametrize("cull_connected, idle", [(False, False), (True, True)])
+def test_connected_tab(cull_connected, idle):
+    activity = summarize(STATUS, [kernel("idle", connections=1)])
+    result = idle_since(activity, cull_connected=cull_connected, cull_busy=False)
+    assert result == (epoch("2024-10-07T09:00:00") if idle else None)
+
+
+def test_busy_and_connected_needs_both_flags():
+    activity = summarize(STATUS, [kernel("busy", connections=1)])
+    assert idle_since(activity, cull_connected=True, cull_busy=False) is None
+    assert idle_since(activity, cull_connected=False, cull_busy=True) is None
+    assert idle_since(activity, cull_connected=True, cull_busy=True) == epoch("2024-10-07T09:00:00")
+
+
+def test_no_kernels_idle_since_start():
+    # A server nobody has touched reports last_activity at (or before) its start
+    activity = summarize({"started": STARTED, "last_activity": "2024-10-07T07:59:59.000000Z"}, [])
+    assert idle_since(activity, cull_connected=False, cull_busy=False) == epoch("2024-10-07T08:00:00")
+
+
+def test_jupyter_api_against_fake_server():
+    responses = {"api/status": STATUS, "api/kernels": [kernel("idle", 1)]}
+    activity = JupyterApi(responses.__getitem__).activity()
+    assert (activity.kernels, activity.connections) == (1, 1)
+
+
+def test_no_server_yet(tmp_path):
+    assert JupyterApi.from_runtime_dir(str(tmp_path)) is None
+
+
+@pytest.fixture
+def reaper(monkeypatch):
+    for name, value in {
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "METADATA_TABLE": "metadata",
+        "WARM_POOL_TABLE": "warm-pool",
+        "CLUSTER_NAME": "cluster",
+        "ALB_LISTENER_ARN": "arn:aws:elasticloadbalancing:us-east-1:123456789012:listener/app/api/1/2",
+        "ALB_VPC_ID": "vpc-1",
+        "MONITOR_CONTAINER": "idle-monitor",
+        "MONITOR_PORT": "8889",
+        "IDLE_TIMEOUT_SECONDS": "3600",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.syspath_prepend(os.path.join(SERVICES, "..", "backend"))
+    spec = importlib.util.spec_from_file_location("idle_reaper_handler", os.path.join(SERVICES, "idle_reaper", "handler.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    module.parked = []
+    monkeypatch.setattr(module, "_emit", lambda **metrics: None)
+    monkeypatch.setattr(module.time, "time", lambda: 100_000.0)
+    monkeypatch.setattr(
+        module, "_park",
+        lambda task, environment_id, idle_seconds, now: (
+            module.parked.append((environment_id, idle_seconds)) or environment_id != "env-deleted"
+        )
+    )
+    return module
+
+
+def run_reaper(reaper, monkeypatch, reports):
+    """reports: {environment_id: /activity JSON or None if unreachable}."""
+    candidates = [({"taskArn": f"task/{env}"}, env, f"10.0.0.{i}") for i, env in enumerate(reports)]
+    by_ip = {ip: reports[env] for _, env, ip in candidates}
+    monkeypatch.setattr(reaper, "_running_tasks", lambda: iter(candidates))
+    monkeypatch.setattr(reaper, "_activity", by_ip.get)
+    return reaper.handler({}, None)
+
+
+def test_reaper_parks_past_timeout(reaper, monkeypatch):
+    result = run_reaper(reaper, monkeypatch, {
+        "env-idle": {"idle_since": 100_000.0 - 3600},
+        "env-recent": {"idle_since": 100_000.0 - 3599},
+        "env-busy": {"idle_since": None},
+        "env-down": None,
+    })
+    assert result == {"monitored": 4, "parked": ["env-idle"], "unreachable": 1}
+    assert reaper.parked == [("env-idle", 3600.0)]
+
+
+def test_reaper_skips_unknown_environment(reaper, monkeypatch):
+    result = run_reaper(reaper, monkeypatch, {
+        "env-deleted": {"idle_since": 0.0},
+        "env-idle": {"idle_since": 0.0},
+    })
+    assert result["parked"] == ["env-idle"]
+    assert [environment_id for environment_id, _ in reaper.parked] == ["env-deleted", "env-idle"]
@@ -0,0 +1,75 @@
+"""Jupyter task size tiers (infrastructure/jupyter_tiers.py) and their task definitions."""
+import pytest
+
+from infrastructure.jupyter_tiers import DEFAULT_JUPYTER_TASK_TIERS, validate_fargate_size
+
+
+@pytest.mark.parametrize("cpu, memory_mib", [
+    (256, 512), (256, 2048),
+    (512, 1024), (512, 4096),
+    (1024, 2048), (1024, 8192),
+    (2048, 4096), (2048, 16384),
+    (4096, 8192), (4096, 30720),
+    (8192, 16384), (8192, 61440),
+    (16384, 32768), (16384, 122880),
+])
+def test_legal_sizes(cpu, memory_mib):
+    validate_fargate_size("tier", cpu, memory_mib)
+
+
+@pytest.mark.parametrize("cpu, memory_mib, message", [
+    (3072, 8192, "cpu 3072 is not a Fargate size"),
+    (256, 1536, "1536 MiB is not valid for cpu 256"),
+    (512, 512, "512 MiB is not valid for cpu 512"),
+    (1024, 9216, "9216 MiB is not valid for cpu 1024"),
+    (4096, 8704, "8704 MiB is not valid for cpu 4096"),
+    (8192, 18432, "18432 MiB is not valid for cpu 8192"),
+    (16384, 131072, "131072 MiB is not valid for cpu 16384"),
+])
+def test_illegal_sizes(cpu, memory_mib, message):
+    with pytest.raises(ValueError, match=message):
+        validate_fargate_size("tier", cpu, memory_mib)
+
+
+@pytest.mark.parametrize("ephemeral_storage_gib", [None, 21, 200])
+def test_legal_ephemeral_storage(ephemeral_storage_gib):
+    validate_fargate_size("tier", 1024, 4096, ephemeral_storage_gib)
+
+
+@pytest.mark.parametrize("ephemeral_storage_gib", [20, 201])
+def test_illegal_ephemeral_storage(ephemeral_storage_gib):
+    with pytest.raises(ValueError, match="ephemeral_storage_gib must be 21-200"):
+        validate_fargate_size("tier", 1024, 4096, ephemeral_storage_gib)
+
+
+@pytest.mark.parametrize("name, tier", sorted(DEFAULT_JUPYTER_TASK_TIERS.items()))
+def test_default_tiers_are_legal(name, tier):
+    validate_fargate_size(name, tier["cpu"], tier["memory_mib"], tier["ephemeral_storage_gib"])
+
+
+def test_task_definition_per_tier(synth):
+    compute = synth({"stacks": "compute"}).template("WestTekCompute")
+    for construct_id, name in [
+        ("JupyterSmallTaskDefinition", "small"),
+        ("JupyterTaskDefinition", "standard"),
+        ("JupyterLargeTaskDefinition", "large"),
+        ("JupyterHighmemTaskDefinition", "highmem"),
+    ]:
+        tier = DEFAULT_JUPYTER_TASK_TIERS[name]
+        (task_definition,) = [
+            task_definition["Properties"]
+            for logical_id, task_definition in compute.find_resources("AWS::ECS::TaskDefinition").items()
+            if logical_id.startswith(construct_id) and "Warm" not in logical_id
+        ]
+        assert task_definition["Cpu"] == str(tier["cpu"])
+        assert task_definition["Memory"] == str(tier["memory_mib"])
+        if tier["ephemeral_storage_gib"] is None:
+            assert "EphemeralStorage" not in task_definition
+        else:
+            assert task_definition["EphemeralStorage"] == {"SizeInGiB": tier["ephemeral_storage_gib"]}
+
+
+def test_illegal_tier_fails_synth(synth):
+    with pytest.raises(ValueError, match="Jupyter task tier 'gpu': 3000 MiB is not valid for cpu 1024"):
+        synth({"stacks": "compute", "jupyter_task_tiers": {"gpu": {"cpu": 1024, "memory_mib": 3000}}})
+
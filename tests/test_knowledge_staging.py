@@ -0,0 +1,142 @@
+"""Knowledge Base staging (services/knowledge_ingestion/staging.py) over fixture manifests."""
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "knowledge_ingestion"))
+
+from staging import _split_block, metadata_key, pack, plan, to_blocks  # noqa: E402
+
+ENVIRONMENT_ID = "env-1"
+
+
+class Snapshots:
+    """Manifests over an in-memory chunk store, one chunk per file."""
+
+    def __init__(self):
+        self.chunks = {}
+        self.archived = set()
+
+    def manifest(self, snapshot_id, files):
+        entries = []
+        for path, data in files.items():
+            digest = hashlib.sha256(data).hexdigest()
+            self.chunks[digest] = data
+            entries.append({"path": path, "mode": 0o644, "size": len(data), "mtime_ns": 0,
+                            "chunks": [digest], "link_target": None})
+        return {"environment_id": ENVIRONMENT_ID, "snapshot_id": snapshot_id, "files": entries}
+
+    def read_file(self, entry):
+        if any(digest in self.archived for digest in entry["chunks"]):
+            return None
+        return b"".join(self.chunks[digest] for digest in entry["chunks"])
+
+
+def notebook(cells):
+    return json.dumps({
+        "metadata": {"language_info": {"name": "python"}},
+        "cells": [{"cell_type": "code", "source": source} for source in cells],
+    }).encode()
+
+
+def long_notebook(edit=None):
+    cells = [f"# step {i}\nresult_{i} = analyse(data, window={i})\n" + "x = 1\n" * 20 for i in range(200)]
+    if edit is not None:
+        cells[edit] += "print('edited')\n"
+    return notebook(cells)
+
+
+def part_keys(state, path):
+    return set(state["files"][path]["parts"])
+
+
+def test_first_plan_stages_every_document():
+    snapshots = Snapshots()
+    result = plan(None, snapshots.manifest("snap-1", {
+        "analysis.ipynb": notebook(["import numpy"]),
+        "README.md": b"# Project\n\nNotes.",
+        "data.csv": b"a,b\n1,2\n",
+        "lib/__pycache__/x.py": b"cached",
+    }), snapshots.read_file)
+    assert set(result.state["files"]) == {"analysis.ipynb", "README.md"}
+    assert result.deletes == []
+    for path in result.state["files"]:
+        for key in part_keys(result.state, path):
+            assert key.startswith(f"documents/{ENVIRONMENT_ID}/{path}/")
+            assert json.loads(result.puts[metadata_key(key)])["metadataAttributes"]["path"] == path
+
+
+def test_unchanged_snapshot_writes_nothing():
+    snapshots = Snapshots()
+    files = {"analysis.ipynb": long_notebook()}
+    first = plan(None, snapshots.manifest("snap-1", files), snapshots.read_file, max_document_bytes=4096)
+    second = plan(first.state, snapshots.manifest("snap-2", files), snapshots.read_file, max_document_bytes=4096)
+    assert (second.puts, second.deletes) == ({}, [])
+    assert second.state["files"] == first.state["files"]
+
+
+def test_early_edit_changes_few_parts():
+    snapshots = Snapshots()
+    first = plan(None, snapshots.manifest("snap-1", {"analysis.ipynb": long_notebook()}),
+                 snapshots.read_file, max_document_bytes=4096)
+    before = part_keys(first.state, "analysis.ipynb")
+    assert len(before) > 10
+
+    second = plan(first.state, snapshots.manifest("snap-2", {"analysis.ipynb": long_notebook(edit=3)}),
+                  snapshots.read_file, max_document_bytes=4096)
+    after = part_keys(second.state, "analysis.ipynb")
+    assert 1 <= len(after - before) <= 2
+    assert 1 <= len(before - after) <= 2
+    assert second.stats["parts_written"] == len(after - before)
+    assert set(second.deletes) == {key for old in before - after for key in (old, metadata_key(old))}
+
+
+def test_removed_file_deletes_parts_and_metadata():
+    snapshots = Snapshots()
+    first = plan(None, snapshots.manifest("snap-1", {
+        "analysis.ipynb": long_notebook(), "README.md": b"# Project",
+    }), snapshots.read_file, max_document_bytes=4096)
+    second = plan(first.state, snapshots.manifest("snap-2", {"README.md": b"# Project"}),
+                  snapshots.read_file, max_document_bytes=4096)
+    removed = part_keys(first.state, "analysis.ipynb")
+    assert sorted(second.deletes) == sorted(key for old in removed for key in (old, metadata_key(old)))
+    assert set(second.state["files"]) == {"README.md"}
+    assert second.stats["removed"] == 1
+
+
+def test_unreadable_file_keeps_previous_parts():
+    snapshots = Snapshots()
+    first = plan(None, snapshots.manifest("snap-1", {"analysis.ipynb": long_notebook()}),
+                 snapshots.read_file, max_document_bytes=4096)
+    manifest = snapshots.manifest("snap-2", {"analysis.ipynb": long_notebook(edit=3), "new.md": b"# New"})
+    snapshots.archived.update(entry["chunks"][0] for entry in manifest["files"])
+
+    second = plan(first.state, manifest, snapshots.read_file, max_document_bytes=4096)
+    assert (second.puts, second.deletes) == ({}, [])
+    assert second.state["files"] == first.state["files"]
+    assert second.stats["unreadable"] == 2
+
+
+def test_notebook_blocks_skip_outputs_and_empty_cells():
+    data = json.dumps({"cells": [
+        {"cell_type": "markdown", "source": ["# Title\n", "Intro"]},
+        {"cell_type": "code", "source": "  ", "outputs": []},
+        {"cell_type": "code", "source": "plot()\n", "outputs": [{"data": {"image/png": "..."}}]},
+    ]}).encode()
+    assert to_blocks("a.ipynb", data) == ["# Title\nIntro", "```python\nplot()\n```"]
+    assert to_blocks("broken.ipynb", b"{not json") == []
+
+
+def test_split_single_line_longer_than_max_bytes():
+    line = "é" * 50 + "a" * 45  # 145 bytes, multi-byte characters first
+    pieces = _split_block(line + "\nshort\n", 40)
+    assert "".join(pieces) == line + "\nshort\n"
+    assert all(len(piece.encode()) <= 40 for piece in pieces)
+
+
+def test_pack_respects_max_bytes():
+    blocks = [f"block {i} " + "y" * (i * 37 % 300) for i in range(100)] + ["z" * 5000]
+    parts = pack(blocks, max_bytes=1024)
+    assert all(len(part.encode()) <= 1024 for part in parts)
+    assert "".join(parts).replace("\n\n", "") == "".join(blocks)
@@ -0,0 +1,133 @@
+"""Read-through metadata cache (backend/app/cache.py) against fakeredis, which runs the Lua scripts."""
+import json
+import os
+import sys
+from decimal import Decimal
+
+import fakeredis
+import pytest
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app.cache import MetadataRepository, ReadThroughCache  # noqa: E402
+
+ITEM = {"environment_id": "env-1", "status": "RUNNING", "cpu": Decimal("2048"), "load": Decimal("0.5")}
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class Table:
+    """The MetadataRepository calls on EnvironmentMetadataTable, in memory."""
+
+    def __init__(self):
+        self.items = {}
+        self.reads = 0
+
+    def get_item(self, Key):
+        self.reads += 1
+        item = self.items.get(Key["environment_id"])
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item["environment_id"]] = dict(Item)
+
+    def delete_item(self, Key):
+        self.items.pop(Key["environment_id"], None)
+
+
+class DownClient:
+    """A client whose every call fails the way redis-py does when Valkey is unreachable."""
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            raise redis.ConnectionError("Connection refused")
+        return call
+
+
+@pytest.fixture
+def cache():
+    return ReadThroughCache(fakeredis.FakeRedis(), namespace="environment")
+
+
+def test_miss_loads_and_caches(cache):
+    loader = Loader(ITEM)
+    assert cache.get("env-1", loader) == {**ITEM, "cpu": 2048, "load": 0.5}
+    assert json.loads(cache.client.get("environment:env-1")) == {**ITEM, "cpu": 2048, "load": 0.5}
+    assert 270 <= cache.client.ttl("environment:env-1") <= 330
+
+
+def test_hit_skips_loader(cache):
+    loader = Loader(ITEM)
+    cache.get("env-1", loader)
+    cache.get("env-1", loader)
+    assert loader.calls == 1
+
+
+def test_unknown_id_cached_briefly(cache):
+    loader = Loader(None)
+    assert cache.get("env-404", loader) is None
+    assert cache.get("env-404", loader) is None
+    assert loader.calls == 1
+    assert cache.client.ttl("environment:env-404") <= 33
+
+
+def test_invalidate_forces_reload(cache):
+    cache.get("env-1", Loader({"status": "RUNNING"}))
+    cache.invalidate("env-1")
+    assert cache.get("env-1", Loader({"status": "PARKED"})) == {"status": "PARKED"}
+
+
+def test_invalidate_during_fill_keeps_stale_value_out(cache):
+    # A read loads the old item, a write lands and evicts, then the read fills
+    def stale_loader():
+        cache.invalidate("env-1")
+        return {"status": "RUNNING"}
+
+    assert cache.get("env-1", stale_loader) == {"status": "RUNNING"}
+    assert cache.client.get("environment:env-1") is None
+    assert cache.get("env-1", Loader({"status": "PARKED"})) == {"status": "PARKED"}
+    assert cache.get("env-1", Loader({"status": "wrong"})) == {"status": "PARKED"}
+
+
+def test_evict_bumps_generation_with_ttl(cache):
+    cache.evict("env-1")
+    cache.evict("env-1")
+    assert cache.client.get("environment:generation:env-1") == b"2"
+    assert cache.client.ttl("environment:generation:env-1") > 0
+
+
+def test_outage_falls_through_to_table():
+    table = Table()
+    table.put_item(ITEM)
+    repository = MetadataRepository(table=table, cache=ReadThroughCache(DownClient(), namespace="environment"))
+    assert repository.get_environment("env-1") == ITEM
+    assert repository.get_environment("env-1") == ITEM
+    assert table.reads == 2
+    # Writes still succeed; the entry expires on its own
+    repository.put_environment({**ITEM, "status": "PARKED"})
+    repository.delete_environment("env-1")
+    assert repository.get_environment("env-1") is None
+
+
+def test_evict_raises_during_outage():
+    with pytest.raises(redis.ConnectionError):
+        ReadThroughCache(DownClient(), namespace="environment").evict("env-1")
+
+
+def test_repository_writes_invalidate(cache):
+    table = Table()
+    table.put_item({"environment_id": "env-1", "status": "RUNNING"})
+    repository = MetadataRepository(table=table, cache=cache)
+    assert repository.get_environment("env-1")["status"] == "RUNNING"
+    repository.put_environment({"environment_id": "env-1", "status": "PARKED"})
+    assert repository.get_environment("env-1")["status"] == "PARKED"
+    assert table.reads == 2
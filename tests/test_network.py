@@ -0,0 +1,121 @@
+"""VPC endpoints (infrastructure/network_stack.py) under the "network" context key."""
+from aws_cdk.assertions import Match
+
+
+def network(synth, **config):
+    return synth({"stacks": "network", "network": config}).template("WestTekNetwork")
+
+
+def endpoints(template, endpoint_type):
+    return {
+        logical_id: endpoint["Properties"]
+        for logical_id, endpoint in template.find_resources("AWS::EC2::VPCEndpoint", {
+            "Properties": {"VpcEndpointType": endpoint_type}
+        }).items()
+    }
+
+
+def gateway_endpoint(template, service):
+    (properties,) = [
+        properties for properties in endpoints(template, "Gateway").values()
+        if properties["ServiceName"]["Fn::Join"][1][-1] == f".{service}"
+    ]
+    return properties
+
+
+def test_gateway_endpoints_attach_to_every_route_table(synth):
+    template = network(synth)
+    route_tables = set(template.find_resources("AWS::EC2::RouteTable"))
+    assert len(route_tables) == 6  # public, private and isolated in 2 AZs
+    for service in ("s3", "dynamodb"):
+        attached = {ref["Ref"] for ref in gateway_endpoint(template, service)["RouteTableIds"]}
+        assert attached == route_tables, service
+
+
+def test_gateway_endpoint_policies_stay_in_account(synth):
+    template = network(synth)
+    for service in ("s3", "dynamodb"):
+        statements = gateway_endpoint(template, service)["PolicyDocument"]["Statement"]
+        assert {
+            "Action": f"{service}:*",
+            "Condition": {"StringEquals": {"aws:ResourceAccount": {"Ref": "AWS::AccountId"}}},
+            "Effect": "Allow",
+            "Principal": {"AWS": "*"},
+            "Resource": "*",
+        } in statements, service
+
+
+def test_s3_endpoint_allows_ecr_layer_bucket(synth):
+    statements = gateway_endpoint(network(synth), "s3")["PolicyDocument"]["Statement"]
+    assert {
+        "Action": "s3:GetObject",
+        "Effect": "Allow",
+        "Principal": {"AWS": "*"},
+        "Resource": "arn:aws:s3:::prod-us-east-1-starport-layer-bucket/*",
+    } in statements
+    # Only S3 gets the layer bucket
+    dynamodb = gateway_endpoint(network(synth), "dynamodb")["PolicyDocument"]["Statement"]
+    assert len(dynamodb) == 1
+
+
+def test_interface_endpoints_in_private_subnets(synth):
+    template = network(synth)
+    private_subnets = [
+        {"Ref": logical_id} for logical_id in template.find_resources("AWS::EC2::Subnet")
+        if "PrivateSubnet" in logical_id
+    ]
+    interface = endpoints(template, "Interface")
+    assert sorted(properties["ServiceName"] for properties in interface.values()) == [
+        f"com.amazonaws.us-east-1.{service}"
+        for service in ("ecr.api", "ecr.dkr", "logs", "secretsmanager", "sts")
+    ]
+    for properties in interface.values():
+        assert properties["PrivateDnsEnabled"] is True
+        assert properties["SubnetIds"] == private_subnets
+
+
+def test_interface_endpoints_accept_https_from_vpc(synth):
+    template = network(synth)
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "GroupDescription": Match.string_like_regexp("EcrApiInterfaceEndpoint"),
+        "SecurityGroupIngress": [Match.object_like({
+            "CidrIp": {"Fn::GetAtt": [Match.string_like_regexp("WestTekVPC"), "CidrBlock"]},
+            "FromPort": 443,
+            "ToPort": 443,
+        })],
+    })
+
+
+def test_configured_endpoints(synth):
+    template = network(
+        synth,
+        gateway_endpoints=["s3"],
+        interface_endpoints=["ecr.api", "ecr.dkr", "logs", "ssm"],
+    )
+    assert len(endpoints(template, "Gateway")) == 1
+    gateway_endpoint(template, "s3")
+    template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+        "ServiceName": "com.amazonaws.us-east-1.ssm",
+    })
+    assert "com.amazonaws.us-east-1.sts" not in {
+        properties["ServiceName"] for properties in endpoints(template, "Interface").values()
+    }
+
+
+def test_private_subnets_share_one_nat_gateway(synth):
+    template = network(synth)
+    (nat_gateway,) = template.find_resources("AWS::EC2::NatGateway")
+    routes = template.find_resources("AWS::EC2::Route", {
+        "Properties": {"NatGatewayId": {"Ref": nat_gateway}}
+    })
+    assert len(routes) == 2
+
+
+def test_nat_gateway_per_az(synth):
+    template = network(synth, nat_gateway_per_az=True)
+    nat_gateways = template.find_resources("AWS::EC2::NatGateway")
+    assert len(nat_gateways) == 2
+    for nat_gateway in nat_gateways:
+        template.resource_properties_count_is("AWS::EC2::Route", {
+            "NatGatewayId": {"Ref": nat_gateway}
+        }, 1)
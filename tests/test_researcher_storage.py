@@ -0,0 +1,82 @@
+"""Per-researcher access points (backend/app/storage.py) against a stubbed EFS client."""
+import hashlib
+import os
+import sys
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from botocore.stub import ANY, Stubber
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app import aws  # noqa: E402
+from app.storage import ResearcherStorage  # noqa: E402
+
+FILE_SYSTEM_ID = "fs-0123456789abcdef0"
+ACCESS_POINT_ID = "fsap-0123456789abcdef0"
+
+
+@pytest.fixture
+def efs(monkeypatch):
+    monkeypatch.setattr(aws, "_STUBS", {})
+    client = boto3.client("efs", region_name="us-east-1")
+    aws.stub("efs", client)
+    aws.stub("ecs", boto3.client("ecs", region_name="us-east-1"))
+    with Stubber(client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+def storage():
+    return ResearcherStorage(file_system_id=FILE_SYSTEM_ID, task_definition="jupyter")
+
+
+def expected_create(researcher_id, environment_id):
+    return {
+        "ClientToken": hashlib.sha256(f"{researcher_id}/{environment_id}".encode()).hexdigest(),
+        "FileSystemId": FILE_SYSTEM_ID,
+        "PosixUser": {"Uid": 1000, "Gid": 100},
+        "RootDirectory": {
+            "Path": f"/researchers/{researcher_id}/{environment_id}",
+            "CreationInfo": {"OwnerUid": 1000, "OwnerGid": 100, "Permissions": "750"},
+        },
+        "Tags": ANY,
+    }
+
+
+def test_first_launch_creates_access_point(efs):
+    efs.add_response(
+        "create_access_point",
+        {"AccessPointId": ACCESS_POINT_ID, "FileSystemId": FILE_SYSTEM_ID},
+        expected_create("alice", "env-1"),
+    )
+    assert storage().ensure_access_point("alice", "env-1") == ACCESS_POINT_ID
+
+
+def test_repeat_launch_returns_existing_access_point(efs):
+    efs.add_response(
+        "create_access_point",
+        {"AccessPointId": ACCESS_POINT_ID, "FileSystemId": FILE_SYSTEM_ID},
+        expected_create("alice", "env-1"),
+    )
+    efs.add_client_error(
+        "create_access_point",
+        service_error_code="AccessPointAlreadyExists",
+        http_status_code=409,
+        modeled_fields={"ErrorCode": "AccessPointAlreadyExists", "AccessPointId": ACCESS_POINT_ID},
+        expected_params=expected_create("alice", "env-1"),
+    )
+    researcher_storage = storage()
+    assert researcher_storage.ensure_access_point("alice", "env-1") == ACCESS_POINT_ID
+    assert researcher_storage.ensure_access_point("alice", "env-1") == ACCESS_POINT_ID
+
+
+def test_other_errors_propagate(efs):
+    efs.add_client_error(
+        "create_access_point",
+        service_error_code="AccessPointLimitExceeded",
+        http_status_code=403,
+    )
+    with pytest.raises(ClientError, match="AccessPointLimitExceeded"):
+        storage().ensure_access_point("alice", "env-1")
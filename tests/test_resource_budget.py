@@ -0,0 +1,121 @@
+"""The resource budget (infrastructure/budgets.py) and what it protects, as synthesized."""
+from aws_cdk.assertions import Match
+
+from infrastructure.budgets import FRAMEWORK_FUNCTION_PREFIXES
+
+# CDK-managed Lambdas (log retention, custom resource providers, bucket notifications)
+FRAMEWORK_FUNCTIONS = FRAMEWORK_FUNCTION_PREFIXES + ("BucketNotificationsHandler", "Custom")
+
+STACKS = [
+    "WestTekNetwork", "WestTekStorage", "WestTekCache", "WestTekAuth",
+    "WestTekCompute", "WestTekSnapshot", "WestTekWorkspace", "WestTekKnowledge",
+]
+
+
+def test_default_app_is_within_budget(synth):
+    assert synth().errors == []
+
+
+def test_gateway_endpoints(synth):
+    network = synth().template("WestTekNetwork")
+    for service in ("s3", "dynamodb"):
+        network.has_resource_properties("AWS::EC2::VPCEndpoint", {
+            "ServiceName": {"Fn::Join": ["", ["com.amazonaws.", {"Ref": "AWS::Region"}, f".{service}"]]},
+            "VpcEndpointType": "Gateway",
+        })
+
+
+def test_interface_endpoints(synth):
+    network = synth().template("WestTekNetwork")
+    for service in ("ecr.api", "ecr.dkr", "logs", "sts", "secretsmanager"):
+        network.has_resource_properties("AWS::EC2::VPCEndpoint", {
+            "ServiceName": f"com.amazonaws.us-east-1.{service}",
+            "VpcEndpointType": "Interface",
+            "PrivateDnsEnabled": True,
+        })
+
+
+def test_missing_endpoint_fails_budget(synth):
+    result = synth({"stacks": "network", "network": {"interface_endpoints": ["ecr.api", "ecr.dkr"]}})
+    assert any("missing VPC endpoint for logs" in error for error in result.errors)
+
+
+def test_single_nat_gateway(synth):
+    synth().template("WestTekNetwork").resource_count_is("AWS::EC2::NatGateway", 1)
+
+
+def test_nat_gateway_per_az_fails_budget(synth):
+    result = synth({"stacks": "network", "network": {"nat_gateway_per_az": True}})
+    assert any("2 NAT gateways, budget is 1" in error for error in result.errors)
+
+
+def test_nat_gateway_per_az_within_raised_budget(synth):
+    result = synth({
+        "stacks": "network",
+        "network": {"nat_gateway_per_az": True},
+        "resource_budget": {"max_nat_gateways": 2},
+    })
+    assert result.errors == []
+    result.template("WestTekNetwork").resource_count_is("AWS::EC2::NatGateway", 2)
+
+
+def test_api_and_warm_pool_services_scale(synth):
+    compute = synth().template("WestTekCompute")
+    compute.has_resource_properties("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "MinCapacity": 2,
+        "MaxCapacity": 10,
+        "ScalableDimension": "ecs:service:DesiredCount",
+    })
+    compute.has_resource_properties("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "MinCapacity": 2,
+        "MaxCapacity": 20,
+        "ResourceId": Match.object_like({
+            "Fn::Join": ["", Match.array_with([{"Fn::GetAtt": [Match.string_like_regexp("ScipyWarmService"), "Name"]}])]
+        }),
+    })
+    policies = compute.find_resources("AWS::ApplicationAutoScaling::ScalingPolicy")
+    assert len(policies) == 3
+
+
+def test_efs_uses_elastic_throughput(synth):
+    synth().template("WestTekStorage").has_resource_properties("AWS::EFS::FileSystem", {
+        "ThroughputMode": "elastic",
+    })
+
+
+def test_bursting_efs_fails_budget(synth):
+    result = synth({"stacks": "storage", "notebook_storage": {"throughput_mode": "bursting"}})
+    assert any("EFS throughput mode bursting" in error for error in result.errors)
+
+
+def test_transient_tables_keep_ttl(synth):
+    storage = synth().template("WestTekStorage")
+    for table in ("DriftTrackingTable", "WarmPoolTable"):
+        tables = storage.find_resources("AWS::DynamoDB::Table", {
+            "Properties": {"TimeToLiveSpecification": {"AttributeName": "expires_at", "Enabled": True}}
+        })
+        assert any(logical_id.startswith(table) for logical_id in tables), table
+
+
+def test_tables_are_on_demand(synth):
+    storage = synth().template("WestTekStorage")
+    tables = storage.find_resources("AWS::DynamoDB::Table")
+    assert tables
+    for logical_id, table in tables.items():
+        assert table["Properties"]["BillingMode"] == "PAY_PER_REQUEST", logical_id
+
+
+def test_every_log_group_expires(synth):
+    result = synth()
+    for stack in STACKS:
+        template = result.template(stack)
+        for logical_id, log_group in template.find_resources("AWS::Logs::LogGroup").items():
+            assert 0 < log_group["Properties"]["RetentionInDays"] <= 365, (stack, logical_id)
+
+        retained = {
+            log_retention["Properties"]["LogGroupName"]["Fn::Join"][1][1]["Ref"]
+            for log_retention in template.find_resources("Custom::LogRetention").values()
+        }
+        for logical_id in template.find_resources("AWS::Lambda::Function"):
+            if not logical_id.startswith(FRAMEWORK_FUNCTIONS):
+                assert logical_id in retained, (stack, logical_id)
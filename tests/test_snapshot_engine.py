@@ -0,0 +1,144 @@
+"""Snapshot engine (services/snapshot_engine) round trips through a LocalChunkStore."""
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "snapshot_engine"))
+
+from engine import JUPYTER_GID, JUPYTER_UID, create_snapshot, restore_snapshot  # noqa: E402
+from manifest import Manifest  # noqa: E402
+from store import LocalChunkStore  # noqa: E402
+
+root_only = pytest.mark.skipif(os.geteuid() != 0, reason="chown to other users needs root")
+
+
+def write(root, path, data=b"", mode=0o644):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as f:
+        f.write(data)
+    os.chmod(full, mode)
+    return full
+
+
+def owner(path):
+    st = os.lstat(path)
+    return st.st_uid, st.st_gid
+
+
+@root_only
+def test_restore_keeps_owners_and_modes(tmp_path):
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    write(source, "work/analysis.ipynb", b"{}", 0o640)
+    write(source, "work/run.sh", b"#!/bin/sh\n", 0o750)
+    os.symlink("analysis.ipynb", source / "work" / "latest.ipynb")
+    os.makedirs(source / "shared")
+    os.chmod(source / "shared", 0o2770)
+    for path in ("", "work", "work/analysis.ipynb", "work/run.sh", "shared"):
+        os.chown(source / path, JUPYTER_UID, JUPYTER_GID)
+    os.lchown(source / "work" / "latest.ipynb", JUPYTER_UID, JUPYTER_GID)
+    os.chown(source / "work" / "run.sh", 1234, 4321)
+    os.chmod(source / "work" / "run.sh", 0o750)
+
+    store = LocalChunkStore(str(tmp_path / "store"))
+    create_snapshot(str(source), store, "env-1", "snap-1")
+    restore_snapshot(Manifest.from_json(store.get_object("manifests/env-1/snap-1.json").decode()),
+                     store, str(target))
+
+    for path in ("", "work", "work/analysis.ipynb", "work/latest.ipynb", "shared"):
+        assert owner(target / path) == (JUPYTER_UID, JUPYTER_GID), path
+    assert owner(target / "work" / "run.sh") == (1234, 4321)
+    assert stat.S_IMODE(os.stat(target / "work" / "analysis.ipynb").st_mode) == 0o640
+    assert stat.S_IMODE(os.stat(target / "work" / "run.sh").st_mode) == 0o750
+    assert stat.S_IMODE(os.stat(target / "shared").st_mode) == 0o2770
+
+
+@root_only
+def test_restore_defaults_owner_for_older_manifests(tmp_path):
+    source, target = tmp_path / "source", tmp_path / "target"
+    write(source, "notebooks/a.ipynb", b"{}")
+    store = LocalChunkStore(str(tmp_path / "store"))
+    manifest, _ = create_snapshot(str(source), store, "env-1", "snap-1")
+
+    # Manifests written before ownership and directories were recorded
+    manifest.files = [entry for entry in manifest.files if not entry.directory]
+    for entry in manifest.files:
+        entry.uid = entry.gid = None
+    restore_snapshot(Manifest.from_json(manifest.to_json()), store, str(target))
+
+    for path in ("", "notebooks", "notebooks/a.ipynb"):
+        assert owner(target / path) == (JUPYTER_UID, JUPYTER_GID), path
+
+
+def snapshot(source, store, snapshot_id, parent=None):
+    return create_snapshot(str(source), store, "env-1", snapshot_id, parent=parent, chunk_size=4, workers=2)
+
+
+def test_round_trip(tmp_path):
+    source, target = tmp_path / "source", tmp_path / "target"
+    write(source, "notebooks/analysis.ipynb", b'{"cells": []}', 0o600)
+    write(source, "bin/run.sh", b"#!/bin/sh\necho hi\n", 0o755)
+    write(source, "empty.txt")
+    os.makedirs(source / "scratch")
+    os.symlink("notebooks/analysis.ipynb", source / "latest")
+    os.symlink("/does/not/exist", source / "dangling")
+    for path, seconds in (("notebooks/analysis.ipynb", 1_600_000_000), ("bin/run.sh", 1_500_000_000)):
+        os.utime(source / path, ns=(seconds * 10**9 + 123, seconds * 10**9 + 123))
+    os.utime(source / "scratch", ns=(1_400_000_000 * 10**9, 1_400_000_000 * 10**9))
+
+    store = LocalChunkStore(str(tmp_path / "store"))
+    manifest, stats = snapshot(source, store, "snap-1")
+    assert stats["files"] == len(manifest.files)
+    restored = restore_snapshot(
+        Manifest.from_json(store.get_object("manifests/env-1/snap-1.json").decode()), store, str(target)
+    )
+    assert restored["restored_bytes"] == manifest.total_size()
+
+    for path in ("notebooks/analysis.ipynb", "bin/run.sh", "empty.txt"):
+        assert (target / path).read_bytes() == (source / path).read_bytes(), path
+        restored_stat, source_stat = os.stat(target / path), os.stat(source / path)
+        assert restored_stat.st_mode == source_stat.st_mode, path
+        assert restored_stat.st_mtime_ns == source_stat.st_mtime_ns, path
+    assert os.readlink(target / "latest") == "notebooks/analysis.ipynb"
+    assert os.readlink(target / "dangling") == "/does/not/exist"
+    assert (target / "scratch").is_dir()
+    assert os.stat(target / "scratch").st_mtime_ns == 1_400_000_000 * 10**9
+
+
+def test_incremental_snapshot_dedupes_against_parent(tmp_path):
+    source = tmp_path / "source"
+    write(source, "unchanged.py", b"a" * 16)
+    write(source, "appended.log", b"line1\nline2\n")
+    write(source, "touched.txt", b"same content")
+    store = LocalChunkStore(str(tmp_path / "store"))
+    parent, first = snapshot(source, store, "snap-1")
+    assert first["uploaded_chunks"] == len(parent.chunk_set())
+
+    with open(source / "appended.log", "ab") as f:
+        f.write(b"line3\n")
+    os.utime(source / "touched.txt", ns=(1, 1))
+    write(source, "new.py", b"a" * 8)
+
+    manifest, stats = snapshot(source, store, "snap-2", parent=parent)
+    assert manifest.parent_snapshot_id == "snap-1"
+    # unchanged.py is not even re-read; touched.txt is re-read, but its chunks are known
+    assert stats["reused_files"] == 1
+    appended = next(entry for entry in manifest.files if entry.path == "appended.log")
+    previous = next(entry for entry in parent.files if entry.path == "appended.log")
+    assert appended.chunks[:len(previous.chunks)] == previous.chunks
+    # Only the appended tail ("3\n") is new; new.py's "aaaa" chunks are already stored
+    assert manifest.chunk_set() - parent.chunk_set() == {appended.chunks[-1]}
+    assert stats["uploaded_chunks"] == 1
+
+
+def test_chunk_size_change_ignores_parent(tmp_path):
+    source = tmp_path / "source"
+    write(source, "a.txt", b"abcdefgh")
+    store = LocalChunkStore(str(tmp_path / "store"))
+    parent, _ = snapshot(source, store, "snap-1")
+    manifest, stats = create_snapshot(str(source), store, "env-1", "snap-2", parent=parent, chunk_size=8)
+    assert manifest.parent_snapshot_id is None
+    assert stats["reused_files"] == 0
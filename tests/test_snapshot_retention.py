@@ -0,0 +1,88 @@
+"""Snapshots bucket lifecycle (infrastructure/snapshot_retention.py) per retention profile."""
+import pytest
+
+from infrastructure.snapshot_retention import RETENTION_PROFILES
+
+# CloudFormation names for the s3.StorageClass members the profiles use
+STORAGE_CLASSES = {
+    "INFREQUENT_ACCESS": "STANDARD_IA",
+    "GLACIER_INSTANT_RETRIEVAL": "GLACIER_IR",
+    "DEEP_ARCHIVE": "DEEP_ARCHIVE",
+}
+
+
+def snapshots_bucket(synth, **config):
+    storage = synth({"stacks": "storage", "snapshot_retention": config}).template("WestTekStorage")
+    (bucket,) = [
+        bucket["Properties"]
+        for logical_id, bucket in storage.find_resources("AWS::S3::Bucket").items()
+        if logical_id.startswith("SnapshotsBucket")
+    ]
+    return bucket
+
+
+def lifecycle_rules(bucket):
+    return {rule["Id"]: rule for rule in bucket["LifecycleConfiguration"]["Rules"]}
+
+
+def transitions(pairs):
+    return [
+        {"StorageClass": STORAGE_CLASSES[storage_class], "TransitionInDays": days}
+        for storage_class, days in pairs
+    ]
+
+
+@pytest.mark.parametrize("profile", sorted(RETENTION_PROFILES))
+def test_profile_lifecycle_rules(synth, profile):
+    expected = RETENTION_PROFILES[profile]
+    rules = lifecycle_rules(snapshots_bucket(synth, profile=profile))
+    assert set(rules) == {"TierSnapshotChunks", "IntelligentTierManifests", "ExpireNoncurrentVersions"}
+
+    chunks = rules["TierSnapshotChunks"]
+    assert chunks["Prefix"] == "chunks/"
+    assert chunks["ObjectSizeGreaterThan"] == 128 * 1024
+    assert chunks["Transitions"] == transitions(expected["chunk_transitions"])
+
+    manifests = rules["IntelligentTierManifests"]
+    assert manifests["Prefix"] == "manifests/"
+    assert manifests["Transitions"] == [{"StorageClass": "INTELLIGENT_TIERING", "TransitionInDays": 0}]
+
+    noncurrent = rules["ExpireNoncurrentVersions"]
+    assert "Prefix" not in noncurrent
+    assert noncurrent["NoncurrentVersionTransitions"] == transitions(expected["noncurrent_transitions"])
+    assert noncurrent["NoncurrentVersionExpiration"] == {
+        "NoncurrentDays": expected["noncurrent_expiration_days"],
+        "NewerNoncurrentVersions": expected["noncurrent_versions_to_retain"],
+    }
+    assert noncurrent["ExpiredObjectDeleteMarker"] is True
+    assert noncurrent["AbortIncompleteMultipartUpload"] == {"DaysAfterInitiation": 7}
+
+
+def test_default_profile_is_decade(synth):
+    default = lifecycle_rules(snapshots_bucket(synth))
+    assert default == lifecycle_rules(snapshots_bucket(synth, profile="decade"))
+
+
+@pytest.mark.parametrize("profile", ["standard", "decade"])
+def test_chunks_stay_instantly_restorable(synth, profile):
+    # Only cold_archive puts chunks where a restore needs a thaw first
+    chunks = lifecycle_rules(snapshots_bucket(synth, profile=profile))["TierSnapshotChunks"]
+    assert "DEEP_ARCHIVE" not in {transition["StorageClass"] for transition in chunks["Transitions"]}
+
+
+def test_versioned(synth):
+    assert snapshots_bucket(synth)["VersioningConfiguration"] == {"Status": "Enabled"}
+
+
+def test_inventory(synth):
+    bucket = snapshots_bucket(synth, inventory_frequency="daily")
+    (inventory,) = bucket["InventoryConfigurations"]
+    assert inventory["ScheduleFrequency"] == "Daily"
+    assert inventory["Destination"]["Format"] == "Parquet"
+    assert inventory["IncludedObjectVersions"] == "All"
+    assert snapshots_bucket(synth)["InventoryConfigurations"][0]["ScheduleFrequency"] == "Weekly"
+
+
+def test_unknown_profile(synth):
+    with pytest.raises(KeyError):
+        snapshots_bucket(synth, profile="forever")
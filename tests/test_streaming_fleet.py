@@ -0,0 +1,114 @@
+"""The streaming fleet (infrastructure/streaming_fleet.py) under the "streaming_fleet" context key."""
+import pytest
+from aws_cdk.assertions import Match
+
+
+def workspace(synth, **config):
+    return synth({"stacks": "workspace", "streaming_fleet": config}).template("WestTekWorkspace")
+
+
+def fleet(template):
+    (properties,) = [fleet["Properties"] for fleet in template.find_resources("AWS::AppStream::Fleet").values()]
+    return properties
+
+
+def scaling_policies(template):
+    return {
+        policy["Properties"]["PolicyType"]: policy["Properties"]
+        for policy in template.find_resources("AWS::ApplicationAutoScaling::ScalingPolicy").values()
+    }
+
+
+def test_elastic_by_default(synth):
+    template = workspace(synth)
+    properties = fleet(template)
+    assert properties["FleetType"] == "ELASTIC"
+    assert properties["Platform"] == "UBUNTU_PRO_2404"
+    assert properties["MaxConcurrentSessions"] == 50
+    assert "ComputeCapacity" not in properties
+    assert "ImageName" not in properties
+    # Elastic fleets do not support Application Auto Scaling
+    template.resource_count_is("AWS::ApplicationAutoScaling::ScalableTarget", 0)
+    template.resource_count_is("AWS::ApplicationAutoScaling::ScalingPolicy", 0)
+
+
+@pytest.mark.parametrize("fleet_type", ["ON_DEMAND", "ALWAYS_ON"])
+def test_instance_fleet_scales(synth, fleet_type):
+    template = workspace(synth, fleet_type=fleet_type, image_name="west-tek-jupyter")
+    properties = fleet(template)
+    assert properties["FleetType"] == fleet_type
+    assert properties["ImageName"] == "west-tek-jupyter"
+    assert properties["ComputeCapacity"] == {"DesiredInstances": 2}
+    assert "MaxConcurrentSessions" not in properties
+    assert "Platform" not in properties
+
+    (target,) = [
+        scalable_target["Properties"]
+        for scalable_target in template.find_resources("AWS::ApplicationAutoScaling::ScalableTarget").values()
+    ]
+    assert target["ServiceNamespace"] == "appstream"
+    assert target["ScalableDimension"] == "appstream:fleet:DesiredCapacity"
+    assert (target["MinCapacity"], target["MaxCapacity"]) == (2, 50)
+    assert target["RoleARN"]["Fn::Join"][1][-1].endswith(
+        ":role/aws-service-role/appstream.application-autoscaling.amazonaws.com/"
+        "AWSServiceRoleForApplicationAutoScaling_AppStreamFleet"
+    )
+    actions = {action["ScheduledActionName"]: action for action in target["ScheduledActions"]}
+    assert actions["LabHoursStart"]["ScalableTargetAction"] == {"MinCapacity": 10}
+    assert actions["LabHoursEnd"]["ScalableTargetAction"] == {"MinCapacity": 2}
+    assert actions["LabHoursStart"]["Timezone"] == "America/New_York"
+
+    policies = scaling_policies(template)
+    tracking = policies["TargetTrackingScaling"]["TargetTrackingScalingPolicyConfiguration"]
+    assert tracking["TargetValue"] == 75
+    assert tracking["PredefinedMetricSpecification"] == {
+        "PredefinedMetricType": "AppStreamAverageCapacityUtilization"
+    }
+    assert (tracking["ScaleInCooldown"], tracking["ScaleOutCooldown"]) == (900, 120)
+    step = policies["StepScaling"]["StepScalingPolicyConfiguration"]
+    assert step["AdjustmentType"] == "ChangeInCapacity"
+    assert [adjustment["ScalingAdjustment"] for adjustment in step["StepAdjustments"]] == [2, 5]
+
+    # The step policy is driven by an alarm on the fleet's capacity errors
+    (fleet_id,) = template.find_resources("AWS::AppStream::Fleet")
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {
+        "MetricName": "InsufficientCapacityError",
+        "Namespace": "AWS/AppStream",
+        "Dimensions": [{"Name": "Fleet", "Value": {"Ref": fleet_id}}],
+        "AlarmActions": [{"Ref": Match.string_like_regexp("InsufficientCapacityStep")}],
+    })
+
+
+def test_scaling_waits_for_service_linked_role(synth):
+    template = workspace(synth, fleet_type="ON_DEMAND", image_name="west-tek-jupyter")
+    (target,) = template.find_resources("AWS::ApplicationAutoScaling::ScalableTarget").values()
+    assert any(dependency.startswith("CreateAutoScaling") for dependency in target.get("DependsOn", [])), target
+
+
+def test_instance_fleet_overrides(synth):
+    template = workspace(
+        synth,
+        fleet_type="ON_DEMAND",
+        image_name="west-tek-jupyter",
+        min_capacity=4,
+        max_capacity=12,
+        scheduled_capacity=[],
+    )
+    assert fleet(template)["ComputeCapacity"] == {"DesiredInstances": 4}
+    (target,) = [
+        scalable_target["Properties"]
+        for scalable_target in template.find_resources("AWS::ApplicationAutoScaling::ScalableTarget").values()
+    ]
+    assert (target["MinCapacity"], target["MaxCapacity"]) == (4, 12)
+    assert "ScheduledActions" not in target
+
+
+@pytest.mark.parametrize("fleet_type", ["ON_DEMAND", "ALWAYS_ON"])
+def test_instance_fleet_needs_image(synth, fleet_type):
+    with pytest.raises(ValueError, match=f"image_name is required for {fleet_type} fleets"):
+        workspace(synth, fleet_type=fleet_type)
+
+
+def test_unknown_fleet_type(synth):
+    with pytest.raises(ValueError, match="fleet_type must be one of"):
+        workspace(synth, fleet_type="SPOT", image_name="west-tek-jupyter")
@@ -0,0 +1,36 @@
+"""The default app against benchmarks/synth_snapshot.json (refresh with synth_time.py --update)."""
+import json
+
+from benchmarks import synth_time
+
+
+def snapshot():
+    with open(synth_time.SNAPSHOT) as f:
+        return json.load(f)
+
+
+def test_templates_match_snapshot(synth):
+    current = synth_time.describe_templates(synth().outdir)
+    assert synth_time.check(current, snapshot(), max_growth_percent=0) == []
+
+
+def test_resource_types_match_snapshot(synth):
+    # Spelled out so a failure names the resource types that changed
+    current = synth_time.describe_templates(synth().outdir)
+    for stack, expected in snapshot().items():
+        assert current[stack]["resource_types"] == expected["resource_types"], stack
+
+
+def test_check_reports_changes():
+    expected = {"Stack": {"digest": "a", "template_bytes": 1000, "resource_types": {"AWS::S3::Bucket": 1}}}
+    current = {
+        "Stack": {"digest": "b", "template_bytes": 1200,
+                  "resource_types": {"AWS::S3::Bucket": 1, "AWS::SQS::Queue": 1}},
+        "NewStack": {"digest": "c", "template_bytes": 10, "resource_types": {}},
+    }
+    assert synth_time.check(current, expected, max_growth_percent=10) == [
+        "Stack: template changed (added {'AWS::SQS::Queue': 1}, removed -)",
+        "Stack: template grew 20.0 % (limit 10 %)",
+        "NewStack: new stack, not in snapshot",
+    ]
+    assert synth_time.check({}, expected, max_growth_percent=10) == ["Stack: missing from synth output"]